@@ -78,10 +78,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'shared.middleware.QueryInstrumentationMiddleware',  # Query count / latency per view
     'shared.middleware.EditLockCleanupMiddleware',  # Clean up stale edit locks
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'shared.middleware.SessionRefreshMiddleware',  # Sliding expiry without per-request writes
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -182,6 +184,13 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Content-addressed attachment blobs and in-progress chunked uploads
+# (see shared.utils.attachments)
+ATTACHMENT_STORAGE_ROOT = env("DJANGO_ATTACHMENT_STORAGE_ROOT", default=str(MEDIA_ROOT / "attachments"))
+ATTACHMENT_MAX_SIZE = env.int("DJANGO_ATTACHMENT_MAX_SIZE", default=1024 ** 3)
+ATTACHMENT_CHUNK_SIZE = env.int("DJANGO_ATTACHMENT_CHUNK_SIZE", default=8 * 1024 * 1024)
+ATTACHMENT_UPLOAD_TTL_HOURS = env.int("DJANGO_ATTACHMENT_UPLOAD_TTL_HOURS", default=24)
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -216,13 +225,72 @@ REST_FRAMEWORK = {
 }
 
 
+# ---------------------------------------------------------------------------
+# Cache configuration
+# ---------------------------------------------------------------------------
+
+CACHES = {
+    "default": env.cache("DJANGO_CACHE_URL", default="locmemcache://"),
+}
+
+# Short TTL for company-scoped aggregates (dashboard, list stats); document
+# saves also invalidate them, so this only bounds staleness of other writers.
+COMPANY_CACHE_TIMEOUT = env.int("DJANGO_COMPANY_CACHE_TIMEOUT", default=60)
+
+# Compiled ticket template schemas are versioned per template and invalidated
+# on every template/field/option/event change, so they can live long.
+TICKET_TEMPLATE_SCHEMA_TIMEOUT = env.int("DJANGO_TICKET_TEMPLATE_SCHEMA_TIMEOUT", default=86400)
+
+# Resolved feature-permission matrices (per set of access levels); the access
+# level editor and admin invalidate them, the TTL bounds other writers. They
+# are only cached when DJANGO_CACHE_URL points at a cache shared by all workers
+# (redis, memcached, database): locmem is per-process, so invalidation would
+# not reach the other workers.
+FEATURE_PERMISSION_CACHE_TIMEOUT = env.int("DJANGO_FEATURE_PERMISSION_CACHE_TIMEOUT", default=300)
+
+# Approver directories (feature → approver user IDs per company) are
+# invalidated by shared.signals and the permission version; TTL is a backstop.
+# Like permission matrices, they are only cached on a shared cache.
+APPROVER_DIRECTORY_TIMEOUT = env.int("DJANGO_APPROVER_DIRECTORY_TIMEOUT", default=3600)
+
+# Inventory costing: "weighted_average" or "fifo". Applies to item/warehouse
+# positions created after a change; rebuild_inventory_valuation re-values history.
+INVENTORY_VALUATION_METHOD = env.str("DJANGO_INVENTORY_VALUATION_METHOD", default="weighted_average")
+
+# Low-stock alerts: also open a draft purchase request for newly low items
+# (requested by the user who posted the issue, or sweep_low_stock --requested-by).
+INVENTORY_REORDER_PURCHASE_REQUESTS = env.bool("DJANGO_INVENTORY_REORDER_PURCHASE_REQUESTS", default=False)
+
+# Change feed (shared.utils.change_feed): longest a /api/v1/changes/ long-poll
+# waits for new events
+CHANGE_FEED_MAX_WAIT = env.int("DJANGO_CHANGE_FEED_MAX_WAIT", default=25)
+# Long-polls a process may hold open at once; a waiting request ties up its
+# worker thread, so keep 0 (answer at once) on sync workers and raise it only
+# on a threaded pool serving /api/v1/changes/ (docs/DEPLOYMENT.md)
+CHANGE_FEED_MAX_LONG_POLLS = env.int("DJANGO_CHANGE_FEED_MAX_LONG_POLLS", default=0)
+
+
+# ---------------------------------------------------------------------------
+# Request instrumentation (see shared.middleware.QueryInstrumentationMiddleware)
+# ---------------------------------------------------------------------------
+
+INSTRUMENTATION_ENABLED = env.bool("DJANGO_INSTRUMENTATION_ENABLED", default=True)
+INSTRUMENTATION_SERVER_TIMING = env.bool("DJANGO_INSTRUMENTATION_SERVER_TIMING", default=True)
+INSTRUMENTATION_SLOW_REQUEST_MS = env.int("DJANGO_INSTRUMENTATION_SLOW_REQUEST_MS", default=1000)
+
+
 # ---------------------------------------------------------------------------
 # Session configuration
 # ---------------------------------------------------------------------------
 
+# Sessions stay in the database so every worker sees logouts and company
+# switches; the row is written only when the session changes or the sliding
+# expiry is refreshed (see SessionRefreshMiddleware).
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 86400  # 1 day
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False
+# Seconds between expiry refreshes of an otherwise unchanged session
+SESSION_REFRESH_INTERVAL = env.int("DJANGO_SESSION_REFRESH_INTERVAL", default=300)
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Lax'
 
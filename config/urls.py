@@ -22,6 +22,7 @@ from django.conf.urls.i18n import i18n_patterns
 from django.views.i18n import set_language
 
 from shared.views import custom_login, set_active_company
+from shared.views.change_feed import ChangeFeedView
 
 # Redirect admin login to custom login
 def redirect_admin_login(request):
@@ -34,6 +35,10 @@ urlpatterns = [
     path("logout/", LogoutView.as_view(next_page='login'), name="logout"),
     path("i18n/setlang/", set_language, name="set_language"),
     path("shared/set-company/", set_active_company, name="set_active_company"),
+    # Read-only REST API for integrations (not language-prefixed)
+    path("api/v1/inventory/", include("inventory.api_urls")),
+    path("api/v1/production/", include("production.api_urls")),
+    path("api/v1/changes/", ChangeFeedView.as_view(), name="change_feed"),
 ]
 
 urlpatterns += i18n_patterns(
@@ -59,7 +59,7 @@ class ItemUnitAdmin(admin.ModelAdmin):
 
 @admin.register(models.ItemWarehouse)
 class ItemWarehouseAdmin(admin.ModelAdmin):
-    list_display = ("company", "item", "warehouse", "is_primary", "is_enabled")
+    list_display = ("company", "item", "warehouse", "is_primary", "reorder_point", "reorder_quantity", "is_enabled")
     list_filter = ("company", "warehouse", "is_primary", "is_enabled")
     search_fields = ("item__item_code", "warehouse__name")
 
@@ -176,9 +176,25 @@ class StocktakingRecordAdmin(admin.ModelAdmin):
     search_fields = ("document_code", "confirmed_by__first_name", "confirmed_by__last_name")
 
 
+@admin.register(models.StocktakingSession)
+class StocktakingSessionAdmin(admin.ModelAdmin):
+    list_display = ("company", "session_code", "warehouse_code", "status", "snapshot_date", "stocktaking_record")
+    list_filter = ("company", "status")
+    search_fields = ("session_code",)
+    raw_id_fields = ("warehouse", "started_by", "posted_by", "stocktaking_record")
+
+
 @admin.register(models.WarehouseRequest)
 class WarehouseRequestAdmin(admin.ModelAdmin):
     list_display = ("company", "request_code", "item", "quantity_requested", "request_status", "priority", "needed_by_date")
     list_filter = ("company", "request_status", "priority", "warehouse", "request_date")
     search_fields = ("request_code", "item_code", "purpose")
     readonly_fields = ("request_code", "item_code", "warehouse_code", "department_unit_code")
+
+
+@admin.register(models.LowStockAlert)
+class LowStockAlertAdmin(admin.ModelAdmin):
+    list_display = ("company", "warehouse", "item", "quantity", "threshold", "status", "opened_at", "purchase_request")
+    list_filter = ("company", "status", "warehouse")
+    search_fields = ("item__item_code", "item__name")
+    raw_id_fields = ("warehouse", "item", "purchase_request")
@@ -0,0 +1,24 @@
+"""
+URL configuration of the inventory REST API, mounted at ``/api/v1/inventory/``.
+"""
+from rest_framework.routers import SimpleRouter
+
+from .views import api_v1
+
+app_name = 'inventory_api'
+
+router = SimpleRouter()
+router.register('items', api_v1.ItemViewSet)
+router.register('warehouses', api_v1.WarehouseViewSet)
+router.register('serials', api_v1.ItemSerialViewSet)
+router.register('balances', api_v1.BalanceViewSet, basename='balance')
+router.register('receipts/temporary', api_v1.ReceiptTemporaryViewSet)
+router.register('receipts/permanent', api_v1.ReceiptPermanentViewSet)
+router.register('receipts/consignment', api_v1.ReceiptConsignmentViewSet)
+router.register('issues/permanent', api_v1.IssuePermanentViewSet)
+router.register('issues/consumption', api_v1.IssueConsumptionViewSet)
+router.register('issues/consignment', api_v1.IssueConsignmentViewSet)
+router.register('stocktaking/deficit', api_v1.StocktakingDeficitViewSet)
+router.register('stocktaking/surplus', api_v1.StocktakingSurplusViewSet)
+
+urlpatterns = router.urls
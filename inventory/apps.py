@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        from . import change_feed, search, signals
+        from .services import reorder, valuation
+
+        signals.connect_signals()
+        search.register_documents()
+        change_feed.register_change_feed_models()
+        valuation.register_valuation_hooks()
+        reorder.register_reorder_hooks()
@@ -0,0 +1,39 @@
+"""
+Change feed registration for inventory documents and master data.
+
+See ``shared.utils.change_feed`` for how events are recorded.
+"""
+from shared.utils.change_feed import register_change_feed
+from . import models
+
+
+def register_change_feed_models():
+    register = register_change_feed
+    documents = (
+        (models.ReceiptTemporary, 'inventory.receipt_temporary', 'inventory.receipts.temporary'),
+        (models.ReceiptPermanent, 'inventory.receipt_permanent', 'inventory.receipts.permanent'),
+        (models.ReceiptConsignment, 'inventory.receipt_consignment', 'inventory.receipts.consignment'),
+        (models.IssuePermanent, 'inventory.issue_permanent', 'inventory.issues.permanent'),
+        (models.IssueConsumption, 'inventory.issue_consumption', 'inventory.issues.consumption'),
+        (models.IssueConsignment, 'inventory.issue_consignment', 'inventory.issues.consignment'),
+        (models.StocktakingDeficit, 'inventory.stocktaking_deficit', 'inventory.stocktaking.deficit'),
+        (models.StocktakingSurplus, 'inventory.stocktaking_surplus', 'inventory.stocktaking.surplus'),
+    )
+    for model, entity_type, feature_code in documents:
+        register(model, entity_type, feature_code=feature_code, lines='lines')
+    register(
+        models.Item, 'inventory.item', feature_code='inventory.master.items',
+        payload_fields=('item_code', 'name', 'default_unit', 'is_enabled'),
+    )
+    register(
+        models.ItemUnit, 'inventory.item_unit', feature_code='inventory.master.items',
+        payload_fields=('item_id', 'from_unit', 'from_quantity', 'to_unit', 'to_quantity'),
+    )
+    register(
+        models.Warehouse, 'inventory.warehouse', feature_code='inventory.master.warehouses',
+        payload_fields=('public_code', 'name', 'is_enabled'),
+    )
+    register(
+        models.Supplier, 'inventory.supplier', feature_code='inventory.suppliers.list',
+        payload_fields=('public_code', 'name', 'is_enabled'),
+    )
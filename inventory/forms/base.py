@@ -7,7 +7,6 @@ This module contains:
 - Base form classes (ReceiptBaseForm, IssueBaseForm, StocktakingBaseForm, etc.)
 - Base formset classes (BaseLineFormSet)
 """
-from collections import deque
 from decimal import Decimal, InvalidOperation
 from typing import Optional, Dict, Any, List
 
@@ -22,7 +21,6 @@ logger = logging.getLogger('inventory.forms.base')
 
 from inventory.models import (
     Item,
-    ItemUnit,
     Warehouse,
     Supplier,
     ReceiptTemporary,
@@ -33,7 +31,9 @@ from inventory.models import (
     ItemSerial,
     CURRENCY_CHOICES,
 )
+from inventory.services import units as unit_service
 from shared.models import CompanyUnit
+from shared.utils.approvers import get_approver_queryset
 from inventory.fields import JalaliDateField
 from inventory.widgets import JalaliDateInput
 
@@ -78,7 +78,7 @@ def get_purchase_request_approvers(company_id: Optional[int]) -> Any:
     return get_feature_approvers("inventory.requests.purchase", company_id)
 
 
-def generate_document_code(model: Any, company_id: int, prefix: str) -> str:
+def generate_document_code(model: Any, company_id: int, prefix: str, field: str = "document_code") -> str:
     """
     Generate a sequential document code for a model.
     
@@ -89,6 +89,7 @@ def generate_document_code(model: Any, company_id: int, prefix: str) -> str:
         model: Django model class
         company_id: Company ID
         prefix: Prefix for the document code (e.g., "PRM", "TMP")
+        field: Code field of the model (default ``document_code``)
         
     Returns:
         Generated document code string
@@ -97,9 +98,9 @@ def generate_document_code(model: Any, company_id: int, prefix: str) -> str:
     month_year = today.strftime("%Y%m")
     base = f"{prefix}-{month_year}"
     last_code = (
-        model.objects.filter(company_id=company_id, document_code__startswith=base)
-        .order_by("-document_code")
-        .values_list("document_code", flat=True)
+        model.objects.filter(company_id=company_id, **{f"{field}__startswith": base})
+        .order_by(f"-{field}")
+        .values_list(field, flat=True)
         .first()
     )
     sequence = 0
@@ -115,6 +116,9 @@ def get_feature_approvers(feature_code: str, company_id: Optional[int]) -> Any:
     """
     Get queryset of User objects that can approve a specific feature.
     
+    Approver IDs come from the cached approver directory
+    (``shared.utils.approvers``), so the queryset is a primary-key lookup.
+    
     Args:
         feature_code: Feature permission code (e.g., "inventory.requests.purchase")
         company_id: Company ID to filter approvers
@@ -122,23 +126,7 @@ def get_feature_approvers(feature_code: str, company_id: Optional[int]) -> Any:
     Returns:
         QuerySet of User objects with approval permission
     """
-    if not company_id:
-        return User.objects.none()
-
-    approved_users = User.objects.filter(
-        Q(is_superuser=True)
-        | Q(
-            company_accesses__company_id=company_id,
-            company_accesses__access_level__permissions__resource_code=feature_code,
-            company_accesses__access_level__permissions__can_approve=1,
-        )
-        | Q(
-            groups__profile__access_levels__permissions__resource_code=feature_code,
-            groups__profile__access_levels__permissions__can_approve=1,
-        )
-    ).distinct()
-
-    return approved_users.order_by('username', 'first_name', 'last_name')
+    return get_approver_queryset(company_id, feature_code).order_by('username', 'first_name', 'last_name')
 
 
 class ReceiptBaseForm(forms.ModelForm):
@@ -292,25 +280,14 @@ class ReceiptBaseForm(forms.ModelForm):
         """Get list of allowed units for an item."""
         if not item:
             return []
-        codes = []
-
-        def add(code: str) -> None:
-            if code and code not in codes:
-                codes.append(code)
-
-        add(item.default_unit)
-        add(item.primary_unit)
-
-        for unit in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-            add(unit.from_unit)
-            add(unit.to_unit)
+        codes = unit_service.get_unit_table(item).allowed_units()
 
         # If no units found, add default unit 'EA' as fallback
         if not codes:
             codes.append('EA')
-        
+
         label_map = {value: str(label) for value, label in UNIT_CHOICES}
-        return [{'value': code, 'label': label_map.get(code, code)} for code in codes if code]
+        return [{'value': code, 'label': label_map.get(code, code)} for code in codes]
 
     def _resolve_item(self, candidate: Any = None) -> Optional[Item]:
         """Resolve item from form data or instance."""
@@ -357,32 +334,7 @@ class ReceiptBaseForm(forms.ModelForm):
 
     def _get_unit_factor(self, item: Item, unit_code: str) -> Decimal:
         """Calculate conversion factor from unit_code to item's default_unit."""
-        default_unit = item.default_unit
-        if not unit_code or unit_code == default_unit:
-            return Decimal('1')
-
-        graph = {}
-        for conversion in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-            from_qty = conversion.from_quantity
-            to_qty = conversion.to_quantity
-            if from_qty in (None, 0) or to_qty in (None, 0):
-                continue
-            graph.setdefault(conversion.from_unit, []).append((conversion.to_unit, to_qty / from_qty))
-            graph.setdefault(conversion.to_unit, []).append((conversion.from_unit, from_qty / to_qty))
-
-        visited = set()
-        queue = deque([(unit_code, Decimal('1'))])
-        while queue:
-            unit, factor = queue.popleft()
-            if unit == default_unit:
-                return factor
-            if unit in visited:
-                continue
-            visited.add(unit)
-            for neighbor, ratio in graph.get(unit, []):
-                queue.append((neighbor, factor * ratio))
-
-        return Decimal('1')
+        return unit_service.get_unit_factor(item, unit_code)
 
     def _validate_unit(self, cleaned_data: Dict[str, Any]) -> None:
         """Validate unit and calculate conversion factor."""
@@ -656,25 +608,14 @@ class StocktakingBaseForm(forms.ModelForm):
         """Get list of allowed units for an item."""
         if not item:
             return []
-        codes = []
-
-        def add(code: str) -> None:
-            if code and code not in codes:
-                codes.append(code)
-
-        add(item.default_unit)
-        add(item.primary_unit)
-
-        for unit in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-            add(unit.from_unit)
-            add(unit.to_unit)
+        codes = unit_service.get_unit_table(item).allowed_units()
 
         # If no units found, add default unit 'EA' as fallback
         if not codes:
             codes.append('EA')
-        
+
         label_map = {value: str(label) for value, label in UNIT_CHOICES}
-        return [{'value': code, 'label': label_map.get(code, code)} for code in codes if code]
+        return [{'value': code, 'label': label_map.get(code, code)} for code in codes]
 
     def _get_item_allowed_warehouses(self, item: Optional[Item]) -> List[Dict[str, str]]:
         """Get list of allowed warehouses for an item."""
@@ -780,6 +721,7 @@ class BaseLineFormSet(forms.BaseInlineFormSet):
         self.company_id = company_id
         self.request = request
         super().__init__(*args, **kwargs)
+        self._prefetch_unit_tables()
         logger.info(f"After super().__init__(), forms count: {len(self.forms)}")
         # Pass company_id and request to all forms in the formset and update querysets
         for i, form in enumerate(self.forms):
@@ -804,6 +746,20 @@ class BaseLineFormSet(forms.BaseInlineFormSet):
                     except Exception as e:
                         logger.warning(f"    Form {i} error checking item in queryset: {e}")
     
+    def _prefetch_unit_tables(self) -> None:
+        """Load the unit conversions of every line item at once (forms then read them from cache)."""
+        if not self.company_id or 'item' not in getattr(self.form, 'base_fields', {}):
+            return
+        if self.is_bound:
+            item_prefix = f'{self.prefix}-'
+            item_ids = {
+                int(value) for key, value in self.data.items()
+                if key.startswith(item_prefix) and key.endswith('-item') and str(value).isdigit()
+            }
+        else:
+            item_ids = {line.item_id for line in self.get_queryset() if line.item_id}
+        unit_service.get_unit_tables(self.company_id, item_ids)
+    
     def _construct_form(self, i, **kwargs):
         """Construct form with company_id and request."""
         logger.info(f"BaseLineFormSet._construct_form() called for index {i}")
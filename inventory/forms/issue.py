@@ -7,7 +7,6 @@ This module contains forms for:
 - Consignment Issues (with line items)
 - Serial Assignment for Issues
 """
-from collections import deque
 from decimal import Decimal, InvalidOperation
 from typing import Optional, Dict, Any
 
@@ -20,7 +19,6 @@ from django.db.models import Q
 
 from inventory.models import (
     Item,
-    ItemUnit,
     Warehouse,
     ItemSerial,
     IssuePermanent,
@@ -32,6 +30,7 @@ from inventory.models import (
     ReceiptConsignment,
 )
 from inventory.services import serials as serial_service
+from inventory.services import units as unit_service
 from inventory import inventory_balance
 from shared.models import CompanyUnit
 from inventory.forms.base import (
@@ -704,23 +703,10 @@ class IssueLineBaseForm(forms.ModelForm):
         """Get list of allowed units for an item."""
         if not item:
             return []
-        codes = []
-        
-        def add(code: str) -> None:
-            if code and code not in codes:
-                codes.append(code)
-        
-        # Add default and primary units (always add both, even if same or None)
-        add(item.default_unit)
-        add(item.primary_unit)
-        
-        # Add units from ItemUnit conversions
-        for unit in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-            add(unit.from_unit)
-            add(unit.to_unit)
-        
+        codes = unit_service.get_unit_table(item).allowed_units()
+
         label_map = {value: str(label) for value, label in UNIT_CHOICES}
-        return [{'value': code, 'label': label_map.get(code, code)} for code in codes if code]
+        return [{'value': code, 'label': label_map.get(code, code)} for code in codes]
     
     def _set_unit_choices(self, item: Optional[Item] = None) -> None:
         """Set unit field choices based on selected item."""
@@ -767,32 +753,7 @@ class IssueLineBaseForm(forms.ModelForm):
     
     def _get_unit_factor(self, item: Item, unit_code: str) -> Decimal:
         """Calculate conversion factor from unit_code to item's default_unit."""
-        default_unit = item.default_unit
-        if not unit_code or unit_code == default_unit:
-            return Decimal('1')
-        
-        graph = {}
-        for conversion in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-            from_qty = conversion.from_quantity
-            to_qty = conversion.to_quantity
-            if from_qty in (None, 0) or to_qty in (None, 0):
-                continue
-            graph.setdefault(conversion.from_unit, []).append((conversion.to_unit, to_qty / from_qty))
-            graph.setdefault(conversion.to_unit, []).append((conversion.from_unit, from_qty / to_qty))
-        
-        visited = set()
-        queue = deque([(unit_code, Decimal('1'))])
-        while queue:
-            unit, factor = queue.popleft()
-            if unit == default_unit:
-                return factor
-            if unit in visited:
-                continue
-            visited.add(unit)
-            for neighbor, ratio in graph.get(unit, []):
-                queue.append((neighbor, factor * ratio))
-        
-        return Decimal('1')
+        return unit_service.get_unit_factor(item, unit_code)
     
     def _validate_unit(self, cleaned_data: Dict[str, Any]) -> None:
         """Validate unit and calculate conversion factor."""
@@ -6,7 +6,6 @@ This module contains forms for:
 - Permanent Receipts (with line items)
 - Consignment Receipts (with line items)
 """
-from collections import deque
 from decimal import Decimal, InvalidOperation
 from typing import Optional, Dict, Any
 
@@ -18,7 +17,6 @@ from django.utils.translation import gettext_lazy as _
 
 from inventory.models import (
     Item,
-    ItemUnit,
     Warehouse,
     Supplier,
     ReceiptTemporary,
@@ -30,6 +28,7 @@ from inventory.models import (
     PurchaseRequest,
     WarehouseRequest,
 )
+from inventory.services import units as unit_service
 from inventory.forms.base import (
     UNIT_CHOICES,
     ReceiptBaseForm,
@@ -465,6 +464,7 @@ class ReceiptLineBaseForm(forms.ModelForm):
         self._unit_factor = Decimal('1')
         self._entered_unit_value = None
         self._entered_quantity_value = None
+        self._entered_unit_cost_value = None
         
         if self.company_id:
             if 'item' in self.fields:
@@ -631,6 +631,8 @@ class ReceiptLineBaseForm(forms.ModelForm):
             
             if 'quantity' in self.fields and getattr(self.instance, 'entered_quantity', None) is not None:
                 self.initial['quantity'] = self.instance.entered_quantity
+            if 'unit_cost' in self.fields and getattr(self.instance, 'entered_unit_cost', None) is not None:
+                self.initial['unit_cost'] = self.instance.entered_unit_cost
     
     def _set_unit_choices_for_item(self, item: Optional[Item]) -> None:
         """Set unit choices based on item."""
@@ -813,52 +815,14 @@ class ReceiptLineBaseForm(forms.ModelForm):
         """Get list of allowed units for an item."""
         if not item:
             return []
-        codes = []
-        
-        def add(code: str) -> None:
-            if code and code not in codes:
-                codes.append(code)
-        
-        # Add default and primary units (always add both, even if same or None)
-        add(item.default_unit)
-        add(item.primary_unit)
-        
-        # Add units from ItemUnit conversions
-        for unit in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-            add(unit.from_unit)
-            add(unit.to_unit)
-        
+        codes = unit_service.get_unit_table(item).allowed_units()
+
         label_map = {value: str(label) for value, label in UNIT_CHOICES}
-        return [{'value': code, 'label': label_map.get(code, code)} for code in codes if code]
+        return [{'value': code, 'label': label_map.get(code, code)} for code in codes]
     
     def _get_unit_factor(self, item: Item, unit_code: str) -> Decimal:
         """Calculate conversion factor from unit_code to item's default_unit."""
-        default_unit = item.default_unit
-        if not unit_code or unit_code == default_unit:
-            return Decimal('1')
-        
-        graph = {}
-        for conversion in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-            from_qty = conversion.from_quantity
-            to_qty = conversion.to_quantity
-            if from_qty in (None, 0) or to_qty in (None, 0):
-                continue
-            graph.setdefault(conversion.from_unit, []).append((conversion.to_unit, to_qty / from_qty))
-            graph.setdefault(conversion.to_unit, []).append((conversion.from_unit, from_qty / to_qty))
-        
-        visited = set()
-        queue = deque([(unit_code, Decimal('1'))])
-        while queue:
-            unit, factor = queue.popleft()
-            if unit == default_unit:
-                return factor
-            if unit in visited:
-                continue
-            visited.add(unit)
-            for neighbor, ratio in graph.get(unit, []):
-                queue.append((neighbor, factor * ratio))
-        
-        return Decimal('1')
+        return unit_service.get_unit_factor(item, unit_code)
     
     def _validate_unit(self, cleaned_data: Dict[str, Any]) -> None:
         """Validate unit and calculate conversion factor."""
@@ -898,6 +862,11 @@ class ReceiptLineBaseForm(forms.ModelForm):
         cleaned_data['unit'] = item.default_unit
         self.instance.unit = item.default_unit
         self.instance.quantity = cleaned_data['quantity']
+        # Cost is entered per entered unit and stored per default unit for valuation
+        if 'unit_cost' in self.fields and cleaned_data.get('unit_cost') is not None:
+            self._entered_unit_cost_value = cleaned_data['unit_cost']
+            cleaned_data['unit_cost'] = (cleaned_data['unit_cost'] / factor).quantize(Decimal('0.000001'))
+            self.instance.unit_cost = cleaned_data['unit_cost']
     
     def clean(self) -> Dict[str, Any]:
         """Validate and normalize form data."""
@@ -917,6 +886,8 @@ class ReceiptLineBaseForm(forms.ModelForm):
             instance.entered_quantity = self._entered_quantity_value
         elif instance.entered_quantity is None:
             instance.entered_quantity = instance.quantity
+        if 'unit_cost' in self.fields:
+            instance.entered_unit_cost = self._entered_unit_cost_value
         
         if commit:
             instance.save()
@@ -932,6 +903,7 @@ class ReceiptPermanentLineForm(ReceiptLineBaseForm):
         fields = [
             'item', 'warehouse', 'unit', 'quantity',
             'entered_unit', 'entered_quantity',
+            'unit_cost',
             'supplier',
             'line_notes',
         ]
@@ -941,6 +913,7 @@ class ReceiptPermanentLineForm(ReceiptLineBaseForm):
             'quantity': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.001'}),
             'entered_unit': forms.TextInput(attrs={'class': 'form-control'}),
             'entered_quantity': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.001'}),
+            'unit_cost': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0'}),
             'line_notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
         }
     
@@ -1002,6 +975,7 @@ class ReceiptConsignmentLineForm(ReceiptLineBaseForm):
         fields = [
             'item', 'warehouse', 'unit', 'quantity',
             'entered_unit', 'entered_quantity',
+            'unit_cost',
             'supplier',
             'line_notes',
         ]
@@ -1011,6 +985,7 @@ class ReceiptConsignmentLineForm(ReceiptLineBaseForm):
             'quantity': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.001'}),
             'entered_unit': forms.TextInput(attrs={'class': 'form-control'}),
             'entered_quantity': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.001'}),
+            'unit_cost': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0'}),
             'line_notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
         }
 
@@ -15,13 +15,13 @@ from django.utils.translation import gettext_lazy as _
 
 from inventory.models import (
     Item,
-    ItemUnit,
     PurchaseRequest,
     PurchaseRequestLine,
     WarehouseRequest,
     WarehouseRequestLine,
     Warehouse,
 )
+from inventory.services import units as unit_service
 from shared.models import CompanyUnit
 from inventory.forms.base import (
     UNIT_CHOICES,
@@ -216,25 +216,14 @@ class PurchaseRequestLineForm(forms.ModelForm):
         """Get list of allowed units for an item."""
         if not item:
             return []
-        codes = []
-
-        def add(code: str) -> None:
-            if code and code not in codes:
-                codes.append(code)
-
-        add(item.default_unit)
-        add(item.primary_unit)
-
-        for unit in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-            add(unit.from_unit)
-            add(unit.to_unit)
+        codes = unit_service.get_unit_table(item).allowed_units()
 
         # If no units found, add default unit 'EA' as fallback
         if not codes:
             codes.append('EA')
         
         label_map = {value: str(label) for value, label in UNIT_CHOICES}
-        return [{'value': code, 'label': label_map.get(code, code)} for code in codes if code]
+        return [{'value': code, 'label': label_map.get(code, code)} for code in codes]
     
     def _set_unit_choices_for_item(self, item: Optional[Item]) -> None:
         """Set unit field choices based on selected item."""
@@ -476,25 +465,14 @@ class WarehouseRequestLineForm(forms.ModelForm):
         """Get list of allowed units for an item."""
         if not item:
             return []
-        codes = []
-
-        def add(code: str) -> None:
-            if code and code not in codes:
-                codes.append(code)
-
-        add(item.default_unit)
-        add(item.primary_unit)
-
-        for unit in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-            add(unit.from_unit)
-            add(unit.to_unit)
+        codes = unit_service.get_unit_table(item).allowed_units()
 
         # If no units found, add default unit 'EA' as fallback
         if not codes:
             codes.append('EA')
         
         label_map = {value: str(label) for value, label in UNIT_CHOICES}
-        return [{'value': code, 'label': label_map.get(code, code)} for code in codes if code]
+        return [{'value': code, 'label': label_map.get(code, code)} for code in codes]
     
     def _set_unit_choices_for_item(self, item: Optional[Item]) -> None:
         """Set unit field choices based on selected item."""
@@ -7,8 +7,8 @@ based on the last stocktaking record and subsequent locked documents.
 
 from decimal import Decimal
 from datetime import datetime, date
-from typing import Dict, List, Optional
-from django.db.models import Sum, Q, F
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.db.models import Sum, Q, F, Value
 from django.utils import timezone
 
 from . import models
@@ -106,28 +106,28 @@ def calculate_movements_after_baseline(
         company_id=company_id,
         warehouse_id=warehouse_id,
         item_id=item_id,
-        document__document_date__gte=baseline_date,
-        document__document_date__lte=as_of_date,
-        document__is_enabled=1,
+        document_date__gte=baseline_date,
+        document_date__lte=as_of_date,
+        document_is_enabled=1,
     ).aggregate(total=Sum('quantity'))
     
     receipts_consignment = models.ReceiptConsignmentLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
         item_id=item_id,
-        document__document_date__gte=baseline_date,
-        document__document_date__lte=as_of_date,
-        document__is_enabled=1,
+        document_date__gte=baseline_date,
+        document_date__lte=as_of_date,
+        document_is_enabled=1,
     ).aggregate(total=Sum('quantity'))
     
     surplus = models.StocktakingSurplusLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
         item_id=item_id,
-        document__document_date__gte=baseline_date,
-        document__document_date__lte=as_of_date,
-        document__is_locked=1,
-        document__is_enabled=1,
+        document_date__gte=baseline_date,
+        document_date__lte=as_of_date,
+        document_is_locked=1,
+        document_is_enabled=1,
     ).aggregate(total=Sum('quantity_adjusted'))
     
     receipts_total = (
@@ -141,37 +141,37 @@ def calculate_movements_after_baseline(
         company_id=company_id,
         warehouse_id=warehouse_id,
         item_id=item_id,
-        document__document_date__gte=baseline_date,
-        document__document_date__lte=as_of_date,
-        document__is_enabled=1,
+        document_date__gte=baseline_date,
+        document_date__lte=as_of_date,
+        document_is_enabled=1,
     ).aggregate(total=Sum('quantity'))
     
     issues_consumption = models.IssueConsumptionLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
         item_id=item_id,
-        document__document_date__gte=baseline_date,
-        document__document_date__lte=as_of_date,
-        document__is_enabled=1,
+        document_date__gte=baseline_date,
+        document_date__lte=as_of_date,
+        document_is_enabled=1,
     ).aggregate(total=Sum('quantity'))
     
     issues_consignment = models.IssueConsignmentLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
         item_id=item_id,
-        document__document_date__gte=baseline_date,
-        document__document_date__lte=as_of_date,
-        document__is_enabled=1,
+        document_date__gte=baseline_date,
+        document_date__lte=as_of_date,
+        document_is_enabled=1,
     ).aggregate(total=Sum('quantity'))
     
     deficit = models.StocktakingDeficitLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
         item_id=item_id,
-        document__document_date__gte=baseline_date,
-        document__document_date__lte=as_of_date,
-        document__is_locked=1,
-        document__is_enabled=1,
+        document_date__gte=baseline_date,
+        document_date__lte=as_of_date,
+        document_is_locked=1,
+        document_is_enabled=1,
     ).aggregate(total=Sum('quantity_adjusted'))
     
     issues_total = (
@@ -300,51 +300,51 @@ def calculate_warehouse_balances(
     items_with_receipts = models.ReceiptPermanentLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
-        document__is_enabled=1,
-        document__document_date__lte=as_of_date,
+        document_is_enabled=1,
+        document_date__lte=as_of_date,
     ).values_list('item_id', flat=True).distinct()
     
     items_with_consignment_receipts = models.ReceiptConsignmentLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
-        document__is_enabled=1,
-        document__document_date__lte=as_of_date,
+        document_is_enabled=1,
+        document_date__lte=as_of_date,
     ).values_list('item_id', flat=True).distinct()
     
     items_with_issues = models.IssuePermanentLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
-        document__is_enabled=1,
-        document__document_date__lte=as_of_date,
+        document_is_enabled=1,
+        document_date__lte=as_of_date,
     ).values_list('item_id', flat=True).distinct()
     
     items_with_consumption = models.IssueConsumptionLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
-        document__is_enabled=1,
-        document__document_date__lte=as_of_date,
+        document_is_enabled=1,
+        document_date__lte=as_of_date,
     ).values_list('item_id', flat=True).distinct()
     
     items_with_consignment_issues = models.IssueConsignmentLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
-        document__is_enabled=1,
-        document__document_date__lte=as_of_date,
+        document_is_enabled=1,
+        document_date__lte=as_of_date,
     ).values_list('item_id', flat=True).distinct()
     
     # Also check for items with stocktaking records (surplus/deficit)
     items_with_surplus = models.StocktakingSurplusLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
-        document__is_enabled=1,
-        document__document_date__lte=as_of_date,
+        document_is_enabled=1,
+        document_date__lte=as_of_date,
     ).values_list('item_id', flat=True).distinct()
     
     items_with_deficit = models.StocktakingDeficitLine.objects.filter(
         company_id=company_id,
         warehouse_id=warehouse_id,
-        document__is_enabled=1,
-        document__document_date__lte=as_of_date,
+        document_is_enabled=1,
+        document_date__lte=as_of_date,
     ).values_list('item_id', flat=True).distinct()
     
     # Combine all item IDs
@@ -404,23 +404,167 @@ def calculate_warehouse_balances(
     return balances
 
 
+# (line model, quantity field, sign, locked documents only) of every stock movement
+MOVEMENT_SOURCES = (
+    ('ReceiptPermanentLine', 'quantity', 1, False),
+    ('ReceiptConsignmentLine', 'quantity', 1, False),
+    ('StocktakingSurplusLine', 'quantity_adjusted', 1, True),
+    ('IssuePermanentLine', 'quantity', -1, False),
+    ('IssueConsumptionLine', 'quantity', -1, False),
+    ('IssueConsignmentLine', 'quantity', -1, False),
+    ('StocktakingDeficitLine', 'quantity_adjusted', -1, True),
+)
+
+
+def get_company_quantities(
+    company_id: int,
+    as_of_date: Optional[date] = None,
+    item_ids: Optional[Iterable[int]] = None,
+    warehouse_ids: Optional[Iterable[int]] = None,
+) -> Dict[Tuple[int, int], Decimal]:
+    """
+    Balance of every (warehouse, item) of a company with one set-based query.
+
+    Same rules as ``calculate_item_balance`` (all enabled movements up to
+    ``as_of_date``; stocktaking surplus/deficit only when locked), but the
+    movement tables are grouped by warehouse and item and combined with
+    ``UNION ALL`` in a single statement instead of nine queries per item.
+
+    Returns:
+        ``{(warehouse_id, item_id): quantity}`` for pairs with at least one movement
+    """
+    if as_of_date is None:
+        as_of_date = timezone.now().date()
+    if item_ids is not None:
+        item_ids = list(item_ids)
+    if warehouse_ids is not None:
+        warehouse_ids = list(warehouse_ids)
+
+    parts = []
+    for model_name, field, sign, locked_only in MOVEMENT_SOURCES:
+        queryset = getattr(models, model_name).objects.filter(
+            company_id=company_id,
+            document_is_enabled=1,
+            document_date__lte=as_of_date,
+        )
+        if locked_only:
+            queryset = queryset.filter(document_is_locked=1)
+        if warehouse_ids is not None:
+            queryset = queryset.filter(warehouse_id__in=warehouse_ids)
+        if item_ids is not None:
+            queryset = queryset.filter(item_id__in=item_ids)
+        parts.append(
+            queryset.order_by().values('warehouse_id', 'item_id').annotate(total=Sum(field), sign=Value(sign))
+        )
+
+    quantities: Dict[Tuple[int, int], Decimal] = {}
+    for row in parts[0].union(*parts[1:], all=True):
+        key = (row['warehouse_id'], row['item_id'])
+        quantities[key] = quantities.get(key, Decimal('0')) + (row['total'] or 0) * row['sign']
+    return quantities
+
+
+def get_warehouse_quantities(
+    company_id: int,
+    warehouse_id: int,
+    as_of_date: Optional[date] = None,
+    item_ids: Optional[Iterable[int]] = None,
+) -> Dict[int, Decimal]:
+    """
+    Balance of every item in a warehouse with one set-based query
+    (``get_company_quantities`` limited to the warehouse).
+
+    Returns:
+        ``{item_id: quantity}`` for items with at least one movement
+    """
+    return {
+        item_id: quantity
+        for (_warehouse_id, item_id), quantity in get_company_quantities(
+            company_id, as_of_date, item_ids=item_ids, warehouse_ids=[warehouse_id],
+        ).items()
+    }
+
+
 def get_low_stock_items(
     company_id: int,
     warehouse_id: Optional[int] = None,
-    threshold_quantity: Decimal = Decimal('10'),
+    threshold_quantity: Optional[Decimal] = None,
+    item_ids: Optional[Iterable[int]] = None,
 ) -> List[Dict]:
     """
-    Get items with balance below threshold (low stock alert).
-    
+    Items whose balance in a warehouse is below their reorder threshold.
+
+    The threshold of a (warehouse, item) is ``threshold_quantity`` when given,
+    otherwise the ``ItemWarehouse.reorder_point`` of the pair, falling back to
+    ``Item.min_stock``. A pair is checked when the item is assigned to the
+    warehouse or has movements in it. Runs four queries whatever the number
+    of items and warehouses.
+
     Args:
         company_id: Company ID
         warehouse_id: Warehouse ID (optional, all warehouses if None)
-        threshold_quantity: Minimum quantity threshold
-    
+        threshold_quantity: Same threshold for every item (optional)
+        item_ids: Limit the check to these items (optional)
+
     Returns:
-        List of items with low stock
+        List of dicts (item, warehouse, ``quantity``, ``threshold``,
+        ``reorder_quantity``, ``shortage``) sorted by warehouse and item code
     """
-    # TODO: Implement low stock detection
-    # This would require calculating balances and filtering
-    pass
+    items = models.Item.objects.filter(company_id=company_id, is_enabled=1)
+    if item_ids is not None:
+        items = items.filter(pk__in=list(item_ids))
+    if threshold_quantity is None:
+        items = items.filter(Q(min_stock__isnull=False) | Q(warehouses__reorder_point__isnull=False))
+    items = {
+        row['pk']: row
+        for row in items.order_by().distinct().values('pk', 'item_code', 'name', 'default_unit', 'min_stock')
+    }
+    if not items:
+        return []
+
+    assignments = models.ItemWarehouse.objects.filter(
+        company_id=company_id, is_enabled=1, item_id__in=list(items),
+    )
+    if warehouse_id:
+        assignments = assignments.filter(warehouse_id=warehouse_id)
+    thresholds: Dict[Tuple[int, int], Tuple[Optional[Decimal], Optional[Decimal]]] = {
+        (row[0], row[1]): (row[2], row[3])
+        for row in assignments.values_list('warehouse_id', 'item_id', 'reorder_point', 'reorder_quantity')
+    }
+    quantities = get_company_quantities(
+        company_id,
+        item_ids=list(items) if item_ids is not None else None,
+        warehouse_ids=[warehouse_id] if warehouse_id else None,
+    )
+    warehouses = {
+        row['pk']: row
+        for row in models.Warehouse.objects.filter(company_id=company_id).values('pk', 'public_code', 'name')
+    }
+
+    low_stock = []
+    for pair in set(thresholds) | {pair for pair in quantities if pair[1] in items}:
+        item = items[pair[1]]
+        reorder_point, reorder_quantity = thresholds.get(pair, (None, None))
+        threshold = threshold_quantity if threshold_quantity is not None else reorder_point
+        if threshold is None:
+            threshold = item['min_stock']
+        quantity = quantities.get(pair, Decimal('0'))
+        if threshold is None or quantity >= threshold:
+            continue
+        warehouse = warehouses.get(pair[0], {})
+        low_stock.append({
+            'item_id': pair[1],
+            'item_code': item['item_code'],
+            'item_name': item['name'],
+            'unit': item['default_unit'],
+            'warehouse_id': pair[0],
+            'warehouse_code': warehouse.get('public_code', ''),
+            'warehouse_name': warehouse.get('name', ''),
+            'quantity': quantity,
+            'threshold': threshold,
+            'reorder_quantity': reorder_quantity,
+            'shortage': threshold - quantity,
+        })
+    low_stock.sort(key=lambda row: (row['warehouse_code'], row['item_code']))
+    return low_stock
 
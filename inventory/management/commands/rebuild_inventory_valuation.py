@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import VALUATION_METHOD_CHOICES, ItemValuation, Warehouse
+from inventory.services import valuation
+from shared.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Replay posted receipts/issues to rebuild item valuation, cost layers and issue costs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Company ID (default: all companies)')
+        parser.add_argument('--warehouse', type=int, help='Warehouse ID (requires --company)')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=valuation.BATCH_SIZE,
+            help='Movement lines streamed and written per batch',
+        )
+        parser.add_argument(
+            '--method',
+            choices=[choice for choice, _label in VALUATION_METHOD_CHOICES],
+            help='Switch the rebuilt items to this valuation method',
+        )
+
+    def handle(self, *args, **options):
+        if options['warehouse'] and not options['company']:
+            raise CommandError('--warehouse requires --company')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        companies = Company.objects.order_by('pk')
+        if options['company']:
+            companies = companies.filter(pk=options['company'])
+        for company_id in companies.values_list('pk', flat=True):
+            warehouses = Warehouse.objects.filter(company_id=company_id).order_by('pk')
+            if options['warehouse']:
+                warehouses = warehouses.filter(pk=options['warehouse'])
+            for warehouse_id in warehouses.values_list('pk', flat=True):
+                if options['method']:
+                    ItemValuation.objects.filter(company_id=company_id, warehouse_id=warehouse_id).update(
+                        valuation_method=options['method'],
+                    )
+                replayed = valuation.rebuild_valuation(
+                    company_id, warehouse_id=warehouse_id, chunk_size=options['chunk_size'],
+                )
+                value = valuation.get_warehouse_value(company_id, warehouse_id)
+                self.stdout.write(
+                    f'company {company_id} warehouse {warehouse_id}: {replayed} lines replayed, value {value}'
+                )
+        self.stdout.write(self.style.SUCCESS('Inventory valuation rebuilt.'))
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.services import reorder
+from shared.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Compare every balance with its reorder point and open/resolve low-stock alerts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Company ID (default: all companies)')
+        parser.add_argument(
+            '--requested-by',
+            help='Username requesting the draft purchase requests '
+                 '(with INVENTORY_REORDER_PURCHASE_REQUESTS)',
+        )
+        parser.add_argument('--no-notify', action='store_true', help='Do not notify purchase approvers')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['requested_by']:
+            try:
+                user = get_user_model().objects.get(username=options['requested_by'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User '{options['requested_by']}' does not exist")
+
+        companies = Company.objects.order_by('pk')
+        if options['company']:
+            companies = companies.filter(pk=options['company'])
+        opened = resolved = 0
+        for company_id in companies.values_list('pk', flat=True):
+            result = reorder.evaluate_low_stock(company_id, user=user, notify=not options['no_notify'])
+            opened += len(result.opened)
+            resolved += result.resolved
+            if result.opened or result.resolved:
+                line = f'company {company_id}: {len(result.opened)} opened, {result.resolved} resolved'
+                if result.purchase_request:
+                    line += f', purchase request {result.purchase_request.request_code}'
+                self.stdout.write(line)
+
+        if opened:
+            self.stdout.write(self.style.WARNING(f'Opened {opened} low-stock alerts ({resolved} resolved).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'No new low-stock alerts ({resolved} resolved).'))
@@ -0,0 +1,75 @@
+# Generated by Django 4.2 on 2026-10-18 23:25
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shared', '0016_attachment_storage'),
+        ('inventory', '0039_issueconsignment_editing_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StocktakingSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('edited_at', models.DateTimeField(auto_now=True)),
+                ('is_enabled', models.PositiveSmallIntegerField(choices=[(0, 'Disabled'), (1, 'Enabled')], default=1)),
+                ('enabled_at', models.DateTimeField(blank=True, null=True)),
+                ('disabled_at', models.DateTimeField(blank=True, null=True)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('company_code', models.CharField(blank=True, editable=False, max_length=8, validators=[django.core.validators.RegexValidator(message='Only numeric characters are allowed.', regex='^\\d+$')])),
+                ('session_code', models.CharField(max_length=20, unique=True, verbose_name='Session Code')),
+                ('warehouse_code', models.CharField(max_length=5, validators=[django.core.validators.RegexValidator(message='Only numeric characters are allowed.', regex='^\\d+$')], verbose_name='Warehouse Code')),
+                ('status', models.CharField(choices=[('counting', 'Counting'), ('posted', 'Posted'), ('cancelled', 'Cancelled')], default='counting', max_length=20, verbose_name='Status')),
+                ('snapshot_date', models.DateField(verbose_name='Snapshot Date')),
+                ('inventory_snapshot_time', models.DateTimeField(verbose_name='Inventory Snapshot Time')),
+                ('posted_at', models.DateTimeField(blank=True, null=True, verbose_name='Posted At')),
+                ('notes', models.TextField(blank=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='shared.company')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('disabled_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_disabled', to=settings.AUTH_USER_MODEL)),
+                ('edited_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_edited', to=settings.AUTH_USER_MODEL)),
+                ('enabled_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_enabled', to=settings.AUTH_USER_MODEL)),
+                ('posted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stocktaking_sessions_posted', to=settings.AUTH_USER_MODEL)),
+                ('started_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stocktaking_sessions_started', to=settings.AUTH_USER_MODEL)),
+                ('stocktaking_record', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='inventory.stocktakingrecord')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stocktaking_sessions', to='inventory.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Stocktaking Session',
+                'verbose_name_plural': 'Stocktaking Sessions',
+                'ordering': ('-inventory_snapshot_time', '-id'),
+            },
+        ),
+        migrations.CreateModel(
+            name='StocktakingSessionLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_code', models.CharField(max_length=16, validators=[django.core.validators.RegexValidator(message='Only numeric characters are allowed.', regex='^\\d+$')], verbose_name='Item Code')),
+                ('unit', models.CharField(max_length=30, verbose_name='Unit')),
+                ('quantity_expected', models.DecimalField(decimal_places=6, max_digits=18, verbose_name='Quantity Expected')),
+                ('quantity_counted', models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True, verbose_name='Quantity Counted')),
+                ('counted_at', models.DateTimeField(blank=True, null=True, verbose_name='Counted At')),
+                ('counted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stocktaking_session_counts', to=settings.AUTH_USER_MODEL)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stocktaking_session_lines', to='inventory.item')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.stocktakingsession')),
+            ],
+            options={
+                'verbose_name': 'Stocktaking Session Line',
+                'verbose_name_plural': 'Stocktaking Session Lines',
+                'ordering': ('item_code', 'id'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stocktakingsessionline',
+            constraint=models.UniqueConstraint(fields=('session', 'item'), name='inv_stk_session_item_unique'),
+        ),
+    ]
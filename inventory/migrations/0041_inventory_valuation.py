@@ -0,0 +1,155 @@
+# Generated by Django 4.2 on 2026-10-18 23:35
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shared', '0016_attachment_storage'),
+        ('inventory', '0040_stocktaking_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issueconsignmentline',
+            name='total_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=20, null=True, verbose_name='Total Cost'),
+        ),
+        migrations.AddField(
+            model_name='issueconsignmentline',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=18, null=True, verbose_name='Unit Cost'),
+        ),
+        migrations.AddField(
+            model_name='issueconsumptionline',
+            name='total_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=20, null=True, verbose_name='Total Cost'),
+        ),
+        migrations.AddField(
+            model_name='issueconsumptionline',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=18, null=True, verbose_name='Unit Cost'),
+        ),
+        migrations.AddField(
+            model_name='issuepermanentline',
+            name='total_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=20, null=True, verbose_name='Total Cost'),
+        ),
+        migrations.AddField(
+            model_name='issuepermanentline',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=18, null=True, verbose_name='Unit Cost'),
+        ),
+        migrations.AddField(
+            model_name='receiptconsignmentline',
+            name='entered_unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0'))]),
+        ),
+        migrations.AddField(
+            model_name='receiptconsignmentline',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0'))], verbose_name='Unit Cost'),
+        ),
+        migrations.AddField(
+            model_name='receiptpermanentline',
+            name='entered_unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0'))]),
+        ),
+        migrations.AddField(
+            model_name='receiptpermanentline',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0'))], verbose_name='Unit Cost'),
+        ),
+        migrations.AddField(
+            model_name='receipttemporaryline',
+            name='entered_unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0'))]),
+        ),
+        migrations.AddField(
+            model_name='receipttemporaryline',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0'))], verbose_name='Unit Cost'),
+        ),
+        migrations.CreateModel(
+            name='ItemValuationEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(max_length=60, verbose_name='Source Type')),
+                ('source_line_id', models.BigIntegerField(verbose_name='Source Line ID')),
+                ('document_code', models.CharField(max_length=30, verbose_name='Document Code')),
+                ('entry_date', models.DateField(verbose_name='Entry Date')),
+                ('quantity', models.DecimalField(decimal_places=6, max_digits=18, verbose_name='Quantity')),
+                ('unit_cost', models.DecimalField(decimal_places=6, max_digits=18, verbose_name='Unit Cost')),
+                ('value', models.DecimalField(decimal_places=4, max_digits=20, verbose_name='Value')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_valuation_entries', to='shared.company')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_entries', to='inventory.item')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_valuation_entries', to='inventory.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Item Valuation Entry',
+                'verbose_name_plural': 'Item Valuation Entries',
+                'ordering': ('entry_date', 'id'),
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valuation_method', models.CharField(choices=[('weighted_average', 'Weighted Average'), ('fifo', 'FIFO')], default='weighted_average', max_length=30, verbose_name='Valuation Method')),
+                ('quantity', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18, verbose_name='Quantity')),
+                ('total_value', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=20, verbose_name='Total Value')),
+                ('average_cost', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18, verbose_name='Average Cost')),
+                ('last_movement_date', models.DateField(blank=True, null=True, verbose_name='Last Movement Date')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_valuations', to='shared.company')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuations', to='inventory.item')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_valuations', to='inventory.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Item Valuation',
+                'verbose_name_plural': 'Item Valuations',
+                'ordering': ('company', 'warehouse', 'item'),
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemCostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(max_length=60, verbose_name='Source Type')),
+                ('source_line_id', models.BigIntegerField(verbose_name='Source Line ID')),
+                ('layer_date', models.DateField(verbose_name='Layer Date')),
+                ('original_quantity', models.DecimalField(decimal_places=6, max_digits=18, verbose_name='Original Quantity')),
+                ('remaining_quantity', models.DecimalField(decimal_places=6, max_digits=18, verbose_name='Remaining Quantity')),
+                ('unit_cost', models.DecimalField(decimal_places=6, max_digits=18, verbose_name='Unit Cost')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_cost_layers', to='shared.company')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.item')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_cost_layers', to='inventory.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Item Cost Layer',
+                'verbose_name_plural': 'Item Cost Layers',
+                'ordering': ('layer_date', 'id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='itemvaluationentry',
+            index=models.Index(fields=['company', 'warehouse', 'item', 'entry_date'], name='inv_valuation_entry_item_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='itemvaluationentry',
+            constraint=models.UniqueConstraint(fields=('source_type', 'source_line_id'), name='inv_valuation_entry_source_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='itemvaluation',
+            constraint=models.UniqueConstraint(fields=('company', 'warehouse', 'item'), name='inv_item_valuation_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='itemcostlayer',
+            index=models.Index(condition=models.Q(('remaining_quantity__gt', 0)), fields=['company', 'warehouse', 'item', 'layer_date', 'id'], name='inv_cost_layer_open_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 23:44
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shared', '0016_attachment_storage'),
+        ('inventory', '0041_inventory_valuation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemwarehouse',
+            name='reorder_point',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text="Low-stock threshold of the item in this warehouse (overrides the item's minimum stock)", max_digits=18, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0'))], verbose_name='Reorder Point'),
+        ),
+        migrations.AddField(
+            model_name='itemwarehouse',
+            name='reorder_quantity',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='Quantity to request when the balance drops below the reorder point', max_digits=18, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0'))], verbose_name='Reorder Quantity'),
+        ),
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Open'), ('resolved', 'Resolved')], default='open', max_length=20, verbose_name='Status')),
+                ('quantity', models.DecimalField(decimal_places=6, max_digits=18, verbose_name='Quantity')),
+                ('threshold', models.DecimalField(decimal_places=6, max_digits=18, verbose_name='Threshold')),
+                ('reorder_quantity', models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True, verbose_name='Reorder Quantity')),
+                ('opened_at', models.DateTimeField(auto_now_add=True, verbose_name='Opened At')),
+                ('resolved_at', models.DateTimeField(blank=True, null=True, verbose_name='Resolved At')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='shared.company')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='inventory.item')),
+                ('purchase_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='low_stock_alerts', to='inventory.purchaserequest')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='inventory.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Low Stock Alert',
+                'verbose_name_plural': 'Low Stock Alerts',
+                'ordering': ('-opened_at', 'id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='lowstockalert',
+            index=models.Index(fields=['company', 'status'], name='inv_low_stock_alert_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='lowstockalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'open')), fields=('company', 'warehouse', 'item'), name='inv_low_stock_alert_open_unique'),
+        ),
+    ]
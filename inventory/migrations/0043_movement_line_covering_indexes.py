@@ -0,0 +1,172 @@
+# Generated by Django 4.2 on 2026-10-18 23:55
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+MOVEMENT_LINES = (
+    ('ReceiptPermanent', 'ReceiptPermanentLine'),
+    ('ReceiptConsignment', 'ReceiptConsignmentLine'),
+    ('IssuePermanent', 'IssuePermanentLine'),
+    ('IssueConsumption', 'IssueConsumptionLine'),
+    ('IssueConsignment', 'IssueConsignmentLine'),
+    ('StocktakingDeficit', 'StocktakingDeficitLine'),
+    ('StocktakingSurplus', 'StocktakingSurplusLine'),
+)
+
+
+def copy_document_fields(apps, schema_editor):
+    """Copy document_date/is_enabled/is_locked of every header onto its lines (one UPDATE per table)."""
+    for header_name, line_name in MOVEMENT_LINES:
+        Header = apps.get_model('inventory', header_name)
+        Line = apps.get_model('inventory', line_name)
+        header = Header.objects.filter(pk=OuterRef('document_id'))
+        Line.objects.update(
+            document_date=Subquery(header.values('document_date')[:1]),
+            document_is_enabled=Subquery(header.values('is_enabled')[:1]),
+            document_is_locked=Subquery(header.values('is_locked')[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0042_low_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issueconsignmentline',
+            name='document_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='issueconsignmentline',
+            name='document_is_enabled',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='issueconsignmentline',
+            name='document_is_locked',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='issueconsumptionline',
+            name='document_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='issueconsumptionline',
+            name='document_is_enabled',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='issueconsumptionline',
+            name='document_is_locked',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='issuepermanentline',
+            name='document_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='issuepermanentline',
+            name='document_is_enabled',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='issuepermanentline',
+            name='document_is_locked',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='receiptconsignmentline',
+            name='document_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='receiptconsignmentline',
+            name='document_is_enabled',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='receiptconsignmentline',
+            name='document_is_locked',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='receiptpermanentline',
+            name='document_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='receiptpermanentline',
+            name='document_is_enabled',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='receiptpermanentline',
+            name='document_is_locked',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='stocktakingdeficitline',
+            name='document_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='stocktakingdeficitline',
+            name='document_is_enabled',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='stocktakingdeficitline',
+            name='document_is_locked',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='stocktakingsurplusline',
+            name='document_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='stocktakingsurplusline',
+            name='document_is_enabled',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='stocktakingsurplusline',
+            name='document_is_locked',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(copy_document_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='issueconsignmentline',
+            index=models.Index(fields=['company', 'warehouse', 'item', 'document_date'], include=('quantity', 'document_is_enabled', 'document_is_locked'), name='inv_issue_consg_line_mv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issueconsumptionline',
+            index=models.Index(fields=['company', 'warehouse', 'item', 'document_date'], include=('quantity', 'document_is_enabled', 'document_is_locked'), name='inv_issue_cons_line_mv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuepermanentline',
+            index=models.Index(fields=['company', 'warehouse', 'item', 'document_date'], include=('quantity', 'document_is_enabled', 'document_is_locked'), name='inv_issue_perm_line_mv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receiptconsignmentline',
+            index=models.Index(fields=['company', 'warehouse', 'item', 'document_date'], include=('quantity', 'document_is_enabled', 'document_is_locked'), name='inv_rec_consg_line_mv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receiptpermanentline',
+            index=models.Index(fields=['company', 'warehouse', 'item', 'document_date'], include=('quantity', 'document_is_enabled', 'document_is_locked'), name='inv_receipt_perm_line_mv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktakingdeficitline',
+            index=models.Index(fields=['company', 'warehouse', 'item', 'document_date'], include=('quantity_adjusted', 'document_is_enabled', 'document_is_locked'), name='inv_std_line_mv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktakingsurplusline',
+            index=models.Index(fields=['company', 'warehouse', 'item', 'document_date'], include=('quantity_adjusted', 'document_is_enabled', 'document_is_locked'), name='inv_sts_line_mv_idx'),
+        ),
+    ]
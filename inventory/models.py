@@ -59,6 +59,105 @@ class InventoryDocumentBase(InventoryBaseModel, LockableModel):
         abstract = True
 
 
+# Header field -> copy kept on every line of a stock movement document
+MOVEMENT_LINE_DOCUMENT_FIELDS = {
+    "document_date": "document_date",
+    "is_enabled": "document_is_enabled",
+    "is_locked": "document_is_locked",
+}
+
+
+class MovementDocumentMixin(models.Model):
+    """
+    Header of a stock movement document whose lines carry copies of its
+    date and enabled/locked flags (``MovementLineMixin``).
+
+    ``save()`` pushes the saved values to the lines that differ with one
+    ``UPDATE``. Callers saving many headers at once may set
+    ``_skip_line_sync`` and call ``sync_line_fields_bulk`` afterwards
+    (``posting.post_documents`` does).
+    """
+
+    class Meta:
+        abstract = True
+
+    def line_field_values(self, fields=None) -> dict:
+        """Line copies of the header ``fields`` (all of them by default), skipping deferred ones."""
+        deferred = self.get_deferred_fields()
+        return {
+            line_field: getattr(self, header_field)
+            for header_field, line_field in MOVEMENT_LINE_DOCUMENT_FIELDS.items()
+            if header_field not in deferred and (fields is None or header_field in fields)
+        }
+
+    def save(self, *args, **kwargs):
+        # Lines of a new header are saved after it and copy the values themselves
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding or getattr(self, "_skip_line_sync", False):
+            return
+        values = self.line_field_values(kwargs.get("update_fields"))
+        if values:
+            self.lines.exclude(**values).update(**values)
+
+    @classmethod
+    def sync_line_fields_bulk(cls, documents, fields=None) -> None:
+        """Push header ``fields`` of ``documents`` to their lines, one ``UPDATE`` per distinct value set."""
+        groups = {}
+        for document in documents:
+            values = document.line_field_values(fields)
+            if values:
+                groups.setdefault(tuple(sorted(values.items())), []).append(document.pk)
+        line_model = cls._meta.get_field("lines").related_model
+        for values, document_ids in groups.items():
+            values = dict(values)
+            line_model.objects.filter(document_id__in=document_ids).exclude(**values).update(**values)
+
+
+class MovementLineQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        document_field = self.model._meta.get_field("document")
+        missing = {obj.document_id for obj in objs if obj.document_id and not document_field.is_cached(obj)}
+        documents = document_field.related_model.objects.in_bulk(missing) if missing else {}
+        for obj in objs:
+            document = obj.document if document_field.is_cached(obj) else documents.get(obj.document_id)
+            if document is not None:
+                obj.copy_document_fields(document)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class MovementLineMixin(models.Model):
+    """
+    Line of a stock movement document with copies of the header's date and
+    enabled/locked flags.
+
+    Balance and stock-card queries filter lines by warehouse, item and these
+    header fields; keeping them on the line lets the
+    (company, warehouse, item, document_date) covering index answer those
+    queries without joining the header. Set on ``save()``/``bulk_create()``
+    and kept in sync by ``MovementDocumentMixin``.
+    """
+
+    document_date = models.DateField(null=True, blank=True, editable=False)
+    document_is_enabled = models.PositiveSmallIntegerField(default=1, editable=False)
+    document_is_locked = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    objects = MovementLineQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def copy_document_fields(self, document) -> None:
+        for header_field, line_field in MOVEMENT_LINE_DOCUMENT_FIELDS.items():
+            setattr(self, line_field, getattr(document, header_field))
+
+    def save(self, *args, **kwargs):
+        if self.document_id:
+            self.copy_document_fields(self.document)
+        super().save(*args, **kwargs)
+
+
 class ItemType(InventorySortableModel):
     public_code = models.CharField(
         max_length=3,
@@ -467,6 +566,24 @@ class ItemWarehouse(InventoryBaseModel):
         related_name="items",
     )
     is_primary = models.PositiveSmallIntegerField(default=0)
+    reorder_point = models.DecimalField(
+        _("Reorder Point"),
+        max_digits=18,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        validators=[POSITIVE_DECIMAL],
+        help_text=_("Low-stock threshold of the item in this warehouse (overrides the item's minimum stock)"),
+    )
+    reorder_quantity = models.DecimalField(
+        _("Reorder Quantity"),
+        max_digits=18,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        validators=[POSITIVE_DECIMAL],
+        help_text=_("Quantity to request when the balance drops below the reorder point"),
+    )
     notes = models.TextField(blank=True)
 
     class Meta:
@@ -940,7 +1057,7 @@ class ReceiptTemporary(InventoryDocumentBase):
         super().save(*args, **kwargs)
 
 
-class ReceiptPermanent(InventoryDocumentBase):
+class ReceiptPermanent(MovementDocumentMixin, InventoryDocumentBase):
     """Header-only model for permanent receipt documents with multi-line support."""
     document_code = models.CharField(max_length=20, unique=True)
     document_date = models.DateField(default=timezone.now)
@@ -990,7 +1107,7 @@ class ReceiptPermanent(InventoryDocumentBase):
         super().save(*args, **kwargs)
 
 
-class ReceiptConsignment(InventoryDocumentBase):
+class ReceiptConsignment(MovementDocumentMixin, InventoryDocumentBase):
     """Header-only model for consignment receipt documents with multi-line support."""
     document_code = models.CharField(max_length=20, unique=True)
     document_date = models.DateField(default=timezone.now)
@@ -1303,6 +1420,23 @@ class IssueLineBase(InventoryBaseModel, SortableModel):
         blank=True,
         validators=[POSITIVE_DECIMAL],
     )
+    # Cost of goods issued, set by the valuation engine when the document is posted
+    unit_cost = models.DecimalField(
+        _("Unit Cost"),
+        max_digits=18,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    total_cost = models.DecimalField(
+        _("Total Cost"),
+        max_digits=20,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        editable=False,
+    )
     line_notes = models.TextField(blank=True)
     
     class Meta:
@@ -1317,7 +1451,7 @@ class IssueLineBase(InventoryBaseModel, SortableModel):
         super().save(*args, **kwargs)
 
 
-class IssuePermanentLine(IssueLineBase):
+class IssuePermanentLine(MovementLineMixin, IssueLineBase):
     """Line item for permanent issue documents."""
     
     document = models.ForeignKey(
@@ -1342,13 +1476,18 @@ class IssuePermanentLine(IssueLineBase):
         indexes = [
             models.Index(fields=("company", "document"), name="inv_issue_perm_line_doc_idx"),
             models.Index(fields=("company", "item"), name="inv_issue_perm_line_item_idx"),
+            models.Index(
+                fields=("company", "warehouse", "item", "document_date"),
+                include=("quantity", "document_is_enabled", "document_is_locked"),
+                name="inv_issue_perm_line_mv_idx",
+            ),
         ]
     
     def __str__(self) -> str:
         return f"{self.document.document_code} - {self.item.name}"
 
 
-class IssueConsumptionLine(IssueLineBase):
+class IssueConsumptionLine(MovementLineMixin, IssueLineBase):
     """Line item for consumption issue documents."""
     
     document = models.ForeignKey(
@@ -1388,6 +1527,11 @@ class IssueConsumptionLine(IssueLineBase):
         indexes = [
             models.Index(fields=("company", "document"), name="inv_issue_cons_line_doc_idx"),
             models.Index(fields=("company", "item"), name="inv_issue_cons_line_item_idx"),
+            models.Index(
+                fields=("company", "warehouse", "item", "document_date"),
+                include=("quantity", "document_is_enabled", "document_is_locked"),
+                name="inv_issue_cons_line_mv_idx",
+            ),
         ]
     
     def __str__(self) -> str:
@@ -1400,7 +1544,7 @@ class IssueConsumptionLine(IssueLineBase):
             super().save(*args, **kwargs)
 
 
-class IssueConsignmentLine(IssueLineBase):
+class IssueConsignmentLine(MovementLineMixin, IssueLineBase):
     """Line item for consignment issue documents."""
     
     document = models.ForeignKey(
@@ -1433,6 +1577,11 @@ class IssueConsignmentLine(IssueLineBase):
         indexes = [
             models.Index(fields=("company", "document"), name="inv_issue_consg_line_doc_idx"),
             models.Index(fields=("company", "item"), name="inv_issue_consg_line_item_idx"),
+            models.Index(
+                fields=("company", "warehouse", "item", "document_date"),
+                include=("quantity", "document_is_enabled", "document_is_locked"),
+                name="inv_issue_consg_line_mv_idx",
+            ),
         ]
     
     def __str__(self) -> str:
@@ -1474,6 +1623,22 @@ class ReceiptLineBase(InventoryBaseModel, SortableModel):
         blank=True,
         validators=[POSITIVE_DECIMAL],
     )
+    # Purchase cost per default unit (``unit``) and as entered per ``entered_unit``
+    unit_cost = models.DecimalField(
+        _("Unit Cost"),
+        max_digits=18,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        validators=[POSITIVE_DECIMAL],
+    )
+    entered_unit_cost = models.DecimalField(
+        max_digits=18,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        validators=[POSITIVE_DECIMAL],
+    )
     line_notes = models.TextField(blank=True)
     
     class Meta:
@@ -1488,7 +1653,7 @@ class ReceiptLineBase(InventoryBaseModel, SortableModel):
         super().save(*args, **kwargs)
 
 
-class ReceiptPermanentLine(ReceiptLineBase):
+class ReceiptPermanentLine(MovementLineMixin, ReceiptLineBase):
     """Line item for permanent receipt documents."""
     
     document = models.ForeignKey(
@@ -1517,6 +1682,11 @@ class ReceiptPermanentLine(ReceiptLineBase):
         indexes = [
             models.Index(fields=("company", "document"), name="inv_receipt_perm_line_doc_idx"),
             models.Index(fields=("company", "item"), name="inv_receipt_perm_line_item_idx"),
+            models.Index(
+                fields=("company", "warehouse", "item", "document_date"),
+                include=("quantity", "document_is_enabled", "document_is_locked"),
+                name="inv_receipt_perm_line_mv_idx",
+            ),
         ]
     
     def __str__(self) -> str:
@@ -1529,7 +1699,7 @@ class ReceiptPermanentLine(ReceiptLineBase):
             super().save(*args, **kwargs)
 
 
-class ReceiptConsignmentLine(ReceiptLineBase):
+class ReceiptConsignmentLine(MovementLineMixin, ReceiptLineBase):
     """Line item for consignment receipt documents."""
     
     document = models.ForeignKey(
@@ -1556,6 +1726,11 @@ class ReceiptConsignmentLine(ReceiptLineBase):
         indexes = [
             models.Index(fields=("company", "document"), name="inv_rec_consg_line_doc_idx"),
             models.Index(fields=("company", "item"), name="inv_rec_consg_line_item_idx"),
+            models.Index(
+                fields=("company", "warehouse", "item", "document_date"),
+                include=("quantity", "document_is_enabled", "document_is_locked"),
+                name="inv_rec_consg_line_mv_idx",
+            ),
         ]
 
 
@@ -1672,7 +1847,7 @@ class QCRejectionDetail(models.Model):
 # Issue and Receipt Document Models (Header-only, multi-line support)
 # ============================================================================
 
-class IssuePermanent(InventoryDocumentBase):
+class IssuePermanent(MovementDocumentMixin, InventoryDocumentBase):
     """Header-only model for permanent issue documents with multi-line support."""
     document_code = models.CharField(max_length=20, unique=True)
     document_date = models.DateField(default=timezone.now)
@@ -1715,7 +1890,7 @@ class IssuePermanent(InventoryDocumentBase):
         super().save(*args, **kwargs)
 
 
-class IssueConsumption(InventoryDocumentBase):
+class IssueConsumption(MovementDocumentMixin, InventoryDocumentBase):
     """Header-only model for consumption issue documents with multi-line support."""
     document_code = models.CharField(max_length=20, unique=True)
     document_date = models.DateField(default=timezone.now)
@@ -1748,7 +1923,7 @@ class IssueConsumption(InventoryDocumentBase):
         super().save(*args, **kwargs)
 
 
-class IssueConsignment(InventoryDocumentBase):
+class IssueConsignment(MovementDocumentMixin, InventoryDocumentBase):
     """Header-only model for consignment issue documents with multi-line support."""
     document_code = models.CharField(max_length=20, unique=True)
     document_date = models.DateField(default=timezone.now)
@@ -1781,7 +1956,7 @@ class IssueConsignment(InventoryDocumentBase):
         super().save(*args, **kwargs)
 
 
-class StocktakingDeficit(InventoryDocumentBase):
+class StocktakingDeficit(MovementDocumentMixin, InventoryDocumentBase):
     """Header-only model for stocktaking deficit documents with multi-line support."""
     document_code = models.CharField(_("Document Code"), max_length=20, unique=True)
     document_date = models.DateField(_("Document Date"), default=timezone.now)
@@ -1802,7 +1977,7 @@ class StocktakingDeficit(InventoryDocumentBase):
         return self.document_code
 
 
-class StocktakingSurplus(InventoryDocumentBase):
+class StocktakingSurplus(MovementDocumentMixin, InventoryDocumentBase):
     """Header-only model for stocktaking surplus documents with multi-line support."""
     document_code = models.CharField(_("Document Code"), max_length=20, unique=True)
     document_date = models.DateField(_("Document Date"), default=timezone.now)
@@ -1823,7 +1998,7 @@ class StocktakingSurplus(InventoryDocumentBase):
         return self.document_code
 
 
-class StocktakingDeficitLine(InventoryBaseModel, SortableModel):
+class StocktakingDeficitLine(MovementLineMixin, InventoryBaseModel, SortableModel):
     """Line item for stocktaking deficit documents."""
     
     document = models.ForeignKey(
@@ -1890,6 +2065,11 @@ class StocktakingDeficitLine(InventoryBaseModel, SortableModel):
         indexes = [
             models.Index(fields=("company", "document"), name="inv_std_line_doc_idx"),
             models.Index(fields=("company", "item"), name="inv_std_line_item_idx"),
+            models.Index(
+                fields=("company", "warehouse", "item", "document_date"),
+                include=("quantity_adjusted", "document_is_enabled", "document_is_locked"),
+                name="inv_std_line_mv_idx",
+            ),
         ]
     
     def __str__(self) -> str:
@@ -1903,7 +2083,7 @@ class StocktakingDeficitLine(InventoryBaseModel, SortableModel):
         super().save(*args, **kwargs)
 
 
-class StocktakingSurplusLine(InventoryBaseModel, SortableModel):
+class StocktakingSurplusLine(MovementLineMixin, InventoryBaseModel, SortableModel):
     """Line item for stocktaking surplus documents."""
     
     document = models.ForeignKey(
@@ -1970,6 +2150,11 @@ class StocktakingSurplusLine(InventoryBaseModel, SortableModel):
         indexes = [
             models.Index(fields=("company", "document"), name="inv_sts_line_doc_idx"),
             models.Index(fields=("company", "item"), name="inv_sts_line_item_idx"),
+            models.Index(
+                fields=("company", "warehouse", "item", "document_date"),
+                include=("quantity_adjusted", "document_is_enabled", "document_is_locked"),
+                name="inv_sts_line_mv_idx",
+            ),
         ]
     
     def __str__(self) -> str:
@@ -2031,6 +2216,268 @@ class StocktakingRecord(InventoryDocumentBase):
         super().save(*args, **kwargs)
 
 
+class StocktakingSession(InventoryBaseModel):
+    """
+    Count session of one warehouse.
+
+    Expected quantities of every item are frozen into ``StocktakingSessionLine``
+    rows when the session starts; counts are recorded against those rows and
+    posting generates the deficit/surplus documents and the ``StocktakingRecord``.
+    """
+
+    STATUS_COUNTING = "counting"
+    STATUS_POSTED = "posted"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_CHOICES = (
+        (STATUS_COUNTING, _("Counting")),
+        (STATUS_POSTED, _("Posted")),
+        (STATUS_CANCELLED, _("Cancelled")),
+    )
+
+    session_code = models.CharField(_("Session Code"), max_length=20, unique=True)
+    warehouse = models.ForeignKey(
+        Warehouse,
+        on_delete=models.PROTECT,
+        related_name="stocktaking_sessions",
+    )
+    warehouse_code = models.CharField(_("Warehouse Code"), max_length=5, validators=[NUMERIC_CODE_VALIDATOR])
+    status = models.CharField(_("Status"), max_length=20, choices=STATUS_CHOICES, default=STATUS_COUNTING)
+    snapshot_date = models.DateField(_("Snapshot Date"))
+    inventory_snapshot_time = models.DateTimeField(_("Inventory Snapshot Time"))
+    started_by = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        related_name="stocktaking_sessions_started",
+    )
+    posted_at = models.DateTimeField(_("Posted At"), null=True, blank=True)
+    posted_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="stocktaking_sessions_posted",
+        null=True,
+        blank=True,
+    )
+    stocktaking_record = models.ForeignKey(
+        "StocktakingRecord",
+        on_delete=models.SET_NULL,
+        related_name="sessions",
+        null=True,
+        blank=True,
+    )
+    notes = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = _("Stocktaking Session")
+        verbose_name_plural = _("Stocktaking Sessions")
+        ordering = ("-inventory_snapshot_time", "-id")
+
+    def __str__(self) -> str:
+        return self.session_code
+
+    def save(self, *args, **kwargs):
+        if self.warehouse and not self.warehouse_code:
+            self.warehouse_code = self.warehouse.public_code
+        super().save(*args, **kwargs)
+
+
+class StocktakingSessionLine(models.Model):
+    """Frozen expected quantity and recorded count of one item in a count session."""
+
+    session = models.ForeignKey(
+        StocktakingSession,
+        on_delete=models.CASCADE,
+        related_name="lines",
+    )
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.PROTECT,
+        related_name="stocktaking_session_lines",
+    )
+    item_code = models.CharField(_("Item Code"), max_length=16, validators=[NUMERIC_CODE_VALIDATOR])
+    unit = models.CharField(_("Unit"), max_length=30)
+    quantity_expected = models.DecimalField(_("Quantity Expected"), max_digits=18, decimal_places=6)
+    quantity_counted = models.DecimalField(
+        _("Quantity Counted"),
+        max_digits=18,
+        decimal_places=6,
+        null=True,
+        blank=True,
+    )
+    counted_at = models.DateTimeField(_("Counted At"), null=True, blank=True)
+    counted_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="stocktaking_session_counts",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = _("Stocktaking Session Line")
+        verbose_name_plural = _("Stocktaking Session Lines")
+        ordering = ("item_code", "id")
+        constraints = [
+            models.UniqueConstraint(fields=("session", "item"), name="inv_stk_session_item_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.session.session_code} - {self.item_code}"
+
+
+VALUATION_WEIGHTED_AVERAGE = "weighted_average"
+VALUATION_FIFO = "fifo"
+VALUATION_METHOD_CHOICES = (
+    (VALUATION_WEIGHTED_AVERAGE, _("Weighted Average")),
+    (VALUATION_FIFO, _("FIFO")),
+)
+
+
+class ItemValuation(models.Model):
+    """
+    Maintained stock value of one item in one warehouse.
+
+    Updated incrementally by ``inventory.services.valuation`` whenever a
+    receipt, issue or stocktaking document is posted; ``rebuild_valuation``
+    recomputes it from posted history.
+    """
+
+    company = models.ForeignKey("shared.Company", on_delete=models.CASCADE, related_name="item_valuations")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="item_valuations")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="valuations")
+    valuation_method = models.CharField(
+        _("Valuation Method"),
+        max_length=30,
+        choices=VALUATION_METHOD_CHOICES,
+        default=VALUATION_WEIGHTED_AVERAGE,
+    )
+    quantity = models.DecimalField(_("Quantity"), max_digits=18, decimal_places=6, default=Decimal("0"))
+    total_value = models.DecimalField(_("Total Value"), max_digits=20, decimal_places=4, default=Decimal("0"))
+    average_cost = models.DecimalField(_("Average Cost"), max_digits=18, decimal_places=6, default=Decimal("0"))
+    last_movement_date = models.DateField(_("Last Movement Date"), null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Item Valuation")
+        verbose_name_plural = _("Item Valuations")
+        ordering = ("company", "warehouse", "item")
+        constraints = [
+            models.UniqueConstraint(fields=("company", "warehouse", "item"), name="inv_item_valuation_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.item_id} @ {self.warehouse_id}: {self.total_value}"
+
+
+class ItemCostLayer(models.Model):
+    """FIFO cost layer: the not yet issued part of one posted receipt line."""
+
+    company = models.ForeignKey("shared.Company", on_delete=models.CASCADE, related_name="item_cost_layers")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="item_cost_layers")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="cost_layers")
+    source_type = models.CharField(_("Source Type"), max_length=60)
+    source_line_id = models.BigIntegerField(_("Source Line ID"))
+    layer_date = models.DateField(_("Layer Date"))
+    original_quantity = models.DecimalField(_("Original Quantity"), max_digits=18, decimal_places=6)
+    remaining_quantity = models.DecimalField(_("Remaining Quantity"), max_digits=18, decimal_places=6)
+    unit_cost = models.DecimalField(_("Unit Cost"), max_digits=18, decimal_places=6)
+
+    class Meta:
+        verbose_name = _("Item Cost Layer")
+        verbose_name_plural = _("Item Cost Layers")
+        ordering = ("layer_date", "id")
+        indexes = [
+            models.Index(
+                fields=("company", "warehouse", "item", "layer_date", "id"),
+                condition=models.Q(remaining_quantity__gt=0),
+                name="inv_cost_layer_open_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.source_type}:{self.source_line_id} {self.remaining_quantity} @ {self.unit_cost}"
+
+
+class ItemValuationEntry(models.Model):
+    """Valuation effect of one posted document line (signed quantity and value)."""
+
+    company = models.ForeignKey("shared.Company", on_delete=models.CASCADE, related_name="item_valuation_entries")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="item_valuation_entries")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="valuation_entries")
+    source_type = models.CharField(_("Source Type"), max_length=60)
+    source_line_id = models.BigIntegerField(_("Source Line ID"))
+    document_code = models.CharField(_("Document Code"), max_length=30)
+    entry_date = models.DateField(_("Entry Date"))
+    quantity = models.DecimalField(_("Quantity"), max_digits=18, decimal_places=6)
+    unit_cost = models.DecimalField(_("Unit Cost"), max_digits=18, decimal_places=6)
+    value = models.DecimalField(_("Value"), max_digits=20, decimal_places=4)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Item Valuation Entry")
+        verbose_name_plural = _("Item Valuation Entries")
+        ordering = ("entry_date", "id")
+        constraints = [
+            models.UniqueConstraint(fields=("source_type", "source_line_id"), name="inv_valuation_entry_source_unique"),
+        ]
+        indexes = [
+            models.Index(fields=("company", "warehouse", "item", "entry_date"), name="inv_valuation_entry_item_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.document_code} {self.source_type}:{self.source_line_id}"
+
+
+class LowStockAlert(models.Model):
+    """
+    An item whose balance in a warehouse dropped below its reorder threshold.
+
+    Opened and resolved by ``inventory.services.reorder``; at most one open
+    alert exists per (company, warehouse, item).
+    """
+
+    STATUS_OPEN = "open"
+    STATUS_RESOLVED = "resolved"
+    STATUS_CHOICES = (
+        (STATUS_OPEN, _("Open")),
+        (STATUS_RESOLVED, _("Resolved")),
+    )
+
+    company = models.ForeignKey("shared.Company", on_delete=models.CASCADE, related_name="low_stock_alerts")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="low_stock_alerts")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="low_stock_alerts")
+    status = models.CharField(_("Status"), max_length=20, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    quantity = models.DecimalField(_("Quantity"), max_digits=18, decimal_places=6)
+    threshold = models.DecimalField(_("Threshold"), max_digits=18, decimal_places=6)
+    reorder_quantity = models.DecimalField(_("Reorder Quantity"), max_digits=18, decimal_places=6, null=True, blank=True)
+    purchase_request = models.ForeignKey(
+        PurchaseRequest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="low_stock_alerts",
+    )
+    opened_at = models.DateTimeField(_("Opened At"), auto_now_add=True)
+    resolved_at = models.DateTimeField(_("Resolved At"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Low Stock Alert")
+        verbose_name_plural = _("Low Stock Alerts")
+        ordering = ("-opened_at", "id")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("company", "warehouse", "item"),
+                condition=models.Q(status="open"),
+                name="inv_low_stock_alert_open_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=("company", "status"), name="inv_low_stock_alert_status_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.item_id} @ {self.warehouse_id}: {self.quantity} < {self.threshold}"
+
+
 class WarehouseRequest(InventoryBaseModel, LockableModel):
     """
     Warehouse request for issuing materials to departments, production, or other internal use.
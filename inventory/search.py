@@ -0,0 +1,67 @@
+"""
+Global search registration for inventory documents.
+
+See ``shared.utils.document_search`` for how entries are maintained.
+"""
+from django.utils.translation import gettext_lazy as _
+
+from shared.utils.document_search import register_searchable_document
+from . import models
+
+
+def register_documents():
+    register = register_searchable_document
+    register(
+        models.ReceiptTemporary, 'inventory.receipt_temporary',
+        label=_('Temporary Receipt'), feature_code='inventory.receipts.temporary',
+        url_name='inventory:receipt_temporary_detail', status_field='status',
+    )
+    register(
+        models.ReceiptPermanent, 'inventory.receipt_permanent',
+        label=_('Permanent Receipt'), feature_code='inventory.receipts.permanent',
+        url_name='inventory:receipt_permanent_detail',
+    )
+    register(
+        models.ReceiptConsignment, 'inventory.receipt_consignment',
+        label=_('Consignment Receipt'), feature_code='inventory.receipts.consignment',
+        url_name='inventory:receipt_consignment_detail',
+    )
+    register(
+        models.IssuePermanent, 'inventory.issue_permanent',
+        label=_('Permanent Issue'), feature_code='inventory.issues.permanent',
+        url_name='inventory:issue_permanent_detail',
+    )
+    register(
+        models.IssueConsumption, 'inventory.issue_consumption',
+        label=_('Consumption Issue'), feature_code='inventory.issues.consumption',
+        url_name='inventory:issue_consumption_detail',
+    )
+    register(
+        models.IssueConsignment, 'inventory.issue_consignment',
+        label=_('Consignment Issue'), feature_code='inventory.issues.consignment',
+        url_name='inventory:issue_consignment_detail',
+    )
+    register(
+        models.StocktakingDeficit, 'inventory.stocktaking_deficit',
+        label=_('Stocktaking Deficit'), feature_code='inventory.stocktaking.deficit',
+        url_name='inventory:stocktaking_deficit_edit',
+    )
+    register(
+        models.StocktakingSurplus, 'inventory.stocktaking_surplus',
+        label=_('Stocktaking Surplus'), feature_code='inventory.stocktaking.surplus',
+        url_name='inventory:stocktaking_surplus_edit',
+    )
+    register(
+        models.PurchaseRequest, 'inventory.purchase_request',
+        label=_('Purchase Request'), feature_code='inventory.requests.purchase',
+        url_name='inventory:purchase_request_edit', code_field='request_code',
+        date_field='request_date', status_field='status', header_item_field='item',
+        owner_field='requested_by',
+    )
+    register(
+        models.WarehouseRequest, 'inventory.warehouse_request',
+        label=_('Warehouse Request'), feature_code='inventory.requests.warehouse',
+        url_name='inventory:warehouse_request_edit', code_field='request_code',
+        date_field='request_date', status_field='request_status', header_item_field='item',
+        owner_field='requester',
+    )
@@ -0,0 +1,83 @@
+"""
+Serializers of the read-only inventory API (``/api/v1/inventory/``).
+
+Foreign keys are exposed as IDs next to the code copied onto each row
+(``item``/``item_code``, ``warehouse``/``warehouse_code``), so no serializer
+needs a join.
+"""
+from __future__ import annotations
+
+from typing import Dict, Tuple, Type
+
+from rest_framework import serializers
+
+from shared.api import FieldSelectionMixin
+
+from . import models
+
+# Audit/bookkeeping columns left out of document and line payloads
+INTERNAL_FIELDS = frozenset({
+    "created_by", "edited_by", "enabled_at", "enabled_by", "disabled_at", "disabled_by",
+    "metadata", "company", "company_code", "editing_by", "editing_started_at",
+    "editing_session_key", "locked_by", "unlocked_at", "unlocked_by", "document",
+    "document_is_enabled", "document_is_locked",
+})
+
+
+def api_fields(model) -> Tuple[str, ...]:
+    """Concrete fields of ``model`` without ``INTERNAL_FIELDS``."""
+    return tuple(field.name for field in model._meta.concrete_fields if field.name not in INTERNAL_FIELDS)
+
+
+class ItemSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = models.Item
+        fields = (
+            "id", "item_code", "full_item_code", "name", "name_en",
+            "type", "type_code", "category", "category_code", "subcategory", "subcategory_code",
+            "default_unit", "primary_unit", "is_sellable", "has_lot_tracking",
+            "requires_temporary_receipt", "min_stock", "tax_id", "is_enabled", "edited_at",
+        )
+
+
+class WarehouseSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = models.Warehouse
+        fields = ("id", "public_code", "name", "name_en", "location_label", "is_enabled", "edited_at")
+
+
+class ItemSerialSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = models.ItemSerial
+        fields = (
+            "id", "serial_code", "secondary_serial_code", "item", "item_code", "lot", "lot_code",
+            "receipt_document", "receipt_document_code", "current_status",
+            "current_warehouse", "current_warehouse_code", "current_document_type",
+            "current_document_id", "current_document_code", "last_moved_at", "edited_at",
+        )
+
+
+class BalanceSerializer(FieldSelectionMixin, serializers.Serializer):
+    warehouse = serializers.IntegerField()
+    item = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=18, decimal_places=6)
+
+
+_document_serializers: Dict[type, Type[serializers.ModelSerializer]] = {}
+
+
+def document_serializer(model) -> Type[serializers.ModelSerializer]:
+    """Serializer of ``model`` (a document header) with its ``lines`` nested."""
+    if model not in _document_serializers:
+        line_model = model._meta.get_field("lines").related_model
+        line_meta = type("Meta", (), {"model": line_model, "fields": api_fields(line_model)})
+        line_serializer = type(
+            f"{line_model.__name__}Serializer", (serializers.ModelSerializer,), {"Meta": line_meta},
+        )
+        meta = type("Meta", (), {"model": model, "fields": (*api_fields(model), "lines")})
+        _document_serializers[model] = type(
+            f"{model.__name__}Serializer",
+            (FieldSelectionMixin, serializers.ModelSerializer),
+            {"Meta": meta, "lines": line_serializer(many=True, read_only=True)},
+        )
+    return _document_serializers[model]
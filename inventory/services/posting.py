@@ -0,0 +1,309 @@
+"""
+Document posting (lock) pipeline for inventory documents.
+
+Posting a document runs validation, sets the lock fields and executes the
+side effects (serial finalisation, registered posting hooks, notifications)
+inside one database transaction, so a failure at any step leaves the
+document unlocked and its serials untouched.
+
+Documents are loaded with their enabled lines, line items and per-line serial
+counts prefetched, which keeps validation and finalisation at a constant
+number of queries per document type regardless of line count.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from shared.utils import change_feed
+
+from . import serials as serial_service
+
+
+PostingHook = Callable[[object, object], None]
+BatchPostingHook = Callable[[Sequence[object], object], None]
+PostingValidator = Callable[[object], Sequence[str]]
+
+_POSTING_HOOKS: Dict[type, List[PostingHook]] = {}
+_UNPOSTING_HOOKS: Dict[type, List[PostingHook]] = {}
+_BATCH_POSTING_HOOKS: Dict[type, List[BatchPostingHook]] = {}
+
+
+class DocumentPostingError(Exception):
+    """Raised when a document cannot be posted; carries user-facing messages."""
+
+    def __init__(self, messages: Iterable[str]):
+        self.messages = [str(message) for message in messages]
+        super().__init__("; ".join(self.messages))
+
+
+@dataclass
+class PostingResult:
+    """Outcome of posting several documents at once."""
+
+    posted: List[object] = field(default_factory=list)
+    already_locked: List[object] = field(default_factory=list)
+    failed: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def register_posting_hook(model, hook: PostingHook) -> None:
+    """Register a side effect executed inside the posting transaction of ``model``."""
+    hooks = _POSTING_HOOKS.setdefault(model, [])
+    if hook not in hooks:
+        hooks.append(hook)
+
+
+def get_posting_hooks(model) -> List[PostingHook]:
+    """Return hooks registered for ``model``."""
+    return list(_POSTING_HOOKS.get(model, []))
+
+
+def register_batch_posting_hook(model, hook: BatchPostingHook) -> None:
+    """
+    Register a side effect that receives every document of ``model`` posted together.
+
+    It runs once per ``post_documents`` call after the documents are locked
+    (once per document for ``post_document``), inside the same transaction.
+    """
+    hooks = _BATCH_POSTING_HOOKS.setdefault(model, [])
+    if hook not in hooks:
+        hooks.append(hook)
+
+
+def get_batch_posting_hooks(model) -> List[BatchPostingHook]:
+    """Return batch hooks registered for ``model``."""
+    return list(_BATCH_POSTING_HOOKS.get(model, []))
+
+
+def register_unposting_hook(model, hook: PostingHook) -> None:
+    """Register a side effect executed inside the unlock transaction of ``model``."""
+    hooks = _UNPOSTING_HOOKS.setdefault(model, [])
+    if hook not in hooks:
+        hooks.append(hook)
+
+
+def get_unposting_hooks(model) -> List[PostingHook]:
+    """Return unlock hooks registered for ``model``."""
+    return list(_UNPOSTING_HOOKS.get(model, []))
+
+
+def _line_model(model):
+    try:
+        return model._meta.get_field("lines").related_model
+    except Exception:
+        return None
+
+
+def load_documents_for_posting(queryset) -> List[object]:
+    """
+    Lock and load documents for posting.
+
+    Must be called inside ``transaction.atomic``. Header rows are locked with
+    ``SELECT ... FOR UPDATE`` and enabled lines are attached as
+    ``posting_lines`` with ``item``/``warehouse`` joined and a ``serial_count``
+    annotation for line models with serial tracking.
+    """
+    model = queryset.model
+    queryset = queryset.select_for_update(of=("self",))
+    if hasattr(model, "department_unit"):
+        queryset = queryset.select_related("department_unit")
+
+    line_model = _line_model(model)
+    if line_model is not None:
+        line_queryset = line_model.objects.filter(is_enabled=1).select_related("item", "warehouse")
+        if hasattr(line_model, "serials"):
+            line_queryset = line_queryset.annotate(serial_count=Count("serials"))
+        queryset = queryset.prefetch_related(
+            Prefetch("lines", queryset=line_queryset, to_attr="posting_lines")
+        )
+
+    documents = list(queryset)
+    for document in documents:
+        for line in getattr(document, "posting_lines", []):
+            # Avoid a query per line when side effects touch line.document
+            line.document = document
+    return documents
+
+
+def validate_issue_line_serials(document) -> List[str]:
+    """Check that every lot-tracked line has exactly ``quantity`` serials selected."""
+    errors: List[str] = []
+    for line in getattr(document, "posting_lines", []):
+        item = line.item
+        if not item or item.has_lot_tracking != 1:
+            continue
+        try:
+            quantity = Decimal(line.quantity)
+        except (InvalidOperation, TypeError):
+            quantity = None
+        if quantity is None or quantity != quantity.to_integral_value():
+            errors.append(
+                _('برای ردیف %(item)s، مقدار باید پیش از قفل‌شدن عدد صحیح باشد.')
+                % {'item': item.name}
+            )
+            continue
+        required = int(quantity)
+        selected = getattr(line, "serial_count", None)
+        if selected is None:
+            selected = line.serials.count()
+        if selected != required:
+            errors.append(
+                _('برای ردیف %(item)s، پیش از قفل کردن باید %(expected)s سریال انتخاب شود (الان %(selected)s عدد ثبت شده است).')
+                % {'item': item.name, 'expected': required, 'selected': selected}
+            )
+    return errors
+
+
+def finalize_issue_serials(document, user=None) -> None:
+    """Side effect: move the document's reserved serials to their final status."""
+    try:
+        serial_service.finalize_issue_lines_serials(getattr(document, "posting_lines", []), user=user)
+    except serial_service.SerialTrackingError as exc:
+        raise DocumentPostingError([str(exc)]) from exc
+
+
+def notify_document_owner(document, user=None, url_name: str = '') -> None:
+    """Side effect: tell the document creator that someone else posted it."""
+    owner_id = getattr(document, "created_by_id", None)
+    if not url_name or not owner_id or user is None or owner_id == user.pk:
+        return
+    from shared.utils.notifications import get_or_create_notification
+
+    get_or_create_notification(
+        user=document.created_by,
+        company=document.company,
+        notification_type='document_posted',
+        notification_key=f'document_posted_{document._meta.model_name}_{document.pk}',
+        message=_('سند %(code)s توسط %(user)s قفل شد.') % {
+            'code': document.document_code,
+            'user': user.get_full_name() or user.username,
+        },
+        url_name=url_name,
+    )
+
+
+def _apply_lock(document, user, lock_field: str) -> None:
+    update_fields = {lock_field}
+    setattr(document, lock_field, 1)
+    if hasattr(document, 'locked_at'):
+        document.locked_at = timezone.now()
+        update_fields.add('locked_at')
+    if hasattr(document, 'locked_by_id'):
+        document.locked_by = user
+        update_fields.add('locked_by')
+    if hasattr(document, 'edited_by_id'):
+        document.edited_by = user
+        update_fields.add('edited_by')
+    if hasattr(document, 'edited_at'):
+        update_fields.add('edited_at')
+    document.save(update_fields=list(update_fields))
+
+
+def post_document(
+    document,
+    user=None,
+    *,
+    validators: Sequence[PostingValidator] = (),
+    side_effects: Sequence[PostingHook] = (),
+    lock_field: str = 'is_locked',
+    batch_hooks: bool = True,
+) -> None:
+    """
+    Validate, lock and run side effects for one document atomically.
+
+    ``document`` should come from ``load_documents_for_posting`` within the
+    same transaction. Raises ``DocumentPostingError`` (and rolls back) when a
+    validator reports errors or a side effect fails. ``batch_hooks=False``
+    leaves the batch hooks to the caller (``post_documents``).
+    """
+    with transaction.atomic():
+        errors: List[str] = []
+        for validator in validators:
+            errors.extend(validator(document) or [])
+        if errors:
+            raise DocumentPostingError(errors)
+
+        _apply_lock(document, user, lock_field)
+
+        for hook in list(side_effects) + get_posting_hooks(type(document)):
+            hook(document, user)
+        if batch_hooks:
+            for batch_hook in get_batch_posting_hooks(type(document)):
+                batch_hook([document], user)
+
+
+def post_documents(
+    queryset,
+    user=None,
+    *,
+    validators: Sequence[PostingValidator] = (),
+    side_effects: Sequence[PostingHook] = (),
+    lock_field: str = 'is_locked',
+) -> PostingResult:
+    """
+    Post every document in ``queryset``.
+
+    Documents are loaded in one batch; each one is posted in its own savepoint
+    so an invalid document does not prevent the others from being posted.
+    The lock flag is copied to the lines of all posted documents at once and
+    batch hooks then run once with all posted documents; if one fails, the
+    whole call is rolled back.
+    """
+    result = PostingResult()
+    model = queryset.model
+    # Lock events of all documents are written with one INSERT
+    with transaction.atomic(), change_feed.batch():
+        for document in load_documents_for_posting(queryset.order_by('pk')):
+            if getattr(document, lock_field, 0):
+                result.already_locked.append(document)
+                continue
+            # Lines of movement documents copy the lock flag; synced below in one UPDATE
+            document._skip_line_sync = True
+            try:
+                with change_feed.batch():
+                    post_document(
+                        document,
+                        user,
+                        validators=validators,
+                        side_effects=side_effects,
+                        lock_field=lock_field,
+                        batch_hooks=False,
+                    )
+            except DocumentPostingError as exc:
+                setattr(document, lock_field, 0)
+                result.failed[document.document_code] = exc.messages
+            else:
+                result.posted.append(document)
+            finally:
+                document._skip_line_sync = False
+        if result.posted:
+            if hasattr(model, 'sync_line_fields_bulk'):
+                model.sync_line_fields_bulk(result.posted, [lock_field])
+            for batch_hook in get_batch_posting_hooks(model):
+                batch_hook(result.posted, user)
+    return result
+
+
+def unpost_document(document, user=None, lock_field: str = 'is_locked') -> None:
+    """Clear the lock fields of a posted document and run its unlock hooks atomically."""
+    with transaction.atomic():
+        update_fields = {lock_field}
+        setattr(document, lock_field, 0)
+        if hasattr(document, 'locked_at'):
+            document.locked_at = None
+            update_fields.add('locked_at')
+        if hasattr(document, 'locked_by_id'):
+            document.locked_by = None
+            update_fields.add('locked_by')
+        if hasattr(document, 'edited_by_id'):
+            document.edited_by = user
+            update_fields.add('edited_by')
+        document.save(update_fields=list(update_fields))
+        for hook in get_unposting_hooks(type(document)):
+            hook(document, user)
@@ -0,0 +1,276 @@
+"""
+Low-stock and reorder-point alerting.
+
+``evaluate_low_stock`` compares balances with the reorder threshold of every
+(warehouse, item) in scope (``inventory_balance.get_low_stock_items``, a fixed
+number of queries for the whole company) and keeps ``LowStockAlert`` in sync:
+
+- pairs that dropped below their threshold open an alert (one open alert per
+  pair, so repeated evaluations do not duplicate it)
+- open alerts whose pair recovered are resolved with one ``UPDATE``
+- purchase approvers get one ``Notification`` per evaluation that opened alerts
+- with ``INVENTORY_REORDER_PURCHASE_REQUESTS`` and a requesting user, the new
+  alerts are gathered into one draft ``PurchaseRequest`` (one line per item)
+
+It runs incrementally after posting (a batch posting hook scoped to the items
+of the posted documents, deferred until the transaction commits) and as a
+full sweep (``sweep_low_stock`` management command).
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from shared.utils.approvers import get_approver_ids
+from shared.utils.cache import get_company_cached, invalidate_company_cache_on_commit
+
+from .. import models
+from ..inventory_balance import get_low_stock_items
+from . import posting
+
+logger = logging.getLogger(__name__)
+
+PURCHASE_FEATURE_CODE = "inventory.requests.purchase"
+# Every movement document: issues open alerts, receipts and surpluses resolve them.
+REORDER_DOCUMENT_MODELS = (
+    "ReceiptPermanent",
+    "ReceiptConsignment",
+    "StocktakingSurplus",
+    "IssuePermanent",
+    "IssueConsumption",
+    "IssueConsignment",
+    "StocktakingDeficit",
+)
+
+
+@dataclass
+class ReorderResult:
+    opened: List[models.LowStockAlert] = field(default_factory=list)
+    resolved: int = 0
+    notified: int = 0
+    purchase_request: Optional[models.PurchaseRequest] = None
+
+
+def _reorder_quantity(row: Dict) -> Decimal:
+    """Requested quantity: the configured reorder quantity, else the shortage."""
+    return row["reorder_quantity"] or row["shortage"]
+
+
+def _notify(company_id: int, alerts: List[models.LowStockAlert]) -> int:
+    from shared.models import Notification
+
+    stamp = timezone.now().strftime("%Y%m%d%H%M%S%f")
+    message = f"{len(alerts)} کالا به نقطه سفارش رسیده است"
+    notifications = [
+        Notification(
+            user_id=user_id,
+            company_id=company_id,
+            notification_type="low_stock",
+            notification_key=f"low_stock_{company_id}_{stamp}_{user_id}",
+            message=message,
+            url_name="inventory:low_stock",
+            count=len(alerts),
+        )
+        for user_id in sorted(get_approver_ids(company_id, PURCHASE_FEATURE_CODE))
+    ]
+    Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+    return len(notifications)
+
+
+def _create_purchase_request(
+    company_id: int,
+    alerts: List[models.LowStockAlert],
+    rows: Dict[tuple, Dict],
+    user,
+) -> models.PurchaseRequest:
+    """One draft purchase request with a line per item (quantities summed over warehouses)."""
+    requested: Dict[int, Dict] = {}
+    for alert in alerts:
+        row = rows[(alert.warehouse_id, alert.item_id)]
+        entry = requested.setdefault(alert.item_id, {"row": row, "quantity": Decimal("0"), "warehouses": []})
+        entry["quantity"] += _reorder_quantity(row)
+        entry["warehouses"].append(row["warehouse_code"])
+    # The legacy header fields describe the first line only; lines carry every amount
+    first = next(iter(requested.values()))
+    request = models.PurchaseRequest(
+        company_id=company_id,
+        requested_by=user,
+        created_by=user,
+        item_id=first["row"]["item_id"],
+        item_code=first["row"]["item_code"],
+        unit=first["row"]["unit"],
+        quantity_requested=first["quantity"],
+        status=models.PurchaseRequest.Status.DRAFT,
+        reason_code="reorder_point",
+        request_metadata={"low_stock_alert_ids": [alert.pk for alert in alerts]},
+    )
+    request._skip_legacy_sync = True
+    request.save()
+    models.PurchaseRequestLine.objects.bulk_create([
+        models.PurchaseRequestLine(
+            company_id=company_id,
+            company_code=request.company_code,
+            document=request,
+            item_id=item_id,
+            item_code=entry["row"]["item_code"],
+            unit=entry["row"]["unit"],
+            quantity_requested=entry["quantity"],
+            line_notes=", ".join(entry["warehouses"]),
+            sort_order=index,
+            created_by=user,
+        )
+        for index, (item_id, entry) in enumerate(requested.items())
+    ])
+    models.LowStockAlert.objects.filter(pk__in=[alert.pk for alert in alerts]).update(purchase_request=request)
+    return request
+
+
+@transaction.atomic
+def evaluate_low_stock(
+    company_id: int,
+    item_ids: Optional[Iterable[int]] = None,
+    warehouse_ids: Optional[Iterable[int]] = None,
+    user=None,
+    notify: bool = True,
+) -> ReorderResult:
+    """
+    Open and resolve low-stock alerts of the company (or of the given items/warehouses).
+
+    Args:
+        company_id: Company ID
+        item_ids: Evaluate only these items (optional, all items if None)
+        warehouse_ids: Evaluate only these warehouses (optional)
+        user: Requester of the draft purchase request
+            (only created with ``INVENTORY_REORDER_PURCHASE_REQUESTS``)
+        notify: Notify purchase approvers about newly opened alerts
+    """
+    result = ReorderResult()
+    if item_ids is not None:
+        item_ids = list(item_ids)
+        if not item_ids:
+            return result
+    warehouse_ids = set(warehouse_ids) if warehouse_ids is not None else None
+
+    rows = {
+        (row["warehouse_id"], row["item_id"]): row
+        for row in get_low_stock_items(company_id, item_ids=item_ids)
+        if warehouse_ids is None or row["warehouse_id"] in warehouse_ids
+    }
+
+    open_alerts = models.LowStockAlert.objects.filter(company_id=company_id, status=models.LowStockAlert.STATUS_OPEN)
+    if item_ids is not None:
+        open_alerts = open_alerts.filter(item_id__in=item_ids)
+    if warehouse_ids is not None:
+        open_alerts = open_alerts.filter(warehouse_id__in=warehouse_ids)
+    existing = {
+        (warehouse_id, item_id): pk
+        for pk, warehouse_id, item_id in open_alerts.values_list("pk", "warehouse_id", "item_id")
+    }
+
+    recovered = [pk for pair, pk in existing.items() if pair not in rows]
+    if recovered:
+        result.resolved = models.LowStockAlert.objects.filter(pk__in=recovered).update(
+            status=models.LowStockAlert.STATUS_RESOLVED, resolved_at=timezone.now(),
+        )
+
+    new_alerts = [
+        models.LowStockAlert(
+            company_id=company_id,
+            warehouse_id=row["warehouse_id"],
+            item_id=row["item_id"],
+            quantity=row["quantity"],
+            threshold=row["threshold"],
+            reorder_quantity=row["reorder_quantity"],
+        )
+        for pair, row in rows.items()
+        if pair not in existing
+    ]
+    if new_alerts:
+        # ``ignore_conflicts`` skips pairs a concurrent evaluation opened in the
+        # meantime (partial unique constraint); read back the rows created here.
+        started = timezone.now()
+        models.LowStockAlert.objects.bulk_create(new_alerts, ignore_conflicts=True)
+        new_pairs = {(alert.warehouse_id, alert.item_id) for alert in new_alerts}
+        result.opened = [
+            alert
+            for alert in models.LowStockAlert.objects.filter(
+                company_id=company_id,
+                status=models.LowStockAlert.STATUS_OPEN,
+                item_id__in={item_id for _warehouse_id, item_id in new_pairs},
+                opened_at__gte=started,
+            )
+            if (alert.warehouse_id, alert.item_id) in new_pairs
+        ]
+
+    if result.opened:
+        if notify:
+            result.notified = _notify(company_id, result.opened)
+        if user is not None and getattr(settings, "INVENTORY_REORDER_PURCHASE_REQUESTS", False):
+            result.purchase_request = _create_purchase_request(company_id, result.opened, rows, user)
+    if result.opened or result.resolved:
+        invalidate_company_cache_on_commit(company_id)
+    return result
+
+
+def get_open_alerts(company_id: int) -> List[Dict]:
+    """Open alerts of the company (cached per company; invalidated when alerts change)."""
+
+    def build() -> List[Dict]:
+        return list(
+            models.LowStockAlert.objects.filter(company_id=company_id, status=models.LowStockAlert.STATUS_OPEN)
+            .order_by("warehouse__public_code", "item__item_code")
+            .values(
+                "pk", "warehouse_id", "warehouse__public_code", "warehouse__name",
+                "item_id", "item__item_code", "item__name", "item__default_unit",
+                "quantity", "threshold", "reorder_quantity", "opened_at",
+                "purchase_request_id", "purchase_request__request_code",
+            )
+        )
+
+    return get_company_cached("low-stock", company_id, build)
+
+
+# ----------------------------------------------------------------- posting hook
+
+def _evaluate_after_commit(company_id: int, item_ids: Set[int], warehouse_ids: Set[int], user) -> None:
+    try:
+        evaluate_low_stock(company_id, item_ids=item_ids, warehouse_ids=warehouse_ids, user=user)
+    except Exception:
+        # Alerting must never fail a posting that already committed; the
+        # periodic sweep catches up.
+        logger.exception("Low-stock evaluation failed for company %s", company_id)
+
+
+def evaluate_posted_documents(documents, user=None) -> None:
+    """
+    Batch posting hook: re-evaluate the items of posted documents once the
+    posting commits (a rolled back posting evaluates nothing).
+    """
+    scopes: Dict[int, tuple] = {}
+    for document in documents:
+        lines = getattr(document, "posting_lines", None)
+        if lines is None:
+            lines = list(document.lines.filter(is_enabled=1))
+        item_ids, warehouse_ids = scopes.setdefault(document.company_id, (set(), set()))
+        for line in lines:
+            item_ids.add(line.item_id)
+            warehouse_ids.add(line.warehouse_id)
+    for company_id, (item_ids, warehouse_ids) in scopes.items():
+        if item_ids:
+            transaction.on_commit(
+                lambda company_id=company_id, item_ids=item_ids, warehouse_ids=warehouse_ids: _evaluate_after_commit(
+                    company_id, item_ids, warehouse_ids, user,
+                )
+            )
+
+
+def register_reorder_hooks() -> None:
+    """Evaluate low stock after every posted movement document."""
+    for model_name in REORDER_DOCUMENT_MODELS:
+        posting.register_batch_posting_hook(getattr(models, model_name), evaluate_posted_documents)
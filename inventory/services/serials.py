@@ -707,3 +707,111 @@ def _determine_final_status_for_line(line) -> str:
         return ItemSerial.Status.CONSUMED
     return ItemSerial.Status.ISSUED
 
+
+
+def finalize_issue_lines_serials(lines: Sequence, user=None) -> int:
+    """
+    Finalise serials for several lines of one issue document in bulk.
+
+    Set-based counterpart of ``finalize_issue_line_serials``: serial links for
+    all lines are read with one query, the serial rows are locked and updated
+    with ``bulk_update`` and history rows are written with ``bulk_create``.
+    Lines are expected to carry ``item`` (select_related) and ``document``.
+    """
+    tracked_lines = [
+        line for line in lines
+        if hasattr(line, "serials") and line.item and line.item.has_lot_tracking == 1
+    ]
+    if not tracked_lines:
+        return 0
+
+    line_model = type(tracked_lines[0])
+    serials_field = line_model._meta.get_field("serials")
+    through = serials_field.remote_field.through
+    line_attr = f"{serials_field.m2m_field_name()}_id"
+    serial_attr = f"{serials_field.m2m_reverse_field_name()}_id"
+
+    lines_by_id = {line.pk: line for line in tracked_lines}
+    serial_to_line = dict(
+        (serial_id, lines_by_id[line_id])
+        for line_id, serial_id in through.objects.filter(
+            **{f"{line_attr}__in": list(lines_by_id)}
+        ).values_list(line_attr, serial_attr)
+    )
+    if not serial_to_line:
+        return 0
+
+    now = timezone.now()
+    history_rows = []
+    update_fields = [
+        "current_status",
+        "current_document_type",
+        "current_document_id",
+        "current_document_code",
+        "current_warehouse",
+        "current_warehouse_code",
+        "current_company_unit",
+        "current_company_unit_code",
+        "last_moved_at",
+        "edited_by",
+    ]
+
+    with transaction.atomic():
+        serials = list(
+            ItemSerial.objects.select_for_update()
+            .filter(id__in=list(serial_to_line))
+            .order_by("serial_code")
+        )
+        for serial in serials:
+            line = serial_to_line[serial.pk]
+            document = line.document
+            final_status = _determine_final_status_for_line(line)
+            old_status = serial.current_status
+            old_warehouse_code = serial.current_warehouse_code
+            old_company_unit_code = serial.current_company_unit_code
+
+            serial.current_status = final_status
+            serial.current_document_type = line.__class__.__name__
+            serial.current_document_id = line.pk
+            serial.current_document_code = document.document_code
+            serial.current_warehouse = None
+            serial.current_warehouse_code = ""
+
+            department_unit = getattr(document, "department_unit", None)
+            if department_unit:
+                serial.current_company_unit = department_unit
+                serial.current_company_unit_code = department_unit.public_code
+            else:
+                serial.current_company_unit = None
+                serial.current_company_unit_code = ""
+
+            serial.last_moved_at = now
+            serial.edited_by = user
+
+            history_rows.append(
+                ItemSerialHistory(
+                    company_id=serial.company_id,
+                    company_code=serial.company_code,
+                    item_id=serial.item_id,
+                    item_code=serial.item_code,
+                    serial=serial,
+                    event_type=_history_event_for_status(final_status),
+                    event_at=now,
+                    from_status=old_status,
+                    to_status=serial.current_status,
+                    reference_document_type=serial.current_document_type,
+                    reference_document_code=serial.current_document_code,
+                    reference_document_id=serial.current_document_id,
+                    from_warehouse_code=old_warehouse_code,
+                    to_warehouse_code=serial.current_warehouse_code,
+                    from_company_unit_code=old_company_unit_code,
+                    to_company_unit_code=serial.current_company_unit_code,
+                    created_by=user,
+                    edited_by=user,
+                )
+            )
+
+        ItemSerial.objects.bulk_update(serials, update_fields)
+        ItemSerialHistory.objects.bulk_create(history_rows)
+
+    return len(serials)
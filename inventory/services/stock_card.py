@@ -0,0 +1,331 @@
+"""
+Item movement ledger (stock card) of one item in one warehouse.
+
+Every movement line between the stocktaking baseline and ``as_of_date`` is
+read with one ``UNION ALL`` over the seven line tables; the running balance
+is a window ``SUM`` computed by the database, so a page costs one query
+whatever the length of the history:
+
+- pages are keyset paginated; the cursor carries the last row's position and
+  running balance, so the next page only reads rows after it. Cursors are
+  signed (``django.core.signing``) for one ledger, so a client cannot pick
+  the opening balance of a page
+- ``iter_stock_card`` streams the whole ledger through a server-side cursor
+  (CSV/JSON export)
+- backends without window functions (SQLite < 3.25) accumulate the running
+  balance in Python over the same ordered rows
+
+Movements of one date are ordered by source (receipts, issues, stocktaking
+surplus, deficit) and line ID. Quantities follow ``calculate_item_balance``:
+all enabled documents, stocktaking surplus/deficit only when locked.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.core import signing
+from django.db import connections
+from django.db.models import CharField, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.translation import gettext_lazy as _
+
+from shared.models import CompanyUnit
+
+from .. import models
+from ..inventory_balance import get_last_stocktaking_baseline
+
+PAGE_SIZE = 100
+STREAM_CHUNK_SIZE = 2000
+EARLIEST_DATE = date(1900, 1, 1)
+# Scale of the line quantity fields (DecimalField(decimal_places=6))
+QUANTITY_EXPONENT = Decimal("0.000001")
+
+
+class StockCardSource(NamedTuple):
+    line_model: str
+    document_type: str
+    label: Any
+    quantity_field: str
+    sign: int
+    locked_only: bool = False
+
+
+# Order of the sources is the order of movements within one date.
+STOCK_CARD_SOURCES = (
+    StockCardSource("ReceiptPermanentLine", "permanent_receipt", _("Permanent Receipt"), "quantity", 1),
+    StockCardSource("ReceiptConsignmentLine", "consignment_receipt", _("Consignment Receipt"), "quantity", 1),
+    StockCardSource("IssuePermanentLine", "permanent_issue", _("Permanent Issue"), "quantity", -1),
+    StockCardSource("IssueConsumptionLine", "consumption_issue", _("Consumption Issue"), "quantity", -1),
+    StockCardSource("IssueConsignmentLine", "consignment_issue", _("Consignment Issue"), "quantity", -1),
+    StockCardSource(
+        "StocktakingSurplusLine", "stocktaking_surplus", _("مازاد انبارگردانی"), "quantity_adjusted", 1, True,
+    ),
+    StockCardSource(
+        "StocktakingDeficitLine", "stocktaking_deficit", _("کسری انبارگردانی"), "quantity_adjusted", -1, True,
+    ),
+)
+
+# Column order of every UNION part (all annotations, so it is the same in each part).
+_COLUMNS = (
+    "movement_date", "source_rank", "line_pk", "doc_pk", "doc_code",
+    "signed_quantity", "movement_unit", "created_by_name", "counterparty",
+)
+_TEXT = CharField()
+
+
+@dataclass
+class StockCardPage:
+    rows: List[Dict[str, Any]]
+    has_next: bool
+    next_cursor: Optional[str]
+    opening_balance: Decimal
+
+
+@dataclass
+class StockCardSummary:
+    baseline: Dict[str, Any]
+    baseline_date: date
+    as_of_date: date
+    total_receipts: Decimal = Decimal("0")
+    total_issues: Decimal = Decimal("0")
+    movement_count: int = 0
+    current_balance: Decimal = field(default=Decimal("0"))
+
+
+# ------------------------------------------------------------------- cursors
+
+def _cursor_salt(summary: StockCardSummary, company_id: int, warehouse_id: int, item_id: int) -> str:
+    # A cursor is only valid for the ledger (and baseline) it was issued for
+    return f"inventory.stock-card:{company_id}:{warehouse_id}:{item_id}:{summary.baseline_date}:{summary.as_of_date}"
+
+
+def _encode_cursor(row: Dict[str, Any], salt: str) -> str:
+    payload = [row["date"].isoformat(), row["source_rank"], row["line_id"], str(row["running_balance"])]
+    return signing.dumps(payload, salt=salt)
+
+
+def _decode_cursor(cursor: Optional[str], salt: str) -> Optional[Tuple[date, int, int, Decimal]]:
+    """Position of a signed cursor; ``None`` when it is missing, tampered with or for another ledger."""
+    if not cursor:
+        return None
+    try:
+        movement_date, rank, line_id, balance = signing.loads(cursor, salt=salt)
+        return date.fromisoformat(movement_date), int(rank), int(line_id), Decimal(balance)
+    except (signing.BadSignature, ValueError, TypeError, InvalidOperation):
+        return None
+
+
+def _after_position(rank: int, position: Optional[Tuple[date, int, int, Decimal]]) -> Q:
+    """``(date, rank, line) > position`` resolved for one source so it stays index friendly."""
+    if position is None:
+        return Q()
+    after_date, after_rank, after_line, _balance = position
+    if rank > after_rank:
+        return Q(document_date__gte=after_date)
+    if rank < after_rank:
+        return Q(document_date__gt=after_date)
+    return Q(document_date__gt=after_date) | Q(document_date=after_date, pk__gt=after_line)
+
+
+# ------------------------------------------------------------------- queries
+
+def _counterparty(source: StockCardSource):
+    """Supplier of receipts, destination of issues (name, falling back to its code)."""
+    if source.document_type.endswith("_receipt"):
+        return Coalesce(F("supplier__name"), Value("", output_field=_TEXT), output_field=_TEXT)
+    if source.document_type == "consumption_issue":
+        return Coalesce(
+            F("work_line__name"), F("document__department_unit__name"), Value("", output_field=_TEXT),
+            output_field=_TEXT,
+        )
+    if source.document_type.endswith("_issue"):
+        unit_name = CompanyUnit.objects.filter(
+            company_id=OuterRef("company_id"), public_code=OuterRef("destination_code"),
+        ).values("name")[:1]
+        return Coalesce(
+            F("document__department_unit__name"), Subquery(unit_name, output_field=_TEXT), F("destination_code"),
+            output_field=_TEXT,
+        )
+    return Value("", output_field=_TEXT)
+
+
+def _movements(company_id, warehouse_id, item_id, date_from, date_to, position=None):
+    """The ``UNION ALL`` of all movement lines (unordered queryset)."""
+    parts = []
+    for rank, source in enumerate(STOCK_CARD_SOURCES):
+        queryset = getattr(models, source.line_model).objects.filter(
+            _after_position(rank, position),
+            company_id=company_id,
+            warehouse_id=warehouse_id,
+            item_id=item_id,
+            document_date__gte=date_from,
+            document_date__lte=date_to,
+            document_is_enabled=1,
+        )
+        if source.locked_only:
+            queryset = queryset.filter(document_is_locked=1)
+        parts.append(
+            queryset.order_by().annotate(
+                movement_date=F("document_date"),
+                source_rank=Value(rank, output_field=IntegerField()),
+                line_pk=F("pk"),
+                doc_pk=F("document_id"),
+                doc_code=F("document__document_code"),
+                signed_quantity=F(source.quantity_field) * Value(source.sign, output_field=DecimalField()),
+                movement_unit=F("unit"),
+                created_by_name=Coalesce(
+                    F("document__created_by__username"), Value("", output_field=_TEXT), output_field=_TEXT,
+                ),
+                counterparty=_counterparty(source),
+            ).values(*_COLUMNS)
+        )
+    return parts[0].union(*parts[1:], all=True)
+
+
+def _sql(queryset) -> Tuple[str, Tuple]:
+    return queryset.query.get_compiler(queryset.db).as_sql()
+
+
+def _windowed(connection) -> bool:
+    """Whether the running balance is computed in SQL (a window ``SUM``)."""
+    # SQLite has no exact decimal type: its SUM runs in floating point
+    return connection.features.supports_over_clause and connection.vendor != "sqlite"
+
+
+def _decimal(value) -> Decimal:
+    """Quantity from the database; non-``Decimal`` (float) values are rounded to the field's scale."""
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value)).quantize(QUANTITY_EXPONENT)
+
+
+def _ledger_sql(union, opening: Decimal, limit: Optional[int], windowed: bool) -> Tuple[str, List]:
+    union_sql, params = _sql(union)
+    columns = ", ".join(_COLUMNS)
+    order = "movement_date, source_rank, line_pk"
+    if windowed:
+        sql = (
+            f"SELECT {columns}, %s + SUM(signed_quantity) OVER "
+            f"(ORDER BY {order} ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS running_balance "
+            f"FROM ({union_sql}) movements ORDER BY {order}"
+        )
+        params = [opening, *params]
+    else:
+        sql = f"SELECT {columns} FROM ({union_sql}) movements ORDER BY {order}"
+        params = list(params)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+def _rows(cursor, opening: Decimal, windowed: bool) -> Iterator[Dict[str, Any]]:
+    """Rows of a ledger cursor as dicts (running balance accumulated here without window support)."""
+    balance = opening
+    while True:
+        chunk = cursor.fetchmany(STREAM_CHUNK_SIZE)
+        if not chunk:
+            return
+        for record in chunk:
+            movement_date, rank, line_pk, doc_pk, doc_code, quantity, unit, created_by, counterparty = record[:9]
+            quantity = _decimal(quantity)
+            if isinstance(movement_date, str):
+                movement_date = date.fromisoformat(movement_date)
+            if windowed:
+                balance = _decimal(record[9])
+            else:
+                balance += quantity
+            source = STOCK_CARD_SOURCES[rank]
+            yield {
+                "date": movement_date,
+                "source_rank": rank,
+                "line_id": line_pk,
+                "type": "receipt" if source.sign > 0 else "issue",
+                "type_label": source.label,
+                "document_type": source.document_type,
+                "document_id": doc_pk,
+                "document_code": doc_code,
+                "quantity": abs(quantity),
+                "signed_quantity": quantity,
+                "unit": unit,
+                "created_by": created_by or "—",
+                "source_destination": counterparty or "—",
+                "running_balance": balance,
+            }
+
+
+# ------------------------------------------------------------------ public API
+
+def get_stock_card_summary(company_id: int, warehouse_id: int, item_id: int, as_of_date: Optional[date] = None) -> StockCardSummary:
+    """Baseline and ledger totals (two queries: baseline lookup and one aggregate over the union)."""
+    as_of_date = as_of_date or date.today()
+    baseline = get_last_stocktaking_baseline(company_id, warehouse_id, item_id, as_of_date)
+    summary = StockCardSummary(
+        baseline=baseline,
+        baseline_date=baseline["baseline_date"] or EARLIEST_DATE,
+        as_of_date=as_of_date,
+    )
+    union = _movements(company_id, warehouse_id, item_id, summary.baseline_date, as_of_date)
+    union_sql, params = _sql(union)
+    connection = connections[union.db]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*), "
+            "COALESCE(SUM(CASE WHEN signed_quantity > 0 THEN signed_quantity ELSE 0 END), 0), "
+            "COALESCE(SUM(CASE WHEN signed_quantity < 0 THEN -signed_quantity ELSE 0 END), 0) "
+            f"FROM ({union_sql}) movements",
+            params,
+        )
+        count, receipts, issues = cursor.fetchone()
+    summary.movement_count = count
+    summary.total_receipts = _decimal(receipts)
+    summary.total_issues = _decimal(issues)
+    summary.current_balance = baseline["baseline_quantity"] + summary.total_receipts - summary.total_issues
+    return summary
+
+
+def get_stock_card_page(
+    summary: StockCardSummary,
+    company_id: int,
+    warehouse_id: int,
+    item_id: int,
+    after: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+) -> StockCardPage:
+    """One page of movements after the ``after`` cursor (the first page without one)."""
+    salt = _cursor_salt(summary, company_id, warehouse_id, item_id)
+    position = _decode_cursor(after, salt)
+    opening = position[3] if position else summary.baseline["baseline_quantity"]
+    union = _movements(company_id, warehouse_id, item_id, summary.baseline_date, summary.as_of_date, position)
+    connection = connections[union.db]
+    windowed = _windowed(connection)
+    sql, params = _ledger_sql(union, opening, page_size + 1, windowed)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = list(_rows(cursor, opening, windowed))
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    return StockCardPage(
+        rows=rows,
+        has_next=has_next,
+        next_cursor=_encode_cursor(rows[-1], salt) if has_next else None,
+        opening_balance=opening,
+    )
+
+
+def iter_stock_card(summary: StockCardSummary, company_id: int, warehouse_id: int, item_id: int) -> Iterator[Dict[str, Any]]:
+    """Every movement of the ledger, read in chunks through a server-side cursor."""
+    union = _movements(company_id, warehouse_id, item_id, summary.baseline_date, summary.as_of_date)
+    connection = connections[union.db]
+    windowed = _windowed(connection)
+    opening = summary.baseline["baseline_quantity"]
+    sql, params = _ledger_sql(union, opening, None, windowed)
+    cursor = connection.chunked_cursor()
+    try:
+        cursor.execute(sql, params)
+        yield from _rows(cursor, opening, windowed)
+    finally:
+        cursor.close()
@@ -0,0 +1,390 @@
+"""
+Stocktaking count sessions.
+
+A session freezes the expected quantity of every item of a warehouse when
+counting starts (one set-based balance query, see
+``inventory_balance.get_warehouse_quantities``), collects counted quantities
+in batches (file upload or scanner API) and posts the result: the deficit and
+surplus documents, their lines and the ``StocktakingRecord`` are written with
+``bulk_create`` in one transaction, so the cost of posting does not grow with
+one query per item.
+
+Quantities are in each item's ``default_unit``, the unit balances are kept in.
+Generated deficit/surplus documents are left unlocked so they go through the
+usual lock flow; only locked documents move the balance.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from shared.utils import change_feed
+
+from .. import models
+from ..forms.base import generate_document_code
+from ..inventory_balance import get_warehouse_quantities
+
+
+BATCH_SIZE = 2000
+COUNT_MODES = ("set", "add")
+
+
+class CountSessionError(Exception):
+    """Raised when a count session operation is not allowed; carries user-facing messages."""
+
+    def __init__(self, messages: Iterable[str]):
+        self.messages = [str(message) for message in messages]
+        super().__init__("; ".join(self.messages))
+
+
+@dataclass
+class CountResult:
+    """Outcome of recording one batch of counts."""
+
+    updated: int = 0
+    created: int = 0
+    unknown: List[str] = field(default_factory=list)
+    invalid: List[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class Variance:
+    item_id: int
+    item_code: str
+    unit: str
+    expected: Decimal
+    counted: Decimal
+
+    @property
+    def difference(self) -> Decimal:
+        return self.counted - self.expected
+
+
+def _session_code(company_id: int) -> str:
+    return generate_document_code(models.StocktakingSession, company_id, "STK", field="session_code")
+
+
+def start_count_session(
+    company_id: int,
+    warehouse: models.Warehouse,
+    user,
+    snapshot_date: Optional[date] = None,
+    item_ids: Optional[Iterable[int]] = None,
+    notes: str = "",
+) -> models.StocktakingSession:
+    """
+    Open a count session and freeze the expected quantities of the warehouse.
+
+    Session lines are created for every item with a balance in the warehouse
+    and every enabled item assigned to it (``ItemWarehouse``), optionally
+    limited to ``item_ids``.
+    """
+    snapshot_date = snapshot_date or timezone.now().date()
+    if item_ids is not None:
+        item_ids = list(item_ids)
+
+    with transaction.atomic():
+        quantities = get_warehouse_quantities(company_id, warehouse.pk, snapshot_date, item_ids)
+        items = models.Item.objects.filter(company_id=company_id).filter(
+            Q(pk__in=list(quantities))
+            | Q(is_enabled=1, warehouses__warehouse_id=warehouse.pk, warehouses__is_enabled=1)
+        )
+        if item_ids is not None:
+            items = items.filter(pk__in=item_ids)
+
+        session = models.StocktakingSession.objects.create(
+            company_id=company_id,
+            session_code=_session_code(company_id),
+            warehouse=warehouse,
+            snapshot_date=snapshot_date,
+            inventory_snapshot_time=timezone.now(),
+            started_by=user,
+            created_by=user,
+            notes=notes,
+        )
+        models.StocktakingSessionLine.objects.bulk_create(
+            [
+                models.StocktakingSessionLine(
+                    session=session,
+                    item_id=item_id,
+                    item_code=item_code,
+                    unit=unit,
+                    quantity_expected=quantities.get(item_id, Decimal("0")),
+                )
+                for item_id, item_code, unit in items.distinct().order_by("item_code", "pk").values_list(
+                    "pk", "item_code", "default_unit",
+                )
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    return session
+
+
+def _lock_counting_session(session_id: int) -> models.StocktakingSession:
+    session = (
+        models.StocktakingSession.objects.select_related("company", "warehouse")
+        .select_for_update(of=("self",))
+        .get(pk=session_id)
+    )
+    if session.status != models.StocktakingSession.STATUS_COUNTING:
+        raise CountSessionError([_("Count session %(code)s is not open for counting.") % {"code": session.session_code}])
+    return session
+
+
+def parse_quantity(value: Any) -> Optional[Decimal]:
+    try:
+        quantity = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return None
+    if not quantity.is_finite() or quantity < 0:
+        return None
+    return quantity
+
+
+def record_counts(
+    session: models.StocktakingSession,
+    counts: Iterable[Mapping[str, Any]],
+    user,
+    mode: str = "set",
+) -> CountResult:
+    """
+    Record counted quantities for a batch of items.
+
+    ``counts`` holds mappings with ``quantity`` and either ``item_id`` or
+    ``item_code`` (the 16-digit ``full_item_code`` a scanner reads, or the
+    7-digit ``item_code``). ``mode="set"`` replaces the count of an item,
+    ``"add"`` accumulates scans. Items missing from the session are added
+    with an expected quantity of zero. Unknown codes and invalid quantities
+    are reported and skipped.
+    """
+    if mode not in COUNT_MODES:
+        raise CountSessionError([_("Unknown count mode: %(mode)s") % {"mode": mode}])
+    result = CountResult()
+
+    entries = []
+    for entry in counts:
+        quantity = parse_quantity(entry.get("quantity"))
+        item_id = entry.get("item_id")
+        code = str(entry.get("item_code") or "").strip()
+        if quantity is None or not (item_id or code):
+            result.invalid.append(str(item_id or code))
+            continue
+        try:
+            entries.append((int(item_id) if item_id else None, code, quantity))
+        except (TypeError, ValueError):
+            result.invalid.append(str(item_id))
+
+    with transaction.atomic():
+        session = _lock_counting_session(session.pk)
+        ids = [item_id for item_id, _code, _quantity in entries if item_id]
+        codes = [code for item_id, code, _quantity in entries if not item_id]
+        items: Dict[int, tuple] = {}
+        by_code: Dict[str, Optional[int]] = {}
+        if entries:
+            for item_id, item_code, full_code, unit in models.Item.objects.filter(
+                Q(pk__in=ids) | Q(full_item_code__in=codes) | Q(item_code__in=codes),
+                company_id=session.company_id,
+            ).values_list("pk", "item_code", "full_item_code", "default_unit"):
+                items[item_id] = (item_code, unit)
+                by_code[full_code] = item_id
+                # A 7-digit code shared by items of different categories is ambiguous
+                by_code[item_code] = None if by_code.get(item_code, item_id) != item_id else item_id
+
+        totals: Dict[int, Decimal] = {}
+        for raw_id, code, quantity in entries:
+            item_id = (raw_id if raw_id in items else None) if raw_id else by_code.get(code)
+            if item_id is None:
+                result.unknown.append(code or str(raw_id))
+                continue
+            totals[item_id] = totals.get(item_id, Decimal("0")) + quantity if mode == "add" else quantity
+
+        now = timezone.now()
+        lines = {
+            line.item_id: line
+            for line in models.StocktakingSessionLine.objects.filter(session=session, item_id__in=list(totals))
+        }
+        changed, created = [], []
+        for item_id, quantity in totals.items():
+            line = lines.get(item_id)
+            if line is None:
+                item_code, unit = items[item_id]
+                line = models.StocktakingSessionLine(
+                    session=session, item_id=item_id, item_code=item_code, unit=unit,
+                    quantity_expected=Decimal("0"),
+                )
+                created.append(line)
+            else:
+                changed.append(line)
+            if mode == "add" and line.quantity_counted is not None:
+                quantity += line.quantity_counted
+            line.quantity_counted = quantity
+            line.counted_at = now
+            line.counted_by = user
+        models.StocktakingSessionLine.objects.bulk_update(
+            changed, ["quantity_counted", "counted_at", "counted_by"], batch_size=BATCH_SIZE,
+        )
+        models.StocktakingSessionLine.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    result.updated = len(changed)
+    result.created = len(created)
+    return result
+
+
+def read_count_file(uploaded_file) -> List[Dict[str, str]]:
+    """
+    Read counts from an uploaded CSV file.
+
+    Rows are ``item_code,quantity``; a header row naming ``item_code`` /
+    ``item_id`` and ``quantity`` columns is honoured when present.
+    """
+    text = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    rows = [row for row in csv.reader(text) if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    if "quantity" in header:
+        return [dict(zip(header, (cell.strip() for cell in row))) for row in rows[1:]]
+    return [{"item_code": row[0].strip(), "quantity": row[1].strip() if len(row) > 1 else ""} for row in rows]
+
+
+def compute_variances(
+    session: models.StocktakingSession,
+    uncounted_as_zero: bool = False,
+) -> List[Variance]:
+    """
+    Expected vs counted quantity of every counted item, in memory from one query.
+
+    Lines without a count are skipped unless ``uncounted_as_zero`` (then the
+    item is treated as missing). Lines without a difference are included.
+    """
+    variances = []
+    for item_id, item_code, unit, expected, counted in session.lines.order_by("item_code", "id").values_list(
+        "item_id", "item_code", "unit", "quantity_expected", "quantity_counted",
+    ):
+        if counted is None:
+            if not uncounted_as_zero:
+                continue
+            counted = Decimal("0")
+        variances.append(Variance(item_id, item_code, unit, expected, counted))
+    return variances
+
+
+def _variance_lines(line_model, document, session, variances, user) -> List[Any]:
+    return [
+        line_model(
+            company_id=session.company_id,
+            company_code=session.company_code,
+            document=document,
+            item_id=variance.item_id,
+            item_code=variance.item_code,
+            warehouse_id=session.warehouse_id,
+            warehouse_code=session.warehouse_code,
+            unit=variance.unit,
+            quantity_expected=variance.expected,
+            quantity_counted=variance.counted,
+            quantity_adjusted=abs(variance.difference),
+            sort_order=index,
+            created_by=user,
+            edited_by=user,
+        )
+        for index, variance in enumerate(variances, start=1)
+    ]
+
+
+def _variance_document(model, line_model, prefix, session, variances, user, document_date):
+    if not variances:
+        return None
+    document = model.objects.create(
+        company=session.company,
+        document_code=generate_document_code(model, session.company_id, prefix),
+        document_date=document_date,
+        stocktaking_session_id=session.pk,
+        document_metadata={"stocktaking_session": session.session_code},
+        notes=_("Generated from count session %(code)s") % {"code": session.session_code},
+        created_by=user,
+        edited_by=user,
+    )
+    lines = line_model.objects.bulk_create(
+        _variance_lines(line_model, document, session, variances, user), batch_size=BATCH_SIZE,
+    )
+    change_feed.record_many(lines, change_feed.ACTION_CREATE)
+    return document
+
+
+def post_count_session(
+    session: models.StocktakingSession,
+    user,
+    document_date: Optional[date] = None,
+    uncounted_as_zero: bool = False,
+) -> models.StocktakingRecord:
+    """
+    Generate the variance documents and the stocktaking record of a session.
+
+    In one transaction: a deficit document for items counted below the frozen
+    expectation, a surplus document for items counted above it (each with all
+    its lines in one ``bulk_create`` per batch), a ``StocktakingRecord``
+    linking both, and the session marked posted. Their change events are
+    written with one more ``INSERT``.
+    """
+    document_date = document_date or timezone.now().date()
+    with transaction.atomic(), change_feed.batch():
+        session = _lock_counting_session(session.pk)
+        variances = compute_variances(session, uncounted_as_zero=uncounted_as_zero)
+        if not variances:
+            raise CountSessionError([_("No item of count session %(code)s has been counted.") % {"code": session.session_code}])
+
+        deficit = _variance_document(
+            models.StocktakingDeficit, models.StocktakingDeficitLine, "STD", session,
+            [variance for variance in variances if variance.difference < 0], user, document_date,
+        )
+        surplus = _variance_document(
+            models.StocktakingSurplus, models.StocktakingSurplusLine, "STS", session,
+            [variance for variance in variances if variance.difference > 0], user, document_date,
+        )
+        documents = [document for document in (deficit, surplus) if document is not None]
+
+        record = models.StocktakingRecord.objects.create(
+            company=session.company,
+            document_code=generate_document_code(models.StocktakingRecord, session.company_id, "STR"),
+            document_date=document_date,
+            stocktaking_session_id=session.pk,
+            inventory_snapshot_time=session.inventory_snapshot_time,
+            confirmed_by=user,
+            variance_document_ids=[document.pk for document in documents],
+            variance_document_codes=[document.document_code for document in documents],
+            record_metadata={
+                "stocktaking_session": session.session_code,
+                "warehouse_code": session.warehouse_code,
+                "items_counted": len(variances),
+                "deficit_lines": sum(1 for variance in variances if variance.difference < 0),
+                "surplus_lines": sum(1 for variance in variances if variance.difference > 0),
+            },
+            created_by=user,
+            edited_by=user,
+        )
+
+        session.status = models.StocktakingSession.STATUS_POSTED
+        session.posted_at = timezone.now()
+        session.posted_by = user
+        session.stocktaking_record = record
+        session.edited_by = user
+        session.save(update_fields=["status", "posted_at", "posted_by", "stocktaking_record", "edited_by", "edited_at"])
+    return record
+
+
+def cancel_count_session(session: models.StocktakingSession, user) -> models.StocktakingSession:
+    """Close a session without generating documents."""
+    with transaction.atomic():
+        session = _lock_counting_session(session.pk)
+        session.status = models.StocktakingSession.STATUS_CANCELLED
+        session.edited_by = user
+        session.save(update_fields=["status", "edited_by", "edited_at"])
+    return session
@@ -0,0 +1,176 @@
+"""
+Unit-of-measure conversion.
+
+Every item converts its quantities to its ``default_unit`` through the
+``ItemUnit`` rows defined for it. ``get_unit_tables`` loads the rows of a set
+of items with one query and turns each item's rows into a ``UnitTable``: the
+factor of every unit reachable from the default unit, including chains of
+conversions (BOX -> CARTON -> EA). Factors are composed with exact fractions
+and rounded to ``Decimal`` once, so a long chain does not accumulate rounding.
+
+Tables are cached per item in the company's versioned cache; saving or
+deleting an ``ItemUnit`` or ``Item`` bumps the version (``signals.py``).
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from decimal import Decimal
+from fractions import Fraction
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from shared.utils.cache import company_cache_key
+
+from .. import models
+
+CACHE_NAMESPACE = "item-units"
+ONE = Decimal("1")
+
+
+@dataclass(frozen=True)
+class UnitTable:
+    """Conversions of one item to its default unit."""
+
+    default_unit: str
+    primary_unit: str = ""
+    # Units mentioned by the item's conversions, in ``ItemUnit`` order
+    units: Tuple[str, ...] = ()
+    # Factor to the default unit of every reachable unit (default unit excluded)
+    factors: Dict[str, Decimal] = field(default_factory=dict)
+
+    def factor(self, unit: str) -> Decimal:
+        """Multiplier from ``unit`` to the default unit (1 for the default or an unknown unit)."""
+        if not unit or unit == self.default_unit:
+            return ONE
+        return self.factors.get(unit, ONE)
+
+    def allowed_units(self) -> List[str]:
+        """Default unit, primary unit and every conversion unit, without duplicates."""
+        codes: List[str] = []
+        for code in (self.default_unit, self.primary_unit, *self.units):
+            if code and code not in codes:
+                codes.append(code)
+        return codes
+
+
+def _ratio(value) -> Fraction:
+    return Fraction(Decimal(value))
+
+
+def build_unit_table(item, conversions: Iterable[Tuple[str, str, Decimal, Decimal]]) -> UnitTable:
+    """
+    Compose ``(from_unit, to_unit, from_quantity, to_quantity)`` rows of ``item``.
+
+    ``from_quantity`` of ``from_unit`` equals ``to_quantity`` of ``to_unit``;
+    rows with a missing or zero quantity are ignored.
+    """
+    units: List[str] = []
+    graph: Dict[str, List[Tuple[str, Fraction]]] = {}
+    for from_unit, to_unit, from_quantity, to_quantity in conversions:
+        for code in (from_unit, to_unit):
+            if code and code not in units:
+                units.append(code)
+        if not from_quantity or not to_quantity:
+            continue
+        # One ``from_unit`` is worth ``to/from`` ``to_unit``
+        ratio = _ratio(to_quantity) / _ratio(from_quantity)
+        graph.setdefault(from_unit, []).append((to_unit, ratio))
+        graph.setdefault(to_unit, []).append((from_unit, 1 / ratio))
+
+    default_unit = item.default_unit
+    exact: Dict[str, Fraction] = {default_unit: Fraction(1)}
+    queue = deque([default_unit])
+    while queue:
+        unit = queue.popleft()
+        for neighbor, ratio in graph.get(unit, []):
+            if neighbor not in exact:
+                # neighbor -> unit -> default unit
+                exact[neighbor] = exact[unit] / ratio
+                queue.append(neighbor)
+    factors = {
+        unit: Decimal(value.numerator) / Decimal(value.denominator)
+        for unit, value in exact.items()
+        if unit != default_unit
+    }
+    return UnitTable(
+        default_unit=default_unit,
+        primary_unit=item.primary_unit or "",
+        units=tuple(units),
+        factors=factors,
+    )
+
+
+def get_unit_tables(company_id: int, items: Iterable) -> Dict[int, UnitTable]:
+    """
+    ``UnitTable`` of every item, from the cache or one ``ItemUnit`` query.
+
+    ``items`` are ``Item`` instances or IDs; items given by ID are only loaded
+    (one query) when their table is not cached.
+    """
+    items = {
+        getattr(item, "pk", item): item
+        for item in items
+        if item is not None and getattr(item, "pk", item)
+    }
+    if not items:
+        return {}
+    prefix = company_cache_key(CACHE_NAMESPACE, company_id)
+    keys = {item_id: f"{prefix}:{item_id}" for item_id in items}
+    cached = cache.get_many(keys.values())
+    tables = {item_id: cached[key] for item_id, key in keys.items() if key in cached}
+
+    missing = [item_id for item_id in items if item_id not in tables]
+    unloaded = [item_id for item_id in missing if not isinstance(items[item_id], models.Item)]
+    if unloaded:
+        items.update(models.Item.objects.filter(company_id=company_id, pk__in=unloaded).only(
+            "pk", "company_id", "default_unit", "primary_unit",
+        ).in_bulk())
+        missing = [item_id for item_id in missing if isinstance(items[item_id], models.Item)]
+    if missing:
+        conversions: Dict[int, list] = {item_id: [] for item_id in missing}
+        for item_id, *row in models.ItemUnit.objects.filter(
+            company_id=company_id, item_id__in=missing,
+        ).order_by("item_id", "sort_order", "pk").values_list(
+            "item_id", "from_unit", "to_unit", "from_quantity", "to_quantity",
+        ):
+            conversions[item_id].append(row)
+        built = {item_id: build_unit_table(items[item_id], conversions[item_id]) for item_id in missing}
+        cache.set_many(
+            {keys[item_id]: table for item_id, table in built.items()},
+            getattr(settings, "COMPANY_CACHE_TIMEOUT", 60),
+        )
+        tables.update(built)
+    return tables
+
+
+def get_unit_table(item) -> UnitTable:
+    return get_unit_tables(item.company_id, [item])[item.pk]
+
+
+def get_unit_factor(item, unit: str) -> Decimal:
+    """Multiplier from ``unit`` to ``item.default_unit``."""
+    if not unit or unit == item.default_unit:
+        return ONE
+    return get_unit_table(item).factor(unit)
+
+
+def get_unit_factors(company_id: int, pairs: Iterable[Tuple[object, str]]) -> Dict[Tuple[int, str], Decimal]:
+    """Factor of each ``(item, unit)`` pair, keyed by ``(item_id, unit)``."""
+    pairs = list(pairs)
+    tables = get_unit_tables(
+        company_id, [item for item, unit in pairs if unit and unit != item.default_unit],
+    )
+    return {
+        (item.pk, unit): tables[item.pk].factor(unit) if item.pk in tables else ONE
+        for item, unit in pairs
+    }
+
+
+def normalize_quantities(company_id: int, rows: Iterable[Tuple[object, str, Decimal]]) -> List[Decimal]:
+    """Quantities of ``(item, unit, quantity)`` rows in each item's default unit, in row order."""
+    rows = list(rows)
+    factors = get_unit_factors(company_id, [(item, unit) for item, unit, _quantity in rows])
+    return [Decimal(quantity) * factors[(item.pk, unit)] for item, unit, quantity in rows]
@@ -0,0 +1,448 @@
+"""
+Inventory valuation (weighted average / FIFO).
+
+The value of every (company, warehouse, item) is kept in ``ItemValuation``
+and updated incrementally when a receipt, issue or stocktaking document is
+posted (registered as posting hooks), so the value of a warehouse is one
+``SUM`` over maintained rows instead of a replay of its history:
+
+- receipts and stocktaking surpluses add quantity at the line's ``unit_cost``
+  (the current average cost when no cost was entered); under FIFO each one
+  opens an ``ItemCostLayer``
+- issues and stocktaking deficits remove quantity at the average cost, or by
+  consuming the oldest open layers under FIFO; the cost is written back to
+  the line (``unit_cost``/``total_cost``)
+- every applied line leaves one ``ItemValuationEntry`` (signed quantity and
+  value), which also prevents applying a line twice
+
+Quantities issued beyond the valued stock are costed at the last known cost.
+Unlocking a document, or posting with a back-dated ``document_date``, makes
+the incremental state diverge from the replay order; ``rebuild_valuation``
+replays posted history of the affected scope (the unlock hook does this for
+the items of the unlocked document).
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DateTimeField, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .. import models
+from . import posting
+
+
+BATCH_SIZE = 2000
+VALUE_QUANTUM = Decimal("0.0001")
+COST_QUANTUM = Decimal("0.000001")
+ZERO = Decimal("0")
+VALUATION_FIELDS = ("valuation_method", "quantity", "total_value", "average_cost", "last_movement_date", "updated_at")
+
+Pair = Tuple[int, int]  # (warehouse_id, item_id)
+
+
+@dataclass(frozen=True)
+class MovementSource:
+    document_model: str
+    line_model: str
+    quantity_field: str
+    direction: int
+    cost_field: Optional[str] = None
+    # Line fields the computed cost is written back to
+    writeback: Tuple[str, ...] = ()
+
+
+MOVEMENT_SOURCES = (
+    MovementSource("ReceiptPermanent", "ReceiptPermanentLine", "quantity", 1, "unit_cost"),
+    MovementSource("ReceiptConsignment", "ReceiptConsignmentLine", "quantity", 1, "unit_cost"),
+    MovementSource(
+        "StocktakingSurplus", "StocktakingSurplusLine", "quantity_adjusted", 1, "unit_cost",
+        ("valuation_method", "unit_cost", "total_cost"),
+    ),
+    MovementSource("IssuePermanent", "IssuePermanentLine", "quantity", -1, writeback=("unit_cost", "total_cost")),
+    MovementSource("IssueConsumption", "IssueConsumptionLine", "quantity", -1, writeback=("unit_cost", "total_cost")),
+    MovementSource("IssueConsignment", "IssueConsignmentLine", "quantity", -1, writeback=("unit_cost", "total_cost")),
+    MovementSource(
+        "StocktakingDeficit", "StocktakingDeficitLine", "quantity_adjusted", -1,
+        writeback=("valuation_method", "unit_cost", "total_cost"),
+    ),
+)
+_SOURCES_BY_DOCUMENT = {source.document_model: source for source in MOVEMENT_SOURCES}
+_WRITEBACK = {getattr(models, source.line_model): source.writeback for source in MOVEMENT_SOURCES if source.writeback}
+
+
+def get_valuation_method() -> str:
+    """Method of newly valued items (``INVENTORY_VALUATION_METHOD``)."""
+    return getattr(settings, "INVENTORY_VALUATION_METHOD", models.VALUATION_WEIGHTED_AVERAGE)
+
+
+def _line_label(line_model) -> str:
+    return line_model._meta.label_lower
+
+
+@dataclass
+class _Position:
+    valuation: models.ItemValuation
+    layers: Deque[models.ItemCostLayer] = field(default_factory=deque)
+
+    @property
+    def is_fifo(self) -> bool:
+        return self.valuation.valuation_method == models.VALUATION_FIFO
+
+    def receive(self, quantity: Decimal, unit_cost: Optional[Decimal]) -> Tuple[Decimal, Decimal]:
+        state = self.valuation
+        if unit_cost is None:
+            unit_cost = state.average_cost
+        value = (quantity * unit_cost).quantize(VALUE_QUANTUM)
+        state.quantity += quantity
+        state.total_value += value
+        state.average_cost = (
+            (state.total_value / state.quantity).quantize(COST_QUANTUM) if state.quantity > 0 else unit_cost
+        )
+        return unit_cost, value
+
+    def issue(self, quantity: Decimal, dirty: Dict[int, models.ItemCostLayer]) -> Tuple[Decimal, Decimal]:
+        state = self.valuation
+        if self.is_fifo:
+            value, remaining = ZERO, quantity
+            while remaining > 0 and self.layers:
+                layer = self.layers[0]
+                taken = min(layer.remaining_quantity, remaining)
+                layer.remaining_quantity -= taken
+                remaining -= taken
+                value += taken * layer.unit_cost
+                dirty[id(layer)] = layer
+                if layer.remaining_quantity <= 0:
+                    self.layers.popleft()
+            # Beyond the open layers: last known cost
+            value = (value + remaining * state.average_cost).quantize(VALUE_QUANTUM)
+        elif quantity >= state.quantity > 0:
+            value = (state.total_value + (quantity - state.quantity) * state.average_cost).quantize(VALUE_QUANTUM)
+        else:
+            value = (quantity * state.average_cost).quantize(VALUE_QUANTUM)
+        state.quantity -= quantity
+        state.total_value -= value
+        if state.quantity > 0:
+            state.average_cost = (state.total_value / state.quantity).quantize(COST_QUANTUM)
+        elif state.quantity == 0:
+            state.total_value = ZERO
+        unit_cost = (value / quantity).quantize(COST_QUANTUM) if quantity else state.average_cost
+        return unit_cost, value
+
+
+class _Ledger:
+    """In-memory positions of a set of items plus the rows to write back."""
+
+    def __init__(self, company_id: int):
+        self.company_id = company_id
+        self.positions: Dict[Pair, _Position] = {}
+        self.new_layers: List[models.ItemCostLayer] = []
+        self.dirty_layers: Dict[int, models.ItemCostLayer] = {}
+        self.entries: List[models.ItemValuationEntry] = []
+        self.line_updates: Dict[type, List[object]] = {}
+
+    def apply(self, source: MovementSource, line, pair: Pair, quantity, unit_cost, document_code, entry_date):
+        position = self.positions[pair]
+        quantity = Decimal(quantity or 0)
+        label = _line_label(type(line))
+        if source.direction > 0:
+            cost, value = position.receive(quantity, unit_cost)
+            if position.is_fifo:
+                layer = models.ItemCostLayer(
+                    company_id=self.company_id,
+                    warehouse_id=pair[0],
+                    item_id=pair[1],
+                    source_type=label,
+                    source_line_id=line.pk,
+                    layer_date=entry_date,
+                    original_quantity=quantity,
+                    remaining_quantity=quantity,
+                    unit_cost=cost,
+                )
+                position.layers.append(layer)
+                self.new_layers.append(layer)
+        else:
+            cost, value = position.issue(quantity, self.dirty_layers)
+            value = -value
+        state = position.valuation
+        if state.last_movement_date is None or entry_date > state.last_movement_date:
+            state.last_movement_date = entry_date
+        self.entries.append(models.ItemValuationEntry(
+            company_id=self.company_id,
+            warehouse_id=pair[0],
+            item_id=pair[1],
+            source_type=label,
+            source_line_id=line.pk,
+            document_code=document_code,
+            entry_date=entry_date,
+            quantity=quantity * source.direction,
+            unit_cost=cost,
+            value=value,
+        ))
+        if source.writeback:
+            line.unit_cost = cost
+            line.total_cost = abs(value)
+            if "valuation_method" in source.writeback:
+                line.valuation_method = state.valuation_method
+            self.line_updates.setdefault(type(line), []).append(line)
+
+    def flush_lines(self) -> None:
+        """Write entries and line costs collected so far."""
+        models.ItemValuationEntry.objects.bulk_create(self.entries, batch_size=BATCH_SIZE)
+        for line_model, lines in self.line_updates.items():
+            line_model.objects.bulk_update(lines, list(_WRITEBACK[line_model]), batch_size=BATCH_SIZE)
+        self.entries, self.line_updates = [], {}
+
+    def flush_layers(self) -> None:
+        models.ItemCostLayer.objects.bulk_update(
+            [layer for layer in self.dirty_layers.values() if layer.pk], ["remaining_quantity"], batch_size=BATCH_SIZE,
+        )
+        models.ItemCostLayer.objects.bulk_create(self.new_layers, batch_size=BATCH_SIZE)
+        self.new_layers, self.dirty_layers = [], {}
+
+
+def _load_positions(ledger: _Ledger, pairs: Set[Pair]) -> None:
+    """Lock (creating when missing) the valuation rows of ``pairs`` and load their open FIFO layers."""
+    warehouse_ids = sorted({warehouse_id for warehouse_id, _item_id in pairs})
+    item_ids = sorted({item_id for _warehouse_id, item_id in pairs})
+    method = get_valuation_method()
+    models.ItemValuation.objects.bulk_create(
+        [
+            models.ItemValuation(
+                company_id=ledger.company_id, warehouse_id=warehouse_id, item_id=item_id, valuation_method=method,
+            )
+            for warehouse_id, item_id in sorted(pairs)
+        ],
+        ignore_conflicts=True,
+    )
+    for valuation in models.ItemValuation.objects.select_for_update().filter(
+        company_id=ledger.company_id, warehouse_id__in=warehouse_ids, item_id__in=item_ids,
+    ).order_by("pk"):
+        pair = (valuation.warehouse_id, valuation.item_id)
+        if pair in pairs:
+            ledger.positions[pair] = _Position(valuation)
+
+    fifo_items = sorted({pair[1] for pair, position in ledger.positions.items() if position.is_fifo})
+    if fifo_items:
+        for layer in models.ItemCostLayer.objects.filter(
+            company_id=ledger.company_id,
+            warehouse_id__in=warehouse_ids,
+            item_id__in=fifo_items,
+            remaining_quantity__gt=0,
+        ).order_by("layer_date", "id"):
+            position = ledger.positions.get((layer.warehouse_id, layer.item_id))
+            if position is not None and position.is_fifo:
+                position.layers.append(layer)
+
+
+def value_documents(documents, user=None) -> None:
+    """
+    Batch posting hook: apply the enabled lines of posted documents to the valuation.
+
+    Lines come from ``posting_lines`` when the documents were loaded for
+    posting, so the cost of a bulk lock does not grow with the number of
+    documents. Lines already valued are skipped.
+    """
+    documents = list(documents)
+    if not documents:
+        return
+    source = _SOURCES_BY_DOCUMENT.get(type(documents[0]).__name__)
+    if source is None:
+        return
+    movements = []
+    for document in documents:
+        lines = getattr(document, "posting_lines", None)
+        if lines is None:
+            lines = list(document.lines.filter(is_enabled=1))
+        movements.extend(
+            (document, line) for line in sorted(lines, key=lambda line: (line.sort_order or 0, line.pk))
+        )
+    if not movements:
+        return
+    done = set(
+        models.ItemValuationEntry.objects.filter(
+            source_type=_line_label(type(movements[0][1])),
+            source_line_id__in=[line.pk for _document, line in movements],
+        ).values_list("source_line_id", flat=True)
+    )
+    movements = [(document, line) for document, line in movements if line.pk not in done]
+    if not movements:
+        return
+
+    with transaction.atomic():
+        ledger = _Ledger(documents[0].company_id)
+        _load_positions(ledger, {(line.warehouse_id, line.item_id) for _document, line in movements})
+        for document, line in movements:
+            ledger.apply(
+                source,
+                line,
+                (line.warehouse_id, line.item_id),
+                getattr(line, source.quantity_field),
+                getattr(line, source.cost_field) if source.cost_field else None,
+                document.document_code,
+                document.document_date,
+            )
+        now = timezone.now()
+        for position in ledger.positions.values():
+            position.valuation.updated_at = now
+        models.ItemValuation.objects.bulk_update(
+            [position.valuation for position in ledger.positions.values()], VALUATION_FIELDS,
+        )
+        ledger.flush_layers()
+        ledger.flush_lines()
+
+
+def unvalue_document(document, user=None) -> None:
+    """Unlock hook: drop the document's entries and rebuild the items it touched."""
+    source = _SOURCES_BY_DOCUMENT.get(type(document).__name__)
+    if source is None:
+        return
+    line_model = getattr(models, source.line_model)
+    pairs = set(
+        line_model.objects.filter(document=document).values_list("warehouse_id", "item_id")
+    )
+    if pairs:
+        rebuild_valuation(document.company_id, pairs=pairs)
+
+
+def register_valuation_hooks() -> None:
+    """Value documents when they are posted and re-value their items when unlocked."""
+    for source in MOVEMENT_SOURCES:
+        model = getattr(models, source.document_model)
+        posting.register_batch_posting_hook(model, value_documents)
+        posting.register_unposting_hook(model, unvalue_document)
+
+
+# --------------------------------------------------------------------- rebuild
+
+def _movement_rows(company_id: int, warehouse_ids=None, item_ids=None):
+    """Posted movement lines of every source as one ``UNION ALL`` in posting order."""
+    parts = []
+    for index, source in enumerate(MOVEMENT_SOURCES):
+        line_model = getattr(models, source.line_model)
+        queryset = line_model.objects.filter(
+            company_id=company_id, is_enabled=1, document_is_enabled=1, document_is_locked=1,
+        )
+        if warehouse_ids is not None:
+            queryset = queryset.filter(warehouse_id__in=warehouse_ids)
+        if item_ids is not None:
+            queryset = queryset.filter(item_id__in=item_ids)
+        cost = F(source.cost_field) if source.cost_field else Value(None, output_field=DecimalField())
+        parts.append(
+            queryset.order_by().annotate(
+                source_index=Value(index),
+                posted_at=Coalesce("document__locked_at", "document__created_at", output_field=DateTimeField()),
+                entry_date=F("document_date"),
+                code=F("document__document_code"),
+                moved=F(source.quantity_field),
+                cost=cost,
+            ).values_list(
+                "posted_at", "document_id", "id", "source_index", "warehouse_id", "item_id",
+                "entry_date", "code", "moved", "cost",
+            )
+        )
+    return parts[0].union(*parts[1:], all=True).order_by("posted_at", "source_index", "document_id", "id")
+
+
+def rebuild_valuation(
+    company_id: int,
+    warehouse_id: Optional[int] = None,
+    item_ids: Optional[Iterable[int]] = None,
+    pairs: Optional[Set[Pair]] = None,
+    chunk_size: int = BATCH_SIZE,
+) -> int:
+    """
+    Recompute valuation state, cost layers, entries and issue costs from posted history.
+
+    Scope: one company, optionally one warehouse, some items or explicit
+    ``(warehouse_id, item_id)`` pairs. Movement lines are streamed in posting
+    order and written back every ``chunk_size`` lines. Returns the number of
+    lines replayed.
+    """
+    if item_ids is not None:
+        item_ids = sorted(set(item_ids))
+    warehouse_ids = [warehouse_id] if warehouse_id else None
+    if pairs is not None:
+        warehouse_ids = sorted({pair[0] for pair in pairs})
+        item_ids = sorted({pair[1] for pair in pairs})
+
+    def in_scope(queryset):
+        queryset = queryset.filter(company_id=company_id)
+        if warehouse_ids is not None:
+            queryset = queryset.filter(warehouse_id__in=warehouse_ids)
+        if item_ids is not None:
+            queryset = queryset.filter(item_id__in=item_ids)
+        return queryset
+
+    sources = [getattr(models, source.line_model) for source in MOVEMENT_SOURCES]
+    method = get_valuation_method()
+    replayed = 0
+    with transaction.atomic():
+        methods = {
+            (row[0], row[1]): row[2]
+            for row in in_scope(models.ItemValuation.objects.select_for_update()).values_list(
+                "warehouse_id", "item_id", "valuation_method",
+            )
+            if pairs is None or (row[0], row[1]) in pairs
+        }
+        for model in (models.ItemValuationEntry, models.ItemCostLayer, models.ItemValuation):
+            queryset = in_scope(model.objects.all())
+            if pairs is None:
+                queryset.delete()
+                continue
+            stale = [
+                pk for pk, warehouse, item in queryset.values_list("pk", "warehouse_id", "item_id")
+                if (warehouse, item) in pairs
+            ]
+            for start in range(0, len(stale), chunk_size):
+                model.objects.filter(pk__in=stale[start:start + chunk_size]).delete()
+
+        ledger = _Ledger(company_id)
+        created: List[models.ItemValuation] = []
+        for row in _movement_rows(company_id, warehouse_ids, item_ids).iterator(chunk_size=chunk_size):
+            _posted_at, _document_id, line_id, index, row_warehouse, row_item, entry_date, code, moved, cost = row
+            pair = (row_warehouse, row_item)
+            if pairs is not None and pair not in pairs:
+                continue
+            if pair not in ledger.positions:
+                valuation = models.ItemValuation(
+                    company_id=company_id, warehouse_id=pair[0], item_id=pair[1],
+                    valuation_method=methods.get(pair, method),
+                )
+                created.append(valuation)
+                ledger.positions[pair] = _Position(valuation)
+            ledger.apply(MOVEMENT_SOURCES[index], sources[index](pk=line_id), pair, moved, cost, code, entry_date)
+            replayed += 1
+            if len(ledger.entries) >= chunk_size:
+                ledger.flush_lines()
+        ledger.flush_lines()
+        # State and layers are final only once every later issue has been replayed
+        models.ItemValuation.objects.bulk_create(created, batch_size=chunk_size)
+        ledger.flush_layers()
+    return replayed
+
+
+# ---------------------------------------------------------------------- reads
+
+def get_warehouse_value(company_id: int, warehouse_id: Optional[int] = None) -> Decimal:
+    """Current value of a warehouse (or the whole company) from the maintained state."""
+    queryset = models.ItemValuation.objects.filter(company_id=company_id)
+    if warehouse_id:
+        queryset = queryset.filter(warehouse_id=warehouse_id)
+    return queryset.aggregate(total=Sum("total_value"))["total"] or ZERO
+
+
+def get_item_values(company_id: int, warehouse_id: int) -> Dict[int, Dict[str, Decimal]]:
+    """``{item_id: {quantity, total_value, average_cost}}`` of a warehouse."""
+    return {
+        row.pop("item_id"): row
+        for row in models.ItemValuation.objects.filter(company_id=company_id, warehouse_id=warehouse_id).values(
+            "item_id", "quantity", "total_value", "average_cost",
+        )
+    }
@@ -0,0 +1,328 @@
+"""
+Wave picking: fulfil approved warehouse requests of a warehouse in one batch.
+
+``plan_wave`` reads every approved request of the warehouse, the balance of
+their items (one set-based query, ``inventory_balance.get_warehouse_quantities``)
+and their unit conversions (``units.get_unit_factors``, at most one query),
+and allocates the available stock by priority, ``needed_by_date`` and request
+date. ``release_wave`` then, in one transaction:
+
+- creates one issue document per (issue type, department unit) with all its
+  lines in one ``bulk_create``
+- back-fills ``quantity_issued``, ``issue_document_id/code`` and the status of
+  the requests with one ``bulk_update``
+
+Requests that only got part of their quantity stay ``approved`` and are
+picked up by the next wave. Generated documents are left unlocked so they
+go through the usual lock flow. ``build_pick_list`` lists the lines of a
+wave by item for the storekeeper.
+"""
+from __future__ import annotations
+
+import secrets
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import ROUND_DOWN, Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from shared.utils import change_feed
+
+from .. import models
+from ..forms.base import generate_document_code
+from ..inventory_balance import get_warehouse_quantities
+from . import units as unit_service
+
+
+BATCH_SIZE = 2000
+REQUEST_QUANTUM = Decimal("0.001")
+PRIORITY_RANK = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+
+# issue type → (document model, line model, code prefix)
+ISSUE_TYPES = {
+    "permanent": (models.IssuePermanent, models.IssuePermanentLine, "ISP"),
+    "consumption": (models.IssueConsumption, models.IssueConsumptionLine, "ISU"),
+    "consignment": (models.IssueConsignment, models.IssueConsignmentLine, "ICN"),
+}
+
+
+class WavePickingError(Exception):
+    """Raised when a wave cannot be released; carries user-facing messages."""
+
+    def __init__(self, messages: Iterable[str]):
+        self.messages = [str(message) for message in messages]
+        super().__init__("; ".join(self.messages))
+
+
+@dataclass
+class Allocation:
+    """Stock allocated to one request (``quantity`` in the item's default unit)."""
+
+    request: models.WarehouseRequest
+    issue_type: str
+    quantity: Decimal
+    # Same quantity in the request's unit, added to ``quantity_issued``
+    request_quantity: Decimal
+    remaining: Decimal
+
+    @property
+    def is_complete(self) -> bool:
+        return self.request_quantity >= self.remaining
+
+
+@dataclass
+class WavePlan:
+    allocations: List[Allocation] = field(default_factory=list)
+    # Requests that got nothing: (request, remaining quantity in request unit)
+    unallocated: List[Tuple[models.WarehouseRequest, Decimal]] = field(default_factory=list)
+    available: Dict[int, Decimal] = field(default_factory=dict)
+
+
+@dataclass
+class WaveResult:
+    wave_code: str
+    plan: WavePlan
+    documents: List[object] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class PickRow:
+    item_id: int
+    item_code: str
+    item_name: str
+    unit: str
+    quantity: Decimal
+    document_codes: Tuple[str, ...]
+    destinations: Tuple[str, ...]
+
+
+def _request_issue_type(request: models.WarehouseRequest, default: str) -> str:
+    issue_type = (request.request_metadata or {}).get("issue_type") or default
+    return issue_type if issue_type in ISSUE_TYPES else default
+
+
+def _approved_requests(company_id: int, warehouse_id: int, request_ids=None, lock: bool = False):
+    queryset = models.WarehouseRequest.objects.filter(
+        company_id=company_id, warehouse_id=warehouse_id, request_status="approved", is_enabled=1,
+    ).select_related("item", "department_unit")
+    if request_ids is not None:
+        queryset = queryset.filter(pk__in=list(request_ids))
+    if lock:
+        queryset = queryset.select_for_update(of=("self",))
+    requests = list(queryset.order_by("pk"))
+    requests.sort(key=lambda request: (
+        PRIORITY_RANK.get(request.priority, len(PRIORITY_RANK)),
+        request.needed_by_date is None,
+        request.needed_by_date or date.max,
+        request.request_date,
+        request.pk,
+    ))
+    return requests
+
+
+def plan_wave(
+    company_id: int,
+    warehouse_id: int,
+    request_ids: Optional[Iterable[int]] = None,
+    issue_type: str = "permanent",
+    lock: bool = False,
+) -> WavePlan:
+    """
+    Allocate the available stock of a warehouse to its approved requests.
+
+    Requests are served in order of priority (urgent first), ``needed_by_date``
+    (earliest first, undated last), request date and ID. Each request gets
+    ``min(remaining, available)``; nothing is written.
+    """
+    requests = _approved_requests(company_id, warehouse_id, request_ids, lock=lock)
+    plan = WavePlan()
+    if not requests:
+        return plan
+    available = get_warehouse_quantities(
+        company_id, warehouse_id, item_ids={request.item_id for request in requests},
+    )
+    plan.available = dict(available)
+    factors = unit_service.get_unit_factors(company_id, {(request.item, request.unit) for request in requests})
+    for request in requests:
+        remaining = request.quantity_requested - (request.quantity_issued or Decimal("0"))
+        if remaining <= 0:
+            continue
+        factor = factors.get((request.item_id, request.unit), Decimal("1"))
+        stock = max(available.get(request.item_id, Decimal("0")), Decimal("0"))
+        needed = remaining * factor
+        if needed <= stock:
+            quantity, request_quantity = needed, remaining
+        else:
+            request_quantity = (stock / factor).quantize(REQUEST_QUANTUM, rounding=ROUND_DOWN)
+            quantity = request_quantity * factor
+        if request_quantity <= 0:
+            plan.unallocated.append((request, remaining))
+            continue
+        available[request.item_id] = stock - quantity
+        plan.allocations.append(Allocation(
+            request=request,
+            issue_type=_request_issue_type(request, issue_type),
+            quantity=quantity,
+            request_quantity=request_quantity,
+            remaining=remaining,
+        ))
+    return plan
+
+
+def _document_codes(model, company_id: int, prefix: str, count: int) -> List[str]:
+    """``count`` consecutive codes following the last code of the month."""
+    first = generate_document_code(model, company_id, prefix)
+    base, sequence = first.rsplit("-", 1)
+    return [f"{base}-{int(sequence) + offset:06d}" for offset in range(count)]
+
+
+def _issue_line(line_model, issue_type: str, document, allocation: Allocation, index: int, user):
+    request = allocation.request
+    unit = request.department_unit
+    line = line_model(
+        company_id=document.company_id,
+        company_code=document.company_code,
+        document=document,
+        item_id=request.item_id,
+        item_code=request.item.item_code,
+        warehouse_id=request.warehouse_id,
+        warehouse_code=request.warehouse_code,
+        unit=request.item.default_unit,
+        quantity=allocation.quantity,
+        entered_unit=request.unit,
+        entered_quantity=allocation.request_quantity,
+        line_notes=request.request_code,
+        sort_order=index,
+        created_by=user,
+        edited_by=user,
+    )
+    if issue_type == "consumption":
+        line.consumption_type = "company_unit"
+        line.reference_document_type = "warehouse_request"
+        line.reference_document_id = request.pk
+        line.reference_document_code = request.request_code
+    else:
+        line.destination_type = "company_unit" if unit else "warehouse_request"
+        line.destination_id = unit.pk if unit else request.pk
+        line.destination_code = unit.public_code if unit else request.request_code
+    return line
+
+
+@transaction.atomic
+def release_wave(
+    company_id: int,
+    warehouse: models.Warehouse,
+    user,
+    request_ids: Optional[Iterable[int]] = None,
+    issue_type: str = "permanent",
+    document_date: Optional[date] = None,
+) -> WaveResult:
+    """
+    Allocate stock and generate the consolidated issue documents of a wave.
+
+    The warehouse row is locked (``select_for_update``) before any balance is
+    read, so waves of one warehouse allocate one after the other and the
+    second sees the first one's issues instead of over-allocating the same
+    stock; the requests are locked too, so none is issued twice.
+    """
+    if issue_type not in ISSUE_TYPES:
+        raise WavePickingError([_("Unknown issue type: %(type)s") % {"type": issue_type}])
+    list(models.Warehouse.objects.select_for_update().filter(pk=warehouse.pk).values_list("pk", flat=True))
+    plan = plan_wave(company_id, warehouse.pk, request_ids, issue_type=issue_type, lock=True)
+    if not plan.allocations:
+        raise WavePickingError([_("No approved request can be served from the available stock.")])
+
+    now = timezone.now()
+    # Random suffix: waves of one warehouse released in the same second stay apart
+    wave_code = f"WAV-{now:%Y%m%d%H%M%S}-{warehouse.public_code}-{secrets.token_hex(3)}"
+    document_date = document_date or now.date()
+    groups: Dict[Tuple[str, Optional[int]], List[Allocation]] = {}
+    for allocation in plan.allocations:
+        groups.setdefault((allocation.issue_type, allocation.request.department_unit_id), []).append(allocation)
+
+    result = WaveResult(wave_code=wave_code, plan=plan)
+    lines_by_model: Dict[type, list] = {}
+    for group_type in ISSUE_TYPES:
+        keys = [key for key in groups if key[0] == group_type]
+        if not keys:
+            continue
+        model, line_model, prefix = ISSUE_TYPES[group_type]
+        for code, key in zip(_document_codes(model, company_id, prefix, len(keys)), keys):
+            allocations = groups[key]
+            requests = [allocation.request for allocation in allocations]
+            document = model.objects.create(
+                company_id=company_id,
+                document_code=code,
+                document_date=document_date,
+                department_unit=requests[0].department_unit,
+                issue_metadata={
+                    "wave_code": wave_code,
+                    "warehouse_request_ids": [request.pk for request in requests],
+                    "warehouse_request_codes": [request.request_code for request in requests],
+                },
+                notes=_("Generated from wave %(code)s") % {"code": wave_code},
+                created_by=user,
+                edited_by=user,
+            )
+            result.documents.append(document)
+            for index, allocation in enumerate(
+                sorted(allocations, key=lambda allocation: allocation.request.item_code), start=1,
+            ):
+                lines_by_model.setdefault(line_model, []).append(
+                    _issue_line(line_model, group_type, document, allocation, index, user)
+                )
+                request = allocation.request
+                request.quantity_issued = (request.quantity_issued or Decimal("0")) + allocation.request_quantity
+                request.issue_document_id = document.pk
+                request.issue_document_code = document.document_code
+                if allocation.is_complete:
+                    request.request_status = "issued"
+                    request.issued_at = now
+                request.edited_by = user
+    for line_model, lines in lines_by_model.items():
+        line_model.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+        change_feed.record_many(lines, change_feed.ACTION_CREATE)
+    models.WarehouseRequest.objects.bulk_update(
+        [allocation.request for allocation in plan.allocations],
+        ["quantity_issued", "issue_document_id", "issue_document_code", "request_status", "issued_at", "edited_by"],
+        batch_size=BATCH_SIZE,
+    )
+    return result
+
+
+def build_pick_list(company_id: int, wave_code: str) -> List[PickRow]:
+    """Lines of a wave's documents summed per item and unit, sorted by item code."""
+    rows: Dict[Tuple[int, str], dict] = {}
+    for _model, line_model, _prefix in ISSUE_TYPES.values():
+        for item_id, item_code, item_name, unit, quantity, document_code, destination in line_model.objects.filter(
+            company_id=company_id, is_enabled=1, document__issue_metadata__wave_code=wave_code,
+        ).values_list(
+            "item_id", "item_code", "item__name", "unit", "quantity",
+            "document__document_code", "document__department_unit_code",
+        ):
+            row = rows.setdefault((item_id, unit), {
+                "item_code": item_code, "item_name": item_name, "quantity": Decimal("0"),
+                "documents": set(), "destinations": set(),
+            })
+            row["quantity"] += quantity
+            row["documents"].add(document_code)
+            if destination:
+                row["destinations"].add(destination)
+    return sorted(
+        (
+            PickRow(
+                item_id=item_id,
+                item_code=row["item_code"],
+                item_name=row["item_name"],
+                unit=unit,
+                quantity=row["quantity"],
+                document_codes=tuple(sorted(row["documents"])),
+                destinations=tuple(sorted(row["destinations"])),
+            )
+            for (item_id, unit), row in rows.items()
+        ),
+        key=lambda row: (row.item_code, row.unit),
+    )
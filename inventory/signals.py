@@ -0,0 +1,48 @@
+"""
+Signal handlers for the inventory module.
+
+Saving or deleting a document (or the master data counted on the dashboard,
+or an item unit conversion) invalidates the company's cached aggregates and
+unit tables once the transaction commits.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from shared.utils.cache import invalidate_company_cache_on_commit
+from . import models
+
+
+COMPANY_CACHE_MODELS = (
+    models.Item,
+    models.ItemUnit,
+    models.Warehouse,
+    models.Supplier,
+    models.PurchaseRequest,
+    models.WarehouseRequest,
+    models.ReceiptTemporary,
+    models.ReceiptPermanent,
+    models.ReceiptConsignment,
+    models.IssuePermanent,
+    models.IssueConsumption,
+    models.IssueConsignment,
+    models.StocktakingDeficit,
+    models.StocktakingSurplus,
+    models.StocktakingRecord,
+)
+
+
+def invalidate_company_cache_handler(sender, instance, **kwargs):
+    invalidate_company_cache_on_commit(getattr(instance, 'company_id', None))
+
+
+def connect_signals():
+    for model in COMPANY_CACHE_MODELS:
+        post_save.connect(
+            invalidate_company_cache_handler,
+            sender=model,
+            dispatch_uid=f'inventory_company_cache_save_{model._meta.model_name}',
+        )
+        post_delete.connect(
+            invalidate_company_cache_handler,
+            sender=model,
+            dispatch_uid=f'inventory_company_cache_delete_{model._meta.model_name}',
+        )
@@ -3,7 +3,7 @@ Template tags for displaying Jalali (Persian) dates.
 """
 from django import template
 from datetime import date, datetime
-from inventory.utils.jalali import gregorian_to_jalali
+from inventory.utils.jalali import gregorian_to_jalali, jalali_parts
 
 register = template.Library()
 
@@ -50,25 +50,17 @@ def jalali_date_long(value):
     if not isinstance(value, date):
         return value
     
-    jalali_str = gregorian_to_jalali(value)
-    if not jalali_str:
-        return ''
-    
-    # Parse Jalali date to get day, month, year
     try:
-        import jdatetime
-        jalali = jdatetime.date.fromgregorian(date=value)
-        
-        # Persian month names
-        month_names = [
-            '', 'فروردین', 'اردیبهشت', 'خرداد', 'تیر', 'مرداد', 'شهریور',
-            'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند'
-        ]
-        
-        month_name = month_names[jalali.month] if 1 <= jalali.month <= 12 else ''
-        return f'{jalali.day} {month_name} {jalali.year}'
+        year, month, day = jalali_parts(value)
     except (ValueError, AttributeError):
-        return jalali_str
+        return ''
+
+    # Persian month names
+    month_names = [
+        '', 'فروردین', 'اردیبهشت', 'خرداد', 'تیر', 'مرداد', 'شهریور',
+        'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند'
+    ]
+    return f'{day} {month_names[month]} {year}'
 
 
 @register.filter(name='jalali_datetime')
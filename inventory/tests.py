@@ -1,6 +1,10 @@
 from decimal import Decimal
 
+from unittest import skipUnless
+
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from inventory import models as inventory_models
@@ -139,3 +143,1000 @@ class InventoryModelTests(TestCase):
         self.assertEqual(lot.receipt_document_code, receipt.document_code)
         # ensure lot timestamp roughly equals now
         self.assertLess(abs((lot.created_at - timezone.now()).total_seconds()), 5)
+
+
+class DocumentPostingTests(TestCase):
+    def setUp(self):
+        from inventory.services import posting
+
+        self.posting = posting
+        self.user = shared_models.User.objects.create_user(
+            username="posting-tester",
+            password="secure-pass",
+        )
+        self.company = shared_models.Company.objects.create(
+            public_code="001",
+            legal_name="Posting Test Co.",
+            display_name="Posting Test",
+            is_enabled=1,
+            created_by=self.user,
+        )
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        self.warehouse = inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        self.item = inventory_models.Item.objects.create(
+            company=self.company,
+            type=item_type,
+            category=category,
+            subcategory=subcategory,
+            user_segment="01",
+            name="Sulfuric Acid",
+            name_en="Sulfuric Acid",
+            default_unit="L",
+            primary_unit="L",
+            has_lot_tracking=1,
+        )
+
+    def create_issue(self, code, quantity):
+        issue = inventory_models.IssuePermanent.objects.create(
+            company=self.company, document_code=code, created_by=self.user,
+        )
+        inventory_models.IssuePermanentLine.objects.create(
+            company=self.company,
+            document=issue,
+            item=self.item,
+            warehouse=self.warehouse,
+            unit="L",
+            quantity=Decimal(quantity),
+        )
+        return issue
+
+    def test_post_documents_locks_valid_documents_only(self):
+        valid = inventory_models.IssuePermanent.objects.create(
+            company=self.company, document_code="ISP-1", created_by=self.user,
+        )
+        invalid = self.create_issue("ISP-2", "2")
+
+        result = self.posting.post_documents(
+            inventory_models.IssuePermanent.objects.filter(pk__in=[valid.pk, invalid.pk]),
+            self.user,
+            validators=[self.posting.validate_issue_line_serials],
+            side_effects=[self.posting.finalize_issue_serials],
+        )
+
+        self.assertEqual([doc.pk for doc in result.posted], [valid.pk])
+        self.assertIn("ISP-2", result.failed)
+        valid.refresh_from_db()
+        invalid.refresh_from_db()
+        self.assertEqual(valid.is_locked, 1)
+        self.assertEqual(valid.locked_by, self.user)
+        self.assertEqual(invalid.is_locked, 0)
+
+    def test_failing_side_effect_rolls_back_lock(self):
+        issue = self.create_issue("ISP-3", "0")
+
+        def fail(document, user):
+            raise self.posting.DocumentPostingError(["boom"])
+
+        with self.assertRaises(self.posting.DocumentPostingError):
+            with transaction.atomic():
+                document = self.posting.load_documents_for_posting(
+                    inventory_models.IssuePermanent.objects.filter(pk=issue.pk)
+                )[0]
+                self.posting.post_document(document, self.user, side_effects=[fail])
+        issue.refresh_from_db()
+        self.assertEqual(issue.is_locked, 0)
+
+    def test_lines_follow_header_date_and_lock(self):
+        issue = self.create_issue("ISP-4", "2")
+        issue.refresh_from_db()
+        line = issue.lines.get()
+        self.assertEqual((line.document_date, line.document_is_enabled, line.document_is_locked),
+                         (issue.document_date, 1, 0))
+
+        issue = inventory_models.IssuePermanent.objects.get(pk=issue.pk)
+        issue.document_date = timezone.localdate() - timezone.timedelta(days=3)
+        issue.save()
+        line.refresh_from_db()
+        self.assertEqual(line.document_date, issue.document_date)
+
+        self.posting.post_documents(inventory_models.IssuePermanent.objects.filter(pk=issue.pk), self.user)
+        line.refresh_from_db()
+        self.assertEqual(line.document_is_locked, 1)
+
+        issue.refresh_from_db()
+        self.posting.unpost_document(issue, self.user)
+        line.refresh_from_db()
+        self.assertEqual(line.document_is_locked, 0)
+
+    @skipUnless(connection.vendor == "postgresql", "index plans are PostgreSQL specific")
+    def test_balance_query_uses_covering_index(self):
+        from django.db.models import Sum
+
+        self.create_issue("ISP-5", "2")
+        queryset = inventory_models.IssuePermanentLine.objects.filter(
+            company=self.company, warehouse=self.warehouse, item=self.item,
+            document_is_enabled=1, document_date__lte=timezone.localdate(),
+        ).values("item_id").annotate(total=Sum("quantity"))
+        with transaction.atomic(), connection.cursor() as cursor:
+            # The test tables are tiny; keep the planner from preferring a sequential scan
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+            cursor.execute(f"ANALYZE {inventory_models.IssuePermanentLine._meta.db_table}")
+            plan = queryset.explain()
+        self.assertIn("Index Only Scan using inv_issue_perm_line_mv_idx", plan)
+
+
+class StocktakingSessionTests(TestCase):
+    def setUp(self):
+        from inventory.services import stocktaking
+
+        self.stocktaking = stocktaking
+        self.user = shared_models.User.objects.create_user(
+            username="counter", password="secure-pass", email="counter@example.com",
+        )
+        self.company = shared_models.Company.objects.create(
+            public_code="001",
+            legal_name="Count Co.",
+            display_name="Count",
+            is_enabled=1,
+        )
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        self.warehouse = inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        self.stocked, self.assigned = [
+            inventory_models.Item.objects.create(
+                company=self.company,
+                type=item_type,
+                category=category,
+                subcategory=subcategory,
+                user_segment="01",
+                name=name,
+                name_en=name,
+                default_unit="KG",
+                primary_unit="KG",
+            )
+            for name in ("Soda", "Salt")
+        ]
+        inventory_models.ItemWarehouse.objects.create(
+            company=self.company, item=self.assigned, warehouse=self.warehouse,
+        )
+        receipt = inventory_models.ReceiptPermanent.objects.create(
+            company=self.company, document_code="RCP-1", created_by=self.user,
+        )
+        inventory_models.ReceiptPermanentLine.objects.create(
+            company=self.company,
+            document=receipt,
+            item=self.stocked,
+            warehouse=self.warehouse,
+            unit="KG",
+            quantity=Decimal("10"),
+        )
+
+    def test_count_session_posts_variance_documents(self):
+        session = self.stocktaking.start_count_session(self.company.pk, self.warehouse, self.user)
+        expected = dict(session.lines.values_list("item_id", "quantity_expected"))
+        self.assertEqual(expected, {self.stocked.pk: Decimal("10"), self.assigned.pk: Decimal("0")})
+
+        result = self.stocktaking.record_counts(
+            session,
+            [
+                {"item_code": self.stocked.full_item_code, "quantity": "4"},
+                {"item_code": self.stocked.full_item_code, "quantity": "3"},
+                {"item_id": self.assigned.pk, "quantity": "2"},
+                {"item_code": "9999999", "quantity": "1"},
+            ],
+            self.user,
+            mode="add",
+        )
+        self.assertEqual((result.updated, result.created, result.unknown), (2, 0, ["9999999"]))
+
+        with self.assertNumQueries(14):
+            record = self.stocktaking.post_count_session(session, self.user)
+
+        deficit = inventory_models.StocktakingDeficit.objects.get(stocktaking_session_id=session.pk)
+        surplus = inventory_models.StocktakingSurplus.objects.get(stocktaking_session_id=session.pk)
+        self.assertEqual(
+            list(deficit.lines.values_list("item_id", "quantity_counted", "quantity_adjusted")),
+            [(self.stocked.pk, Decimal("7"), Decimal("3"))],
+        )
+        self.assertEqual(
+            list(surplus.lines.values_list("item_id", "quantity_adjusted")), [(self.assigned.pk, Decimal("2"))],
+        )
+        self.assertEqual(record.variance_document_ids, [deficit.pk, surplus.pk])
+        self.assertEqual(record.stocktaking_session_id, session.pk)
+        session.refresh_from_db()
+        self.assertEqual(session.status, inventory_models.StocktakingSession.STATUS_POSTED)
+        self.assertEqual(session.stocktaking_record, record)
+        with self.assertRaises(self.stocktaking.CountSessionError):
+            self.stocktaking.record_counts(session, [{"item_id": self.stocked.pk, "quantity": "1"}], self.user)
+
+
+class InventoryValuationTests(TestCase):
+    def setUp(self):
+        from inventory.services import posting, valuation
+
+        self.posting = posting
+        self.valuation = valuation
+        self.user = shared_models.User.objects.create_user(
+            username="valuer", password="secure-pass", email="valuer@example.com",
+        )
+        self.company = shared_models.Company.objects.create(
+            public_code="001",
+            legal_name="Value Co.",
+            display_name="Value",
+            is_enabled=1,
+        )
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        self.warehouse = inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        self.item = inventory_models.Item.objects.create(
+            company=self.company,
+            type=item_type,
+            category=category,
+            subcategory=subcategory,
+            user_segment="01",
+            name="Soda",
+            name_en="Soda",
+            default_unit="KG",
+            primary_unit="KG",
+        )
+
+    def post(self, document_model, line_model, code, quantity, unit_cost=None):
+        document = document_model.objects.create(company=self.company, document_code=code, created_by=self.user)
+        line_model.objects.create(
+            company=self.company,
+            document=document,
+            item=self.item,
+            warehouse=self.warehouse,
+            unit="KG",
+            quantity=Decimal(quantity),
+            **({"unit_cost": Decimal(unit_cost)} if unit_cost else {}),
+        )
+        result = self.posting.post_documents(document_model.objects.filter(pk=document.pk), self.user)
+        self.assertEqual(len(result.posted), 1)
+        return document
+
+    def receive(self, code, quantity, unit_cost):
+        return self.post(
+            inventory_models.ReceiptPermanent, inventory_models.ReceiptPermanentLine, code, quantity, unit_cost,
+        )
+
+    def issue(self, code, quantity):
+        document = self.post(inventory_models.IssuePermanent, inventory_models.IssuePermanentLine, code, quantity)
+        return document.lines.get()
+
+    def state(self):
+        valuation = inventory_models.ItemValuation.objects.get(warehouse=self.warehouse, item=self.item)
+        return valuation.quantity, valuation.total_value
+
+    def test_weighted_average_is_maintained_on_posting(self):
+        self.receive("RCP-1", "10", "100")
+        self.receive("RCP-2", "10", "130")
+        line = self.issue("ISP-1", "5")
+
+        self.assertEqual(line.unit_cost, Decimal("115"))
+        self.assertEqual(line.total_cost, Decimal("575"))
+        self.assertEqual(self.state(), (Decimal("15"), Decimal("1725")))
+        self.assertEqual(self.valuation.get_warehouse_value(self.company.pk, self.warehouse.pk), Decimal("1725"))
+
+        before = self.state()
+        self.assertEqual(self.valuation.rebuild_valuation(self.company.pk, warehouse_id=self.warehouse.pk), 3)
+        self.assertEqual(self.state(), before)
+
+    def test_fifo_consumes_oldest_layers_and_unlock_revalues(self):
+        with self.settings(INVENTORY_VALUATION_METHOD="fifo"):
+            self.receive("RCP-1", "10", "100")
+            self.receive("RCP-2", "10", "130")
+            issue_line = self.issue("ISP-1", "15")
+
+        self.assertEqual(issue_line.total_cost, Decimal("1650"))
+        self.assertEqual(self.state(), (Decimal("5"), Decimal("650")))
+        open_layers = inventory_models.ItemCostLayer.objects.filter(remaining_quantity__gt=0)
+        self.assertEqual(list(open_layers.values_list("remaining_quantity", "unit_cost")), [(Decimal("5"), Decimal("130"))])
+
+        self.posting.unpost_document(issue_line.document, self.user)
+        self.assertEqual(self.state(), (Decimal("20"), Decimal("2300")))
+        self.assertFalse(
+            inventory_models.ItemValuationEntry.objects.filter(source_line_id=issue_line.pk, quantity__lt=0).exists()
+        )
+
+
+class WavePickingTests(TestCase):
+    def setUp(self):
+        from inventory.services import wave_picking
+
+        self.wave_picking = wave_picking
+        self.user = shared_models.User.objects.create_user(
+            username="picker", password="secure-pass", email="picker@example.com",
+        )
+        self.company = shared_models.Company.objects.create(
+            public_code="001",
+            legal_name="Wave Co.",
+            display_name="Wave",
+            is_enabled=1,
+        )
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        self.warehouse = inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        self.item = inventory_models.Item.objects.create(
+            company=self.company,
+            type=item_type,
+            category=category,
+            subcategory=subcategory,
+            user_segment="01",
+            name="Soda",
+            name_en="Soda",
+            default_unit="KG",
+            primary_unit="KG",
+        )
+        receipt = inventory_models.ReceiptPermanent.objects.create(
+            company=self.company, document_code="RCP-1", created_by=self.user,
+        )
+        inventory_models.ReceiptPermanentLine.objects.create(
+            company=self.company,
+            document=receipt,
+            item=self.item,
+            warehouse=self.warehouse,
+            unit="KG",
+            quantity=Decimal("10"),
+        )
+        self.units = [
+            shared_models.CompanyUnit.objects.create(
+                company=self.company, public_code=code, name=name, unit_type="department",
+            )
+            for code, name in (("00001", "Lab"), ("00002", "Plant"))
+        ]
+
+    def request(self, code, quantity, priority="normal", unit=0):
+        return inventory_models.WarehouseRequest.objects.create(
+            company=self.company,
+            request_code=code,
+            item=self.item,
+            item_code=self.item.item_code,
+            quantity_requested=Decimal(quantity),
+            unit="KG",
+            warehouse=self.warehouse,
+            warehouse_code=self.warehouse.public_code,
+            requester=self.user,
+            department_unit=self.units[unit],
+            department_unit_code=self.units[unit].public_code,
+            priority=priority,
+            request_status="approved",
+        )
+
+    def test_release_wave_allocates_by_priority_and_backfills_requests(self):
+        normal = self.request("WRQ-1", "6")
+        urgent = self.request("WRQ-2", "5", priority="urgent", unit=1)
+        late = self.request("WRQ-3", "4")
+
+        result = self.wave_picking.release_wave(self.company.pk, self.warehouse, self.user)
+
+        self.assertEqual(len(result.documents), 2)
+        self.assertEqual([request for request, _remaining in result.plan.unallocated], [late])
+        urgent.refresh_from_db()
+        normal.refresh_from_db()
+        late.refresh_from_db()
+        self.assertEqual((urgent.request_status, urgent.quantity_issued), ("issued", Decimal("5")))
+        self.assertEqual((normal.request_status, normal.quantity_issued), ("approved", Decimal("5")))
+        self.assertEqual(late.quantity_issued, None)
+        document = inventory_models.IssuePermanent.objects.get(pk=urgent.issue_document_id)
+        self.assertEqual(document.department_unit, self.units[1])
+        self.assertEqual(document.lines.get().quantity, Decimal("5"))
+
+        pick_list = self.wave_picking.build_pick_list(self.company.pk, result.wave_code)
+        self.assertEqual([(row.item_code, row.quantity) for row in pick_list], [(self.item.item_code, Decimal("10"))])
+        with self.assertRaises(self.wave_picking.WavePickingError):
+            self.wave_picking.release_wave(self.company.pk, self.warehouse, self.user)
+
+    @skipUnless(connection.features.has_select_for_update, "row locks need SELECT ... FOR UPDATE")
+    def test_release_wave_locks_the_warehouse_before_reading_balances(self):
+        self.request("WRQ-6", "3")
+        with CaptureQueriesContext(connection) as queries:
+            self.wave_picking.release_wave(self.company.pk, self.warehouse, self.user)
+        statements = [query["sql"] for query in queries.captured_queries if "SAVEPOINT" not in query["sql"]]
+        self.assertIn(f'FROM "{inventory_models.Warehouse._meta.db_table}"', statements[0])
+        self.assertIn("FOR UPDATE", statements[0])
+
+    def test_waves_released_together_keep_separate_pick_lists(self):
+        first_request = self.request("WRQ-4", "3")
+        second_request = self.request("WRQ-5", "2")
+        first = self.wave_picking.release_wave(self.company.pk, self.warehouse, self.user, [first_request.pk])
+        second = self.wave_picking.release_wave(self.company.pk, self.warehouse, self.user, [second_request.pk])
+
+        self.assertNotEqual(first.wave_code, second.wave_code)
+        for result, quantity in ((first, Decimal("3")), (second, Decimal("2"))):
+            pick_list = self.wave_picking.build_pick_list(self.company.pk, result.wave_code)
+            self.assertEqual([row.quantity for row in pick_list], [quantity])
+
+
+class LowStockAlertTests(TestCase):
+    def setUp(self):
+        from inventory import inventory_balance
+        from inventory.services import posting, reorder
+
+        self.inventory_balance = inventory_balance
+        self.posting = posting
+        self.reorder = reorder
+        self.user = shared_models.User.objects.create_superuser(
+            username="buyer", password="secure-pass", email="buyer@example.com",
+        )
+        self.company = shared_models.Company.objects.create(
+            public_code="001",
+            legal_name="Stock Co.",
+            display_name="Stock",
+            is_enabled=1,
+        )
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        self.warehouse = inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        self.item = inventory_models.Item.objects.create(
+            company=self.company,
+            type=item_type,
+            category=category,
+            subcategory=subcategory,
+            user_segment="01",
+            name="Soda",
+            name_en="Soda",
+            default_unit="KG",
+            primary_unit="KG",
+            min_stock=Decimal("8"),
+        )
+
+    def post(self, document_model, line_model, code, quantity):
+        document = document_model.objects.create(company=self.company, document_code=code, created_by=self.user)
+        line_model.objects.create(
+            company=self.company,
+            document=document,
+            item=self.item,
+            warehouse=self.warehouse,
+            unit="KG",
+            quantity=Decimal(quantity),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posting.post_documents(document_model.objects.filter(pk=document.pk), self.user)
+
+    def test_reorder_point_overrides_min_stock_in_constant_queries(self):
+        self.post(inventory_models.ReceiptPermanent, inventory_models.ReceiptPermanentLine, "RCP-1", "10")
+        self.assertEqual(self.inventory_balance.get_low_stock_items(self.company.pk), [])
+
+        inventory_models.ItemWarehouse.objects.create(
+            company=self.company, item=self.item, warehouse=self.warehouse, reorder_point=Decimal("12"),
+        )
+        with self.assertNumQueries(4):
+            rows = self.inventory_balance.get_low_stock_items(self.company.pk)
+        self.assertEqual(
+            [(row["item_id"], row["quantity"], row["threshold"], row["shortage"]) for row in rows],
+            [(self.item.pk, Decimal("10"), Decimal("12"), Decimal("2"))],
+        )
+
+    def test_posting_opens_and_resolves_alerts(self):
+        self.post(inventory_models.ReceiptPermanent, inventory_models.ReceiptPermanentLine, "RCP-1", "10")
+        with self.settings(INVENTORY_REORDER_PURCHASE_REQUESTS=True):
+            self.post(inventory_models.IssuePermanent, inventory_models.IssuePermanentLine, "ISP-1", "5")
+
+        alert = inventory_models.LowStockAlert.objects.get()
+        self.assertEqual((alert.status, alert.quantity, alert.threshold), ("open", Decimal("5"), Decimal("8")))
+        self.assertEqual(alert.purchase_request.lines.get().quantity_requested, Decimal("3"))
+        self.assertTrue(
+            shared_models.Notification.objects.filter(user=self.user, notification_type="low_stock").exists()
+        )
+        self.assertEqual([row["pk"] for row in self.reorder.get_open_alerts(self.company.pk)], [alert.pk])
+
+        # Re-evaluating does not duplicate the open alert
+        self.assertEqual(self.reorder.evaluate_low_stock(self.company.pk).opened, [])
+
+        self.post(inventory_models.ReceiptPermanent, inventory_models.ReceiptPermanentLine, "RCP-2", "10")
+        alert.refresh_from_db()
+        self.assertEqual(alert.status, "resolved")
+        self.assertEqual(self.reorder.get_open_alerts(self.company.pk), [])
+
+
+    def test_purchase_request_header_matches_its_first_line(self):
+        other = inventory_models.Item.objects.create(
+            company=self.company, type=self.item.type, category=self.item.category,
+            subcategory=self.item.subcategory, user_segment="01", name="Acid", name_en="Acid",
+            default_unit="L", primary_unit="L", min_stock=Decimal("4"),
+        )
+        for item, unit, quantity in ((self.item, "KG", "5"), (other, "L", "1")):
+            document = inventory_models.ReceiptPermanent.objects.create(
+                company=self.company, document_code=f"RCP-{unit}", created_by=self.user,
+            )
+            inventory_models.ReceiptPermanentLine.objects.create(
+                company=self.company, document=document, item=item, warehouse=self.warehouse,
+                unit=unit, quantity=Decimal(quantity),
+            )
+        self.posting.post_documents(inventory_models.ReceiptPermanent.objects.all(), self.user)
+        with self.settings(INVENTORY_REORDER_PURCHASE_REQUESTS=True):
+            self.reorder.evaluate_low_stock(self.company.pk, user=self.user, notify=False)
+
+        request = inventory_models.PurchaseRequest.objects.get()
+        lines = list(request.lines.order_by("sort_order"))
+        self.assertEqual([line.quantity_requested for line in lines], [Decimal("3"), Decimal("3")])
+        self.assertEqual(
+            (request.item_id, request.unit, request.quantity_requested),
+            (lines[0].item_id, lines[0].unit, lines[0].quantity_requested),
+        )
+
+
+class StockCardTests(TestCase):
+    def setUp(self):
+        from inventory.services import stock_card
+
+        self.stock_card = stock_card
+        self.user = shared_models.User.objects.create_user(
+            username="ledger", password="secure-pass", email="ledger@example.com",
+        )
+        self.company = shared_models.Company.objects.create(
+            public_code="001",
+            legal_name="Ledger Co.",
+            display_name="Ledger",
+            is_enabled=1,
+        )
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        self.warehouse = inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        self.item = inventory_models.Item.objects.create(
+            company=self.company,
+            type=item_type,
+            category=category,
+            subcategory=subcategory,
+            user_segment="01",
+            name="Soda",
+            name_en="Soda",
+            default_unit="KG",
+            primary_unit="KG",
+        )
+        movements = [
+            (inventory_models.ReceiptPermanent, inventory_models.ReceiptPermanentLine, "RCP-1", "10", 1),
+            (inventory_models.IssuePermanent, inventory_models.IssuePermanentLine, "ISP-1", "3", 2),
+            (inventory_models.ReceiptPermanent, inventory_models.ReceiptPermanentLine, "RCP-2", "5", 2),
+            (inventory_models.IssueConsumption, inventory_models.IssueConsumptionLine, "ISU-1", "4", 3),
+        ]
+        for document_model, line_model, code, quantity, day in movements:
+            document = document_model.objects.create(
+                company=self.company,
+                document_code=code,
+                document_date=timezone.now().date() - timezone.timedelta(days=10 - day),
+                created_by=self.user,
+            )
+            line_model.objects.create(
+                company=self.company,
+                document=document,
+                item=self.item,
+                warehouse=self.warehouse,
+                unit="KG",
+                quantity=Decimal(quantity),
+                **({"consumption_type": "production"} if line_model is inventory_models.IssueConsumptionLine else {}),
+            )
+
+    def test_pages_carry_running_balance_and_match_the_stream(self):
+        summary = self.stock_card.get_stock_card_summary(self.company.pk, self.warehouse.pk, self.item.pk)
+        self.assertEqual(
+            (summary.movement_count, summary.total_receipts, summary.total_issues, summary.current_balance),
+            (4, Decimal("15"), Decimal("7"), Decimal("8")),
+        )
+
+        rows, after = [], None
+        while True:
+            with self.assertNumQueries(1):
+                page = self.stock_card.get_stock_card_page(
+                    summary, self.company.pk, self.warehouse.pk, self.item.pk, after=after, page_size=3,
+                )
+            rows.extend(page.rows)
+            if not page.has_next:
+                break
+            after = page.next_cursor
+
+        # Same date: receipts before issues
+        self.assertEqual([row["document_code"] for row in rows], ["RCP-1", "RCP-2", "ISP-1", "ISU-1"])
+        self.assertEqual([row["running_balance"] for row in rows], [Decimal("10"), Decimal("15"), Decimal("12"), Decimal("8")])
+        streamed = list(self.stock_card.iter_stock_card(summary, self.company.pk, self.warehouse.pk, self.item.pk))
+        self.assertEqual(streamed, rows)
+
+    def test_cursor_is_signed_for_its_ledger(self):
+        from django.core import signing
+
+        summary = self.stock_card.get_stock_card_summary(self.company.pk, self.warehouse.pk, self.item.pk)
+        first = self.stock_card.get_stock_card_page(summary, self.company.pk, self.warehouse.pk, self.item.pk, page_size=2)
+        salt = self.stock_card._cursor_salt(summary, self.company.pk, self.warehouse.pk, self.item.pk)
+        position = signing.loads(first.next_cursor, salt=salt)
+        forged = signing.dumps([*position[:3], "1000000"], salt=salt, key="not-the-secret-key")
+        other_item = self.stock_card._encode_cursor(first.rows[-1], salt.replace(f":{self.item.pk}:", ":0:"))
+        for cursor in (forged, other_item, "not-a-cursor"):
+            page = self.stock_card.get_stock_card_page(
+                summary, self.company.pk, self.warehouse.pk, self.item.pk, after=cursor, page_size=2,
+            )
+            self.assertEqual(page.opening_balance, summary.baseline["baseline_quantity"])
+            self.assertEqual(page.rows, first.rows)
+
+    def test_export_streams_csv(self):
+        from django.urls import reverse
+
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["active_company_id"] = self.company.pk
+        session.save()
+        response = self.client.get(
+            reverse("inventory:balance_details_export", args=[self.item.pk, self.warehouse.pk])
+        )
+        lines = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[-1].split(",")[-1], "8.000000")
+
+
+class UnitConversionTests(TestCase):
+    def setUp(self):
+        from inventory.services import units
+
+        self.units = units
+        self.company = shared_models.Company.objects.create(
+            public_code="001", legal_name="Unit Co.", display_name="Unit", is_enabled=1,
+        )
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        self.item = inventory_models.Item.objects.create(
+            company=self.company,
+            type=item_type,
+            category=category,
+            subcategory=subcategory,
+            user_segment="01",
+            name="Bolt",
+            name_en="Bolt",
+            default_unit="EA",
+            primary_unit="EA",
+        )
+        self.add_conversion("000001", "CARTON", "1", "EA", "12")
+        self.add_conversion("000002", "BOX", "3", "CARTON", "1")
+
+    def add_conversion(self, code, from_unit, from_quantity, to_unit, to_quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            return inventory_models.ItemUnit.objects.create(
+                company=self.company, item=self.item, public_code=code,
+                from_unit=from_unit, from_quantity=Decimal(from_quantity),
+                to_unit=to_unit, to_quantity=Decimal(to_quantity),
+            )
+
+    def test_chained_conversions_compose_exactly(self):
+        table = self.units.get_unit_table(self.item)
+
+        self.assertEqual(table.factor("CARTON"), Decimal("12"))
+        # 3 BOX = 1 CARTON = 12 EA: one box is exactly 4 EA, not 3.99999...
+        self.assertEqual(table.factor("BOX"), Decimal("4"))
+        self.assertEqual(table.allowed_units(), ["EA", "CARTON", "BOX"])
+        self.assertEqual(
+            self.units.normalize_quantities(self.company.pk, [(self.item, "BOX", Decimal("3")), (self.item, "EA", 5)]),
+            [Decimal("12"), Decimal("5")],
+        )
+
+    def test_tables_are_cached_until_conversions_change(self):
+        self.units.get_unit_tables(self.company.pk, [self.item.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.units.get_unit_factor(self.item, "BOX"), Decimal("4"))
+
+        self.add_conversion("000003", "PALLET", "1", "BOX", "10")
+        self.assertEqual(self.units.get_unit_factor(self.item, "PALLET"), Decimal("40"))
+
+
+class JalaliDateTests(TestCase):
+    def test_period_boundaries_and_labels(self):
+        from datetime import date
+
+        from inventory.utils import jalali
+
+        self.assertEqual(jalali.jalali_month_range(1403, 12), (date(2025, 2, 19), date(2025, 3, 21)))
+        self.assertEqual(jalali.jalali_quarter_range(1403, 4), (date(2024, 12, 21), date(2025, 3, 21)))
+        self.assertEqual(jalali.jalali_year_range(1403), (date(2024, 3, 20), date(2025, 3, 21)))
+
+        periods = jalali.jalali_periods(date(2025, 3, 1), date(2025, 4, 1))
+        self.assertEqual([p.label for p in periods], ["1403/12", "1404/01"])
+        self.assertEqual(periods[0].end, periods[1].start)
+        quarters = jalali.jalali_periods(date(2024, 3, 20), date(2025, 3, 20), jalali.PERIOD_QUARTER)
+        self.assertEqual([p.label for p in quarters], ["1403-Q1", "1403-Q2", "1403-Q3", "1403-Q4"])
+
+    def test_conversions_are_memoized_and_bucketed_in_sql(self):
+        from datetime import date
+
+        from django.db.models import DateField, Value
+
+        from inventory.utils import jalali
+
+        jalali._jalali_parts.cache_clear()
+        for _row in range(3):
+            self.assertEqual(jalali.gregorian_to_jalali(date(2024, 12, 5)), "1403/09/15")
+        self.assertEqual(jalali._jalali_parts.cache_info().misses, 1)
+        self.assertEqual(jalali.jalali_to_gregorian(" 1403/09/15 "), date(2024, 12, 5))
+
+        shared_models.Company.objects.create(
+            public_code="001", legal_name="Jalali Co.", display_name="Jalali", is_enabled=1,
+        )
+        periods = jalali.jalali_periods(date(2024, 11, 1), date(2025, 1, 31))
+        row = (
+            shared_models.Company.objects.annotate(day=Value(date(2024, 12, 21), output_field=DateField()))
+            .annotate(period=jalali.jalali_period_case("day", periods))
+            .values_list("period", flat=True)
+            .first()
+        )
+        self.assertEqual(row, "1403/10")
+
+
+class RestApiTests(TestCase):
+    def setUp(self):
+        self.user = shared_models.User.objects.create_superuser(
+            username="api-tester", password="secure-pass", email="api@example.com",
+        )
+        self.company = shared_models.Company.objects.create(
+            public_code="001", legal_name="API Co.", display_name="API", is_enabled=1,
+        )
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        self.warehouse = inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        self.item = inventory_models.Item.objects.create(
+            company=self.company,
+            type=item_type,
+            category=category,
+            subcategory=subcategory,
+            user_segment="01",
+            name="Nitric Acid",
+            name_en="Nitric Acid",
+            default_unit="L",
+            primary_unit="L",
+        )
+        self.client.force_login(self.user)
+        self.headers = {"HTTP_X_COMPANY_ID": str(self.company.pk)}
+
+    def test_items_support_fields_updated_since_and_etag(self):
+        response = self.client.get("/api/v1/inventory/items/?fields=item_code,name", **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": self.item.pk, "item_code": self.item.item_code, "name": "Nitric Acid"}],
+        )
+
+        cached = self.client.get(
+            "/api/v1/inventory/items/?fields=item_code,name",
+            HTTP_IF_NONE_MATCH=response["ETag"], **self.headers,
+        )
+        self.assertEqual(cached.status_code, 304)
+
+        later = (self.item.edited_at + timezone.timedelta(seconds=1)).isoformat()
+        response = self.client.get("/api/v1/inventory/items/", {"updated_since": later}, **self.headers)
+        self.assertEqual(response.json()["results"], [])
+
+    def test_documents_include_lines_and_balances_are_company_wide(self):
+        issue = inventory_models.IssuePermanent.objects.create(
+            company=self.company, document_code="ISP-API-1", created_by=self.user,
+        )
+        receipt = inventory_models.ReceiptPermanent.objects.create(
+            company=self.company, document_code="RCP-API-1", created_by=self.user,
+        )
+        inventory_models.ReceiptPermanentLine.objects.create(
+            company=self.company, document=receipt, item=self.item, warehouse=self.warehouse,
+            unit="L", quantity=Decimal("10"),
+        )
+        inventory_models.IssuePermanentLine.objects.create(
+            company=self.company, document=issue, item=self.item, warehouse=self.warehouse,
+            unit="L", quantity=Decimal("4"),
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/inventory/issues/permanent/", **self.headers)
+        # Lines of the whole page come from one prefetch query
+        line_queries = [q for q in queries if 'FROM "inventory_issuepermanentline"' in q["sql"]]
+        self.assertEqual(len(line_queries), 1)
+        document = response.json()["results"][0]
+        self.assertEqual(document["document_code"], "ISP-API-1")
+        self.assertEqual([line["quantity"] for line in document["lines"]], ["4.000000"])
+
+        response = self.client.get("/api/v1/inventory/balances/", **self.headers)
+        self.assertEqual(
+            response.json()["results"],
+            [{"warehouse": self.warehouse.pk, "item": self.item.pk, "quantity": "6.000000"}],
+        )
+
+    def test_company_access_is_required(self):
+        self.assertEqual(self.client.get("/api/v1/production/boms/", **self.headers).status_code, 200)
+        outsider = shared_models.User.objects.create_user(username="api-outsider", password="secure-pass")
+        self.client.force_login(outsider)
+        response = self.client.get("/api/v1/inventory/items/", **self.headers)
+        self.assertEqual(response.status_code, 403)
+
+
+class ListStatsTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = shared_models.User.objects.create_superuser(
+            username="stats-admin", email="stats@example.com", password="secure-pass",
+        )
+        self.company = shared_models.Company.objects.create(
+            public_code="001",
+            legal_name="Stats Co.",
+            display_name="Stats",
+            is_enabled=1,
+        )
+        inventory_models.IssuePermanent.objects.create(company=self.company, document_code="ISP-1")
+        inventory_models.IssuePermanent.objects.create(company=self.company, document_code="ISP-2", is_locked=1)
+
+    def get_stats(self):
+        from django.test import RequestFactory
+        from inventory.views import IssuePermanentListView
+
+        request = RequestFactory().get("/")
+        request.user = self.user
+        request.session = {"active_company_id": self.company.id}
+        view = IssuePermanentListView()
+        view.setup(request)
+        view.object_list = view.get_queryset()
+        return view.get_stats()
+
+    def test_stats_are_aggregated_and_cached(self):
+        with self.assertNumQueries(1):
+            stats = self.get_stats()
+        self.assertEqual(stats, {"total": 2, "posted": 1, "draft": 1})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_stats(), stats)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.company = shared_models.Company.objects.create(
+            public_code="001",
+            legal_name="Keyset Co.",
+            display_name="Keyset",
+            is_enabled=1,
+        )
+        today = timezone.now().date()
+        self.issues = [
+            inventory_models.IssuePermanent.objects.create(
+                company=self.company,
+                document_code=f"ISP-{index}",
+                document_date=today - timezone.timedelta(days=index // 2),
+            )
+            for index in range(5)
+        ]
+
+    def test_walks_pages_forward_and_backward(self):
+        from inventory.utils.pagination import paginate_keyset
+
+        queryset = inventory_models.IssuePermanent.objects.all()
+        expected = [issue.pk for issue in queryset.order_by("-document_date", "-id")]
+
+        first = paginate_keyset(queryset, 2)
+        second = paginate_keyset(queryset, 2, after=first.next_cursor)
+        third = paginate_keyset(queryset, 2, after=second.next_cursor)
+        walked = [obj.pk for page in (first, second, third) for obj in page]
+        self.assertEqual(walked, expected)
+        self.assertFalse(first.has_previous())
+        self.assertTrue(second.has_next())
+        self.assertFalse(third.has_next())
+
+        back = paginate_keyset(queryset, 2, before=third.previous_cursor)
+        self.assertEqual([obj.pk for obj in back], [obj.pk for obj in second])
+        self.assertTrue(back.has_previous())
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        from inventory.utils.pagination import _encode_cursor, paginate_keyset
+
+        queryset = inventory_models.IssuePermanent.objects.all()
+        first = paginate_keyset(queryset, 2)
+        for cursor in (_encode_cursor(["x", "y"]), _encode_cursor([None, 1]), "not-a-cursor"):
+            page = paginate_keyset(queryset, 2, after=cursor, before=cursor)
+            self.assertEqual([obj.pk for obj in page], [obj.pk for obj in first])
+
+    def test_document_search_uses_exists_without_duplicates(self):
+        from inventory.views.base import InventoryBaseView
+
+        user = shared_models.User.objects.create_user(username="keyset", password="secure-pass")
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        warehouse = inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        item = inventory_models.Item.objects.create(
+            company=self.company,
+            type=item_type,
+            category=category,
+            subcategory=subcategory,
+            user_segment="01",
+            name="Sulfuric Acid",
+            name_en="Sulfuric Acid",
+            default_unit="L",
+            primary_unit="L",
+            created_by=user,
+        )
+        for _ in range(2):
+            inventory_models.IssuePermanentLine.objects.create(
+                company=self.company,
+                document=self.issues[0],
+                item=item,
+                warehouse=warehouse,
+                unit="L",
+                quantity=Decimal("1"),
+            )
+
+        results = InventoryBaseView().filter_by_document_search(
+            inventory_models.IssuePermanent.objects.all(), "sulfuric"
+        )
+        self.assertEqual(list(results), [self.issues[0]])
+        outer_sql = str(results.query).split("EXISTS", 1)[0]
+        self.assertIn("EXISTS", str(results.query))
+        self.assertNotIn("JOIN", outer_sql)
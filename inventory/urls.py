@@ -86,6 +86,7 @@ urlpatterns = [
     path('receipts/temporary/<int:pk>/edit/', views.ReceiptTemporaryUpdateView.as_view(), name='receipt_temporary_edit'),
     path('receipts/temporary/<int:pk>/delete/', views.ReceiptTemporaryDeleteView.as_view(), name='receipt_temporary_delete'),
     path('receipts/temporary/<int:pk>/lock/', views.ReceiptTemporaryLockView.as_view(), name='receipt_temporary_lock'),
+    path('receipts/temporary/lock/bulk/', views.ReceiptTemporaryLockView.as_view(), name='receipt_temporary_bulk_lock'),
     path('receipts/temporary/<int:pk>/unlock/', views.ReceiptTemporaryUnlockView.as_view(), name='receipt_temporary_unlock'),
     path('receipts/temporary/<int:pk>/send-to-qc/', views.ReceiptTemporarySendToQCView.as_view(), name='receipt_temporary_send_to_qc'),
     path('receipts/permanent/', views.ReceiptPermanentListView.as_view(), name='receipt_permanent'),
@@ -95,6 +96,7 @@ urlpatterns = [
     path('receipts/permanent/<int:pk>/edit/', views.ReceiptPermanentUpdateView.as_view(), name='receipt_permanent_edit'),
     path('receipts/permanent/<int:pk>/delete/', views.ReceiptPermanentDeleteView.as_view(), name='receipt_permanent_delete'),
     path('receipts/permanent/<int:pk>/lock/', views.ReceiptPermanentLockView.as_view(), name='receipt_permanent_lock'),
+    path('receipts/permanent/lock/bulk/', views.ReceiptPermanentLockView.as_view(), name='receipt_permanent_bulk_lock'),
     path('receipts/permanent/<int:pk>/unlock/', views.ReceiptPermanentUnlockView.as_view(), name='receipt_permanent_unlock'),
     path('receipts/permanent/<int:pk>/lines/<int:line_id>/serials/', views.ReceiptPermanentLineSerialAssignmentView.as_view(), name='receipt_permanent_line_serials'),
     path('receipts/consignment/', views.ReceiptConsignmentListView.as_view(), name='receipt_consignment'),
@@ -104,6 +106,7 @@ urlpatterns = [
     path('receipts/consignment/<int:pk>/edit/', views.ReceiptConsignmentUpdateView.as_view(), name='receipt_consignment_edit'),
     path('receipts/consignment/<int:pk>/delete/', views.ReceiptConsignmentDeleteView.as_view(), name='receipt_consignment_delete'),
     path('receipts/consignment/<int:pk>/lock/', views.ReceiptConsignmentLockView.as_view(), name='receipt_consignment_lock'),
+    path('receipts/consignment/lock/bulk/', views.ReceiptConsignmentLockView.as_view(), name='receipt_consignment_bulk_lock'),
     path('receipts/consignment/<int:pk>/unlock/', views.ReceiptConsignmentUnlockView.as_view(), name='receipt_consignment_unlock'),
     path('receipts/consignment/<int:pk>/lines/<int:line_id>/serials/', views.ReceiptConsignmentLineSerialAssignmentView.as_view(), name='receipt_consignment_line_serials'),
     
@@ -114,6 +117,7 @@ urlpatterns = [
     path('issues/permanent/<int:pk>/edit/', views.IssuePermanentUpdateView.as_view(), name='issue_permanent_edit'),
     path('issues/permanent/<int:pk>/delete/', views.IssuePermanentDeleteView.as_view(), name='issue_permanent_delete'),
     path('issues/permanent/<int:pk>/lock/', views.IssuePermanentLockView.as_view(), name='issue_permanent_lock'),
+    path('issues/permanent/lock/bulk/', views.IssuePermanentLockView.as_view(), name='issue_permanent_bulk_lock'),
     path('issues/permanent/<int:pk>/lines/<int:line_id>/serials/', views.IssuePermanentLineSerialAssignmentView.as_view(), name='issue_permanent_line_serials'),
     path('issues/consumption/', views.IssueConsumptionListView.as_view(), name='issue_consumption'),
     path('issues/consumption/create/', views.IssueConsumptionCreateView.as_view(), name='issue_consumption_create'),
@@ -121,6 +125,7 @@ urlpatterns = [
     path('issues/consumption/<int:pk>/edit/', views.IssueConsumptionUpdateView.as_view(), name='issue_consumption_edit'),
     path('issues/consumption/<int:pk>/delete/', views.IssueConsumptionDeleteView.as_view(), name='issue_consumption_delete'),
     path('issues/consumption/<int:pk>/lock/', views.IssueConsumptionLockView.as_view(), name='issue_consumption_lock'),
+    path('issues/consumption/lock/bulk/', views.IssueConsumptionLockView.as_view(), name='issue_consumption_bulk_lock'),
     path('issues/consumption/<int:pk>/lines/<int:line_id>/serials/', views.IssueConsumptionLineSerialAssignmentView.as_view(), name='issue_consumption_line_serials'),
     path('issues/consignment/', views.IssueConsignmentListView.as_view(), name='issue_consignment'),
     path('issues/consignment/create/', views.IssueConsignmentCreateView.as_view(), name='issue_consignment_create'),
@@ -128,6 +133,7 @@ urlpatterns = [
     path('issues/consignment/<int:pk>/edit/', views.IssueConsignmentUpdateView.as_view(), name='issue_consignment_edit'),
     path('issues/consignment/<int:pk>/delete/', views.IssueConsignmentDeleteView.as_view(), name='issue_consignment_delete'),
     path('issues/consignment/<int:pk>/lock/', views.IssueConsignmentLockView.as_view(), name='issue_consignment_lock'),
+    path('issues/consignment/lock/bulk/', views.IssueConsignmentLockView.as_view(), name='issue_consignment_bulk_lock'),
     path('issues/consignment/<int:pk>/lines/<int:line_id>/serials/', views.IssueConsignmentLineSerialAssignmentView.as_view(), name='issue_consignment_line_serials'),
     
     # Stocktaking
@@ -136,20 +142,31 @@ urlpatterns = [
     path('stocktaking/deficit/<int:pk>/edit/', views.StocktakingDeficitUpdateView.as_view(), name='stocktaking_deficit_edit'),
     path('stocktaking/deficit/<int:pk>/delete/', views.StocktakingDeficitDeleteView.as_view(), name='stocktaking_deficit_delete'),
     path('stocktaking/deficit/<int:pk>/lock/', views.StocktakingDeficitLockView.as_view(), name='stocktaking_deficit_lock'),
+    path('stocktaking/deficit/lock/bulk/', views.StocktakingDeficitLockView.as_view(), name='stocktaking_deficit_bulk_lock'),
     path('stocktaking/surplus/', views.StocktakingSurplusListView.as_view(), name='stocktaking_surplus'),
     path('stocktaking/surplus/create/', views.StocktakingSurplusCreateView.as_view(), name='stocktaking_surplus_create'),
     path('stocktaking/surplus/<int:pk>/edit/', views.StocktakingSurplusUpdateView.as_view(), name='stocktaking_surplus_edit'),
     path('stocktaking/surplus/<int:pk>/delete/', views.StocktakingSurplusDeleteView.as_view(), name='stocktaking_surplus_delete'),
     path('stocktaking/surplus/<int:pk>/lock/', views.StocktakingSurplusLockView.as_view(), name='stocktaking_surplus_lock'),
+    path('stocktaking/surplus/lock/bulk/', views.StocktakingSurplusLockView.as_view(), name='stocktaking_surplus_bulk_lock'),
     path('stocktaking/records/', views.StocktakingRecordListView.as_view(), name='stocktaking_records'),
     path('stocktaking/records/create/', views.StocktakingRecordCreateView.as_view(), name='stocktaking_record_create'),
     path('stocktaking/records/<int:pk>/edit/', views.StocktakingRecordUpdateView.as_view(), name='stocktaking_record_edit'),
     path('stocktaking/records/<int:pk>/delete/', views.StocktakingRecordDeleteView.as_view(), name='stocktaking_record_delete'),
     path('stocktaking/records/<int:pk>/lock/', views.StocktakingRecordLockView.as_view(), name='stocktaking_record_lock'),
+    path('stocktaking/records/lock/bulk/', views.StocktakingRecordLockView.as_view(), name='stocktaking_record_bulk_lock'),
+    path('stocktaking/sessions/start/', views.CountSessionStartView.as_view(), name='stocktaking_session_start'),
+    path('stocktaking/sessions/<int:pk>/', views.CountSessionDetailView.as_view(), name='stocktaking_session_detail'),
+    path('stocktaking/sessions/<int:pk>/counts/', views.CountSessionCountsView.as_view(), name='stocktaking_session_counts'),
+    path('stocktaking/sessions/<int:pk>/variances/', views.CountSessionVariancesView.as_view(), name='stocktaking_session_variances'),
+    path('stocktaking/sessions/<int:pk>/post/', views.CountSessionPostView.as_view(), name='stocktaking_session_post'),
+    path('stocktaking/sessions/<int:pk>/cancel/', views.CountSessionCancelView.as_view(), name='stocktaking_session_cancel'),
     
     # Warehouse Requests
     path('warehouse-requests/', views.WarehouseRequestListView.as_view(), name='warehouse_requests'),
     path('warehouse-requests/create/', views.WarehouseRequestCreateView.as_view(), name='warehouse_request_create'),
+    path('warehouse-requests/wave/', views.WavePickingView.as_view(), name='warehouse_request_wave'),
+    path('warehouse-requests/wave/<str:wave_code>/pick-list/', views.WavePickListView.as_view(), name='warehouse_request_wave_pick_list'),
     path('warehouse-requests/<int:pk>/edit/', views.WarehouseRequestUpdateView.as_view(), name='warehouse_request_edit'),
     path('warehouse-requests/<int:pk>/approve/', views.WarehouseRequestApproveView.as_view(), name='warehouse_request_approve'),
     # Intermediate selection views (quantity selection)
@@ -163,6 +180,8 @@ urlpatterns = [
     
     # Inventory Balance
     path('balance/', views.InventoryBalanceView.as_view(), name='inventory_balance'),
+    path('balance/low-stock/', views.LowStockView.as_view(), name='low_stock'),
     path('balance/details/<int:item_id>/<int:warehouse_id>/', views.InventoryBalanceDetailsView.as_view(), name='balance_details'),
+    path('balance/details/<int:item_id>/<int:warehouse_id>/export/', views.InventoryBalanceExportView.as_view(), name='balance_details_export'),
     path('api/balance/', views.InventoryBalanceAPIView.as_view(), name='inventory_balance_api'),
 ]
@@ -1,10 +1,47 @@
 """
 Jalali (Persian) date utility functions for converting between Jalali and Gregorian dates.
 All dates are stored as Gregorian in the database, but displayed and entered as Jalali in the UI.
+
+Conversions are memoized (``functools.lru_cache``): a list page renders the
+same few dates many times, so each distinct date is converted once per
+process. The period helpers return Gregorian ``[start, end)`` boundaries of
+Jalali months, quarters and years so reports can bucket rows in SQL with
+range predicates instead of converting every row in Python.
 """
+from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Optional, Union
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
 import jdatetime
+from django.db.models import Case, CharField, Value, When
+
+# Distinct dates/strings kept per process (about 11 years of days)
+JALALI_CACHE_SIZE = 4096
+
+PERIOD_MONTH = 'month'
+PERIOD_QUARTER = 'quarter'
+PERIOD_YEAR = 'year'
+
+
+@lru_cache(maxsize=JALALI_CACHE_SIZE)
+def _jalali_parts(gregorian_date: date) -> Tuple[int, int, int]:
+    jalali = jdatetime.date.fromgregorian(date=gregorian_date)
+    return jalali.year, jalali.month, jalali.day
+
+
+@lru_cache(maxsize=JALALI_CACHE_SIZE)
+def _format_jalali(gregorian_date: date, format_str: str) -> Optional[str]:
+    try:
+        return jdatetime.date(*_jalali_parts(gregorian_date)).strftime(format_str)
+    except (ValueError, AttributeError):
+        return None
+
+
+def jalali_parts(gregorian_date: Union[date, datetime]) -> Tuple[int, int, int]:
+    """``(year, month, day)`` of a Gregorian date in the Jalali calendar."""
+    if isinstance(gregorian_date, datetime):
+        gregorian_date = gregorian_date.date()
+    return _jalali_parts(gregorian_date)
 
 
 def gregorian_to_jalali(gregorian_date: Union[date, datetime, str, None], format_str: str = '%Y/%m/%d') -> Optional[str]:
@@ -39,11 +76,7 @@ def gregorian_to_jalali(gregorian_date: Union[date, datetime, str, None], format
     if not isinstance(gregorian_date, date):
         return None
     
-    try:
-        jalali = jdatetime.date.fromgregorian(date=gregorian_date)
-        return jalali.strftime(format_str)
-    except (ValueError, AttributeError):
-        return None
+    return _format_jalali(gregorian_date, format_str)
 
 
 def jalali_to_gregorian(jalali_date: Union[str, None], format_str: str = '%Y/%m/%d') -> Optional[date]:
@@ -65,10 +98,11 @@ def jalali_to_gregorian(jalali_date: Union[str, None], format_str: str = '%Y/%m/
     """
     if not jalali_date:
         return None
-    
-    # Clean and normalize input
-    jalali_date = jalali_date.strip()
-    
+    return _parse_jalali(jalali_date.strip(), format_str)
+
+
+@lru_cache(maxsize=JALALI_CACHE_SIZE)
+def _parse_jalali(jalali_date: str, format_str: str) -> Optional[date]:
     # Try multiple formats
     formats_to_try = [
         '%Y/%m/%d',      # 1403/09/15
@@ -118,3 +152,106 @@ def today_gregorian() -> date:
     """Get today's date as Gregorian date (same as date.today())."""
     return jdatetime.date.today().togregorian()
 
+
+
+@dataclass(frozen=True)
+class JalaliPeriod:
+    """A Jalali month, quarter or year with its Gregorian ``[start, end)`` range."""
+
+    label: str
+    year: int
+    # Month (1-12), quarter (1-4) or 0 for a whole year
+    number: int
+    start: date
+    end: date
+
+    def contains(self, value: Union[date, datetime]) -> bool:
+        if isinstance(value, datetime):
+            value = value.date()
+        return self.start <= value < self.end
+
+
+@lru_cache(maxsize=JALALI_CACHE_SIZE)
+def _month_start(year: int, month: int) -> date:
+    # Months past Esfand roll over into the next year
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return jdatetime.date(year, month, 1).togregorian()
+
+
+def jalali_month_range(year: int, month: int) -> Tuple[date, date]:
+    """Gregorian ``[start, end)`` of Jalali ``year/month``."""
+    return _month_start(year, month), _month_start(year, month + 1)
+
+
+def jalali_quarter_range(year: int, quarter: int) -> Tuple[date, date]:
+    """Gregorian ``[start, end)`` of a Jalali quarter (1 = Farvardin-Khordad)."""
+    first_month = (quarter - 1) * 3 + 1
+    return _month_start(year, first_month), _month_start(year, first_month + 3)
+
+
+def jalali_year_range(year: int) -> Tuple[date, date]:
+    """Gregorian ``[start, end)`` of Jalali ``year``."""
+    return _month_start(year, 1), _month_start(year + 1, 1)
+
+
+def jalali_periods(start: Union[date, datetime], end: Union[date, datetime],
+                   period: str = PERIOD_MONTH) -> List[JalaliPeriod]:
+    """
+    Jalali periods overlapping the Gregorian dates ``start``..``end`` (inclusive), in order.
+
+    ``period`` is ``'month'`` (label ``1403/09``), ``'quarter'`` (``1403-Q3``)
+    or ``'year'`` (``1403``). The first and last periods keep their full
+    boundaries, not the clipped range.
+    """
+    if period not in (PERIOD_MONTH, PERIOD_QUARTER, PERIOD_YEAR):
+        raise ValueError(f"Unknown Jalali period: {period}")
+    if isinstance(end, datetime):
+        end = end.date()
+    year, month, _day = jalali_parts(start)
+    if period == PERIOD_MONTH:
+        number = month
+    elif period == PERIOD_QUARTER:
+        number = (month - 1) // 3 + 1
+    else:
+        number = 0
+
+    periods: List[JalaliPeriod] = []
+    while True:
+        if period == PERIOD_MONTH:
+            period_start, period_end = jalali_month_range(year, number)
+            label = f'{year:04d}/{number:02d}'
+        elif period == PERIOD_QUARTER:
+            period_start, period_end = jalali_quarter_range(year, number)
+            label = f'{year:04d}-Q{number}'
+        else:
+            period_start, period_end = jalali_year_range(year)
+            label = f'{year:04d}'
+        if period_start > end:
+            return periods
+        periods.append(JalaliPeriod(label, year, number, period_start, period_end))
+        if period == PERIOD_YEAR or number == (12 if period == PERIOD_MONTH else 4):
+            year, number = year + 1, (number and 1)
+        else:
+            number += 1
+
+
+def jalali_period_case(field_name: str, periods: List[JalaliPeriod]) -> Case:
+    """
+    SQL expression labelling ``field_name`` with the Jalali period it falls in.
+
+    Use with ``annotate()``/``values()`` to group a queryset by Jalali period in
+    the database; rows outside every period get ``NULL``::
+
+        periods = jalali_periods(date_from, date_to)
+        (queryset.filter(document_date__gte=periods[0].start, document_date__lt=periods[-1].end)
+         .annotate(period=jalali_period_case('document_date', periods))
+         .values('period').annotate(total=Sum('quantity')))
+    """
+    return Case(
+        *[
+            When(**{f'{field_name}__gte': p.start, f'{field_name}__lt': p.end}, then=Value(p.label))
+            for p in periods
+        ],
+        default=None,
+        output_field=CharField(),
+    )
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# Below this estimate an exact COUNT(*) is cheap enough and always preferred.
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(queryset, threshold: int = EXACT_COUNT_THRESHOLD) -> int:
+    """Return the planner's row estimate for ``queryset`` (exact count when small).
+
+    On PostgreSQL the estimate comes from ``EXPLAIN`` and costs no table scan;
+    other backends fall back to ``queryset.count()``.
+    """
+
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate < threshold:
+        return queryset.count()
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that uses ``estimate_count`` instead of ``COUNT(*)`` on large lists."""
+
+    @cached_property
+    def count(self) -> int:
+        return estimate_count(self.object_list)
+
+
+def _encode_cursor(values: Sequence[Any]) -> str:
+    payload = [value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _ordering_field(model, name: str):
+    """Model field behind an ordering name (``pk``, ``field`` or ``relation__field``)."""
+
+    *relations, last = name.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.pk if last == "pk" else model._meta.get_field(last)
+
+
+def _decode_cursor(cursor: Optional[str], model, fields: List[Tuple[str, bool]]) -> Optional[List[Any]]:
+    """Cursor values coerced to their fields' types; ``None`` (first page) when invalid."""
+
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        values = [_ordering_field(model, name).to_python(value) for (name, _), value in zip(fields, values)]
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError, ValidationError, FieldDoesNotExist):
+        return None
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def _parse_ordering(ordering: Sequence[str]) -> List[Tuple[str, bool]]:
+    return [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+
+def _keyset_filter(fields: List[Tuple[str, bool]], values: Sequence[Any], forward: bool) -> Q:
+    """Build ``(a, b) > (x, y)``-style filter respecting each field's direction."""
+
+    condition = Q()
+    for index in range(len(fields) - 1, -1, -1):
+        name, descending = fields[index]
+        lookup = "lt" if descending == forward else "gt"
+        step = Q(**{f"{name}__{lookup}": values[index]})
+        if index < len(fields) - 1:
+            step |= Q(**{name: values[index]}) & condition
+        condition = step
+    return condition
+
+
+class KeysetPaginator:
+    """Minimal paginator facade for keyset pages (no page numbers)."""
+
+    def __init__(self, queryset, per_page: int, estimate: bool = False):
+        self.object_list = queryset
+        self.per_page = per_page
+        self.estimate = estimate
+
+    @cached_property
+    def count(self) -> int:
+        if self.estimate:
+            return estimate_count(self.object_list)
+        return self.object_list.count()
+
+    @property
+    def num_pages(self) -> int:
+        return max(1, -(-self.count // self.per_page))
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset.
+
+    Navigation uses ``?after=<cursor>`` / ``?before=<cursor>`` instead of
+    ``?page=N`` so late pages cost the same as the first one.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, *, has_next, has_previous, next_cursor, previous_cursor, query=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._query = query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    def _querystring(self, key: str, cursor: Optional[str]) -> str:
+        query = self._query.copy() if self._query is not None else None
+        if query is None:
+            return f"?{key}={cursor}"
+        for name in ("page", "after", "before"):
+            query.pop(name, None)
+        if cursor:
+            query[key] = cursor
+        return f"?{query.urlencode()}"
+
+    @property
+    def next_querystring(self) -> str:
+        return self._querystring("after", self.next_cursor)
+
+    @property
+    def previous_querystring(self) -> str:
+        return self._querystring("before", self.previous_cursor)
+
+    @property
+    def first_querystring(self) -> str:
+        return self._querystring("after", None)
+
+
+def paginate_keyset(
+    queryset,
+    per_page: int,
+    ordering: Sequence[str] = ("-document_date", "-id"),
+    *,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    estimate: bool = False,
+    query=None,
+) -> KeysetPage:
+    """Return the page after/before the given cursor ordered by ``ordering``.
+
+    ``ordering`` must end with a unique field (normally ``id``) so cursors
+    are unambiguous. ``query`` is the request ``GET`` QueryDict used to build
+    navigation links that keep the active filters.
+    """
+
+    fields = _parse_ordering(ordering)
+    paginator = KeysetPaginator(queryset, per_page, estimate=estimate)
+    after_values = _decode_cursor(after, queryset.model, fields)
+    before_values = _decode_cursor(before, queryset.model, fields) if after_values is None else None
+
+    if before_values is not None:
+        reverse_ordering = [f"{'' if descending else '-'}{name}" for name, descending in fields]
+        rows = list(
+            queryset.filter(_keyset_filter(fields, before_values, forward=False))
+            .order_by(*reverse_ordering)[: per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        page_queryset = queryset.order_by(*ordering)
+        if after_values is not None:
+            page_queryset = page_queryset.filter(_keyset_filter(fields, after_values, forward=True))
+        rows = list(page_queryset[: per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after_values is not None
+
+    def cursor_for(obj):
+        return _encode_cursor([getattr(obj, name) for name, _ in fields])
+
+    return KeysetPage(
+        rows,
+        paginator,
+        has_next=has_next and bool(rows),
+        has_previous=has_previous and bool(rows),
+        next_cursor=cursor_for(rows[-1]) if rows else None,
+        previous_cursor=cursor_for(rows[0]) if rows else None,
+        query=query,
+    )
@@ -166,11 +166,27 @@ from .stocktaking import (
     StocktakingRecordLockView,
 )
 
+# Import stocktaking count session endpoints
+from .stocktaking_sessions import (
+    CountSessionStartView,
+    CountSessionDetailView,
+    CountSessionCountsView,
+    CountSessionVariancesView,
+    CountSessionPostView,
+    CountSessionCancelView,
+)
+from .wave_picking import (
+    WavePickingView,
+    WavePickListView,
+)
+
 # Import balance views (already refactored with Type Hints)
 from .balance import (
     InventoryBalanceView,
     InventoryBalanceDetailsView,
+    InventoryBalanceExportView,
     InventoryBalanceAPIView,
+    LowStockView,
 )
 
 # Import master data views (already refactored with Type Hints)
@@ -325,10 +341,20 @@ __all__ = [
     'StocktakingRecordUpdateView',
     'StocktakingRecordDeleteView',
     'StocktakingRecordLockView',
+    'CountSessionStartView',
+    'CountSessionDetailView',
+    'CountSessionCountsView',
+    'CountSessionVariancesView',
+    'CountSessionPostView',
+    'CountSessionCancelView',
+    'WavePickingView',
+    'WavePickListView',
     # Balance (refactored)
     'InventoryBalanceView',
     'InventoryBalanceDetailsView',
+    'InventoryBalanceExportView',
     'InventoryBalanceAPIView',
+    'LowStockView',
     # API (refactored)
     'get_item_allowed_units',
     'get_item_units',
@@ -422,7 +448,8 @@ if _views_py_path.exists():
         'StocktakingSurplusDeleteView', 'StocktakingSurplusLockView',
         'StocktakingRecordListView', 'StocktakingRecordCreateView', 'StocktakingRecordUpdateView',
         'StocktakingRecordDeleteView', 'StocktakingRecordLockView',
-        'InventoryBalanceView', 'InventoryBalanceDetailsView', 'InventoryBalanceAPIView',
+        'InventoryBalanceView', 'InventoryBalanceDetailsView', 'InventoryBalanceExportView', 'InventoryBalanceAPIView',
+        'LowStockView',
     }
     
     # Import all public classes from views_module
@@ -11,6 +11,7 @@ from django.http import JsonResponse, HttpRequest
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from .. import models
+from ..services import units as unit_service
 from ..forms import UNIT_CHOICES
 
 logger = logging.getLogger('inventory.views.api')
@@ -66,29 +67,15 @@ def get_item_allowed_units(request: HttpRequest) -> JsonResponse:
         logger.info(f"  Default unit: {item.default_unit}")
         logger.info(f"  Primary unit: {item.primary_unit}")
         
-        codes: List[str] = []
-        def add(code: str) -> None:
-            if code and code not in codes:
-                codes.append(code)
-        
-        # Add default and primary units (always add both, even if same or None)
-        add(item.default_unit)
-        add(item.primary_unit)
-        
-        # Add units from ItemUnit conversions
-        item_units = models.ItemUnit.objects.filter(item=item, company_id=item.company_id)
-        logger.info(f"get_item_allowed_units: Found {item_units.count()} ItemUnit conversions")
-        for unit in item_units:
-            logger.info(f"  Conversion: {unit.from_unit} -> {unit.to_unit}")
-            add(unit.from_unit)
-            add(unit.to_unit)
+        # Default and primary units plus every unit of the ItemUnit conversions
+        codes: List[str] = unit_service.get_unit_table(item).allowed_units()
         
         logger.info(f"get_item_allowed_units: Total unique unit codes: {len(codes)}")
         logger.info(f"  Codes: {codes}")
         
         # Map to labels
         label_map = {value: str(label) for value, label in UNIT_CHOICES}
-        units = [{'value': code, 'label': label_map.get(code, code)} for code in codes if code]
+        units = [{'value': code, 'label': label_map.get(code, code)} for code in codes]
         
         logger.info(f"get_item_allowed_units: Returning {len(units)} units")
         for unit in units:
@@ -0,0 +1,177 @@
+"""
+Read-only REST API of the inventory module (``/api/v1/inventory/``).
+
+Company scoping, feature permissions, cursor pagination, ``updated_since``,
+``fields`` and ETags come from ``shared.api``.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import date
+from typing import List, Optional
+
+from django.db.models import Prefetch
+from rest_framework import exceptions, viewsets
+from rest_framework.response import Response
+
+from shared.api import CompanyReadOnlyViewSet, ETagMixin, FeaturePermission, get_api_company_id
+
+from .. import inventory_balance, models
+from .. import serializers as api_serializers
+
+
+class ItemViewSet(CompanyReadOnlyViewSet):
+    queryset = models.Item.objects.all()
+    serializer_class = api_serializers.ItemSerializer
+    feature_code = 'inventory.master.items'
+    filterset_fields = ('type', 'category', 'subcategory', 'is_enabled', 'is_sellable')
+
+
+class WarehouseViewSet(CompanyReadOnlyViewSet):
+    queryset = models.Warehouse.objects.all()
+    serializer_class = api_serializers.WarehouseSerializer
+    feature_code = 'inventory.master.warehouses'
+    filterset_fields = ('is_enabled',)
+
+
+class ItemSerialViewSet(CompanyReadOnlyViewSet):
+    queryset = models.ItemSerial.objects.all()
+    serializer_class = api_serializers.ItemSerialSerializer
+    feature_code = 'inventory.master.item_serials'
+    filterset_fields = ('item', 'current_status', 'current_warehouse')
+
+
+class DocumentViewSet(CompanyReadOnlyViewSet):
+    """Document headers with their lines (one prefetch query per page)."""
+
+    filterset_fields = {
+        'is_locked': ['exact'],
+        'is_enabled': ['exact'],
+        'document_date': ['exact', 'gte', 'lte'],
+    }
+
+    def get_queryset(self):
+        line_model = self.queryset.model._meta.get_field('lines').related_model
+        return super().get_queryset().prefetch_related(
+            Prefetch('lines', queryset=line_model.objects.order_by('sort_order', 'id')),
+        )
+
+    def get_serializer_class(self):
+        return api_serializers.document_serializer(self.queryset.model)
+
+
+class ReceiptTemporaryViewSet(DocumentViewSet):
+    queryset = models.ReceiptTemporary.objects.all()
+    feature_code = 'inventory.receipts.temporary'
+
+
+class ReceiptPermanentViewSet(DocumentViewSet):
+    queryset = models.ReceiptPermanent.objects.all()
+    feature_code = 'inventory.receipts.permanent'
+
+
+class ReceiptConsignmentViewSet(DocumentViewSet):
+    queryset = models.ReceiptConsignment.objects.all()
+    feature_code = 'inventory.receipts.consignment'
+
+
+class IssuePermanentViewSet(DocumentViewSet):
+    queryset = models.IssuePermanent.objects.all()
+    feature_code = 'inventory.issues.permanent'
+
+
+class IssueConsumptionViewSet(DocumentViewSet):
+    queryset = models.IssueConsumption.objects.all()
+    feature_code = 'inventory.issues.consumption'
+
+
+class IssueConsignmentViewSet(DocumentViewSet):
+    queryset = models.IssueConsignment.objects.all()
+    feature_code = 'inventory.issues.consignment'
+
+
+class StocktakingDeficitViewSet(DocumentViewSet):
+    queryset = models.StocktakingDeficit.objects.all()
+    feature_code = 'inventory.stocktaking.deficit'
+
+
+class StocktakingSurplusViewSet(DocumentViewSet):
+    queryset = models.StocktakingSurplus.objects.all()
+    feature_code = 'inventory.stocktaking.surplus'
+
+
+def _id_list(raw: Optional[str], name: str) -> Optional[List[int]]:
+    if not raw:
+        return None
+    try:
+        return [int(value) for value in raw.split(',') if value.strip()]
+    except ValueError:
+        raise exceptions.ValidationError({name: 'Expected comma-separated integer IDs.'})
+
+
+class BalanceViewSet(ETagMixin, viewsets.ViewSet):
+    """
+    Balance of every (warehouse, item) with at least one movement.
+
+    ``?as_of=YYYY-MM-DD``, ``?warehouse=1,2`` and ``?item=3,4`` narrow the
+    result; rows are ordered by warehouse and item and paged with an opaque
+    ``cursor`` (``page_size`` rows, at most ``max_page_size``).
+    """
+
+    feature_code = 'inventory.balance'
+    permission_classes = [FeaturePermission]
+    page_size = 500
+    max_page_size = 5000
+
+    def list(self, request):
+        as_of_date = None
+        if request.query_params.get('as_of'):
+            try:
+                as_of_date = date.fromisoformat(request.query_params['as_of'])
+            except ValueError:
+                raise exceptions.ValidationError({'as_of': 'Expected an ISO 8601 date.'})
+        quantities = inventory_balance.get_company_quantities(
+            get_api_company_id(request),
+            as_of_date,
+            item_ids=_id_list(request.query_params.get('item'), 'item'),
+            warehouse_ids=_id_list(request.query_params.get('warehouse'), 'warehouse'),
+        )
+
+        try:
+            page_size = max(1, min(int(request.query_params.get('page_size', self.page_size)), self.max_page_size))
+        except ValueError:
+            page_size = self.page_size
+        keys = sorted(quantities)
+        after = self._decode_cursor(request.query_params.get('cursor'))
+        if after is not None:
+            keys = [key for key in keys if key > after]
+        page, remaining = keys[:page_size], keys[page_size:]
+
+        serializer = api_serializers.BalanceSerializer(
+            [{'warehouse': warehouse_id, 'item': item_id, 'quantity': quantities[(warehouse_id, item_id)]}
+             for warehouse_id, item_id in page],
+            many=True,
+            context={'request': request},
+        )
+        next_url = None
+        if remaining:
+            query = request.query_params.copy()
+            query['cursor'] = self._encode_cursor(page[-1])
+            next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+        return Response({'next': next_url, 'results': serializer.data})
+
+    @staticmethod
+    def _encode_cursor(key) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]):
+        if not cursor:
+            return None
+        try:
+            warehouse_id, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return int(warehouse_id), int(item_id)
+        except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+            raise exceptions.ValidationError({'cursor': 'Invalid cursor.'})
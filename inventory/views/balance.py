@@ -3,18 +3,25 @@ Inventory Balance views for inventory module.
 
 This module contains views for:
 - Inventory Balance Display
-- Inventory Balance Details
+- Inventory Balance Details (stock card) and its CSV/JSON export
 - Inventory Balance API
+- Low Stock (items below their reorder point)
 """
-from typing import Dict, Any, Optional
+import csv
+import json
+from typing import Dict, Any, Iterator, Optional, Tuple
 from datetime import date
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views import View
 from django.views.generic import TemplateView
-from django.http import JsonResponse
 from django.utils.translation import gettext_lazy as _
 
 from .base import InventoryBaseView
+from shared.mixins import FeaturePermissionRequiredMixin
 from .. import models
 from .. import inventory_balance
+from ..services import reorder, stock_card, valuation
 
 
 class InventoryBalanceView(InventoryBaseView, TemplateView):
@@ -81,6 +88,9 @@ class InventoryBalanceView(InventoryBaseView, TemplateView):
                 context['balances'] = balances
                 context['total_items'] = len(balances)
                 context['total_balance_value'] = sum(b['current_balance'] for b in balances)
+                # Maintained valuation state is current; it has no as-of history
+                if not as_of_date:
+                    context['inventory_value'] = valuation.get_warehouse_value(company_id, int(warehouse_id))
             except Exception as e:
                 context['error'] = str(e)
                 context['balances'] = []
@@ -90,335 +100,203 @@ class InventoryBalanceView(InventoryBaseView, TemplateView):
         return context
 
 
-class InventoryBalanceDetailsView(InventoryBaseView, TemplateView):
+class LowStockView(FeaturePermissionRequiredMixin, InventoryBaseView, TemplateView):
     """
-    Display detailed transaction history (receipts and issues) for a specific item in a warehouse.
-    Shows all movements from baseline date to as_of_date.
+    Items below their reorder point.
+
+    Without filters the open low-stock alerts are listed (cached per company,
+    kept current by posting and the ``sweep_low_stock`` command); selecting a
+    warehouse evaluates its balances live.
     """
-    template_name = 'inventory/inventory_balance_details.html'
-    
+    template_name = 'inventory/low_stock.html'
+    feature_code = 'inventory.balance'
+    required_action = 'view_own'
+
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
-        """Get transaction history for item in warehouse."""
         context = super().get_context_data(**kwargs)
-        
-        item_id = kwargs.get('item_id')
-        warehouse_id = kwargs.get('warehouse_id')
-        as_of_date = self.request.GET.get('as_of_date')
-        
-        # Parse date
-        if as_of_date:
+        company_id: Optional[int] = self.request.session.get('active_company_id')
+        warehouse_id = self.request.GET.get('warehouse_id')
+        context['warehouses'] = models.Warehouse.objects.filter(
+            company_id=company_id, is_enabled=1
+        ).order_by('name')
+        context['selected_warehouse_id'] = warehouse_id
+        if not company_id:
+            context['rows'] = []
+        elif warehouse_id and warehouse_id.isdigit():
+            context['rows'] = inventory_balance.get_low_stock_items(company_id, warehouse_id=int(warehouse_id))
+            context['live'] = True
+        else:
+            context['rows'] = [
+                {
+                    'item_id': alert['item_id'],
+                    'item_code': alert['item__item_code'],
+                    'item_name': alert['item__name'],
+                    'unit': alert['item__default_unit'],
+                    'warehouse_id': alert['warehouse_id'],
+                    'warehouse_code': alert['warehouse__public_code'],
+                    'warehouse_name': alert['warehouse__name'],
+                    'quantity': alert['quantity'],
+                    'threshold': alert['threshold'],
+                    'reorder_quantity': alert['reorder_quantity'],
+                    'shortage': alert['threshold'] - alert['quantity'],
+                    'opened_at': alert['opened_at'],
+                    'purchase_request_code': alert['purchase_request__request_code'],
+                }
+                for alert in reorder.get_open_alerts(company_id)
+            ]
+        return context
+
+
+def _parse_as_of_date(value: Optional[str]) -> date:
+    """Gregorian (YYYY-MM-DD) or Jalali (YYYY/MM/DD) date; today when missing or invalid."""
+    if value:
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
             try:
-                as_of_date = date.fromisoformat(as_of_date)
-            except ValueError:
-                try:
-                    from ..utils.jalali import jalali_to_gregorian
-                    as_of_date = jalali_to_gregorian(as_of_date)
-                except (ValueError, TypeError):
-                    as_of_date = None
-        
-        if not as_of_date:
-            as_of_date = date.today()
-        
-        # Get company_id from session
+                from ..utils.jalali import jalali_to_gregorian
+                return jalali_to_gregorian(value)
+            except (ValueError, TypeError):
+                pass
+    return date.today()
+
+
+class StockCardMixin:
+    """Item, warehouse and ledger summary of a stock card request."""
+
+    def get_company_id(self) -> int:
         company_id: Optional[int] = self.request.session.get('active_company_id')
         if not company_id:
             company_id = self.request.user.usercompanyaccess_set.first().company_id if self.request.user.usercompanyaccess_set.exists() else 1
-        
-        # Get item and warehouse
+        return company_id
+
+    def get_stock_card(self) -> Tuple[models.Item, models.Warehouse, stock_card.StockCardSummary]:
+        company_id = self.get_company_id()
+        item = get_object_or_404(models.Item, id=self.kwargs['item_id'], company_id=company_id)
+        warehouse = get_object_or_404(models.Warehouse, id=self.kwargs['warehouse_id'], company_id=company_id)
+        summary = stock_card.get_stock_card_summary(
+            company_id, warehouse.pk, item.pk, _parse_as_of_date(self.request.GET.get('as_of_date')),
+        )
+        return item, warehouse, summary
+
+
+class InventoryBalanceDetailsView(StockCardMixin, InventoryBaseView, TemplateView):
+    """
+    Stock card of an item in a warehouse: movements from the stocktaking
+    baseline to as_of_date with running balance, one cursor page at a time.
+    """
+    template_name = 'inventory/inventory_balance_details.html'
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        """Get one page of the transaction history for item in warehouse."""
+        context = super().get_context_data(**kwargs)
         try:
-            item = models.Item.objects.get(id=item_id, company_id=company_id)
-            warehouse = models.Warehouse.objects.get(id=warehouse_id, company_id=company_id)
-        except models.Item.DoesNotExist:
-            context['error'] = _('Item not found')
+            item, warehouse, summary = self.get_stock_card()
+        except Http404:
+            context['error'] = _('Item or warehouse not found')
             return context
-        except models.Warehouse.DoesNotExist:
-            context['error'] = _('Warehouse not found')
-            return context
-        
-        # Get baseline
-        baseline = inventory_balance.get_last_stocktaking_baseline(
-            company_id, warehouse_id, item_id, as_of_date
+
+        page = stock_card.get_stock_card_page(
+            summary, self.get_company_id(), warehouse.pk, item.pk, after=self.request.GET.get('after'),
         )
-        baseline_date = baseline['baseline_date'] or date(1900, 1, 1)
-        
-        # Get all receipts (positive movements)
-        receipts_perm = models.ReceiptPermanentLine.objects.filter(
-            company_id=company_id,
-            warehouse_id=warehouse_id,
-            item_id=item_id,
-            document__document_date__gte=baseline_date,
-            document__document_date__lte=as_of_date,
-            document__is_enabled=1,
-        ).select_related('document', 'document__created_by', 'supplier').order_by('document__document_date', 'id')
-        
-        receipts_consignment = models.ReceiptConsignmentLine.objects.filter(
-            company_id=company_id,
-            warehouse_id=warehouse_id,
-            item_id=item_id,
-            document__document_date__gte=baseline_date,
-            document__document_date__lte=as_of_date,
-            document__is_enabled=1,
-        ).select_related('document', 'document__created_by', 'supplier').order_by('document__document_date', 'id')
-        
-        # Get all issues (negative movements)
-        issues_permanent = models.IssuePermanentLine.objects.filter(
-            company_id=company_id,
-            warehouse_id=warehouse_id,
-            item_id=item_id,
-            document__document_date__gte=baseline_date,
-            document__document_date__lte=as_of_date,
-            document__is_enabled=1,
-        ).select_related('document', 'document__created_by', 'document__department_unit').order_by('document__document_date', 'id')
-        
-        issues_consumption = models.IssueConsumptionLine.objects.filter(
-            company_id=company_id,
-            warehouse_id=warehouse_id,
-            item_id=item_id,
-            document__document_date__gte=baseline_date,
-            document__document_date__lte=as_of_date,
-            document__is_enabled=1,
-        ).select_related('document', 'document__created_by', 'document__department_unit', 'work_line').order_by('document__document_date', 'id')
-        
-        issues_consignment = models.IssueConsignmentLine.objects.filter(
-            company_id=company_id,
-            warehouse_id=warehouse_id,
-            item_id=item_id,
-            document__document_date__gte=baseline_date,
-            document__document_date__lte=as_of_date,
-            document__is_enabled=1,
-        ).select_related('document', 'document__created_by', 'document__department_unit').order_by('document__document_date', 'id')
-        
-        # Get stocktaking surplus (positive movements)
-        # Include surplus documents on or after baseline_date
-        surplus_lines = models.StocktakingSurplusLine.objects.filter(
-            company_id=company_id,
-            warehouse_id=warehouse_id,
-            item_id=item_id,
-            document__document_date__gte=baseline_date,
-            document__document_date__lte=as_of_date,
-            document__is_locked=1,
-            document__is_enabled=1,
-        ).select_related('document', 'document__created_by').order_by('document__document_date', 'id')
-        
-        # Get stocktaking deficit (negative movements)
-        # Include deficit documents on or after baseline_date
-        deficit_lines = models.StocktakingDeficitLine.objects.filter(
-            company_id=company_id,
-            warehouse_id=warehouse_id,
-            item_id=item_id,
-            document__document_date__gte=baseline_date,
-            document__document_date__lte=as_of_date,
-            document__is_locked=1,
-            document__is_enabled=1,
-        ).select_related('document', 'document__created_by').order_by('document__document_date', 'id')
-        
-        # Combine all transactions
-        transactions = []
-        
-        # Add receipts
-        for receipt in receipts_perm:
-            # Get supplier from line - show name only
-            source_info = '—'
-            if receipt.supplier:
-                source_info = receipt.supplier.name
-            
-            transactions.append({
-                'date': receipt.document.document_date,
-                'type': 'receipt',
-                'type_label': _('Permanent Receipt'),
-                'document_code': receipt.document.document_code,
-                'document_id': receipt.document.pk,
-                'document_type': 'permanent_receipt',
-                'quantity': receipt.quantity,
-                'unit': receipt.unit,
-                'created_by': receipt.document.created_by.username if receipt.document.created_by else '—',
-                'source_destination': source_info,
-            })
-        
-        for receipt in receipts_consignment:
-            # Get supplier from line - show name only
-            source_info = '—'
-            if receipt.supplier:
-                source_info = receipt.supplier.name
-            
-            transactions.append({
-                'date': receipt.document.document_date,
-                'type': 'receipt',
-                'type_label': _('Consignment Receipt'),
-                'document_code': receipt.document.document_code,
-                'document_id': receipt.document.pk,
-                'document_type': 'consignment_receipt',
-                'quantity': receipt.quantity,
-                'unit': receipt.unit,
-                'created_by': receipt.document.created_by.username if receipt.document.created_by else '—',
-                'source_destination': source_info,
-            })
-        
-        # Add issues
-        for issue in issues_permanent:
-            # Get destination from document department_unit - show name only
-            destination_info = '—'
-            if issue.document.department_unit:
-                destination_info = issue.document.department_unit.name
-            elif issue.destination_code:
-                # Try to get department unit name from destination_code
-                from shared.models import CompanyUnit
-                try:
-                    dept_unit = CompanyUnit.objects.filter(
-                        company_id=company_id,
-                        public_code=issue.destination_code
-                    ).first()
-                    if dept_unit:
-                        destination_info = dept_unit.name
-                    else:
-                        destination_info = issue.destination_code
-                except:
-                    destination_info = issue.destination_code
-            
-            transactions.append({
-                'date': issue.document.document_date,
-                'type': 'issue',
-                'type_label': _('Permanent Issue'),
-                'document_code': issue.document.document_code,
-                'document_id': issue.document.pk,
-                'document_type': 'permanent_issue',
-                'quantity': issue.quantity,
-                'unit': issue.unit,
-                'created_by': issue.document.created_by.username if issue.document.created_by else '—',
-                'source_destination': destination_info,
-            })
-        
-        for issue in issues_consumption:
-            # Get destination from document department_unit or line work_line - show name only
-            destination_info = '—'
-            if issue.work_line:
-                destination_info = issue.work_line.name
-            elif issue.document.department_unit:
-                destination_info = issue.document.department_unit.name
-            elif issue.cost_center_code:
-                # Try to find department unit by cost_center_code
-                from shared.models import CompanyUnit
-                try:
-                    dept_unit = CompanyUnit.objects.filter(
-                        company_id=company_id,
-                        public_code=issue.cost_center_code
-                    ).first()
-                    if dept_unit:
-                        destination_info = dept_unit.name
-                    else:
-                        # If not found, show code as fallback
-                        destination_info = issue.cost_center_code
-                except:
-                    destination_info = issue.cost_center_code
-            
-            transactions.append({
-                'date': issue.document.document_date,
-                'type': 'issue',
-                'type_label': _('Consumption Issue'),
-                'document_code': issue.document.document_code,
-                'document_id': issue.document.pk,
-                'document_type': 'consumption_issue',
-                'quantity': issue.quantity,
-                'unit': issue.unit,
-                'created_by': issue.document.created_by.username if issue.document.created_by else '—',
-                'source_destination': destination_info,
-            })
-        
-        for issue in issues_consignment:
-            # Get destination from document department_unit - show name only
-            destination_info = '—'
-            if issue.document.department_unit:
-                destination_info = issue.document.department_unit.name
-            elif issue.destination_code:
-                # Try to get department unit name from destination_code
-                from shared.models import CompanyUnit
-                try:
-                    dept_unit = CompanyUnit.objects.filter(
-                        company_id=company_id,
-                        public_code=issue.destination_code
-                    ).first()
-                    if dept_unit:
-                        destination_info = dept_unit.name
-                    else:
-                        destination_info = issue.destination_code
-                except:
-                    destination_info = issue.destination_code
-            
-            transactions.append({
-                'date': issue.document.document_date,
-                'type': 'issue',
-                'type_label': _('Consignment Issue'),
-                'document_code': issue.document.document_code,
-                'document_id': issue.document.pk,
-                'document_type': 'consignment_issue',
-                'quantity': issue.quantity,
-                'unit': issue.unit,
-                'created_by': issue.document.created_by.username if issue.document.created_by else '—',
-                'source_destination': destination_info,
-            })
-        
-        # Add stocktaking surplus (positive movements)
-        for surplus_line in surplus_lines:
-            transactions.append({
-                'date': surplus_line.document.document_date,
-                'type': 'receipt',
-                'type_label': _('مازاد انبارگردانی'),  # More specific label
-                'document_code': surplus_line.document.document_code,
-                'document_id': surplus_line.document.pk,
-                'document_type': 'stocktaking_surplus',
-                'quantity': surplus_line.quantity_adjusted,
-                'unit': surplus_line.unit,
-                'created_by': surplus_line.document.created_by.username if surplus_line.document.created_by else '—',
-                'source_destination': '—',
-            })
-        
-        # Add stocktaking deficit (negative movements)
-        for deficit_line in deficit_lines:
-            transactions.append({
-                'date': deficit_line.document.document_date,
-                'type': 'issue',
-                'type_label': _('کسری انبارگردانی'),  # More specific label
-                'document_code': deficit_line.document.document_code,
-                'document_id': deficit_line.document.pk,
-                'document_type': 'stocktaking_deficit',
-                'quantity': deficit_line.quantity_adjusted,
-                'unit': deficit_line.unit,
-                'created_by': deficit_line.document.created_by.username if deficit_line.document.created_by else '—',
-                'source_destination': '—',
-            })
-        
-        # Sort by date
-        transactions.sort(key=lambda x: x['date'])
-        
-        # Calculate running balance
-        running_balance = baseline['baseline_quantity']
-        for transaction in transactions:
-            if transaction['type'] == 'receipt':
-                running_balance += transaction['quantity']
-            else:
-                running_balance -= transaction['quantity']
-            transaction['running_balance'] = running_balance
-        
-        # Calculate current balance
-        current_balance = baseline['baseline_quantity']
-        if transactions:
-            current_balance = transactions[-1]['running_balance']
-        
+        query = self.request.GET.copy()
+        query.pop('after', None)
         context.update({
             'item': item,
             'warehouse': warehouse,
-            'baseline': baseline,
-            'baseline_date': baseline_date,
-            'as_of_date': as_of_date,
-            'transactions': transactions,
-            'total_receipts': sum(t['quantity'] for t in transactions if t['type'] == 'receipt'),
-            'total_issues': sum(t['quantity'] for t in transactions if t['type'] == 'issue'),
-            'current_balance': current_balance,
+            'baseline': summary.baseline,
+            'baseline_date': summary.baseline_date,
+            'as_of_date': summary.as_of_date,
+            'transactions': page.rows,
+            'page': page,
+            'is_first_page': not self.request.GET.get('after'),
+            'first_querystring': query.urlencode(),
+            'total_receipts': summary.total_receipts,
+            'total_issues': summary.total_issues,
+            'movement_count': summary.movement_count,
+            'current_balance': summary.current_balance,
         })
-        
+        if page.next_cursor:
+            query['after'] = page.next_cursor
+            context['next_querystring'] = query.urlencode()
         return context
 
 
+class _Echo:
+    """File-like object whose ``write`` returns the value (for streaming ``csv.writer``)."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class InventoryBalanceExportView(StockCardMixin, InventoryBaseView, View):
+    """
+    Stream the full stock card as CSV (default) or JSON (``?format=json``).
+
+    Rows are read through a server-side cursor and written as they arrive, so
+    memory does not grow with the number of movements.
+    """
+
+    def get(self, request, *args, **kwargs) -> StreamingHttpResponse:
+        item, warehouse, summary = self.get_stock_card()
+        rows = stock_card.iter_stock_card(summary, self.get_company_id(), warehouse.pk, item.pk)
+        filename = f'stock-card-{item.item_code}-{warehouse.public_code}-{summary.as_of_date.isoformat()}'
+        if request.GET.get('format') == 'json':
+            response = StreamingHttpResponse(self._json(item, warehouse, summary, rows), content_type='application/json')
+            response['Content-Disposition'] = f'attachment; filename="{filename}.json"'
+        else:
+            response = StreamingHttpResponse(self._csv(summary, rows), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+
+    def _csv(self, summary, rows) -> Iterator[str]:
+        writer = csv.writer(_Echo())
+        yield '\ufeff'  # Excel reads UTF-8 (Persian labels) only with a BOM
+        yield writer.writerow([
+            'date', 'type', 'document_type', 'document_code', 'source_destination',
+            'created_by', 'quantity', 'unit', 'running_balance',
+        ])
+        yield writer.writerow([
+            summary.baseline_date.isoformat(), 'baseline', '', summary.baseline.get('stocktaking_record_code') or '',
+            '', '', summary.baseline['baseline_quantity'], '', summary.baseline['baseline_quantity'],
+        ])
+        for row in rows:
+            yield writer.writerow([
+                row['date'].isoformat(), row['type'], row['document_type'], row['document_code'],
+                row['source_destination'], row['created_by'], row['signed_quantity'], row['unit'],
+                row['running_balance'],
+            ])
+
+    def _json(self, item, warehouse, summary, rows) -> Iterator[str]:
+        header = {
+            'item_id': item.pk,
+            'item_code': item.item_code,
+            'warehouse_id': warehouse.pk,
+            'warehouse_code': warehouse.public_code,
+            'baseline_date': summary.baseline_date.isoformat(),
+            'baseline_quantity': str(summary.baseline['baseline_quantity']),
+            'as_of_date': summary.as_of_date.isoformat(),
+            'current_balance': str(summary.current_balance),
+        }
+        yield json.dumps(header, ensure_ascii=False)[:-1] + ', "movements": ['
+        separator = ''
+        for row in rows:
+            yield separator + json.dumps({
+                'date': row['date'].isoformat(),
+                'type': row['type'],
+                'document_type': row['document_type'],
+                'document_id': row['document_id'],
+                'document_code': row['document_code'],
+                'source_destination': row['source_destination'],
+                'created_by': row['created_by'],
+                'quantity': str(row['signed_quantity']),
+                'unit': row['unit'],
+                'running_balance': str(row['running_balance']),
+            }, ensure_ascii=False)
+            separator = ', '
+        yield ']}'
+
+
 class InventoryBalanceAPIView(InventoryBaseView, TemplateView):
     """
     JSON API endpoint for inventory balance calculation.
@@ -8,13 +8,20 @@ from typing import Optional, Dict, Any
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import View
-from django.http import HttpResponseRedirect
+from functools import partial
+from django.db import transaction
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Exists, OuterRef, Q
+from django.http import Http404, HttpResponseRedirect
 from django.urls import reverse
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.shortcuts import get_object_or_404
+from shared.mixins import ListStatsMixin
+from shared.utils import change_feed
 from .. import models
 from .. import forms
+from ..services import posting
+from ..utils.pagination import EstimatedCountPaginator, paginate_keyset
 from ..services import serials as serial_service
 import logging
 
@@ -24,6 +31,11 @@ logger = logging.getLogger('inventory.views.base')
 class InventoryBaseView(LoginRequiredMixin):
     """Base view with common context for inventory module."""
     login_url = '/admin/login/'
+    # List pagination: 'offset' (?page=N) or 'keyset' (?after=/?before= cursors)
+    pagination_mode: str = 'offset'
+    keyset_ordering = ('-document_date', '-id')
+    # Use the planner's row estimate instead of COUNT(*) for large lists
+    estimate_count: bool = False
     
     def get_queryset(self):
         """Filter queryset by active company."""
@@ -39,6 +51,60 @@ class InventoryBaseView(LoginRequiredMixin):
         context['active_module'] = 'inventory'
         return context
     
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        """Use an estimated-count paginator when ``estimate_count`` is enabled."""
+        if self.estimate_count:
+            return EstimatedCountPaginator(
+                queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page, **kwargs
+            )
+        return super().get_paginator(queryset, per_page, orphans, allow_empty_first_page, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate with cursors when ``pagination_mode == 'keyset'``."""
+        if self.pagination_mode != 'keyset':
+            return super().paginate_queryset(queryset, page_size)
+        page = paginate_keyset(
+            queryset,
+            page_size,
+            self.keyset_ordering,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+            estimate=self.estimate_count,
+            query=self.request.GET,
+        )
+        return page.paginator, page, page.object_list, page.has_other_pages()
+
+    def filter_by_document_search(self, queryset, search: str):
+        """
+        Match document code or any enabled line's item name/code.
+
+        Line matches go through an ``EXISTS`` subquery so the list needs no
+        join over lines and no ``DISTINCT``.
+        """
+        search = (search or '').strip()
+        if not search:
+            return queryset
+        condition = Q(document_code__icontains=search)
+        try:
+            line_model = queryset.model._meta.get_field('lines').related_model
+        except FieldDoesNotExist:
+            line_model = None
+        if line_model is not None:
+            matching_lines = line_model.objects.filter(
+                document_id=OuterRef('pk'),
+                is_enabled=1,
+            ).filter(
+                Q(item__name__icontains=search) | Q(item__item_code__icontains=search)
+            )
+            condition |= Exists(matching_lines)
+        return queryset.filter(condition)
+
+    def filter_by_posted(self, queryset, posted: Optional[str]):
+        """Apply the ``posted`` (1/0) list filter on ``is_locked``."""
+        if posted in ('0', '1'):
+            return queryset.filter(is_locked=int(posted))
+        return queryset
+
     def add_delete_permissions_to_context(self, context: Dict[str, Any], feature_code: str) -> Dict[str, Any]:
         """Helper method to add delete permission checks to context."""
         from shared.utils.permissions import get_user_feature_permissions, has_feature_permission
@@ -92,6 +158,17 @@ class InventoryBaseView(LoginRequiredMixin):
         return queryset.none()
 
 
+class DocumentListStatsMixin(ListStatsMixin):
+    """Summary cards (total / posted / draft) for lockable document lists."""
+
+    def get_stats_filters(self) -> Dict[str, Optional[Q]]:
+        return {
+            'total': None,
+            'posted': Q(is_locked=1),
+            'draft': Q(is_locked=0),
+        }
+
+
 class DocumentLockProtectedMixin:
     """Prevent modifying locked inventory documents."""
 
@@ -128,57 +205,116 @@ class DocumentLockProtectedMixin:
 
 
 class DocumentLockView(LoginRequiredMixin, View):
-    """Generic view to lock inventory documents."""
+    """
+    Generic view to lock (post) inventory documents.
+
+    Posting goes through ``inventory.services.posting`` so validation, the
+    lock itself and every side effect share one transaction. POSTing to the
+    URL without ``pk`` locks all ``document_ids`` selected in a list view.
+    """
 
     model = None
     success_url_name: str = ''
     success_message = _('سند با موفقیت قفل شد و دیگر قابل ویرایش نیست.')
     already_locked_message = _('این سند قبلاً قفل شده است.')
+    bulk_success_message = _('%(count)s سند قفل شد.')
+    bulk_empty_message = _('هیچ سندی انتخاب نشده است.')
     lock_field: str = 'is_locked'
 
     def after_lock(self, obj, request) -> None:
-        """Hook for subclasses to perform extra actions after locking."""
+        """Hook for subclasses to perform extra actions after locking (inside the transaction)."""
         return None
 
     def before_lock(self, obj, request) -> bool:
         """Hook executed before locking. Return False to cancel lock."""
         return True
 
-    def post(self, request, *args, **kwargs):
-        if self.model is None or not self.success_url_name:
-            messages.error(request, _('پیکربندی قفل سند نامعتبر است.'))
-            return HttpResponseRedirect(request.META.get('HTTP_REFERER', '/'))
+    def get_posting_validators(self) -> list:
+        """Validators returning a list of error messages for a loaded document."""
+        return []
+
+    def get_posting_side_effects(self, request) -> list:
+        """Side effects executed after the lock fields are set."""
+        return [
+            lambda obj, user: self.after_lock(obj, request),
+            partial(posting.notify_document_owner, url_name=self.success_url_name),
+        ]
 
+    def get_lock_queryset(self, request):
         queryset = self.model.objects.all()
         company_id = request.session.get('active_company_id')
         if company_id and hasattr(self.model, 'company_id'):
             queryset = queryset.filter(company_id=company_id)
+        return queryset
 
-        obj = get_object_or_404(queryset, pk=kwargs.get('pk'))
+    def post(self, request, *args, **kwargs):
+        if self.model is None or not self.success_url_name:
+            messages.error(request, _('پیکربندی قفل سند نامعتبر است.'))
+            return HttpResponseRedirect(request.META.get('HTTP_REFERER', '/'))
 
-        if getattr(obj, self.lock_field, 0):
-            messages.info(request, self.already_locked_message)
-        else:
-            if not self.before_lock(obj, request):
-                return HttpResponseRedirect(request.META.get('HTTP_REFERER', reverse(self.success_url_name)))
+        if kwargs.get('pk') is None:
+            return self.post_bulk(request)
 
-            update_fields = {self.lock_field}
-            setattr(obj, self.lock_field, 1)
-            if hasattr(obj, 'locked_at'):
-                obj.locked_at = timezone.now()
-                update_fields.add('locked_at')
-            if hasattr(obj, 'locked_by_id'):
-                obj.locked_by = request.user
-                update_fields.add('locked_by')
-            if hasattr(obj, 'edited_by_id'):
-                obj.edited_by = request.user
-                update_fields.add('edited_by')
-            obj.save(update_fields=list(update_fields))
-            self.after_lock(obj, request)
-            messages.success(request, self.success_message)
+        cancel_url = request.META.get('HTTP_REFERER', reverse(self.success_url_name))
+        try:
+            with transaction.atomic():
+                documents = posting.load_documents_for_posting(
+                    self.get_lock_queryset(request).filter(pk=kwargs.get('pk'))
+                )
+                if not documents:
+                    raise Http404
+                obj = documents[0]
+
+                if getattr(obj, self.lock_field, 0):
+                    messages.info(request, self.already_locked_message)
+                    return HttpResponseRedirect(reverse(self.success_url_name))
+
+                if not self.before_lock(obj, request):
+                    return HttpResponseRedirect(cancel_url)
+
+                posting.post_document(
+                    obj,
+                    request.user,
+                    validators=self.get_posting_validators(),
+                    side_effects=self.get_posting_side_effects(request),
+                    lock_field=self.lock_field,
+                )
+        except posting.DocumentPostingError as exc:
+            for message in exc.messages:
+                messages.error(request, message)
+            return HttpResponseRedirect(cancel_url)
 
+        messages.success(request, self.success_message)
         return HttpResponseRedirect(reverse(self.success_url_name))
 
+    def post_bulk(self, request):
+        """Lock every selected document; each one succeeds or fails on its own."""
+        ids = [value for value in request.POST.getlist('document_ids') if value.isdigit()]
+        if not ids:
+            messages.warning(request, self.bulk_empty_message)
+            return HttpResponseRedirect(reverse(self.success_url_name))
+
+        cancelled = _('قفل سند لغو شد.')
+        validators = [
+            lambda obj: [] if self.before_lock(obj, request) else [cancelled],
+            *self.get_posting_validators(),
+        ]
+        result = posting.post_documents(
+            self.get_lock_queryset(request).filter(pk__in=ids),
+            request.user,
+            validators=validators,
+            side_effects=self.get_posting_side_effects(request),
+            lock_field=self.lock_field,
+        )
+
+        for code, errors in result.failed.items():
+            for message in errors:
+                messages.error(request, f'{code}: {message}')
+        if result.posted:
+            messages.success(request, self.bulk_success_message % {'count': len(result.posted)})
+        if result.already_locked:
+            messages.info(request, self.already_locked_message)
+        return HttpResponseRedirect(reverse(self.success_url_name))
 
 class DocumentUnlockView(LoginRequiredMixin, View):
     """Generic view to unlock inventory documents."""
@@ -252,18 +388,7 @@ class DocumentUnlockView(LoginRequiredMixin, View):
             if not self.before_unlock(obj, request):
                 return HttpResponseRedirect(request.META.get('HTTP_REFERER', reverse(self.success_url_name)))
 
-            update_fields = {self.lock_field}
-            setattr(obj, self.lock_field, 0)
-            if hasattr(obj, 'locked_at'):
-                obj.locked_at = None
-                update_fields.add('locked_at')
-            if hasattr(obj, 'locked_by_id'):
-                obj.locked_by = None
-                update_fields.add('locked_by')
-            if hasattr(obj, 'edited_by_id'):
-                obj.edited_by = request.user
-                update_fields.add('edited_by')
-            obj.save(update_fields=list(update_fields))
+            posting.unpost_document(obj, request.user, lock_field=self.lock_field)
             self.after_unlock(obj, request)
             messages.success(request, self.success_message)
 
@@ -358,6 +483,11 @@ class LineFormsetMixin:
     
     def _save_line_formset(self, formset) -> None:
         """Save line formset instances."""
+        # Change events of all lines are written with one INSERT
+        with change_feed.batch():
+            self._save_line_forms(formset)
+
+    def _save_line_forms(self, formset) -> None:
         # Process each form in the formset manually to ensure all valid forms are saved
         for form in formset.forms:
             # Check if form has cleaned_data - only if form is bound and validated
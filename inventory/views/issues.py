@@ -16,25 +16,27 @@ from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from decimal import Decimal, InvalidOperation
 
-from .base import InventoryBaseView, DocumentLockProtectedMixin, DocumentLockView, LineFormsetMixin
+from .base import InventoryBaseView, DocumentListStatsMixin, DocumentLockProtectedMixin, DocumentLockView, LineFormsetMixin
 from shared.views.base import EditLockProtectedMixin
 from .receipts import DocumentDeleteViewBase, ReceiptFormMixin
 from shared.mixins import FeaturePermissionRequiredMixin
 from .. import models
 from .. import forms
-from ..services import serials as serial_service
+from ..services import posting
 
 
 # ============================================================================
 # Permanent Issue Views
 # ============================================================================
 
-class IssuePermanentListView(InventoryBaseView, ListView):
+class IssuePermanentListView(DocumentListStatsMixin, InventoryBaseView, ListView):
     """List view for permanent issues."""
     model = models.IssuePermanent
     template_name = 'inventory/issue_permanent.html'
     context_object_name = 'issues'
     paginate_by = 50
+    pagination_mode = 'keyset'
+    estimate_count = True
     ordering = ['-id']  # Show newest documents first
 
     def get_queryset(self):
@@ -42,11 +44,13 @@ class IssuePermanentListView(InventoryBaseView, ListView):
         queryset = super().get_queryset()
         # Filter by user permissions (own vs all)
         queryset = self.filter_queryset_by_permissions(queryset, 'inventory.issues.permanent', 'created_by')
+        self.stats_queryset = queryset
         queryset = queryset.select_related('created_by', 'department_unit', 'warehouse_request').prefetch_related(
             'lines__item',
             'lines__warehouse',
         )
-        return queryset
+        queryset = self.filter_by_posted(queryset, self.request.GET.get('posted'))
+        return self.filter_by_document_search(queryset, self.request.GET.get('search', ''))
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """Add context for template."""
@@ -55,6 +59,7 @@ class IssuePermanentListView(InventoryBaseView, ListView):
         context['edit_url_name'] = 'inventory:issue_permanent_edit'
         context['delete_url_name'] = 'inventory:issue_permanent_delete'
         context['lock_url_name'] = 'inventory:issue_permanent_lock'
+        context['bulk_lock_url'] = reverse('inventory:issue_permanent_bulk_lock')
         context['detail_url_name'] = 'inventory:issue_permanent_detail'
         context['create_label'] = _('Permanent Issue')
         context['show_warehouse_request'] = True
@@ -233,63 +238,35 @@ class IssuePermanentDeleteView(DocumentDeleteViewBase):
     success_message = _('حواله دائم با موفقیت حذف شد.')
 
 
-class IssuePermanentLockView(DocumentLockView):
+class IssueSerialPostingMixin:
+    """Validate and finalize lot-tracked serials as part of posting an issue."""
+
+    def get_posting_validators(self):
+        return [*super().get_posting_validators(), posting.validate_issue_line_serials]
+
+    def get_posting_side_effects(self, request):
+        return [posting.finalize_issue_serials, *super().get_posting_side_effects(request)]
+
+
+class IssuePermanentLockView(IssueSerialPostingMixin, DocumentLockView):
     """Lock view for permanent issues with serial validation."""
     model = models.IssuePermanent
     success_url_name = 'inventory:issue_permanent'
     success_message = _('حواله دائم قفل شد و دیگر قابل ویرایش نیست.')
 
-    def before_lock(self, obj, request):
-        """Validate serials for all lines with lot-tracked items."""
-        lines = models.IssuePermanentLine.objects.filter(document=obj, is_enabled=1)
-        for line in lines:
-            if line.item and line.item.has_lot_tracking == 1:
-                try:
-                    required = int(Decimal(line.quantity))
-                except (InvalidOperation, TypeError):
-                    messages.error(
-                        request,
-                        _('برای ردیف %(item)s، مقدار باید پیش از قفل‌شدن عدد صحیح باشد.')
-                        % {'item': line.item.name}
-                    )
-                    return False
-                if Decimal(line.quantity) != Decimal(required):
-                    messages.error(
-                        request,
-                        _('برای ردیف %(item)s، مقدار باید پیش از قفل‌شدن عدد صحیح باشد.')
-                        % {'item': line.item.name}
-                    )
-                    return False
-                selected = line.serials.count()
-                if selected != required:
-                    messages.error(
-                        request,
-                        _('برای ردیف %(item)s، پیش از قفل کردن باید %(expected)s سریال انتخاب شود (الان %(selected)s عدد ثبت شده است).')
-                        % {'item': line.item.name, 'expected': required, 'selected': selected}
-                    )
-                    return False
-        return True
-
-    def after_lock(self, obj, request):
-        """Finalize serials for all lines."""
-        lines = models.IssuePermanentLine.objects.filter(document=obj, is_enabled=1)
-        for line in lines:
-            try:
-                serial_service.finalize_issue_line_serials(line, user=request.user)
-            except serial_service.SerialTrackingError as exc:
-                messages.error(request, str(exc))
-
 
 # ============================================================================
 # Consumption Issue Views
 # ============================================================================
 
-class IssueConsumptionListView(InventoryBaseView, ListView):
+class IssueConsumptionListView(DocumentListStatsMixin, InventoryBaseView, ListView):
     """List view for consumption issues."""
     model = models.IssueConsumption
     template_name = 'inventory/issue_consumption.html'
     context_object_name = 'issues'
     paginate_by = 50
+    pagination_mode = 'keyset'
+    estimate_count = True
     ordering = ['-id']  # Show newest documents first
 
     def get_queryset(self):
@@ -297,8 +274,10 @@ class IssueConsumptionListView(InventoryBaseView, ListView):
         queryset = super().get_queryset()
         # Filter by user permissions (own vs all)
         queryset = self.filter_queryset_by_permissions(queryset, 'inventory.issues.consumption', 'created_by')
+        self.stats_queryset = queryset
         queryset = queryset.select_related('created_by')
-        return queryset
+        queryset = self.filter_by_posted(queryset, self.request.GET.get('posted'))
+        return self.filter_by_document_search(queryset, self.request.GET.get('search', ''))
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """Add context for template."""
@@ -307,6 +286,7 @@ class IssueConsumptionListView(InventoryBaseView, ListView):
         context['edit_url_name'] = 'inventory:issue_consumption_edit'
         context['delete_url_name'] = 'inventory:issue_consumption_delete'
         context['lock_url_name'] = 'inventory:issue_consumption_lock'
+        context['bulk_lock_url'] = reverse('inventory:issue_consumption_bulk_lock')
         context['detail_url_name'] = 'inventory:issue_consumption_detail'
         context['create_label'] = _('Consumption Issue')
         context['serial_url_name'] = None
@@ -508,63 +488,25 @@ class IssueConsumptionDeleteView(DocumentDeleteViewBase):
     success_message = _('حواله مصرفی با موفقیت حذف شد.')
 
 
-class IssueConsumptionLockView(DocumentLockView):
+class IssueConsumptionLockView(IssueSerialPostingMixin, DocumentLockView):
     """Lock view for consumption issues with serial validation."""
     model = models.IssueConsumption
     success_url_name = 'inventory:issue_consumption'
     success_message = _('حواله مصرفی قفل شد و دیگر قابل ویرایش نیست.')
 
-    def before_lock(self, obj, request):
-        """Validate serials for all lines with lot-tracked items."""
-        lines = models.IssueConsumptionLine.objects.filter(document=obj, is_enabled=1)
-        for line in lines:
-            if line.item and line.item.has_lot_tracking == 1:
-                try:
-                    required = int(Decimal(line.quantity))
-                except (InvalidOperation, TypeError):
-                    messages.error(
-                        request,
-                        _('برای ردیف %(item)s، مقدار باید پیش از قفل‌شدن عدد صحیح باشد.')
-                        % {'item': line.item.name}
-                    )
-                    return False
-                if Decimal(line.quantity) != Decimal(required):
-                    messages.error(
-                        request,
-                        _('برای ردیف %(item)s، مقدار باید پیش از قفل‌شدن عدد صحیح باشد.')
-                        % {'item': line.item.name}
-                    )
-                    return False
-                selected = line.serials.count()
-                if selected != required:
-                    messages.error(
-                        request,
-                        _('برای ردیف %(item)s، پیش از قفل کردن باید %(expected)s سریال انتخاب شود (الان %(selected)s عدد ثبت شده است).')
-                        % {'item': line.item.name, 'expected': required, 'selected': selected}
-                    )
-                    return False
-        return True
-
-    def after_lock(self, obj, request):
-        """Finalize serials for all lines."""
-        lines = models.IssueConsumptionLine.objects.filter(document=obj, is_enabled=1)
-        for line in lines:
-            try:
-                serial_service.finalize_issue_line_serials(line, user=request.user)
-            except serial_service.SerialTrackingError as exc:
-                messages.error(request, str(exc))
-
 
 # ============================================================================
 # Consignment Issue Views
 # ============================================================================
 
-class IssueConsignmentListView(InventoryBaseView, ListView):
+class IssueConsignmentListView(DocumentListStatsMixin, InventoryBaseView, ListView):
     """List view for consignment issues."""
     model = models.IssueConsignment
     template_name = 'inventory/issue_consignment.html'
     context_object_name = 'issues'
     paginate_by = 50
+    pagination_mode = 'keyset'
+    estimate_count = True
     ordering = ['-id']  # Show newest documents first
 
     def get_queryset(self):
@@ -572,8 +514,10 @@ class IssueConsignmentListView(InventoryBaseView, ListView):
         queryset = super().get_queryset()
         # Filter by user permissions (own vs all)
         queryset = self.filter_queryset_by_permissions(queryset, 'inventory.issues.consignment', 'created_by')
+        self.stats_queryset = queryset
         queryset = queryset.select_related('created_by')
-        return queryset
+        queryset = self.filter_by_posted(queryset, self.request.GET.get('posted'))
+        return self.filter_by_document_search(queryset, self.request.GET.get('search', ''))
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """Add context for template."""
@@ -582,6 +526,7 @@ class IssueConsignmentListView(InventoryBaseView, ListView):
         context['edit_url_name'] = 'inventory:issue_consignment_edit'
         context['delete_url_name'] = 'inventory:issue_consignment_delete'
         context['lock_url_name'] = 'inventory:issue_consignment_lock'
+        context['bulk_lock_url'] = reverse('inventory:issue_consignment_bulk_lock')
         context['detail_url_name'] = 'inventory:issue_consignment_detail'
         context['create_label'] = _('Consignment Issue')
         context['serial_url_name'] = None
@@ -724,52 +669,12 @@ class IssueConsignmentDeleteView(DocumentDeleteViewBase):
     success_message = _('حواله امانی با موفقیت حذف شد.')
 
 
-class IssueConsignmentLockView(DocumentLockView):
+class IssueConsignmentLockView(IssueSerialPostingMixin, DocumentLockView):
     """Lock view for consignment issues with serial validation."""
     model = models.IssueConsignment
     success_url_name = 'inventory:issue_consignment'
     success_message = _('حواله امانی قفل شد و دیگر قابل ویرایش نیست.')
 
-    def before_lock(self, obj, request):
-        """Validate serials for all lines with lot-tracked items."""
-        lines = models.IssueConsignmentLine.objects.filter(document=obj, is_enabled=1)
-        for line in lines:
-            if line.item and line.item.has_lot_tracking == 1:
-                try:
-                    required = int(Decimal(line.quantity))
-                except (InvalidOperation, TypeError):
-                    messages.error(
-                        request,
-                        _('برای ردیف %(item)s، مقدار باید پیش از قفل‌شدن عدد صحیح باشد.')
-                        % {'item': line.item.name}
-                    )
-                    return False
-                if Decimal(line.quantity) != Decimal(required):
-                    messages.error(
-                        request,
-                        _('برای ردیف %(item)s، مقدار باید پیش از قفل‌شدن عدد صحیح باشد.')
-                        % {'item': line.item.name}
-                    )
-                    return False
-                selected = line.serials.count()
-                if selected != required:
-                    messages.error(
-                        request,
-                        _('برای ردیف %(item)s، پیش از قفل کردن باید %(expected)s سریال انتخاب شود (الان %(selected)s عدد ثبت شده است).')
-                        % {'item': line.item.name, 'expected': required, 'selected': selected}
-                    )
-                    return False
-        return True
-
-    def after_lock(self, obj, request):
-        """Finalize serials for all lines."""
-        lines = models.IssueConsignmentLine.objects.filter(document=obj, is_enabled=1)
-        for line in lines:
-            try:
-                serial_service.finalize_issue_line_serials(line, user=request.user)
-            except serial_service.SerialTrackingError as exc:
-                messages.error(request, str(exc))
-
 
 # ============================================================================
 # Issue Line Serial Assignment Views
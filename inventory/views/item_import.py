@@ -6,12 +6,15 @@ from typing import Dict, Any, List, Tuple
 from decimal import Decimal, InvalidOperation
 
 from django.contrib import messages
+from django.db import transaction
 from django.http import HttpResponse, HttpResponseRedirect
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 from django.views import View
 from django.views.generic import TemplateView
 
+from shared.utils import change_feed
+
 from .base import InventoryBaseView
 from .. import models
 from ..forms.base import UNIT_CHOICES
@@ -239,46 +242,50 @@ class ItemExcelImportView(InventoryBaseView, TemplateView):
                 models.Item.objects.filter(company_id=company_id).exclude(item_code='').values_list('item_code', flat=True)
             )
             
-            # Process each row (skip header row)
-            for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                # Skip empty rows
-                if not any(row):
-                    continue
-                
-                row_errors = []
-                
-                try:
-                    # Parse row data
-                    item_data = self._parse_row(row, company_id, row_num)
+            # Process each row (skip header row); the change events of all
+            # rows are written with one INSERT when the loop ends
+            self._lookups = {}
+            with change_feed.batch():
+                for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+                    # Skip empty rows
+                    if not any(row):
+                        continue
                     
-                    # Validate
-                    validation_errors = self._validate_item_data(item_data, company_id, existing_items, existing_item_codes)
-                    if validation_errors:
-                        row_errors.extend(validation_errors)
+                    row_errors = []
                     
-                    if row_errors:
-                        errors.append({
-                            'row': row_num,
-                            'errors': row_errors,
-                            'data': row[:10]  # First 10 columns for display
-                        })
-                        continue
+                    try:
+                        # Parse row data
+                        item_data = self._parse_row(row, company_id, row_num)
+                    
+                        # Validate
+                        validation_errors = self._validate_item_data(item_data, company_id, existing_items, existing_item_codes)
+                        if validation_errors:
+                            row_errors.extend(validation_errors)
                     
-                    # Create item
-                    item = self._create_item(item_data, company_id, request.user)
-                    success_count += 1
+                        if row_errors:
+                            errors.append({
+                                'row': row_num,
+                                'errors': row_errors,
+                                'data': row[:10]  # First 10 columns for display
+                            })
+                            continue
                     
-                    # Add to existing sets to prevent duplicates in same import
-                    existing_items.add(item.name)
-                    if item.item_code:
-                        existing_item_codes.add(item.item_code)
+                        # Create item; a failing row rolls back alone, with its events
+                        with transaction.atomic(), change_feed.batch():
+                            item = self._create_item(item_data, company_id, request.user)
+                        success_count += 1
                     
-                except Exception as e:
-                    errors.append({
-                        'row': row_num,
-                        'errors': [str(e)],
-                        'data': row[:10] if row else []
-                    })
+                        # Add to existing sets to prevent duplicates in same import
+                        existing_items.add(item.name)
+                        if item.item_code:
+                            existing_item_codes.add(item.item_code)
+                    
+                    except Exception as e:
+                        errors.append({
+                            'row': row_num,
+                            'errors': [str(e)],
+                            'data': row[:10] if row else []
+                        })
             
             # Prepare context
             context = {
@@ -395,12 +402,21 @@ class ItemExcelImportView(InventoryBaseView, TemplateView):
     def _create_item(self, data: Dict[str, Any], company_id: int, user) -> models.Item:
         """Create item from validated data."""
         # Resolve type, category, subcategory
-        item_type = self._resolve_item_type(data['type_code_or_name'], company_id)
-        category = self._resolve_category(data['category_code_or_name'], company_id)
-        subcategory = self._resolve_subcategory(
-            data['subcategory_code_or_name'], 
-            category.id if category else None,
-            company_id
+        item_type = self._lookup(
+            ('type', data['type_code_or_name']),
+            lambda: self._resolve_item_type(data['type_code_or_name'], company_id),
+        )
+        category = self._lookup(
+            ('category', data['category_code_or_name']),
+            lambda: self._resolve_category(data['category_code_or_name'], company_id),
+        )
+        subcategory = self._lookup(
+            ('subcategory', data['subcategory_code_or_name'], category.id if category else None),
+            lambda: self._resolve_subcategory(
+                data['subcategory_code_or_name'],
+                category.id if category else None,
+                company_id
+            ),
         )
         
         if not item_type or not category or not subcategory:
@@ -410,11 +426,13 @@ class ItemExcelImportView(InventoryBaseView, TemplateView):
         warehouses = []
         if data.get('warehouse_codes'):
             warehouse_codes = [code.strip() for code in data['warehouse_codes'].split(',')]
-            warehouses = models.Warehouse.objects.filter(
-                company_id=company_id,
-                public_code__in=warehouse_codes,
-                is_enabled=1
-            )
+            warehouses = self._lookup(('warehouses', tuple(warehouse_codes)), lambda: list(
+                models.Warehouse.objects.filter(
+                    company_id=company_id,
+                    public_code__in=warehouse_codes,
+                    is_enabled=1
+                )
+            ))
         
         # Create item
         item = models.Item(
@@ -456,6 +474,12 @@ class ItemExcelImportView(InventoryBaseView, TemplateView):
         
         return item
     
+    def _lookup(self, key: tuple, resolve):
+        """Resolve a reference once per import; rows usually repeat the same codes."""
+        if key not in self._lookups:
+            self._lookups[key] = resolve()
+        return self._lookups[key]
+    
     def _resolve_item_type(self, code_or_name: str, company_id: int):
         """Resolve item type by code or name."""
         if not code_or_name:
@@ -20,9 +20,9 @@ from django.core.exceptions import PermissionDenied
 from decimal import Decimal, InvalidOperation
 import json
 
-from .base import InventoryBaseView, DocumentLockProtectedMixin, DocumentLockView, DocumentUnlockView, LineFormsetMixin
+from .base import InventoryBaseView, DocumentListStatsMixin, DocumentLockProtectedMixin, DocumentLockView, DocumentUnlockView, LineFormsetMixin
 from shared.views.base import EditLockProtectedMixin
-from shared.mixins import FeaturePermissionRequiredMixin
+from shared.mixins import FeaturePermissionRequiredMixin, ListStatsMixin
 from shared.utils.permissions import get_user_feature_permissions, has_feature_permission
 from .. import models
 from .. import forms
@@ -211,7 +211,7 @@ class ReceiptFormMixin(InventoryBaseView):
 # Temporary Receipt Views
 # ============================================================================
 
-class ReceiptTemporaryListView(InventoryBaseView, ListView):
+class ReceiptTemporaryListView(ListStatsMixin, InventoryBaseView, ListView):
     """List view for temporary receipts."""
     model = models.ReceiptTemporary
     template_name = 'inventory/receipt_temporary.html'
@@ -227,6 +227,7 @@ class ReceiptTemporaryListView(InventoryBaseView, ListView):
         queryset = queryset.filter(is_enabled=1)
         # Filter by user permissions (own vs all)
         queryset = self.filter_queryset_by_permissions(queryset, 'inventory.receipts.temporary', 'created_by')
+        self.stats_queryset = queryset
         # Prefetch lines with related items, warehouses, and suppliers for efficient display
         # Also prefetch converted_receipt for linking
         # Use Prefetch to filter only enabled lines
@@ -238,8 +239,7 @@ class ReceiptTemporaryListView(InventoryBaseView, ListView):
                 to_attr='enabled_lines'
             )
         ).select_related('created_by', 'converted_receipt')
-        queryset = self._apply_filters(queryset)
-        return queryset.distinct()
+        return self._apply_filters(queryset)
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """Add context for template."""
@@ -249,6 +249,7 @@ class ReceiptTemporaryListView(InventoryBaseView, ListView):
         context['edit_url_name'] = 'inventory:receipt_temporary_edit'
         context['delete_url_name'] = 'inventory:receipt_temporary_delete'
         context['lock_url_name'] = 'inventory:receipt_temporary_lock'
+        context['bulk_lock_url'] = reverse('inventory:receipt_temporary_bulk_lock')
         context['unlock_url_name'] = 'inventory:receipt_temporary_unlock'
         context['create_label'] = _('Temporary Receipt')
         context['show_qc'] = True
@@ -270,7 +271,6 @@ class ReceiptTemporaryListView(InventoryBaseView, ListView):
         context['status_filter'] = self.request.GET.get('status', '')
         context['converted_filter'] = self.request.GET.get('converted', '')
         context['search_query'] = self.request.GET.get('search', '').strip()
-        context['stats'] = self._get_stats()
         return context
 
     def _apply_filters(self, queryset):
@@ -291,32 +291,16 @@ class ReceiptTemporaryListView(InventoryBaseView, ListView):
         elif converted_param == '0':
             queryset = queryset.filter(is_converted=0)
         
-        search_query = self.request.GET.get('search', '').strip()
-        if search_query:
-            queryset = queryset.filter(
-                Q(document_code__icontains=search_query) |
-                Q(lines__item__name__icontains=search_query) |
-                Q(lines__item__item_code__icontains=search_query)
-            )
-        return queryset
+        return self.filter_by_document_search(queryset, self.request.GET.get('search', ''))
 
-    def _get_stats(self) -> Dict[str, int]:
-        """Return aggregate stats for summary cards."""
-        stats = {
-            'total': 0,
-            'awaiting_qc': 0,
-            'qc_passed': 0,
-            'converted': 0,
+    def get_stats_filters(self) -> Dict[str, Optional[Q]]:
+        """Summary cards: total, awaiting QC, QC passed and converted."""
+        return {
+            'total': None,
+            'awaiting_qc': Q(status=models.ReceiptTemporary.Status.AWAITING_INSPECTION),
+            'qc_passed': Q(status=models.ReceiptTemporary.Status.APPROVED),
+            'converted': Q(is_converted=1),
         }
-        company_id = self.request.session.get('active_company_id')
-        if not company_id:
-            return stats
-        base_qs = models.ReceiptTemporary.objects.filter(company_id=company_id, is_enabled=1)
-        stats['total'] = base_qs.count()
-        stats['awaiting_qc'] = base_qs.filter(status=models.ReceiptTemporary.Status.AWAITING_INSPECTION).count()
-        stats['qc_passed'] = base_qs.filter(status=models.ReceiptTemporary.Status.APPROVED).count()
-        stats['converted'] = base_qs.filter(is_converted=1).count()
-        return stats
 
 
 class ReceiptTemporaryCreateView(LineFormsetMixin, ReceiptFormMixin, CreateView):
@@ -630,18 +614,21 @@ class ReceiptTemporarySendToQCView(FeaturePermissionRequiredMixin, InventoryBase
 # Permanent Receipt Views
 # ============================================================================
 
-class ReceiptPermanentListView(InventoryBaseView, ListView):
+class ReceiptPermanentListView(DocumentListStatsMixin, InventoryBaseView, ListView):
     """List view for permanent receipts."""
     model = models.ReceiptPermanent
     template_name = 'inventory/receipt_permanent.html'
     context_object_name = 'receipts'
     paginate_by = 50
+    pagination_mode = 'keyset'
+    estimate_count = True
 
     def get_queryset(self):
         """Prefetch related objects for efficient display."""
         queryset = super().get_queryset()
         # Filter by user permissions (own vs all)
         queryset = self.filter_queryset_by_permissions(queryset, 'inventory.receipts.permanent', 'created_by')
+        self.stats_queryset = queryset
         # Use Prefetch to filter only enabled lines
         from django.db.models import Prefetch
         queryset = queryset.prefetch_related(
@@ -651,7 +638,7 @@ class ReceiptPermanentListView(InventoryBaseView, ListView):
                 to_attr='enabled_lines'
             )
         ).select_related('created_by', 'temporary_receipt', 'purchase_request')
-        return queryset
+        return self.filter_by_document_search(queryset, self.request.GET.get('search', ''))
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """Add context for template."""
@@ -661,6 +648,7 @@ class ReceiptPermanentListView(InventoryBaseView, ListView):
         context['edit_url_name'] = 'inventory:receipt_permanent_edit'
         context['delete_url_name'] = 'inventory:receipt_permanent_delete'
         context['lock_url_name'] = 'inventory:receipt_permanent_lock'
+        context['bulk_lock_url'] = reverse('inventory:receipt_permanent_bulk_lock')
         context['unlock_url_name'] = 'inventory:receipt_permanent_unlock'
         context['create_label'] = _('Permanent Receipt')
         context['show_qc'] = False
@@ -870,18 +858,21 @@ class ReceiptPermanentUnlockView(DocumentUnlockView):
 # Consignment Receipt Views
 # ============================================================================
 
-class ReceiptConsignmentListView(InventoryBaseView, ListView):
+class ReceiptConsignmentListView(DocumentListStatsMixin, InventoryBaseView, ListView):
     """List view for consignment receipts."""
     model = models.ReceiptConsignment
     template_name = 'inventory/receipt_consignment.html'
     context_object_name = 'receipts'
     paginate_by = 50
+    pagination_mode = 'keyset'
+    estimate_count = True
 
     def get_queryset(self):
         """Prefetch related objects for efficient display."""
         queryset = super().get_queryset()
         # Filter by user permissions (own vs all)
         queryset = self.filter_queryset_by_permissions(queryset, 'inventory.receipts.consignment', 'created_by')
+        self.stats_queryset = queryset
         # Use Prefetch to filter only enabled lines
         from django.db.models import Prefetch
         queryset = queryset.prefetch_related(
@@ -891,7 +882,7 @@ class ReceiptConsignmentListView(InventoryBaseView, ListView):
                 to_attr='enabled_lines'
             )
         ).select_related('created_by')
-        return queryset
+        return self.filter_by_document_search(queryset, self.request.GET.get('search', ''))
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """Add context for template."""
@@ -901,6 +892,7 @@ class ReceiptConsignmentListView(InventoryBaseView, ListView):
         context['edit_url_name'] = 'inventory:receipt_consignment_edit'
         context['delete_url_name'] = 'inventory:receipt_consignment_delete'
         context['lock_url_name'] = 'inventory:receipt_consignment_lock'
+        context['bulk_lock_url'] = reverse('inventory:receipt_consignment_bulk_lock')
         context['unlock_url_name'] = 'inventory:receipt_consignment_unlock'
         context['create_label'] = _('Consignment Receipt')
         context['show_qc'] = False
@@ -19,11 +19,13 @@ from django.db.models import Q
 import json
 
 from .base import InventoryBaseView, LineFormsetMixin
-from shared.mixins import FeaturePermissionRequiredMixin
+from shared.mixins import FeaturePermissionRequiredMixin, ListStatsMixin
 from shared.views.base import EditLockProtectedMixin
+from shared.utils.approvers import get_approver_ids
 from .. import models
 from .. import forms
-from ..models import Item, ItemUnit
+from ..models import Item
+from ..services import units as unit_service
 
 
 # ============================================================================
@@ -70,21 +72,14 @@ class PurchaseRequestFormMixin(InventoryBaseView):
         if company_id:
             unit_map: Dict[str, list] = {}
             items = Item.objects.filter(company_id=company_id, is_enabled=1)
+            # Allowed units of every item from one ItemUnit query
+            unit_tables = unit_service.get_unit_tables(company_id, items)
             for item in items:
-                # Get allowed units for item
-                codes = []
-                def add(code: str) -> None:
-                    if code and code not in codes:
-                        codes.append(code)
-                add(item.default_unit)
-                add(item.primary_unit)
-                for unit in ItemUnit.objects.filter(item=item, company_id=item.company_id):
-                    add(unit.from_unit)
-                    add(unit.to_unit)
+                codes = unit_tables[item.pk].allowed_units()
                 if not codes:
                     codes.append('EA')
                 label_map = {value: str(label) for value, label in forms.UNIT_CHOICES}
-                unit_map[str(item.pk)] = [{'value': code, 'label': label_map.get(code, code)} for code in codes if code]
+                unit_map[str(item.pk)] = [{'value': code, 'label': label_map.get(code, code)} for code in codes]
             context['unit_options_json'] = mark_safe(json.dumps(unit_map, ensure_ascii=False))
         else:
             context['unit_options_json'] = mark_safe('{}')
@@ -114,7 +109,7 @@ class PurchaseRequestFormMixin(InventoryBaseView):
         return []
 
 
-class PurchaseRequestListView(InventoryBaseView, ListView):
+class PurchaseRequestListView(ListStatsMixin, InventoryBaseView, ListView):
     """List view for purchase requests."""
     model = models.PurchaseRequest
     template_name = 'inventory/purchase_requests.html'
@@ -126,6 +121,7 @@ class PurchaseRequestListView(InventoryBaseView, ListView):
         queryset = super().get_queryset()
         # Filter by user permissions (own vs all)
         queryset = self.filter_queryset_by_permissions(queryset, 'inventory.requests.purchase', 'requested_by')
+        self.stats_queryset = queryset
         queryset = queryset.select_related('requested_by', 'approver').prefetch_related('lines__item')
         # Order by newest first (by id descending, then by request_date)
         queryset = queryset.order_by('-id', '-request_date', 'request_code')
@@ -146,16 +142,21 @@ class PurchaseRequestListView(InventoryBaseView, ListView):
                 )
         return queryset
 
+    def get_stats_filters(self) -> Dict[str, Optional[Q]]:
+        """Summary cards by request status."""
+        status = models.PurchaseRequest.Status
+        return {
+            'total': None,
+            'draft': Q(status=status.DRAFT),
+            'approved': Q(status=status.APPROVED),
+            'ordered': Q(status=status.ORDERED),
+            'fulfilled': Q(status=status.FULFILLED),
+        }
+
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """Add statistics and filter context."""
         context = super().get_context_data(**kwargs)
         company_id: Optional[int] = self.request.session.get('active_company_id')
-        stats_queryset = models.PurchaseRequest.objects.filter(company_id=company_id)
-        context['total_count'] = stats_queryset.count()
-        context['draft_count'] = stats_queryset.filter(status=models.PurchaseRequest.Status.DRAFT).count()
-        context['approved_count'] = stats_queryset.filter(status=models.PurchaseRequest.Status.APPROVED).count()
-        context['ordered_count'] = stats_queryset.filter(status=models.PurchaseRequest.Status.ORDERED).count()
-        context['fulfilled_count'] = stats_queryset.filter(status=models.PurchaseRequest.Status.FULFILLED).count()
         context['create_url'] = reverse_lazy('inventory:purchase_request_create')
         context['edit_url_name'] = 'inventory:purchase_request_edit'
         context['approve_url_name'] = 'inventory:purchase_request_approve'
@@ -468,7 +469,7 @@ class WarehouseRequestFormMixin(InventoryBaseView):
         return []
 
 
-class WarehouseRequestListView(InventoryBaseView, ListView):
+class WarehouseRequestListView(ListStatsMixin, InventoryBaseView, ListView):
     """List view for warehouse requests."""
     model = models.WarehouseRequest
     template_name = 'inventory/warehouse_requests.html'
@@ -480,6 +481,7 @@ class WarehouseRequestListView(InventoryBaseView, ListView):
         queryset = super().get_queryset()
         # Filter by user permissions (own vs all)
         queryset = self.filter_queryset_by_permissions(queryset, 'inventory.requests.warehouse', 'requester')
+        self.stats_queryset = queryset
         queryset = queryset.select_related('item', 'warehouse', 'requester', 'approver')
         status = self.request.GET.get('status')
         priority = self.request.GET.get('priority')
@@ -498,23 +500,26 @@ class WarehouseRequestListView(InventoryBaseView, ListView):
                 )
         return queryset
 
+    def get_stats_filters(self) -> Dict[str, Optional[Q]]:
+        """Summary cards by request status."""
+        return {
+            'total': None,
+            'draft': Q(request_status='draft'),
+            'approved': Q(request_status='approved'),
+            'issued': Q(request_status='issued'),
+        }
+
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """Add statistics and filter context."""
         context = super().get_context_data(**kwargs)
         company_id: Optional[int] = self.request.session.get('active_company_id')
-        stats_queryset = models.WarehouseRequest.objects.filter(company_id=company_id)
-        context['total_count'] = stats_queryset.count()
-        context['draft_count'] = stats_queryset.filter(request_status='draft').count()
-        context['approved_count'] = stats_queryset.filter(request_status='approved').count()
-        context['issued_count'] = stats_queryset.filter(request_status='issued').count()
         context['create_url'] = reverse_lazy('inventory:warehouse_request_create')
         context['edit_url_name'] = 'inventory:warehouse_request_edit'
         context['approve_url_name'] = 'inventory:warehouse_request_approve'
         context['status_filter'] = self.request.GET.get('status', '')
         context['priority_filter'] = self.request.GET.get('priority', '')
         context['search_term'] = self.request.GET.get('search', '')
-        approver_queryset = forms.get_feature_approvers("inventory.requests.warehouse", company_id)
-        approver_ids: Set[int] = set(approver_queryset.values_list('id', flat=True))
+        approver_ids: Set[int] = set(get_approver_ids(company_id, "inventory.requests.warehouse"))
         for wr in context['requests']:
             wr.can_current_user_edit = (
                 wr.request_status == 'draft'
@@ -736,8 +741,7 @@ class WarehouseRequestApproveView(InventoryBaseView, View):
             messages.error(request, _('تنها تاییدکننده تعیین‌شده می‌تواند این درخواست را تایید کند.'))
             return HttpResponseRedirect(reverse('inventory:warehouse_requests'))
 
-        allowed_user_ids: Set[int] = set(forms.get_feature_approvers("inventory.requests.warehouse", company_id).values_list('id', flat=True))
-        if request.user.id not in allowed_user_ids:
+        if request.user.id not in get_approver_ids(company_id, "inventory.requests.warehouse"):
             messages.error(request, _('شما مجوز تایید درخواست انبار را ندارید.'))
             return HttpResponseRedirect(reverse('inventory:warehouse_requests'))
 
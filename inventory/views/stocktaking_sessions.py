@@ -0,0 +1,182 @@
+"""
+Stocktaking count session endpoints (JSON).
+
+- ``POST stocktaking/sessions/start/`` with ``warehouse_id`` (and optional
+  ``snapshot_date``, ``notes``) → session with frozen expected quantities
+- ``GET stocktaking/sessions/<pk>/`` → session summary
+- ``POST stocktaking/sessions/<pk>/counts/`` with a JSON body
+  ``{"mode": "set"|"add", "counts": [{"item_code"|"item_id", "quantity"}]}``
+  (scanners) or a CSV ``file`` upload (``item_code,quantity`` rows)
+- ``GET stocktaking/sessions/<pk>/variances/`` → expected vs counted
+- ``POST stocktaking/sessions/<pk>/post/`` → deficit/surplus documents and
+  the stocktaking record
+- ``POST stocktaking/sessions/<pk>/cancel/``
+"""
+import json
+from datetime import date
+from typing import Any, Dict, Optional
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views import View
+
+from shared.mixins import FeaturePermissionRequiredMixin
+from .. import models
+from ..services import stocktaking as stocktaking_service
+from ..services.stocktaking import CountSessionError
+
+
+def _error(exc: CountSessionError) -> JsonResponse:
+    return JsonResponse({'error': str(exc), 'messages': exc.messages}, status=400)
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _session_payload(session: models.StocktakingSession) -> Dict[str, Any]:
+    lines = session.lines.values_list('quantity_counted', flat=True)
+    return {
+        'id': session.pk,
+        'session_code': session.session_code,
+        'warehouse_id': session.warehouse_id,
+        'warehouse_code': session.warehouse_code,
+        'status': session.status,
+        'snapshot_date': session.snapshot_date.isoformat(),
+        'inventory_snapshot_time': session.inventory_snapshot_time.isoformat(),
+        'items': lines.count(),
+        'counted': lines.filter(quantity_counted__isnull=False).count(),
+        'stocktaking_record_id': session.stocktaking_record_id,
+    }
+
+
+class CountSessionMixin(FeaturePermissionRequiredMixin):
+    """Stocktaking record permission and the active company's sessions."""
+
+    feature_code = 'inventory.stocktaking.records'
+    required_action = 'create'
+
+    def get_company_id(self) -> int:
+        company_id = self.request.session.get('active_company_id')
+        if not company_id:
+            raise Http404
+        return company_id
+
+    def get_session(self) -> models.StocktakingSession:
+        return get_object_or_404(
+            models.StocktakingSession, pk=self.kwargs['pk'], company_id=self.get_company_id(),
+        )
+
+
+class CountSessionStartView(CountSessionMixin, View):
+    """Open a count session for a warehouse."""
+
+    def post(self, request, *args, **kwargs):
+        company_id = self.get_company_id()
+        warehouse = get_object_or_404(
+            models.Warehouse, pk=request.POST.get('warehouse_id') or 0, company_id=company_id, is_enabled=1,
+        )
+        session = stocktaking_service.start_count_session(
+            company_id,
+            warehouse,
+            request.user,
+            snapshot_date=_parse_date(request.POST.get('snapshot_date')),
+            notes=request.POST.get('notes', ''),
+        )
+        return JsonResponse(_session_payload(session), status=201)
+
+
+class CountSessionDetailView(CountSessionMixin, View):
+    """Session summary."""
+
+    required_action = 'view_own'
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(_session_payload(self.get_session()))
+
+
+class CountSessionCountsView(CountSessionMixin, View):
+    """Record a batch of counts from a scanner (JSON) or a CSV upload."""
+
+    def post(self, request, *args, **kwargs):
+        session = self.get_session()
+        if 'file' in request.FILES:
+            counts = stocktaking_service.read_count_file(request.FILES['file'])
+            mode = request.POST.get('mode', 'set')
+        else:
+            try:
+                payload = json.loads(request.body or b'{}')
+            except (ValueError, UnicodeDecodeError):
+                return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+            counts = payload.get('counts') or []
+            mode = payload.get('mode', 'set')
+            if not isinstance(counts, list) or not all(isinstance(entry, dict) for entry in counts):
+                return JsonResponse({'error': 'counts must be a list of objects'}, status=400)
+        try:
+            result = stocktaking_service.record_counts(session, counts, request.user, mode=mode)
+        except CountSessionError as exc:
+            return _error(exc)
+        return JsonResponse({
+            'updated': result.updated,
+            'created': result.created,
+            'unknown': result.unknown,
+            'invalid': result.invalid,
+        })
+
+
+class CountSessionVariancesView(CountSessionMixin, View):
+    """Expected vs counted quantities of the counted items."""
+
+    required_action = 'view_own'
+
+    def get(self, request, *args, **kwargs):
+        variances = stocktaking_service.compute_variances(
+            self.get_session(), uncounted_as_zero=request.GET.get('uncounted_as_zero') == '1',
+        )
+        return JsonResponse({'variances': [
+            {
+                'item_id': variance.item_id,
+                'item_code': variance.item_code,
+                'unit': variance.unit,
+                'expected': str(variance.expected),
+                'counted': str(variance.counted),
+                'difference': str(variance.difference),
+            }
+            for variance in variances
+            if variance.difference or request.GET.get('all') == '1'
+        ]})
+
+
+class CountSessionPostView(CountSessionMixin, View):
+    """Generate the variance documents and the stocktaking record."""
+
+    def post(self, request, *args, **kwargs):
+        try:
+            record = stocktaking_service.post_count_session(
+                self.get_session(),
+                request.user,
+                document_date=_parse_date(request.POST.get('document_date')),
+                uncounted_as_zero=request.POST.get('uncounted_as_zero') == '1',
+            )
+        except CountSessionError as exc:
+            return _error(exc)
+        return JsonResponse({
+            'stocktaking_record_id': record.pk,
+            'stocktaking_record_code': record.document_code,
+            'variance_document_ids': record.variance_document_ids,
+            'variance_document_codes': record.variance_document_codes,
+        }, status=201)
+
+
+class CountSessionCancelView(CountSessionMixin, View):
+    """Cancel a session without generating documents."""
+
+    def post(self, request, *args, **kwargs):
+        try:
+            session = stocktaking_service.cancel_count_session(self.get_session(), request.user)
+        except CountSessionError as exc:
+            return _error(exc)
+        return JsonResponse(_session_payload(session))
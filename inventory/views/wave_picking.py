@@ -0,0 +1,117 @@
+"""
+Wave picking views.
+
+- ``GET warehouse-requests/wave/?warehouse_id=&issue_type=`` → allocation
+  preview of every approved request of the warehouse
+- ``POST warehouse-requests/wave/`` → generate the consolidated issue documents
+  and redirect to the pick list
+- ``GET warehouse-requests/wave/<wave_code>/pick-list/`` → printable pick list
+  sorted by item
+"""
+from datetime import date
+from typing import Any, Dict, Optional
+
+from django.contrib import messages
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.translation import gettext_lazy as _
+from django.views.generic import TemplateView
+
+from .base import InventoryBaseView
+from shared.mixins import FeaturePermissionRequiredMixin
+from .. import models
+from ..services import wave_picking as wave_service
+from ..services.wave_picking import WavePickingError
+
+
+class WavePickingMixin(FeaturePermissionRequiredMixin, InventoryBaseView):
+    """Issue permission of the selected issue type within the active company."""
+
+    required_action = 'create_issue_from_warehouse_request'
+
+    def get_issue_type(self) -> str:
+        issue_type = self.request.POST.get('issue_type') or self.request.GET.get('issue_type') or 'permanent'
+        return issue_type if issue_type in wave_service.ISSUE_TYPES else 'permanent'
+
+    def get_feature_code(self) -> str:
+        return f'inventory.issues.{self.get_issue_type()}'
+
+    def get_company_id(self) -> int:
+        company_id = self.request.session.get('active_company_id')
+        if not company_id:
+            raise Http404(_('شرکت فعال مشخص نشده است.'))
+        return company_id
+
+
+class WavePickingView(WavePickingMixin, TemplateView):
+    """Preview and release a wave for one warehouse."""
+
+    template_name = 'inventory/wave_picking.html'
+
+    def get_warehouse(self) -> Optional[models.Warehouse]:
+        warehouse_id = self.request.POST.get('warehouse_id') or self.request.GET.get('warehouse_id')
+        if not warehouse_id:
+            return None
+        return get_object_or_404(
+            models.Warehouse, pk=warehouse_id, company_id=self.get_company_id(), is_enabled=1,
+        )
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        company_id = self.get_company_id()
+        warehouse = self.get_warehouse()
+        context['warehouses'] = models.Warehouse.objects.filter(company_id=company_id, is_enabled=1).order_by('name')
+        context['warehouse'] = warehouse
+        context['issue_type'] = self.get_issue_type()
+        context['issue_types'] = list(wave_service.ISSUE_TYPES)
+        if warehouse:
+            context['plan'] = wave_service.plan_wave(company_id, warehouse.pk, issue_type=context['issue_type'])
+        return context
+
+    def post(self, request, *args, **kwargs):
+        warehouse = self.get_warehouse()
+        if warehouse is None:
+            messages.error(request, _('Select a warehouse.'))
+            return HttpResponseRedirect(reverse('inventory:warehouse_request_wave'))
+        request_ids = [int(pk) for pk in request.POST.getlist('request_ids') if pk.isdigit()] or None
+        try:
+            document_date = date.fromisoformat(request.POST['document_date']) if request.POST.get('document_date') else None
+        except ValueError:
+            document_date = None
+        try:
+            result = wave_service.release_wave(
+                self.get_company_id(),
+                warehouse,
+                request.user,
+                request_ids=request_ids,
+                issue_type=self.get_issue_type(),
+                document_date=document_date,
+            )
+        except WavePickingError as exc:
+            for message in exc.messages:
+                messages.error(request, message)
+            return HttpResponseRedirect(
+                f"{reverse('inventory:warehouse_request_wave')}?warehouse_id={warehouse.pk}"
+            )
+        messages.success(request, _('%(documents)d issue documents created for %(requests)d requests.') % {
+            'documents': len(result.documents),
+            'requests': len(result.plan.allocations),
+        })
+        return HttpResponseRedirect(reverse('inventory:warehouse_request_wave_pick_list', args=[result.wave_code]))
+
+
+class WavePickListView(WavePickingMixin, TemplateView):
+    """Printable pick list of a wave, one row per item."""
+
+    template_name = 'inventory/wave_pick_list.html'
+    required_action = 'view_own'
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        rows = wave_service.build_pick_list(self.get_company_id(), self.kwargs['wave_code'])
+        if not rows:
+            raise Http404
+        context['wave_code'] = self.kwargs['wave_code']
+        context['rows'] = rows
+        return context
@@ -0,0 +1,14 @@
+"""
+URL configuration of the production REST API, mounted at ``/api/v1/production/``.
+"""
+from rest_framework.routers import SimpleRouter
+
+from .views import api_v1
+
+app_name = 'production_api'
+
+router = SimpleRouter()
+router.register('boms', api_v1.BOMViewSet)
+router.register('product-orders', api_v1.ProductOrderViewSet)
+
+urlpatterns = router.urls
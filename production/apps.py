@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ProductionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'production'
+
+    def ready(self):
+        from . import change_feed, search
+
+        search.register_documents()
+        change_feed.register_change_feed_models()
@@ -0,0 +1,21 @@
+"""
+Change feed registration for production master data and orders.
+
+See ``shared.utils.change_feed`` for how events are recorded.
+"""
+from shared.utils.change_feed import register_change_feed
+from . import models
+
+
+def register_change_feed_models():
+    register = register_change_feed
+    register(
+        models.BOM, 'production.bom', feature_code='production.bom',
+        payload_fields=('bom_code', 'finished_item_id', 'version', 'is_active', 'is_enabled'),
+        lines='materials',
+        line_payload_fields=('bom_id', 'material_item_id', 'quantity_per_unit', 'unit'),
+    )
+    register(
+        models.ProductOrder, 'production.product_order', feature_code='production.product_orders',
+        payload_fields=('order_code', 'order_date', 'finished_item_id', 'quantity_planned', 'status'),
+    )
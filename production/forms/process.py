@@ -74,33 +74,11 @@ class ProcessForm(forms.ModelForm):
             ).order_by('name')
             
             # Filter approved_by (User) - only users with approve permission for production.processes
-            from shared.models import UserCompanyAccess, AccessLevelPermission
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            
-            # Find access levels that have approve permission for production.processes
-            approve_access_levels = list(AccessLevelPermission.objects.filter(
-                module_code='production',
-                resource_code='production.processes',
-                can_approve=1,
-            ).values_list('access_level_id', flat=True))
-            
-            # Find users with those access levels for this company
-            approver_user_ids = list(UserCompanyAccess.objects.filter(
-                company_id=company_id,
-                access_level_id__in=approve_access_levels,
-                is_enabled=1,
-            ).values_list('user_id', flat=True))
-            
-            # Filter User queryset to show only users with approve permission
-            if approver_user_ids:
-                self.fields['approved_by'].queryset = User.objects.filter(
-                    id__in=approver_user_ids,
-                    is_active=True,
-                ).order_by('first_name', 'last_name', 'username')
-            else:
-                # No approvers found, show empty queryset
-                self.fields['approved_by'].queryset = User.objects.none()
+            # (company access levels only, read from the cached approver directory)
+            from shared.utils.approvers import get_approver_queryset
+            self.fields['approved_by'].queryset = get_approver_queryset(
+                company_id, 'production.processes', include_groups=False, include_superusers=False,
+            ).filter(is_active=True).order_by('first_name', 'last_name', 'username')
         else:
             from django.contrib.auth import get_user_model
             User = get_user_model()
@@ -0,0 +1,34 @@
+"""
+Global search registration for production documents.
+
+See ``shared.utils.document_search`` for how entries are maintained.
+"""
+from django.utils.translation import gettext_lazy as _
+
+from shared.utils.document_search import register_searchable_document
+from . import models
+
+
+def register_documents():
+    register = register_searchable_document
+    register(
+        models.ProductOrder, 'production.product_order',
+        label=_('Production Order'), feature_code='production.product_orders',
+        url_name='production:product_order_edit', code_field='order_code',
+        date_field='order_date', lines=None, status_field='status',
+        header_item_field='finished_item',
+    )
+    register(
+        models.TransferToLine, 'production.transfer_request',
+        label=_('Transfer To Line'), feature_code='production.transfer_requests',
+        url_name='production:transfer_request_edit', code_field='transfer_code',
+        date_field='transfer_date', lines='items', item_field='material_item',
+        status_field='status',
+    )
+    register(
+        models.PerformanceRecord, 'production.performance_record',
+        label=_('Performance Record'), feature_code='production.performance_records',
+        url_name='production:performance_record_edit', code_field='performance_code',
+        date_field='performance_date', lines='materials', item_field='material_item',
+        status_field='status', header_item_field='finished_item',
+    )
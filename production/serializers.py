@@ -0,0 +1,40 @@
+"""
+Serializers of the read-only production API (``/api/v1/production/``).
+"""
+from __future__ import annotations
+
+from rest_framework import serializers
+
+from shared.api import FieldSelectionMixin
+
+from . import models
+
+
+class BOMMaterialSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.BOMMaterial
+        fields = (
+            "id", "line_number", "material_item", "material_item_code", "material_type",
+            "quantity_per_unit", "unit", "scrap_allowance", "is_optional", "description",
+        )
+
+
+class BOMSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    materials = BOMMaterialSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = models.BOM
+        fields = (
+            "id", "bom_code", "finished_item", "finished_item_code", "version", "is_active",
+            "description", "is_enabled", "edited_at", "materials",
+        )
+
+
+class ProductOrderSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = models.ProductOrder
+        fields = (
+            "id", "order_code", "order_date", "due_date", "finished_item", "finished_item_code",
+            "bom", "bom_code", "process", "process_code", "quantity_planned", "unit",
+            "status", "priority", "customer_reference", "is_enabled", "edited_at",
+        )
@@ -0,0 +1,27 @@
+"""
+Read-only REST API of the production module (``/api/v1/production/``).
+"""
+from __future__ import annotations
+
+from django.db.models import Prefetch
+
+from shared.api import CompanyReadOnlyViewSet
+
+from .. import models
+from .. import serializers as api_serializers
+
+
+class BOMViewSet(CompanyReadOnlyViewSet):
+    queryset = models.BOM.objects.prefetch_related(
+        Prefetch('materials', queryset=models.BOMMaterial.objects.order_by('line_number', 'id')),
+    )
+    serializer_class = api_serializers.BOMSerializer
+    feature_code = 'production.bom'
+    filterset_fields = ('finished_item', 'is_active', 'is_enabled')
+
+
+class ProductOrderViewSet(CompanyReadOnlyViewSet):
+    queryset = models.ProductOrder.objects.all()
+    serializer_class = api_serializers.ProductOrderSerializer
+    feature_code = 'production.product_orders'
+    filterset_fields = ('status', 'priority', 'finished_item', 'bom')
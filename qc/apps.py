@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class QcConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'qc'
+
+    def ready(self):
+        from . import attachments
+
+        attachments.register_targets()
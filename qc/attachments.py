@@ -0,0 +1,41 @@
+"""
+Attachment target registration for QC receipt inspections.
+
+Inspection attachments stay in ``ReceiptInspection.attachments`` (a JSON
+list); each entry points at a deduplicated ``StoredFile``. See
+``shared.utils.attachments``.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from shared.utils.attachments import describe, feature_allowed, register_attachment_target
+
+from . import models
+
+
+def _attach(inspection, stored, file_name, user):
+    entry = describe(stored, file_name, uploaded_by=user.pk, uploaded_at=timezone.now().isoformat())
+    with transaction.atomic():
+        current = (
+            models.ReceiptInspection.objects.select_for_update()
+            .values_list("attachments", flat=True)
+            .get(pk=inspection.pk)
+        )
+        attachments = [*(current or []), entry]
+        models.ReceiptInspection.objects.filter(pk=inspection.pk).update(attachments=attachments)
+    inspection.attachments = attachments
+    return entry
+
+
+def _files(inspection):
+    return [entry for entry in inspection.attachments or [] if isinstance(entry, dict)]
+
+
+def register_targets():
+    register_attachment_target(
+        models.ReceiptInspection,
+        "qc.receipt_inspection",
+        attach=_attach,
+        files=_files,
+        allowed=feature_allowed("qc.inspections", "approve"),
+    )
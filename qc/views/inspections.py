@@ -11,13 +11,14 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.db import transaction
+from django.db.models import Q
 
 from inventory import models as inventory_models
 from qc.views.base import QCBaseView
-from shared.mixins import FeaturePermissionRequiredMixin
+from shared.mixins import FeaturePermissionRequiredMixin, ListStatsMixin
 
 
-class TemporaryReceiptQCListView(FeaturePermissionRequiredMixin, QCBaseView, ListView):
+class TemporaryReceiptQCListView(ListStatsMixin, FeaturePermissionRequiredMixin, QCBaseView, ListView):
     """List view for temporary receipts awaiting QC inspection."""
     model = inventory_models.ReceiptTemporary
     template_name = 'qc/temporary_receipts.html'
@@ -32,9 +33,9 @@ class TemporaryReceiptQCListView(FeaturePermissionRequiredMixin, QCBaseView, Lis
         # Show all receipts (awaiting, approved, rejected) - they should all be visible
         # Locked receipts (approved/rejected) will be shown but without action buttons
         # Note: item and warehouse are in ReceiptTemporaryLine, not in ReceiptTemporary
-        queryset = queryset.filter(
-            is_enabled=1
-        ).select_related('supplier', 'created_by', 'qc_approved_by').prefetch_related(
+        queryset = queryset.filter(is_enabled=1)
+        self.stats_queryset = queryset
+        queryset = queryset.select_related('supplier', 'created_by', 'qc_approved_by').prefetch_related(
             'lines__item', 
             'lines__warehouse'
         )
@@ -46,19 +47,21 @@ class TemporaryReceiptQCListView(FeaturePermissionRequiredMixin, QCBaseView, Lis
         )
         return queryset
     
+    def get_stats_filters(self) -> Dict[str, Any]:
+        """Summary cards by QC status."""
+        status = inventory_models.ReceiptTemporary.Status
+        return {
+            'total': None,
+            'awaiting_qc': Q(status=status.AWAITING_INSPECTION),
+            'approved': Q(status=status.APPROVED),
+            'rejected': Q(status=status.CLOSED),
+        }
+    
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """Add page title and stats to context."""
         context = super().get_context_data(**kwargs)
         context['page_title'] = _('Temporary Receipts - QC Inspection')
         
-        # Calculate stats
-        queryset = self.get_queryset()
-        context['stats'] = {
-            'awaiting_qc': queryset.filter(status=inventory_models.ReceiptTemporary.Status.AWAITING_INSPECTION).count(),
-            'approved': queryset.filter(status=inventory_models.ReceiptTemporary.Status.APPROVED).count(),
-            'rejected': queryset.filter(status=inventory_models.ReceiptTemporary.Status.CLOSED).count(),
-        }
-        
         # Prefetch rejected lines count for each receipt to show management button
         receipts = context.get('receipts', [])
         for receipt in receipts:
@@ -3,6 +3,7 @@ from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 from django.utils.translation import gettext_lazy as _
 
 from . import models
+from .utils.permissions import invalidate_feature_permissions_on_commit
 
 
 @admin.register(models.User)
@@ -68,6 +69,18 @@ class AccessLevelPermissionAdmin(admin.ModelAdmin):
     list_filter = ("module_code", "resource_type")
     search_fields = ("module_code", "resource_code", "access_level__code")
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_feature_permissions_on_commit()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_feature_permissions_on_commit()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_feature_permissions_on_commit()
+
 
 @admin.register(models.UserCompanyAccess)
 class UserCompanyAccessAdmin(admin.ModelAdmin):
@@ -0,0 +1,173 @@
+"""
+Building blocks of the read-only REST API (``/api/v1/``).
+
+Integrations authenticate with a session or HTTP Basic and pick a company with
+the ``X-Company-Id`` header (or ``?company=``); the active company of the
+session and then the user's primary company are used otherwise. Access is
+checked with the same feature permissions as the HTML views
+(``get_user_feature_permissions``), including the own/all view scope.
+
+List endpoints page with an opaque cursor ordered by ``edited_at``, accept
+``?updated_since=`` for incremental sync and ``?fields=`` to trim the
+payload; every ``GET`` response carries an ``ETag`` and answers
+``If-None-Match`` with ``304 Not Modified``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, time
+from typing import Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from rest_framework import exceptions, permissions, status, viewsets
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from shared.models import UserCompanyAccess
+from shared.utils.permissions import get_user_feature_permissions, has_feature_permission
+
+COMPANY_HEADER = "X-Company-Id"
+
+
+def get_api_company_id(request) -> int:
+    """Company the API request works on; raises ``PermissionDenied`` without access."""
+    cached = getattr(request, "_api_company_id", None)
+    if cached is not None:
+        return cached
+
+    user = request.user
+    raw = request.headers.get(COMPANY_HEADER) or request.query_params.get("company")
+    if raw:
+        try:
+            company_id = int(raw)
+        except (TypeError, ValueError):
+            raise exceptions.ValidationError({"company": "Company must be an integer ID."})
+    else:
+        company_id = request.session.get("active_company_id") if hasattr(request, "session") else None
+    if company_id is None:
+        primary = (
+            UserCompanyAccess.objects.filter(user=user, is_enabled=1)
+            .order_by("-is_primary", "id")
+            .values_list("company_id", flat=True)
+            .first()
+        )
+        if primary is None:
+            raise exceptions.PermissionDenied("No company selected.")
+        company_id = primary
+    elif not user.is_superuser and not UserCompanyAccess.objects.filter(
+        user=user, company_id=company_id, is_enabled=1,
+    ).exists():
+        raise exceptions.PermissionDenied("No access to this company.")
+
+    request._api_company_id = company_id
+    return company_id
+
+
+class FeaturePermission(permissions.IsAuthenticated):
+    """Requires ``view`` on the view's ``feature_code`` in the request's company."""
+
+    def has_permission(self, request, view) -> bool:
+        if not super().has_permission(request, view):
+            return False
+        company_id = get_api_company_id(request)
+        feature_code = getattr(view, "feature_code", None)
+        if not feature_code or request.user.is_superuser:
+            return True
+        feature_permissions = get_user_feature_permissions(request.user, company_id)
+        return has_feature_permission(feature_permissions, feature_code, "view")
+
+
+class EditedCursorPagination(CursorPagination):
+    """Cursor pages in ``edited_at`` order, the order ``updated_since`` syncs in."""
+
+    ordering = ("edited_at", "id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class UpdatedSinceFilter(BaseFilterBackend):
+    """``?updated_since=<ISO date or datetime>`` keeps rows edited at or after that moment."""
+
+    def filter_queryset(self, request, queryset, view):
+        raw = request.query_params.get("updated_since")
+        if not raw:
+            return queryset
+        value = parse_datetime(raw)
+        if value is None:
+            day = parse_date(raw)
+            if day is None:
+                raise exceptions.ValidationError({"updated_since": "Expected an ISO 8601 date or datetime."})
+            value = datetime.combine(day, time.min)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return queryset.filter(**{f"{view.updated_field}__gte": value})
+
+
+class FieldSelectionMixin:
+    """Serializer mixin honouring ``?fields=a,b`` of the request in its context."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        # Nested serializers are built without a context, so lines stay whole
+        raw = request.query_params.get("fields") if request is not None else None
+        if not raw:
+            return
+        requested = {name.strip() for name in raw.split(",") if name.strip()}
+        for name in set(self.fields) - requested - {"id"}:
+            self.fields.pop(name)
+
+
+class ETagMixin:
+    """Adds a content ``ETag`` to successful ``GET`` responses and honours ``If-None-Match``."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method != "GET" or response.status_code != status.HTTP_200_OK or not hasattr(response, "data"):
+            return response
+        payload = json.dumps(response.data, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"))
+        etag = f'"{hashlib.md5(payload.encode()).hexdigest()}"'
+        if etag in _parse_etags(request.headers.get("If-None-Match")):
+            not_modified = Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            return super().finalize_response(request, not_modified, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
+
+def _parse_etags(header: Optional[str]) -> set:
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+class CompanyReadOnlyViewSet(ETagMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only viewset limited to the request's company.
+
+    Subclasses set ``queryset``, ``serializer_class`` and ``feature_code``;
+    users with only the ``view_own`` scope see rows whose ``owner_field`` is
+    themselves, like ``filter_queryset_by_permissions`` in the HTML views.
+    """
+
+    feature_code: Optional[str] = None
+    owner_field = "created_by"
+    updated_field = "edited_at"
+    permission_classes = [FeaturePermission]
+    pagination_class = EditedCursorPagination
+    filter_backends = [UpdatedSinceFilter, *api_settings.DEFAULT_FILTER_BACKENDS]
+
+    def get_queryset(self):
+        request = self.request
+        company_id = get_api_company_id(request)
+        queryset = super().get_queryset().filter(company_id=company_id)
+        if self.feature_code and not request.user.is_superuser:
+            feature_permissions = get_user_feature_permissions(request.user, company_id)
+            if not has_feature_permission(feature_permissions, self.feature_code, "view_all", allow_own_scope=False):
+                queryset = queryset.filter(**{self.owner_field: request.user})
+        return queryset
@@ -0,0 +1,390 @@
+"""
+Query-budget benchmark suite for the main inventory/production screens.
+
+Each scenario runs against a synthetic company (``shared.utils.demo_data``)
+and is measured for query count, duplicate queries, SQL time, wall time and
+peak Python memory. ``run_benchmarks`` returns a JSON-serialisable report;
+``compare_reports`` diffs two reports so regressions show up between commits.
+
+Scenarios register with ``@scenario(name, budget=...)``; ``budget`` is the
+maximum query count enforced by the benchmark tests and flagged in reports.
+Document scenarios also run at 10 and 100 lines; ``LINE_BUDGETS`` caps the
+queries each extra line may add between the two runs.
+"""
+from __future__ import annotations
+
+import io
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from shared.utils.instrumentation import record_queries
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    run: Callable[['BenchmarkContext', Any], Any]
+    setup: Optional[Callable[['BenchmarkContext'], Any]] = None
+    budget: Optional[int] = None
+    description: str = ''
+
+
+_SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, *, budget: Optional[int] = None, setup=None):
+    """Register the decorated ``run(ctx, state)`` function as a benchmark scenario."""
+    def decorator(func):
+        _SCENARIOS[name] = Scenario(
+            name=name, run=func, setup=setup, budget=budget, description=(func.__doc__ or '').strip(),
+        )
+        return func
+    return decorator
+
+
+def get_scenarios(names: Optional[Iterable[str]] = None) -> List[Scenario]:
+    if not names:
+        return list(_SCENARIOS.values())
+    return [_SCENARIOS[name] for name in names]
+
+
+class BenchmarkContext:
+    """Dataset plus a logged-in client with the synthetic company active."""
+
+    def __init__(self, dataset):
+        from django.contrib.auth import get_user_model
+
+        self.dataset = dataset
+        self.user = get_user_model().objects.get(pk=dataset.user_id)
+        self.client = Client()
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['active_company_id'] = dataset.company_id
+        session.save()
+
+        self._sequence = 0
+
+    def url(self, name: str, *args) -> str:
+        return reverse(name, args=args)
+
+    def next_document_code(self, prefix: str) -> str:
+        self._sequence += 1
+        return f'{prefix}{self.dataset.company_id:04d}{self._sequence:08d}'
+
+
+def _status(response) -> Optional[int]:
+    return getattr(response, 'status_code', None)
+
+
+def measure(func: Callable[[], Any]) -> Dict[str, Any]:
+    """Run ``func`` once and return its query/time/memory measurements."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with record_queries() as recorder:
+            result = func()
+        wall = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'queries': recorder.count,
+        'duplicate_queries': recorder.duplicate_count,
+        'sql_ms': round(recorder.duration * 1000, 2),
+        'wall_ms': round(wall * 1000, 2),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'status': _status(result),
+        'top_duplicates': [
+            {'count': count, 'sql': sql[:300]} for sql, count in list(recorder.duplicates.items())[:5]
+        ],
+    }
+
+
+# Periodic maintenance that would be charged to whichever scenario runs when its interval expires
+UNMEASURED_MIDDLEWARE = ('shared.middleware.EditLockCleanupMiddleware',)
+
+# Line counts document scenarios run at, and the queries each extra line may add
+SCALING_LINES = (10, 100)
+LINE_BUDGETS = {
+    'inventory.issue_create': 22,
+    'inventory.issue_edit': 12,
+}
+
+
+def line_scaling(dataset, results: Dict[str, Any]) -> Dict[str, Any]:
+    """Queries per extra line between the ``SCALING_LINES`` runs of each ``LINE_BUDGETS`` scenario."""
+    small, large = SCALING_LINES
+    rows = {}
+    for prefix, budget in LINE_BUDGETS.items():
+        runs = [results.get(f'{prefix}_{count}_lines') for count in SCALING_LINES]
+        if None in runs:
+            continue
+        # Small scales have fewer plain items than lines asked for
+        lines = [len(_plain_items(dataset, small)), len(_plain_items(dataset, large))]
+        per_line = (runs[1]['queries'] - runs[0]['queries']) / max(1, lines[1] - lines[0])
+        rows[prefix] = {
+            'lines': lines,
+            'queries': [run['queries'] for run in runs],
+            'per_line': round(per_line, 2),
+            'budget': budget,
+            'over_budget': per_line > budget,
+        }
+    return rows
+
+
+def run_benchmarks(dataset, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Run scenarios against ``dataset`` and return the report dictionary."""
+    results = {}
+    # The test client talks to ``testserver``; outside the test runner it must be allowed explicitly
+    with override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        MIDDLEWARE=[name for name in settings.MIDDLEWARE if name not in UNMEASURED_MIDDLEWARE],
+    ):
+        ctx = BenchmarkContext(dataset)
+        for item in get_scenarios(names):
+            state = item.setup(ctx) if item.setup else None
+            result = measure(lambda: item.run(ctx, state))
+            result['budget'] = item.budget
+            result['over_budget'] = item.budget is not None and result['queries'] > item.budget
+            results[item.name] = result
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'dataset': dict(sorted(dataset.counts.items())),
+        'scenarios': results,
+        'line_scaling': line_scaling(dataset, results),
+    }
+
+
+COMPARED_METRICS = ('queries', 'duplicate_queries', 'sql_ms', 'wall_ms', 'peak_memory_kb')
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return per-scenario metric deltas between two reports."""
+    rows = []
+    for name, result in current.get('scenarios', {}).items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        row = {'scenario': name}
+        for metric in COMPARED_METRICS:
+            row[metric] = {
+                'before': before.get(metric),
+                'after': result.get(metric),
+                'delta': round((result.get(metric) or 0) - (before.get(metric) or 0), 2),
+            }
+        rows.append(row)
+    return rows
+
+
+# --------------------------------------------------------------------- scenarios
+#
+# Budgets are the query counts measured on the ``tiny`` scale with
+# ``BENCHMARK_ITEMS`` items, plus a small margin; lower them as screens get
+# optimised so a regression fails ``manage.py test --tag benchmark``.
+
+# Enough items without lot tracking for the 100-line scenarios
+BENCHMARK_ITEMS = 120
+
+
+def _create_issue_with_lines(ctx, lines: int, *, locked: int = 0):
+    from inventory import models as inventory_models
+
+    dataset = ctx.dataset
+    issue = inventory_models.IssuePermanent.objects.create(
+        company_id=dataset.company_id, document_code=ctx.next_document_code('IB'),
+        created_by=ctx.user, is_locked=locked,
+    )
+    item_ids = [item_id for _, item_id in _plain_items(dataset, lines)]
+    items = inventory_models.Item.objects.filter(pk__in=item_ids).order_by('pk')
+    warehouse = inventory_models.Warehouse.objects.get(pk=dataset.warehouse_ids[0])
+    inventory_models.IssuePermanentLine.objects.bulk_create([
+        inventory_models.IssuePermanentLine(
+            company_id=dataset.company_id, company_code=issue.company_code, document=issue,
+            item=item, item_code=item.item_code,
+            warehouse=warehouse, warehouse_code=warehouse.public_code, unit='EA', quantity=1,
+            sort_order=index,
+        )
+        for index, item in enumerate(items)
+    ])
+    return issue
+
+
+@scenario('inventory.balance', budget=790)
+def balance_page(ctx, state):
+    """Inventory balance page for one warehouse."""
+    return ctx.client.get(ctx.url('inventory:inventory_balance'), {'warehouse_id': ctx.dataset.warehouse_ids[0]})
+
+
+@scenario('inventory.item_autocomplete', budget=5)
+def item_autocomplete(ctx, state):
+    """Item picker search (AJAX)."""
+    return ctx.client.get(ctx.url('inventory:filtered_items'), {'search': 'Item 00'})
+
+
+def _primary_warehouse_id(dataset, index: int) -> int:
+    # DemoDataGenerator assigns item N to warehouse N % warehouses as its primary warehouse
+    return dataset.warehouse_ids[index % len(dataset.warehouse_ids)]
+
+
+def _plain_items(dataset, lines: int):
+    """``(index, item_id)`` of the first ``lines`` items without lot tracking (no serial entry needed)."""
+    lot_items = set(dataset.lot_item_ids)
+    return [(index, item_id) for index, item_id in enumerate(dataset.item_ids) if item_id not in lot_items][:lines]
+
+
+def _stock_receipt(ctx, lines: int):
+    """Locked receipt putting enough stock of the first ``lines`` items into their primary warehouses."""
+    from inventory import models as inventory_models
+
+    dataset = ctx.dataset
+    receipt = inventory_models.ReceiptPermanent.objects.create(
+        company_id=dataset.company_id, document_code=ctx.next_document_code('RB'),
+        created_by=ctx.user, is_locked=1,
+    )
+    plain_items = _plain_items(dataset, lines)
+    items = inventory_models.Item.objects.in_bulk([item_id for _, item_id in plain_items])
+    warehouses = inventory_models.Warehouse.objects.in_bulk(dataset.warehouse_ids)
+    rows = []
+    for index, item_id in plain_items:
+        warehouse = warehouses[_primary_warehouse_id(dataset, index)]
+        rows.append(inventory_models.ReceiptPermanentLine(
+            company_id=dataset.company_id, company_code=receipt.company_code, document=receipt,
+            item=items[item_id], item_code=items[item_id].item_code, warehouse=warehouse,
+            warehouse_code=warehouse.public_code, unit='EA', quantity=1000, sort_order=index,
+        ))
+    inventory_models.ReceiptPermanentLine.objects.bulk_create(rows)
+    return receipt
+
+
+def _issue_form_data(ctx, lines: int) -> Dict[str, Any]:
+    dataset = ctx.dataset
+    plain_items = _plain_items(dataset, lines)
+    data = {
+        'document_date': timezone.localdate().isoformat(),
+        'lines-TOTAL_FORMS': str(len(plain_items)),
+        'lines-INITIAL_FORMS': '0',
+        'lines-MIN_NUM_FORMS': '0',
+        'lines-MAX_NUM_FORMS': '1000',
+    }
+    for position, (index, item_id) in enumerate(plain_items):
+        prefix = f'lines-{position}'
+        data.update({
+            f'{prefix}-item': str(item_id),
+            f'{prefix}-warehouse': str(_primary_warehouse_id(dataset, index)),
+            f'{prefix}-unit': 'EA',
+            f'{prefix}-quantity': '1',
+        })
+    return data
+
+
+def _issue_create(lines: int, budget: int):
+    def issue_create(ctx, state):
+        return ctx.client.post(ctx.url('inventory:issue_permanent_create'), _issue_form_data(ctx, lines))
+
+    issue_create.__doc__ = f'Create a permanent issue with {lines} lines through the form.'
+    return scenario(
+        f'inventory.issue_create_{lines}_lines', budget=budget, setup=lambda ctx: _stock_receipt(ctx, lines),
+    )(issue_create)
+
+
+def _issue_edit(lines: int, budget: int):
+    def issue_edit(ctx, issue):
+        return ctx.client.get(ctx.url('inventory:issue_permanent_edit', issue.pk))
+
+    issue_edit.__doc__ = f'Render the edit page of a permanent issue with {lines} lines.'
+    return scenario(
+        f'inventory.issue_edit_{lines}_lines', budget=budget, setup=lambda ctx: _create_issue_with_lines(ctx, lines),
+    )(issue_edit)
+
+
+issue_create_10 = _issue_create(10, budget=230)
+issue_create_100 = _issue_create(100, budget=2200)
+issue_edit_10 = _issue_edit(10, budget=140)
+issue_edit_100 = _issue_edit(100, budget=1180)
+
+
+@scenario('inventory.bulk_lock_20_issues', budget=100,
+          setup=lambda ctx: [_create_issue_with_lines(ctx, 5).pk for _ in range(20)])
+def bulk_lock(ctx, issue_ids):
+    """Post (lock) 20 issues at once."""
+    return ctx.client.post(ctx.url('inventory:issue_permanent_bulk_lock'), {'document_ids': issue_ids})
+
+
+@scenario('ui.dashboard', budget=12)
+def dashboard(ctx, state):
+    """Main dashboard."""
+    return ctx.client.get(ctx.url('ui:dashboard'))
+
+
+def _item_workbook(ctx, rows: int):
+    from openpyxl import Workbook
+
+    from inventory import models as inventory_models
+
+    subcategory = inventory_models.ItemSubcategory.objects.filter(
+        company_id=ctx.dataset.company_id,
+    ).select_related('category').first()
+    item_type = inventory_models.ItemType.objects.filter(company_id=ctx.dataset.company_id).first()
+    warehouse_code = inventory_models.Warehouse.objects.get(pk=ctx.dataset.warehouse_ids[0]).public_code
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['header'] * 20)
+    stamp = int(time.time())
+    for index in range(rows):
+        name = f'Import {stamp}-{index:05d}'
+        sheet.append([
+            item_type.public_code, subcategory.category.public_code, subcategory.public_code, '90',
+            name, name, '', 0, 0, 0, '', '', 0, 'EA', 'EA', '', '', index, 1, warehouse_code,
+        ])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    buffer.name = 'items.xlsx'
+    return buffer
+
+
+@scenario('inventory.item_excel_import_100', budget=850, setup=lambda ctx: _item_workbook(ctx, 100))
+def item_excel_import(ctx, workbook):
+    """Import 100 items from an Excel workbook."""
+    return ctx.client.post(ctx.url('inventory:item_excel_import'), {'excel_file': workbook})
+
+
+def _limited_user(ctx):
+    from django.contrib.auth import get_user_model
+
+    from shared.models import AccessLevel, AccessLevelPermission, UserCompanyAccess
+    from shared.permissions import FEATURE_PERMISSION_MAP
+
+    user = get_user_model().objects.create_user(
+        username=f'bench-limited-{ctx.dataset.company_id}-{int(time.time() * 1000)}',
+        email=f'bench-{ctx.dataset.company_id}-{int(time.time() * 1000)}@example.com',
+    )
+    level = AccessLevel.objects.create(name=f'Benchmark {user.username}')
+    AccessLevelPermission.objects.bulk_create([
+        AccessLevelPermission(
+            access_level=level, module_code=code.split('.')[0], resource_type='feature',
+            resource_code=code, can_view=1, can_create=1, can_edit=1,
+        )
+        for code in FEATURE_PERMISSION_MAP
+    ])
+    UserCompanyAccess.objects.create(user=user, company_id=ctx.dataset.company_id, access_level=level)
+    return user
+
+
+@scenario('shared.permission_resolver', budget=5, setup=_limited_user)
+def permission_resolver(ctx, user):
+    """Resolve every feature permission of a non-superuser."""
+    from shared.utils.permissions import get_user_feature_permissions
+
+    get_user_feature_permissions(user, ctx.dataset.company_id)
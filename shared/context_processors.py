@@ -74,10 +74,10 @@ def active_company(request):
             
             company = context['active_company']
             
-            # Get sent email notifications from session (to avoid duplicate emails)
-            sent_email_notifications = request.session.get('sent_email_notifications', set())
-            if not isinstance(sent_email_notifications, set):
-                sent_email_notifications = set()
+            # Get sent email notifications from session (to avoid duplicate emails);
+            # the session is written only when an email is actually sent
+            from shared.utils.notifications import get_sent_email_notifications, mark_email_notification_sent
+            sent_email_notifications = get_sent_email_notifications(request.session)
             
             # 1. Requests awaiting approval (user is approver)
             pending_purchase_approvals = inventory_models.PurchaseRequest.objects.filter(
@@ -112,7 +112,7 @@ def active_company(request):
                             company_name=context['active_company'].display_name if context['active_company'] else None,
                         ):
                             sent_email_notifications.add(notification_key)
-                            request.session['sent_email_notifications'] = list(sent_email_notifications)
+                            mark_email_notification_sent(request.session, notification_key)
                     except Exception as e:
                         import logging
                         logger = logging.getLogger(__name__)
@@ -150,7 +150,7 @@ def active_company(request):
                             company_name=context['active_company'].display_name if context['active_company'] else None,
                         ):
                             sent_email_notifications.add(notification_key)
-                            request.session['sent_email_notifications'] = list(sent_email_notifications)
+                            mark_email_notification_sent(request.session, notification_key)
                     except Exception as e:
                         import logging
                         logger = logging.getLogger(__name__)
@@ -189,7 +189,7 @@ def active_company(request):
                             company_name=context['active_company'].display_name if context['active_company'] else None,
                         ):
                             sent_email_notifications.add(notification_key)
-                            request.session['sent_email_notifications'] = list(sent_email_notifications)
+                            mark_email_notification_sent(request.session, notification_key)
                     except Exception as e:
                         import logging
                         logger = logging.getLogger(__name__)
@@ -231,7 +231,7 @@ def active_company(request):
                             company_name=context['active_company'].display_name if context['active_company'] else None,
                         ):
                             sent_email_notifications.add(notification_key)
-                            request.session['sent_email_notifications'] = list(sent_email_notifications)
+                            mark_email_notification_sent(request.session, notification_key)
                     except Exception as e:
                         import logging
                         logger = logging.getLogger(__name__)
@@ -270,7 +270,7 @@ def active_company(request):
                             company_name=context['active_company'].display_name if context['active_company'] else None,
                         ):
                             sent_email_notifications.add(notification_key)
-                            request.session['sent_email_notifications'] = list(sent_email_notifications)
+                            mark_email_notification_sent(request.session, notification_key)
                     except Exception as e:
                         import logging
                         logger = logging.getLogger(__name__)
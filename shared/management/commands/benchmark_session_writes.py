@@ -0,0 +1,87 @@
+"""
+Management command to measure django_session writes per 1,000 requests.
+"""
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from django.core.management.base import BaseCommand
+
+from shared.middleware import SessionRefreshMiddleware
+
+
+def _view(request):
+    # Typical page: reads the active company like the context processor does
+    request.session.get('active_company_id')
+    return HttpResponse('ok')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark session table writes per 1,000 requests (legacy vs current settings)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Number of simulated requests per configuration (default: 1000)',
+        )
+        parser.add_argument(
+            '--spacing',
+            type=float,
+            default=2.0,
+            help='Simulated seconds between requests of the same user (default: 2)',
+        )
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        spacing = options['spacing']
+        configurations = [
+            ('legacy (db, save every request)', {
+                'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+                'SESSION_SAVE_EVERY_REQUEST': True,
+            }, False),
+            ('current ({}, refresh every {}s)'.format(
+                settings.SESSION_ENGINE.rsplit('.', 1)[-1],
+                getattr(settings, 'SESSION_REFRESH_INTERVAL', 300),
+            ), {}, True),
+        ]
+        for label, overrides, sliding in configurations:
+            with override_settings(**overrides):
+                writes = self._run(requests, spacing, sliding)
+            per_thousand = writes * 1000 / requests if requests else 0
+            self.stdout.write(f'{label}: {writes} writes / {requests} requests ({per_thousand:.1f} per 1,000)')
+
+    def _run(self, requests, spacing, sliding):
+        handler = SessionRefreshMiddleware(_view) if sliding else _view
+        middleware = SessionMiddleware(handler)
+        factory = RequestFactory()
+        clock = [1_000_000.0]
+
+        with transaction.atomic():
+            session = middleware.SessionStore()
+            session['active_company_id'] = 1
+            session.create()
+            cookie = {settings.SESSION_COOKIE_NAME: session.session_key}
+
+            with mock.patch('time.time', side_effect=lambda: clock[0]), \
+                    CaptureQueriesContext(connection) as queries:
+                for _ in range(requests):
+                    request = factory.get('/')
+                    request.COOKIES.update(cookie)
+                    middleware(request)
+                    clock[0] += spacing
+
+            session.delete()
+            transaction.set_rollback(True)
+
+        table = 'django_session'
+        return sum(
+            1 for query in queries.captured_queries
+            if table in query['sql'] and query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE'))
+        )
@@ -0,0 +1,36 @@
+"""
+Management command for attachment background work (thumbnails, stale uploads).
+"""
+from django.core.management.base import BaseCommand
+
+from shared.utils.attachments import generate_thumbnails, purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Generate pending attachment thumbnails and purge abandoned uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Maximum thumbnails to render in this run (default: 100)',
+        )
+        parser.add_argument(
+            '--skip-purge',
+            action='store_true',
+            help='Do not purge unfinished uploads older than ATTACHMENT_UPLOAD_TTL_HOURS',
+        )
+
+    def handle(self, *args, **options):
+        counts = generate_thumbnails(options['limit'])
+        if counts.get('unavailable'):
+            self.stdout.write(self.style.WARNING('Pillow is not installed; thumbnails were not generated.'))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'Thumbnails: {counts["ready"]} generated, {counts["failed"]} failed.')
+            )
+
+        if not options['skip_purge']:
+            purged = purge_stale_uploads()
+            self.stdout.write(f'Purged {purged} abandoned uploads.')
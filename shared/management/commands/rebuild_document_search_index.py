@@ -0,0 +1,50 @@
+"""
+Management command to rebuild the global document search index.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from shared.models import DocumentSearchIndex
+from shared.utils.document_search import get_searchable_documents, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DocumentSearchIndex entries for registered document types'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            action='append',
+            dest='types',
+            default=[],
+            help='Document type key to rebuild (repeatable, default: all types)',
+        )
+        parser.add_argument(
+            '--company',
+            type=int,
+            default=None,
+            help='Only rebuild documents of this company ID',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete existing entries of the selected types first',
+        )
+
+    def handle(self, *args, **options):
+        known = {spec.type_key for spec in get_searchable_documents()}
+        types = options['types']
+        unknown = sorted(set(types) - known)
+        if unknown:
+            raise CommandError(f'Unknown document types: {", ".join(unknown)}')
+
+        if options['clear']:
+            entries = DocumentSearchIndex.objects.all()
+            if types:
+                entries = entries.filter(document_type__in=types)
+            if options['company']:
+                entries = entries.filter(company_id=options['company'])
+            deleted, _ = entries.delete()
+            self.stdout.write(f'Deleted {deleted} search entries.')
+
+        total = rebuild_index(types or None, company_id=options['company'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} documents.'))
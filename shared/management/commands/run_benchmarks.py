@@ -0,0 +1,129 @@
+"""
+Management command to run the query-budget benchmark suite.
+"""
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from shared.benchmarks import compare_reports, get_scenarios, run_benchmarks
+from shared.utils.demo_data import SCALES, DemoDataGenerator, get_scale
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic company and measure queries, time and memory of the main screens'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(SCALES),
+            default='small',
+            help='Size of the generated company (default: small)',
+        )
+        parser.add_argument('--items', type=int, help='Override the number of items')
+        parser.add_argument('--documents', type=int, help='Override the number of receipts and issues')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Run only this scenario (repeatable). Use --list to see names',
+        )
+        parser.add_argument('--list', action='store_true', help='List scenarios and exit')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--compare', help='Print deltas against an earlier JSON report')
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the generated data instead of rolling it back',
+        )
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for item in get_scenarios():
+                budget = item.budget if item.budget is not None else '-'
+                self.stdout.write(f'{item.name:<40} budget={budget:<5} {item.description}')
+            return
+
+        try:
+            names = options['scenarios'] or None
+            get_scenarios(names)
+        except KeyError as exc:
+            raise CommandError(f'Unknown scenario: {exc.args[0]}')
+
+        scale = get_scale(
+            options['scale'],
+            items=options['items'],
+            receipts=options['documents'],
+            issues=options['documents'],
+        )
+        report = None
+        try:
+            with transaction.atomic():
+                dataset = DemoDataGenerator(scale).generate()
+                report = run_benchmarks(dataset, names)
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        report['scale'] = options['scale']
+        report['commit'] = _git_commit()
+        self._print(report)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as handle:
+                baseline = json.load(handle)
+            self._print_comparison(compare_reports(baseline, report))
+
+        over = [name for name, result in report['scenarios'].items() if result['over_budget']]
+        over += [f'{name} (per line)' for name, row in report['line_scaling'].items() if row['over_budget']]
+        if over:
+            self.stderr.write(self.style.WARNING('Over query budget: ' + ', '.join(over)))
+
+    def _print(self, report):
+        self.stdout.write(
+            f'{"scenario":<40} {"status":>6} {"queries":>8} {"dups":>5} {"sql ms":>9} '
+            f'{"wall ms":>9} {"peak KB":>9}'
+        )
+        for name, result in report['scenarios'].items():
+            self.stdout.write(
+                f'{name:<40} {result["status"] or "-":>6} {result["queries"]:>8} '
+                f'{result["duplicate_queries"]:>5} {result["sql_ms"]:>9} {result["wall_ms"]:>9} '
+                f'{result["peak_memory_kb"]:>9}'
+            )
+        for name, row in report['line_scaling'].items():
+            small, large = row['lines']
+            self.stdout.write(
+                f'{name:<40} {row["per_line"]} queries per extra line ({small}→{large} lines, '
+                f'budget {row["budget"]})'
+            )
+
+    def _print_comparison(self, rows):
+        self.stdout.write('')
+        self.stdout.write(f'{"scenario":<40} {"queries":>14} {"wall ms":>20}')
+        for row in rows:
+            queries = row['queries']
+            wall = row['wall_ms']
+            self.stdout.write(
+                f'{row["scenario"]:<40} {queries["before"]:>5}→{queries["after"]:<5}({queries["delta"]:+}) '
+                f'{wall["before"]:>8}→{wall["after"]:<8}({wall["delta"]:+})'
+            )
@@ -0,0 +1,69 @@
+"""
+Management command to generate synthetic demo data for load tests and benchmarks.
+"""
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shared.utils.demo_data import SCALES, generate_companies, get_scale
+
+
+class Command(BaseCommand):
+    help = 'Generate referentially consistent demo companies with bulk inserts (for load testing)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(SCALES),
+            default='small',
+            help='Rows per company (default: small)',
+        )
+        parser.add_argument('--companies', type=int, default=1, help='Number of companies (default: 1)')
+        parser.add_argument(
+            '--processes',
+            type=int,
+            help='Worker processes, one company each (default: CPU count; always 1 on SQLite)',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert (default: 2000)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument('--items', type=int, help='Override the number of items per company')
+        parser.add_argument('--documents', type=int, help='Override the number of receipts and issues')
+        parser.add_argument('--lines-per-document', type=int, help='Override the number of lines per document')
+        parser.add_argument('--tickets', type=int, help='Override the number of tickets per company')
+
+    def handle(self, *args, **options):
+        if options['companies'] < 1:
+            raise CommandError('--companies must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        scale = get_scale(
+            options['scale'],
+            items=options['items'],
+            receipts=options['documents'],
+            issues=options['documents'],
+            lines_per_document=options['lines_per_document'],
+            tickets=options['tickets'],
+        )
+        started = time.perf_counter()
+        datasets = generate_companies(
+            scale,
+            options['companies'],
+            processes=options['processes'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+        )
+        elapsed = time.perf_counter() - started
+
+        counts = Counter()
+        for dataset in datasets:
+            counts.update(dataset.counts)
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f'{label:<45} {count:>12,}')
+        total = sum(counts.values())
+        companies = ', '.join(str(dataset.company_id) for dataset in datasets)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {total:,} rows for companies [{companies}] in {elapsed:.1f}s '
+            f'({total / elapsed if elapsed else total:,.0f} rows/s)'
+        ))
@@ -69,3 +69,81 @@ class EditLockCleanupMiddleware:
             logger = logging.getLogger(__name__)
             logger.info(f"Cleaned up {cleaned_count} stale edit locks")
 
+
+
+class SessionRefreshMiddleware:
+    """
+    Sliding session expiry without a session write on every request.
+
+    Replaces ``SESSION_SAVE_EVERY_REQUEST``: an unmodified session is saved
+    (which also re-sends the cookie with a fresh expiry) only when its last
+    refresh is older than ``SESSION_REFRESH_INTERVAL`` seconds. Must be placed
+    after ``SessionMiddleware`` so it runs before the session is saved.
+    """
+    refreshed_at_key = '_session_refreshed_at'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        from django.conf import settings
+        self.refresh_interval = getattr(settings, 'SESSION_REFRESH_INTERVAL', 300)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        if session is None or not session.session_key or response.status_code >= 500:
+            return response
+
+        import time
+        now = int(time.time())
+        if session.modified or now - session.get(self.refreshed_at_key, 0) >= self.refresh_interval:
+            session[self.refreshed_at_key] = now
+        return response
+
+
+# Metrics key of requests that did not resolve to a view (404s, scanners)
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, duplicate queries, SQL time and latency per view.
+
+    Statistics go to ``shared.utils.instrumentation.metrics`` (report at
+    ``shared:instrumentation_report``). With ``INSTRUMENTATION_SERVER_TIMING``
+    the response carries a ``Server-Timing`` header visible in browser devtools.
+    Disabled entirely when ``INSTRUMENTATION_ENABLED`` is false.
+    """
+
+    def __init__(self, get_response):
+        from django.conf import settings
+        from django.core.exceptions import MiddlewareNotUsed
+
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'INSTRUMENTATION_SERVER_TIMING', True)
+        self.slow_request_ms = getattr(settings, 'INSTRUMENTATION_SLOW_REQUEST_MS', 1000)
+
+    def __call__(self, request):
+        import time
+        from shared.utils.instrumentation import metrics, record_queries, server_timing_header
+
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        # One bucket for all unresolved paths, so 404s/scanners cannot grow the aggregate
+        view_name = (match.view_name if match else '') or UNRESOLVED_VIEW
+        metrics.record(f'{request.method} {view_name}', request.path, response.status_code, total, recorder)
+
+        if self.server_timing:
+            response['Server-Timing'] = server_timing_header(total, recorder)
+        if total * 1000 >= self.slow_request_ms:
+            import logging
+            logging.getLogger(__name__).warning(
+                'Slow request %s %s: %.0f ms, %d queries (%d duplicates)',
+                request.method, request.path, total * 1000, recorder.count, recorder.duplicate_count,
+            )
+        return response
@@ -0,0 +1,75 @@
+# Generated by Django 4.2 on 2026-10-18 22:30
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_trigram_index(apps, schema_editor):
+    """Add a trigram index on search_text when pg_trgm is available (substring search)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS document_search_text_trgm_idx "
+        "ON shared_documentsearchindex USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS document_search_text_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shared', '0014_add_editable_model_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSearchIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(help_text="Registered document type key (e.g., 'inventory.issue_permanent')", max_length=60, verbose_name='Document Type')),
+                ('document_id', models.BigIntegerField(verbose_name='Document ID')),
+                ('document_code', models.CharField(max_length=30, verbose_name='Document Code')),
+                ('document_date', models.DateField(blank=True, null=True, verbose_name='Document Date')),
+                ('status', models.CharField(blank=True, max_length=30, verbose_name='Status')),
+                ('is_enabled', models.PositiveSmallIntegerField(choices=[(0, 'Disabled'), (1, 'Enabled')], default=1)),
+                ('is_locked', models.PositiveSmallIntegerField(default=0)),
+                ('item_codes', models.TextField(blank=True, verbose_name='Item Codes')),
+                ('item_names', models.TextField(blank=True, verbose_name='Item Names')),
+                ('search_text', models.TextField(blank=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, help_text='Document creator, used for view_own permission scope', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_search_entries', to='shared.company', verbose_name='Company')),
+            ],
+            options={
+                'verbose_name': 'Document Search Index',
+                'verbose_name_plural': 'Document Search Index',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='documentsearchindex',
+            index=models.Index(fields=['company', '-document_date'], name='document_search_company_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentsearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='document_search_vector_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentsearchindex',
+            constraint=models.UniqueConstraint(fields=('document_type', 'document_id'), name='document_search_type_id_unique'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-19 00:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shared', '0016_attachment_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeFeedCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Consumer Name')),
+                ('last_event_id', models.BigIntegerField(default=0, verbose_name='Last Event ID')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_feed_checkpoints', to='shared.company', verbose_name='Company')),
+            ],
+            options={
+                'verbose_name': 'Change Feed Checkpoint',
+                'verbose_name_plural': 'Change Feed Checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(help_text="Registered entity type key (e.g., 'inventory.issue_permanent')", max_length=60, verbose_name='Entity Type')),
+                ('entity_id', models.BigIntegerField(verbose_name='Entity ID')),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete'), ('lock', 'Lock'), ('unlock', 'Unlock')], max_length=10, verbose_name='Action')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Payload')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='change_events', to='shared.company', verbose_name='Company')),
+            ],
+            options={
+                'verbose_name': 'Change Event',
+                'verbose_name_plural': 'Change Events',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='changefeedcheckpoint',
+            constraint=models.UniqueConstraint(fields=('name', 'company'), name='change_feed_checkpoint_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['company', 'id'], name='change_event_company_seq_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-19 09:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+# Document types whose list views scope view_own by a field other than created_by
+OWNER_FIELDS = {
+    'inventory.purchase_request': ('inventory', 'PurchaseRequest', 'requested_by_id'),
+    'inventory.warehouse_request': ('inventory', 'WarehouseRequest', 'requester_id'),
+}
+
+
+def fill_request_owners(apps, schema_editor):
+    DocumentSearchIndex = apps.get_model('shared', 'DocumentSearchIndex')
+    for document_type, (app_label, model_name, owner_column) in OWNER_FIELDS.items():
+        model = apps.get_model(app_label, model_name)
+        DocumentSearchIndex.objects.filter(document_type=document_type).update(
+            owner_id=Subquery(model.objects.filter(pk=OuterRef('document_id')).values(owner_column)[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0043_movement_line_covering_indexes'),
+        ('shared', '0017_change_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='documentsearchindex',
+            old_name='created_by',
+            new_name='owner',
+        ),
+        migrations.AlterField(
+            model_name='documentsearchindex',
+            name='owner',
+            field=models.ForeignKey(blank=True, help_text="User the document's list views scope view_own by (creator or requester)", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+        migrations.RunPython(fill_request_owners, migrations.RunPython.noop),
+    ]
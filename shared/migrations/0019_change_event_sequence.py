@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+def number_existing_events(apps, schema_editor):
+    # Existing events keep their ID as sequence, so stored checkpoints stay valid
+    ChangeEvent = apps.get_model('shared', 'ChangeEvent')
+    ChangeEvent.objects.update(sequence=models.F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shared', '0018_document_search_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changeevent',
+            name='sequence',
+            field=models.BigIntegerField(blank=True, help_text="Feed position, assigned once the event's transaction has committed", null=True, unique=True, verbose_name='Sequence'),
+        ),
+        migrations.RunPython(number_existing_events, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='changeevent',
+            name='change_event_company_seq_idx',
+        ),
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['company', 'sequence'], name='change_event_company_pos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(condition=models.Q(('sequence__isnull', True)), fields=['id'], name='change_event_unsequenced_idx'),
+        ),
+        migrations.RenameField(
+            model_name='changefeedcheckpoint',
+            old_name='last_event_id',
+            new_name='last_sequence',
+        ),
+        migrations.AlterField(
+            model_name='changefeedcheckpoint',
+            name='last_sequence',
+            field=models.BigIntegerField(default=0, verbose_name='Last Sequence'),
+        ),
+    ]
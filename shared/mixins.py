@@ -4,7 +4,9 @@ from __future__ import annotations
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import PermissionDenied
+from django.db.models import Count, Q
 
+from shared.utils.cache import get_company_cached
 from shared.utils.permissions import (
     FeaturePermissionState,
     get_user_feature_permissions,
@@ -52,3 +54,49 @@ class FeaturePermissionRequiredMixin(LoginRequiredMixin):
         if not self.has_feature_permission():
             raise PermissionDenied
         return super().dispatch(request, *args, **kwargs)
+
+
+class ListStatsMixin:
+    """
+    Summary-card counts for list views computed with one aggregate query.
+
+    Subclasses return ``{key: Q | None}`` from ``get_stats_filters`` (``None``
+    counts every row) and assign ``self.stats_queryset`` in ``get_queryset``
+    once company/permission filtering is applied, before request filters and
+    prefetches. Results are cached per company and user and are exposed to
+    the template as ``stats``.
+    """
+
+    stats_queryset = None
+
+    def get_stats_filters(self) -> dict[str, Q | None]:
+        return {}
+
+    def get_stats_queryset(self):
+        if self.stats_queryset is not None:
+            return self.stats_queryset
+        return self.object_list
+
+    def get_stats(self) -> dict[str, int]:
+        filters = self.get_stats_filters()
+        if not filters:
+            return {}
+        queryset = self.get_stats_queryset().order_by()
+        aggregates = {
+            key: Count("pk", filter=condition) if condition is not None else Count("pk")
+            for key, condition in filters.items()
+        }
+        company_id = self.request.session.get("active_company_id")
+        if not company_id:
+            return queryset.aggregate(**aggregates)
+        return get_company_cached(
+            f"list-stats:{self.__class__.__name__}",
+            company_id,
+            lambda: queryset.aggregate(**aggregates),
+            self.request.user.pk,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["stats"] = self.get_stats()
+        return context
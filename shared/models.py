@@ -1,7 +1,10 @@
 import re
+import uuid
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, Group
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import RegexValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -37,6 +40,10 @@ __all__ = [
     "SectionRegistry",
     "ActionRegistry",
     "Notification",
+    "StoredFile",
+    "UploadSession",
+    "ChangeEvent",
+    "ChangeFeedCheckpoint",
     "NUMERIC_CODE_VALIDATOR",
     "ENABLED_FLAG_CHOICES",
 ]
@@ -798,3 +805,241 @@ class Notification(TimeStampedModel):
             self.edited_by = user
         self.save(update_fields=['is_read', 'read_at', 'edited_by', 'edited_at'])
 
+
+class DocumentSearchIndex(models.Model):
+    """
+    One row per searchable document (receipts, issues, requests, production).
+
+    Maintained by ``shared.utils.document_search`` on header and line
+    save/delete, so a global search is a single query over this table instead
+    of header → lines → items joins per document type.
+    """
+
+    company = models.ForeignKey(
+        "Company",
+        on_delete=models.CASCADE,
+        related_name="document_search_entries",
+        verbose_name=_("Company"),
+    )
+    document_type = models.CharField(
+        max_length=60,
+        verbose_name=_("Document Type"),
+        help_text=_("Registered document type key (e.g., 'inventory.issue_permanent')"),
+    )
+    document_id = models.BigIntegerField(verbose_name=_("Document ID"))
+    document_code = models.CharField(max_length=30, verbose_name=_("Document Code"))
+    document_date = models.DateField(null=True, blank=True, verbose_name=_("Document Date"))
+    status = models.CharField(max_length=30, blank=True, verbose_name=_("Status"))
+    is_enabled = models.PositiveSmallIntegerField(choices=ENABLED_FLAG_CHOICES, default=1)
+    is_locked = models.PositiveSmallIntegerField(default=0)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("Owner"),
+        help_text=_("User the document's list views scope view_own by (creator or requester)"),
+    )
+    item_codes = models.TextField(blank=True, verbose_name=_("Item Codes"))
+    item_names = models.TextField(blank=True, verbose_name=_("Item Names"))
+    search_text = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Document Search Index")
+        verbose_name_plural = _("Document Search Index")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("document_type", "document_id"),
+                name="document_search_type_id_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["company", "-document_date"], name="document_search_company_idx"),
+            GinIndex(fields=["search_vector"], name="document_search_vector_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.document_type}:{self.document_code}"
+
+
+class StoredFile(models.Model):
+    """
+    Content-addressed attachment blob (one row and one file per SHA-256).
+
+    Ticket attachments and QC inspection attachments reference these rows, so
+    the same content uploaded twice is stored once. Maintained by
+    ``shared.utils.attachments``.
+    """
+
+    THUMBNAIL_STATUS_CHOICES = [
+        ("pending", _("Pending")),
+        ("ready", _("Ready")),
+        ("skipped", _("Skipped")),
+        ("failed", _("Failed")),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name=_("SHA-256"))
+    size = models.BigIntegerField(verbose_name=_("Size"), help_text=_("File size in bytes"))
+    mime_type = models.CharField(max_length=100, blank=True, verbose_name=_("MIME Type"))
+    storage_name = models.CharField(
+        max_length=255,
+        verbose_name=_("Storage Name"),
+        help_text=_("Path relative to ATTACHMENT_STORAGE_ROOT"),
+    )
+    thumbnail_name = models.CharField(max_length=255, blank=True, verbose_name=_("Thumbnail Name"))
+    thumbnail_status = models.CharField(
+        max_length=10,
+        choices=THUMBNAIL_STATUS_CHOICES,
+        default="pending",
+        verbose_name=_("Thumbnail Status"),
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Stored File")
+        verbose_name_plural = _("Stored Files")
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                name="stored_file_thumb_pending_idx",
+                condition=models.Q(thumbnail_status="pending"),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.sha256
+
+
+class UploadSession(models.Model):
+    """Resumable chunked upload; bytes go to a ``.part`` file until completed."""
+
+    STATUS_CHOICES = [
+        ("uploading", _("Uploading")),
+        ("complete", _("Complete")),
+        ("aborted", _("Aborted")),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey(
+        "Company",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="upload_sessions",
+        verbose_name=_("Company"),
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+        verbose_name=_("User"),
+    )
+    file_name = models.CharField(max_length=255, verbose_name=_("File Name"))
+    mime_type = models.CharField(max_length=100, blank=True, verbose_name=_("MIME Type"))
+    total_size = models.BigIntegerField(verbose_name=_("Total Size"))
+    received_size = models.BigIntegerField(default=0, verbose_name=_("Received Size"))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="uploading")
+    stored_file = models.ForeignKey(
+        StoredFile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="upload_sessions",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Upload Session")
+        verbose_name_plural = _("Upload Sessions")
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="upload_session_status_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.file_name} ({self.received_size}/{self.total_size})"
+
+
+class ChangeEvent(models.Model):
+    """
+    Transactional outbox row: one save, delete or lock/unlock of a tracked model.
+
+    Written by ``shared.utils.change_feed`` in the transaction of the change.
+    ``sequence`` is the feed position consumers checkpoint on; writers number
+    events right after they have committed, see ``assign_sequences``.
+    """
+
+    ACTION_CHOICES = [
+        ("create", _("Create")),
+        ("update", _("Update")),
+        ("delete", _("Delete")),
+        ("lock", _("Lock")),
+        ("unlock", _("Unlock")),
+    ]
+
+    company = models.ForeignKey(
+        "Company",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="change_events",
+        verbose_name=_("Company"),
+    )
+    entity_type = models.CharField(
+        max_length=60,
+        verbose_name=_("Entity Type"),
+        help_text=_("Registered entity type key (e.g., 'inventory.issue_permanent')"),
+    )
+    entity_id = models.BigIntegerField(verbose_name=_("Entity ID"))
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, verbose_name=_("Action"))
+    payload = models.JSONField(default=dict, blank=True, verbose_name=_("Payload"))
+    sequence = models.BigIntegerField(
+        null=True,
+        blank=True,
+        unique=True,
+        verbose_name=_("Sequence"),
+        help_text=_("Feed position, assigned once the event's transaction has committed"),
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Change Event")
+        verbose_name_plural = _("Change Events")
+        indexes = [
+            models.Index(fields=["company", "sequence"], name="change_event_company_pos_idx"),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(sequence__isnull=True),
+                name="change_event_unsequenced_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.pk} {self.action} {self.entity_type}:{self.entity_id}"
+
+
+class ChangeFeedCheckpoint(models.Model):
+    """Last ``ChangeEvent`` sequence a named consumer has processed for a company."""
+
+    name = models.CharField(max_length=100, verbose_name=_("Consumer Name"))
+    company = models.ForeignKey(
+        "Company",
+        on_delete=models.CASCADE,
+        related_name="change_feed_checkpoints",
+        verbose_name=_("Company"),
+    )
+    last_sequence = models.BigIntegerField(default=0, verbose_name=_("Last Sequence"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Change Feed Checkpoint")
+        verbose_name_plural = _("Change Feed Checkpoints")
+        constraints = [
+            models.UniqueConstraint(fields=("name", "company"), name="change_feed_checkpoint_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name}@{self.company_id}: {self.last_sequence}"
@@ -0,0 +1,62 @@
+"""
+Signal handlers for the shared module.
+
+Changes to who holds which access level in a company invalidate the cached
+approver directories (``shared.utils.approvers``).
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from shared.utils.approvers import invalidate_approvers
+from . import models
+
+
+APPROVER_MODELS = (
+    models.UserCompanyAccess,
+    models.GroupProfile,
+    models.AccessLevel,
+)
+
+
+def invalidate_approvers_handler(sender, **kwargs):
+    invalidate_approvers()
+
+
+def user_saved_handler(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login; anything else may change is_superuser
+    if created or update_fields is None or 'is_superuser' in update_fields:
+        invalidate_approvers()
+
+
+def connect_signals():
+    for model in APPROVER_MODELS:
+        post_save.connect(
+            invalidate_approvers_handler,
+            sender=model,
+            dispatch_uid=f'shared_approvers_save_{model._meta.model_name}',
+        )
+        post_delete.connect(
+            invalidate_approvers_handler,
+            sender=model,
+            dispatch_uid=f'shared_approvers_delete_{model._meta.model_name}',
+        )
+    m2m_changed.connect(
+        invalidate_approvers_handler,
+        sender=get_user_model().groups.through,
+        dispatch_uid='shared_approvers_user_groups',
+    )
+    m2m_changed.connect(
+        invalidate_approvers_handler,
+        sender=models.GroupProfile.access_levels.through,
+        dispatch_uid='shared_approvers_group_access_levels',
+    )
+    post_save.connect(
+        user_saved_handler,
+        sender=get_user_model(),
+        dispatch_uid='shared_approvers_user_save',
+    )
+    post_delete.connect(
+        invalidate_approvers_handler,
+        sender=get_user_model(),
+        dispatch_uid='shared_approvers_user_delete',
+    )
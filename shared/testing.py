@@ -0,0 +1,31 @@
+"""
+Test helpers shared by the app test suites.
+"""
+from shared.utils.instrumentation import record_queries
+
+
+class QueryBudgetMixin:
+    """
+    ``TestCase`` mixin asserting per-view query budgets.
+
+    Unlike ``assertNumQueries`` the budget is an upper bound, and a failure
+    lists the repeated query fingerprints, which usually point at the N+1.
+    """
+
+    def assertQueryBudget(self, url, max_queries, *, max_duplicates=None, method='get', data=None,
+                          status_code=200, **extra):
+        with record_queries() as recorder:
+            response = getattr(self.client, method)(url, data or {}, **extra)
+        self.assertEqual(response.status_code, status_code)
+
+        problems = []
+        if recorder.count > max_queries:
+            problems.append(f'{recorder.count} queries (budget {max_queries})')
+        if max_duplicates is not None and recorder.duplicate_count > max_duplicates:
+            problems.append(f'{recorder.duplicate_count} duplicate queries (budget {max_duplicates})')
+        if problems:
+            repeated = '\n'.join(
+                f'  x{count} {sql[:200]}' for sql, count in list(recorder.duplicates.items())[:10]
+            )
+            self.fail(f'{url}: ' + ', '.join(problems) + (f'\nRepeated queries:\n{repeated}' if repeated else ''))
+        return response
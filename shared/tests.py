@@ -1,4 +1,12 @@
-from django.test import TestCase
+import hashlib
+import importlib.util
+import io
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 from shared import models
 from production import models as production_models
@@ -51,3 +59,821 @@ class SharedModelTests(TestCase):
             is_enabled=1,
         )
         self.assertIn(self.company.display_name, str(access))
+
+
+class DocumentSearchIndexTests(TestCase):
+    def setUp(self):
+        from inventory import models as inventory_models
+
+        self.inventory_models = inventory_models
+        self.user = models.User.objects.create_superuser(
+            username="search-admin", email="search@example.com", password="secure-pass",
+        )
+        self.company = models.Company.objects.create(
+            public_code="001", legal_name="Search Co.", display_name="Search Co.", is_enabled=1,
+        )
+        item_type = inventory_models.ItemType.objects.create(
+            company=self.company, public_code="001", name="Raw", name_en="Raw",
+        )
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        subcategory = inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        self.warehouse = inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        self.item = inventory_models.Item.objects.create(
+            company=self.company, type=item_type, category=category, subcategory=subcategory,
+            user_segment="01", name="Sulfuric Acid", name_en="Sulfuric Acid",
+            default_unit="L", primary_unit="L",
+        )
+
+    def create_issue(self, code):
+        with self.captureOnCommitCallbacks(execute=True):
+            issue = self.inventory_models.IssuePermanent.objects.create(
+                company=self.company, document_code=code, created_by=self.user,
+            )
+            self.inventory_models.IssuePermanentLine.objects.create(
+                company=self.company, document=issue, item=self.item,
+                warehouse=self.warehouse, unit="L", quantity=1,
+            )
+        return issue
+
+    def test_saving_lines_indexes_document_once_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            issue = self.inventory_models.IssuePermanent.objects.create(
+                company=self.company, document_code="ISP-SEARCH-1", created_by=self.user,
+            )
+            for _ in range(3):
+                self.inventory_models.IssuePermanentLine.objects.create(
+                    company=self.company, document=issue, item=self.item,
+                    warehouse=self.warehouse, unit="L", quantity=1,
+                )
+        reindexes = [callback for callback in callbacks if hasattr(callback, "search_keys")]
+        self.assertEqual(len(reindexes), 1)
+        self.assertEqual(list(reindexes[0].search_keys), [(self.inventory_models.IssuePermanent, issue.pk)])
+        reindexes[0]()
+        entry = models.DocumentSearchIndex.objects.get(
+            document_type="inventory.issue_permanent", document_id=issue.pk,
+        )
+        self.assertIn(self.item.item_code, entry.item_codes)
+        self.assertEqual(entry.item_names, "Sulfuric Acid")
+
+    def test_rolled_back_reindex_does_not_swallow_later_ones(self):
+        from django.db import transaction
+
+        from shared.utils.document_search import schedule_reindex
+
+        issue = self.create_issue("ISP-SEARCH-4")
+        key = (self.inventory_models.IssuePermanent, issue.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    schedule_reindex(*key)
+                    raise ValueError
+            except ValueError:
+                pass
+            with transaction.atomic():
+                schedule_reindex(*key)
+                schedule_reindex(*key)
+        reindexes = [callback for callback in callbacks if hasattr(callback, "search_keys")]
+        self.assertEqual([list(callback.search_keys) for callback in reindexes], [[key]])
+
+    def test_search_finds_documents_by_item_name_and_code(self):
+        from shared.utils.document_search import search_documents
+
+        issue = self.create_issue("ISP-SEARCH-2")
+        with self.assertNumQueries(1):
+            hits = search_documents(self.user, self.company.pk, "sulfu")
+        self.assertEqual([hit["id"] for hit in hits], [issue.pk])
+        self.assertEqual(hits[0]["url"], reverse("inventory:issue_permanent_detail", args=[issue.pk]))
+
+        hits = search_documents(self.user, self.company.pk, "SEARCH-2")
+        self.assertEqual([hit["code"] for hit in hits], ["ISP-SEARCH-2"])
+
+    def test_requests_are_owned_by_their_requester(self):
+        requester = models.User.objects.create_user(username="search-requester", password="secure-pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            request = self.inventory_models.PurchaseRequest.objects.create(
+                company=self.company, requested_by=requester, created_by=self.user,
+                item=self.item, unit="L", quantity_requested=1,
+            )
+        entry = models.DocumentSearchIndex.objects.get(
+            document_type="inventory.purchase_request", document_id=request.pk,
+        )
+        self.assertEqual(entry.owner_id, requester.pk)
+
+    def test_deleting_document_removes_entry(self):
+        issue = self.create_issue("ISP-SEARCH-3")
+        with self.captureOnCommitCallbacks(execute=True):
+            issue.delete()
+        self.assertFalse(models.DocumentSearchIndex.objects.filter(document_id=issue.pk).exists())
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        from inventory import models as inventory_models
+
+        self.inventory_models = inventory_models
+        self.user = models.User.objects.create_superuser(
+            username="feed-admin", email="feed@example.com", password="secure-pass",
+        )
+        self.company = models.Company.objects.create(
+            public_code="001", legal_name="Feed Co.", display_name="Feed Co.", is_enabled=1,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.warehouse = inventory_models.Warehouse.objects.create(
+                company=self.company, public_code="00001", name="Main", name_en="Main",
+            )
+
+    def events(self, **filters):
+        return list(
+            models.ChangeEvent.objects.filter(company=self.company, **filters)
+            .order_by("id").values_list("entity_type", "entity_id", "action")
+        )
+
+    def create_issue(self, code):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.inventory_models.IssuePermanent.objects.create(
+                company=self.company, document_code=code, created_by=self.user,
+            )
+
+    def test_saves_record_events_in_order(self):
+        issue = self.create_issue("ISP-FEED-1")
+        issue.document_code = "ISP-FEED-1A"
+        issue.save(update_fields=["document_code"])
+        issue_id = issue.pk
+        issue.delete()
+        self.assertEqual(self.events(entity_type="inventory.issue_permanent"), [
+            ("inventory.issue_permanent", issue_id, "create"),
+            ("inventory.issue_permanent", issue_id, "update"),
+            ("inventory.issue_permanent", issue_id, "delete"),
+        ])
+
+    def test_batch_writes_events_once_and_drops_failed_blocks(self):
+        from shared.utils import change_feed
+
+        with CaptureQueriesContext(connection) as queries:
+            with change_feed.batch():
+                first = self.create_issue("ISP-FEED-2")
+                try:
+                    with change_feed.batch():
+                        self.create_issue("ISP-FEED-3")
+                        raise ValueError
+                except ValueError:
+                    pass
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith(f'INSERT INTO "{models.ChangeEvent._meta.db_table}"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(self.events(entity_type="inventory.issue_permanent"), [("inventory.issue_permanent", first.pk, "create")])
+
+    def test_posting_records_lock_events(self):
+        from inventory.services import posting
+
+        issues = [self.create_issue(f"ISP-FEED-{number}") for number in (4, 5)]
+        models.ChangeEvent.objects.all().delete()
+        result = posting.post_documents(
+            self.inventory_models.IssuePermanent.objects.filter(pk__in=[issue.pk for issue in issues]),
+            self.user,
+        )
+        self.assertEqual(len(result.posted), 2)
+        self.assertEqual(
+            self.events(entity_type="inventory.issue_permanent"),
+            [("inventory.issue_permanent", issue.pk, "lock") for issue in issues],
+        )
+
+    def test_event_committed_late_with_smaller_id_is_not_skipped(self):
+        from shared.utils import change_feed
+
+        first = self.create_issue("ISP-FEED-8")
+        seen = change_feed.read_changes(self.company.pk, entity_types=["inventory.issue_permanent"])
+        self.assertEqual([event.entity_id for event in seen], [first.pk])
+        # A transaction that took its ID before the event above but commits after the read
+        late = models.ChangeEvent.objects.create(
+            id=models.ChangeEvent.objects.earliest("id").pk - 1, company=self.company,
+            entity_type="inventory.issue_permanent", entity_id=first.pk, action="update",
+        )
+        self.assertEqual(change_feed.read_changes(self.company.pk, seen[-1].sequence), [])
+        # Its writer numbers it after the commit; readers never write
+        change_feed.assign_sequences()
+        after = change_feed.read_changes(self.company.pk, seen[-1].sequence, entity_types=["inventory.issue_permanent"])
+        self.assertEqual([event.pk for event in after], [late.pk])
+        self.assertGreater(after[0].sequence, seen[-1].sequence)
+
+    def test_writer_numbers_events_once_per_transaction_after_commit(self):
+        from django.db import transaction
+
+        from shared.utils import change_feed
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                issues = [
+                    self.inventory_models.IssuePermanent.objects.create(
+                        company=self.company, document_code=f"ISP-FEED-1{number}", created_by=self.user,
+                    )
+                    for number in range(3)
+                ]
+        sequencing = change_feed._sequence_committed_events
+        self.assertEqual([callback for callback in callbacks if callback is sequencing], [sequencing])
+        with self.assertNumQueries(1):
+            self.assertEqual(change_feed.read_changes(self.company.pk, entity_types=["inventory.issue_permanent"]), [])
+
+        for callback in callbacks:
+            callback()
+        events = change_feed.read_changes(self.company.pk, entity_types=["inventory.issue_permanent"])
+        self.assertEqual([event.entity_id for event in events], [issue.pk for issue in issues])
+
+    def test_long_polls_wait_only_while_a_slot_is_free(self):
+        from shared.utils import change_feed
+
+        with self.settings(CHANGE_FEED_MAX_LONG_POLLS=1):
+            with change_feed.long_poll_slot(10) as first, change_feed.long_poll_slot(10) as second:
+                self.assertEqual((first, second), (10, 0))
+            with change_feed.long_poll_slot(10) as again:
+                self.assertEqual(again, 10)
+        with change_feed.long_poll_slot(10) as default:
+            self.assertEqual(default, 0)
+
+    def test_item_import_writes_events_once_and_rolls_back_failed_rows(self):
+        from unittest import mock
+
+        from openpyxl import Workbook
+
+        from inventory.views.item_import import ItemExcelImportView
+
+        inventory_models = self.inventory_models
+        inventory_models.ItemType.objects.create(company=self.company, public_code="001", name="Raw", name_en="Raw")
+        category = inventory_models.ItemCategory.objects.create(
+            company=self.company, public_code="001", name="Chem", name_en="Chem",
+        )
+        inventory_models.ItemSubcategory.objects.create(
+            company=self.company, category=category, public_code="001", name="Acid", name_en="Acid",
+        )
+        workbook = Workbook()
+        workbook.active.append(["header"] * 20)
+        for name in ("Soda", "Broken", "Lime"):
+            workbook.active.append(["001", "001", "001", "01", name, name, "", 0, 0, 0, "", "", 0, "EA", "EA", "", "", 0, 1, "00001"])
+        upload = io.BytesIO()
+        workbook.save(upload)
+        upload.seek(0)
+        upload.name = "items.xlsx"
+
+        create_item = ItemExcelImportView._create_item
+
+        def failing_create(view, data, company_id, user):
+            item = create_item(view, data, company_id, user)
+            if item.name == "Broken":
+                raise ValueError("broken row")
+            return item
+
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["active_company_id"] = self.company.pk
+        session.save()
+        with mock.patch.object(ItemExcelImportView, "_create_item", failing_create), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("inventory:item_excel_import"), {"excel_file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["success_count"], 2)
+        items = inventory_models.Item.objects.filter(company=self.company).order_by("pk")
+        self.assertEqual([item.name for item in items], ["Soda", "Lime"])
+        self.assertEqual(
+            [(entity_id, action) for _, entity_id, action in self.events(entity_type="inventory.item")],
+            [(item.pk, "create") for item in items],
+        )
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith(f'INSERT INTO "{models.ChangeEvent._meta.db_table}"')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_endpoint_and_consumer_resume_after_last_sequence(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        first = self.create_issue("ISP-FEED-6")
+        self.client.force_login(self.user)
+        url = reverse("change_feed")
+        headers = {"HTTP_X_COMPANY_ID": str(self.company.pk)}
+        body = self.client.get(url, {"entity_type": "inventory.issue_permanent"}, **headers).json()
+        self.assertEqual([event["entity_id"] for event in body["events"]], [first.pk])
+
+        second = self.create_issue("ISP-FEED-7")
+        body = self.client.get(url, {"after": body["last_sequence"], "entity_type": "inventory.issue_permanent"}, **headers).json()
+        self.assertEqual([event["entity_id"] for event in body["events"]], [second.pk])
+
+        out = StringIO()
+        call_command("consume_changes", name="erp-sync", company=self.company.pk, stdout=out, stderr=StringIO())
+        checkpoint = models.ChangeFeedCheckpoint.objects.get(name="erp-sync", company=self.company)
+        self.assertEqual(checkpoint.last_sequence, models.ChangeEvent.objects.latest("sequence").sequence)
+        call_command("consume_changes", name="erp-sync", company=self.company.pk, stdout=out, stderr=StringIO())
+        self.assertEqual(len(out.getvalue().splitlines()), models.ChangeEvent.objects.filter(company=self.company).count())
+
+
+    def test_endpoint_hides_features_the_user_can_only_view_own(self):
+        level = models.AccessLevel.objects.create(name="Own issues")
+        permission = level.permissions.create(
+            module_code="inventory", resource_type="menu", resource_code="inventory.issues.permanent",
+            can_view=1, metadata={"actions": {"view_scope": "own"}},
+        )
+        clerk = models.User.objects.create_user(username="clerk", password="x", email="clerk@example.com")
+        models.UserCompanyAccess.objects.create(user=clerk, company=self.company, access_level=level)
+        issue = self.create_issue("ISP-FEED-9")
+        self.client.force_login(clerk)
+        url = reverse("change_feed")
+        headers = {"HTTP_X_COMPANY_ID": str(self.company.pk)}
+        self.assertEqual(self.client.get(url, **headers).json()["events"], [])
+
+        permission.metadata = {"actions": {"view_scope": "all"}}
+        permission.save()
+        body = self.client.get(url, {"entity_type": "inventory.issue_permanent"}, **headers).json()
+        self.assertEqual([event["entity_id"] for event in body["events"]], [issue.pk])
+
+
+class SessionRefreshMiddlewareTests(TestCase):
+    def run_requests(self, count, spacing):
+        from unittest import mock
+
+        from django.conf import settings
+        from django.contrib.sessions.middleware import SessionMiddleware
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        from shared.middleware import SessionRefreshMiddleware
+
+        def view(request):
+            request.session.get("active_company_id")
+            return HttpResponse("ok")
+
+        middleware = SessionMiddleware(SessionRefreshMiddleware(view))
+        session = middleware.SessionStore()
+        session["active_company_id"] = 1
+        session.create()
+        clock = [1_000_000.0]
+        responses = []
+        with mock.patch("time.time", side_effect=lambda: clock[0]):
+            for _ in range(count):
+                request = RequestFactory().get("/")
+                request.COOKIES[settings.SESSION_COOKIE_NAME] = session.session_key
+                responses.append(middleware(request))
+                clock[0] += spacing
+        return responses
+
+    def test_unchanged_session_is_saved_once_per_refresh_interval(self):
+        from django.conf import settings
+
+        with self.settings(SESSION_REFRESH_INTERVAL=300):
+            responses = self.run_requests(20, spacing=60)
+        refreshed = [settings.SESSION_COOKIE_NAME in response.cookies for response in responses]
+        # First request starts the window, then one refresh every 5 minutes
+        self.assertEqual(refreshed.count(True), 4)
+        self.assertTrue(refreshed[0])
+        self.assertFalse(any(refreshed[1:5]))
+
+    def test_sent_email_notifications_are_stored_in_the_session(self):
+        from django.contrib.sessions.backends.db import SessionStore
+
+        from shared.utils.notifications import get_sent_email_notifications, mark_email_notification_sent
+
+        created = SessionStore()
+        created.create()
+        session = SessionStore(created.session_key)
+        self.assertEqual(get_sent_email_notifications(session), set())
+        self.assertFalse(session.modified)
+        mark_email_notification_sent(session, "approval_pending_purchase_1")
+        mark_email_notification_sent(session, "approved_purchase_1")
+        session.save()
+        # Another worker loads the same row
+        self.assertEqual(
+            get_sent_email_notifications(SessionStore(session.session_key)),
+            {"approval_pending_purchase_1", "approved_purchase_1"},
+        )
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        from shared.utils.instrumentation import metrics
+
+        self.metrics = metrics
+        metrics.reset()
+        self.user = models.User.objects.create_user(username="metrics", password="secure-pass")
+        self.client.force_login(self.user)
+
+    def test_fingerprint_groups_same_statement(self):
+        from shared.utils.instrumentation import fingerprint_sql
+
+        self.assertEqual(
+            fingerprint_sql('SELECT * FROM t WHERE id = 5 AND name = \'x\' AND pk IN (%s, %s)'),
+            fingerprint_sql('SELECT * FROM t WHERE id = 17 AND name = \'y\' AND pk IN (%s)'),
+        )
+
+    def test_middleware_records_view_and_sets_server_timing(self):
+        response = self.client.get(reverse("shared:notifications"))
+        self.assertIn("db;dur=", response["Server-Timing"])
+        views = {row["view"]: row for row in self.metrics.report()["views"]}
+        row = views["GET shared:notifications"]
+        self.assertEqual(row["requests"], 1)
+        self.assertGreater(row["avg_queries"], 0)
+
+    def test_unresolved_paths_share_one_bucket(self):
+        for path in ("/no-such-page/", "/wp-login.php"):
+            self.client.get(path)
+        views = [row["view"] for row in self.metrics.report()["views"]]
+        self.assertEqual(views, ["GET <unresolved>"])
+
+    def test_query_budget_helper_reports_duplicates(self):
+        from shared.testing import QueryBudgetMixin
+
+        class Budget(QueryBudgetMixin, TestCase):
+            def runTest(self):
+                pass
+
+        helper = Budget()
+        helper.client = self.client
+        # First request also runs the periodic edit-lock cleanup sweep
+        self.client.get(reverse("shared:notifications"))
+        helper.assertQueryBudget(reverse("shared:notifications"), 30)
+        with self.assertRaisesMessage(AssertionError, "budget 1"):
+            helper.assertQueryBudget(reverse("shared:notifications"), 1)
+
+    def test_report_is_staff_only(self):
+        url = reverse("shared:instrumentation_report")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+        response = self.client.get(url, {"format": "json", "sort": "max_queries"})
+        self.assertEqual(response.json()["sort"], "max_queries")
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class DemoDataTests(TestCase):
+    def test_generate_companies_builds_independent_companies(self):
+        from inventory import models as inventory_models
+        from ticketing import models as ticketing_models
+        from shared.utils.demo_data import generate_companies, get_scale
+
+        datasets = generate_companies(get_scale("tiny"), 2, processes=2)
+        self.assertEqual(len({dataset.company_id for dataset in datasets}), 2)
+        for dataset in datasets:
+            self.assertEqual(
+                inventory_models.Item.objects.filter(company_id=dataset.company_id).count(), 20,
+            )
+            self.assertEqual(len(dataset.stocktaking_ids), 2)
+            self.assertEqual(
+                ticketing_models.Ticket.objects.filter(company_id=dataset.company_id).count(), 10,
+            )
+        type_codes = inventory_models.ItemType.objects.filter(
+            company_id__in=[dataset.company_id for dataset in datasets],
+        ).values_list("public_code", flat=True)
+        self.assertEqual(len(set(type_codes)), 2)
+
+
+@tag("benchmark")
+class BenchmarkSuiteTests(TestCase):
+    """Query budgets of the main screens on the tiny synthetic company (``--tag benchmark``)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from shared.utils.demo_data import DemoDataGenerator, get_scale
+
+        from shared.benchmarks import BENCHMARK_ITEMS
+
+        cls.dataset = DemoDataGenerator(get_scale("tiny", items=BENCHMARK_ITEMS)).generate()
+
+    def test_generator_creates_consistent_company(self):
+        from inventory import models as inventory_models
+
+        from shared.benchmarks import BENCHMARK_ITEMS
+
+        self.assertEqual(len(self.dataset.item_ids), BENCHMARK_ITEMS)
+        self.assertEqual(
+            inventory_models.IssuePermanentLine.objects.filter(document_id__in=self.dataset.issue_ids).count(),
+            self.dataset.counts["inventory.IssuePermanentLine"],
+        )
+        self.assertTrue(
+            inventory_models.Item.objects.filter(pk__in=self.dataset.item_ids, company_id=self.dataset.company_id)
+            .exclude(full_item_code="").exists()
+        )
+
+    def test_scenarios_stay_within_query_budget(self):
+        from shared.benchmarks import run_benchmarks
+
+        report = run_benchmarks(self.dataset)
+        for name, result in report["scenarios"].items():
+            with self.subTest(scenario=name):
+                self.assertIn(result["status"], (None, 200, 302))
+                self.assertFalse(
+                    result["over_budget"],
+                    f'{name}: {result["queries"]} queries, budget {result["budget"]}',
+                )
+        self.assertEqual(set(report["line_scaling"]), {"inventory.issue_create", "inventory.issue_edit"})
+        for prefix, row in report["line_scaling"].items():
+            with self.subTest(scaling=prefix):
+                self.assertEqual(row["lines"], [10, 100])
+                self.assertFalse(
+                    row["over_budget"],
+                    f'{prefix}: {row["per_line"]} queries per extra line, budget {row["budget"]}',
+                )
+
+    def test_compare_reports_returns_deltas(self):
+        from shared.benchmarks import compare_reports
+
+        before = {"scenarios": {"a": {"queries": 10, "wall_ms": 5.0}}}
+        after = {"scenarios": {"a": {"queries": 7, "wall_ms": 6.5}, "b": {"queries": 1}}}
+        rows = compare_reports(before, after)
+        self.assertEqual([row["scenario"] for row in rows], ["a"])
+        self.assertEqual(rows[0]["queries"]["delta"], -3)
+        self.assertEqual(rows[0]["wall_ms"]["delta"], 1.5)
+
+
+class AttachmentUploadTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        from ticketing import models as ticketing_models
+
+        self.storage_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.storage_dir.cleanup)
+        settings_override = self.settings(ATTACHMENT_STORAGE_ROOT=self.storage_dir.name, ATTACHMENT_CHUNK_SIZE=4)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.company = models.Company.objects.create(public_code="001", legal_name="Co", display_name="Co")
+        self.user = models.User.objects.create_superuser(username="root", password="x", email="root@example.com")
+        template = ticketing_models.TicketTemplate.objects.create(company=self.company, name="Request")
+        self.tickets = [
+            ticketing_models.Ticket.objects.create(
+                company=self.company, template=template, title=f"Ticket {index}", reported_by=self.user,
+            )
+            for index in range(2)
+        ]
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["active_company_id"] = self.company.pk
+        session.save()
+
+    def _upload(self, ticket, content=b"hello world", file_name="note.txt", **extra):
+        response = self.client.post(
+            reverse("shared:upload_start"), {"file_name": file_name, "size": len(content), **extra},
+        )
+        self.assertEqual(response.status_code, 201)
+        url = reverse("shared:upload_session", args=[response.json()["upload_id"]])
+        for offset in range(0, len(content), 4):
+            response = self.client.patch(
+                url, content[offset:offset + 4], content_type="application/offset+octet-stream",
+                HTTP_UPLOAD_OFFSET=str(offset),
+            )
+            self.assertEqual(response.json()["offset"], min(offset + 4, len(content)))
+        return self.client.post(
+            url + "complete/", {"target": "ticketing.ticket", "object_id": ticket.pk},
+        )
+
+    def test_chunked_upload_resumes_and_deduplicates_content(self):
+        start = self.client.post(reverse("shared:upload_start"), {"file_name": "a.txt", "size": 8})
+        url = reverse("shared:upload_session", args=[start.json()["upload_id"]])
+        self.client.patch(url, b"abcd", content_type="application/octet-stream", HTTP_UPLOAD_OFFSET="0")
+        retry = self.client.patch(url, b"abcd", content_type="application/octet-stream", HTTP_UPLOAD_OFFSET="0")
+        self.assertEqual((retry.status_code, retry.json()["offset"]), (409, 4))
+        self.assertEqual(self.client.get(url).json()["offset"], 4)
+
+        first = self._upload(self.tickets[0])
+        second = self._upload(self.tickets[1])
+        self.assertEqual(first.status_code, 201)
+        self.assertFalse(first.json()["deduplicated"])
+        self.assertTrue(second.json()["deduplicated"])
+        self.assertEqual(models.StoredFile.objects.count(), 1)
+        self.assertEqual(self.tickets[1].file_attachments.get().stored_file.size, 11)
+
+    def test_racing_retries_and_completes_use_the_locked_session(self):
+        import os
+
+        from shared.utils.attachments import UploadOffsetError, append_chunk, complete_upload, start_upload
+
+        session = start_upload(self.user, self.company.pk, "race.txt", 8)
+        # Both requests loaded the session before either wrote its chunk
+        first, second = (models.UploadSession.objects.get(pk=session.pk) for _ in range(2))
+        self.assertEqual(append_chunk(first, 0, io.BytesIO(b"abcd"), 4), 4)
+        with self.assertRaises(UploadOffsetError):
+            append_chunk(second, 0, io.BytesIO(b"wxyz"), 4)
+        append_chunk(first, 4, io.BytesIO(b"efgh"), 4)
+        self.assertEqual(os.listdir(os.path.join(self.storage_dir.name, "uploads")), [f"{session.pk}.part"])
+
+        first, second = (models.UploadSession.objects.get(pk=session.pk) for _ in range(2))
+        stored, created = complete_upload(first)
+        self.assertTrue(created)
+        self.assertEqual(complete_upload(second), (stored, False))
+        self.assertEqual(stored.size, 8)
+        self.assertEqual(stored.sha256, hashlib.sha256(b"abcdefgh").hexdigest())
+
+    def test_download_streams_full_file_and_byte_ranges(self):
+        sha256 = self._upload(self.tickets[0]).json()["attachment"]["sha256"]
+        url = reverse("shared:attachment_download", args=["ticketing.ticket", self.tickets[0].pk, sha256])
+
+        response = self.client.get(url)
+        self.assertEqual(b"".join(response.streaming_content), b"hello world")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+        response = self.client.get(url, HTTP_RANGE="bytes=6-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 6-10/11")
+        self.assertEqual(b"".join(response.streaming_content), b"world")
+
+        other = reverse("shared:attachment_download", args=["ticketing.ticket", self.tickets[1].pk, sha256])
+        self.assertEqual(self.client.get(other).status_code, 404)
+
+    def test_active_content_is_never_served_inline(self):
+        for file_name, content in (("page.html", b"<script>1</script>"), ("logo.svg", b"<svg onload=1/>")):
+            # The client's MIME type is ignored; the file name decides
+            sha256 = self._upload(
+                self.tickets[0], content, file_name, mime_type="image/png",
+            ).json()["attachment"]["sha256"]
+            url = reverse("shared:attachment_download", args=["ticketing.ticket", self.tickets[0].pk, sha256])
+            response = self.client.get(url, {"inline": "1"})
+            self.assertNotEqual(response["Content-Type"], "image/png")
+            self.assertTrue(response["Content-Disposition"].startswith("attachment"))
+            self.assertEqual(response["Content-Security-Policy"], "sandbox")
+
+    @skipUnless(importlib.util.find_spec("PIL"), "thumbnails require Pillow")
+    def test_broken_image_fails_alone(self):
+        from PIL import Image
+
+        from shared.utils.attachments import generate_thumbnails, store_file
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 20), "red").save(buffer, "PNG")
+        buffer.seek(0)
+        good, _created = store_file(buffer, "good.png")
+        bad, _created = store_file(io.BytesIO(b"not an image"), "bad.png")
+        self.assertEqual(generate_thumbnails(), {"ready": 1, "failed": 1})
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual((good.thumbnail_status, bad.thumbnail_status), ("ready", "failed"))
+
+
+def use_shared_cache(testcase):
+    """Run ``testcase`` on a file-based cache, which every worker process shares."""
+    import tempfile
+
+    cache_dir = tempfile.TemporaryDirectory()
+    testcase.addCleanup(cache_dir.cleanup)
+    settings_override = testcase.settings(CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": cache_dir.name},
+    })
+    settings_override.enable()
+    testcase.addCleanup(settings_override.disable)
+
+
+class AccessLevelPermissionSyncTests(TestCase):
+    def setUp(self):
+        self.levels = [models.AccessLevel.objects.create(name=f"Level {index}") for index in range(3)]
+        self.levels[0].permissions.create(
+            module_code="shared", resource_type="menu", resource_code="shared.companies", can_view=1,
+        )
+        self.levels[0].permissions.create(
+            module_code="shared", resource_type="menu", resource_code="shared.users", can_view=1,
+        )
+
+    def test_sync_diffs_matrix_and_writes_in_bulk(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from shared.utils import permissions
+
+        rows = permissions.permission_rows_from_post({
+            "perm-shared__companies-view": "all",
+            "perm-shared__companies-create": "on",
+            "perm-shared__access_levels-view": "own",
+        })
+        self.assertEqual(set(rows), {"shared.companies", "shared.access_levels"})
+
+        version = permissions.get_feature_permission_version()
+        level_ids = [level.pk for level in self.levels[:2]]
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                counts = permissions.sync_access_level_permissions(level_ids, rows)
+        statements = [query["sql"] for query in queries.captured_queries if "SAVEPOINT" not in query["sql"]]
+        self.assertEqual(counts, {"created": 3, "updated": 1, "deleted": 1})
+        self.assertEqual(len(statements), 4)
+        self.assertEqual(permissions.get_feature_permission_version(), version + 1)
+
+        for level in self.levels[:2]:
+            resolved = permissions._resolve_feature_permissions([level.pk])
+            self.assertEqual(resolved["shared__companies"].view_scope, "all")
+            self.assertTrue(resolved["shared__companies"].actions["create"])
+            self.assertEqual(resolved["shared__access_levels"].view_scope, "own")
+            self.assertFalse(resolved["shared__users"].can_view)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                counts = permissions.sync_access_level_permissions(level_ids, rows)
+        self.assertEqual(counts, {"created": 0, "updated": 0, "deleted": 0})
+        self.assertEqual(permissions.get_feature_permission_version(), version + 1)
+
+    def test_matrices_are_cached_only_on_a_shared_cache(self):
+        from shared.utils import permissions
+
+        level_ids = {self.levels[0].pk}
+        permissions._cached_feature_permissions(level_ids)
+        with self.assertNumQueries(1):
+            resolved = permissions._cached_feature_permissions(level_ids)
+        self.assertTrue(resolved["shared__users"].can_view)
+
+        use_shared_cache(self)
+        permissions._cached_feature_permissions(level_ids)
+        with self.assertNumQueries(0):
+            self.assertEqual(permissions._cached_feature_permissions(level_ids), resolved)
+
+        self.levels[0].permissions.filter(resource_code="shared.users").delete()
+        permissions.invalidate_feature_permissions()
+        self.assertFalse(permissions._cached_feature_permissions(level_ids)["shared__users"].can_view)
+
+    def test_editor_applies_matrix_to_selected_levels(self):
+        user = models.User.objects.create_superuser(username="admin", password="x", email="admin@example.com")
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("shared:access_level_edit", args=[self.levels[0].pk]),
+            {
+                "name": "Level 0",
+                "description": "",
+                "is_enabled": 1,
+                "is_global": 0,
+                "perm-shared__users-view": "all",
+                "apply_to": [self.levels[2].pk],
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        for level in (self.levels[0], self.levels[2]):
+            self.assertEqual(list(level.permissions.values_list("resource_code", flat=True)), ["shared.users"])
+        self.assertFalse(self.levels[1].permissions.exists())
+
+        clone = self.client.get(reverse("shared:access_level_create") + f"?copy_from={self.levels[0].pk}")
+        self.assertEqual(clone.context["form"].initial["name"], "Level 0 (copy)")
+
+
+class ApproverDirectoryTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import Group
+
+        self.company = models.Company.objects.create(public_code="001", legal_name="Co", display_name="Co")
+        self.approver_level = models.AccessLevel.objects.create(name="Approver")
+        self.approver_level.permissions.create(
+            module_code="inventory", resource_type="menu",
+            resource_code="inventory.requests.purchase", can_view=1, can_approve=1,
+        )
+        self.viewer_level = models.AccessLevel.objects.create(name="Viewer")
+        self.direct = models.User.objects.create_user(username="direct", password="x", email="direct@example.com")
+        self.via_group = models.User.objects.create_user(username="grouped", password="x", email="grouped@example.com")
+        self.viewer = models.User.objects.create_user(username="viewer", password="x", email="viewer@example.com")
+        self.root = models.User.objects.create_superuser(username="root", password="x", email="root@example.com")
+        models.UserCompanyAccess.objects.create(
+            user=self.direct, company=self.company, access_level=self.approver_level,
+        )
+        models.UserCompanyAccess.objects.create(
+            user=self.viewer, company=self.company, access_level=self.viewer_level,
+        )
+        self.group = Group.objects.create(name="Approvers")
+        models.GroupProfile.objects.create(group=self.group).access_levels.add(self.approver_level)
+        self.via_group.groups.add(self.group)
+
+    def test_directory_resolves_sources_and_is_served_from_cache(self):
+        from shared.utils.approvers import get_approver_ids, get_approver_queryset
+
+        use_shared_cache(self)
+        code = "inventory.requests.purchase"
+        ids = get_approver_ids(self.company.pk, code)
+        self.assertEqual(ids, {self.direct.pk, self.via_group.pk, self.root.pk})
+        self.assertEqual(
+            get_approver_ids(self.company.pk, code, include_groups=False, include_superusers=False),
+            {self.direct.pk},
+        )
+        with self.assertNumQueries(0):
+            get_approver_ids(self.company.pk, code)
+        with self.assertNumQueries(1) as queries:
+            list(get_approver_queryset(self.company.pk, code))
+        self.assertNotIn("JOIN", queries.captured_queries[0]["sql"])
+
+    def test_directory_is_rebuilt_on_a_per_process_cache(self):
+        from shared.utils.approvers import get_approver_ids
+
+        code = "inventory.requests.purchase"
+        get_approver_ids(self.company.pk, code)
+        with self.assertNumQueries(5):
+            self.assertIn(self.direct.pk, get_approver_ids(self.company.pk, code))
+
+    def test_membership_changes_invalidate_directory(self):
+        from shared.utils.approvers import get_approver_ids
+
+        use_shared_cache(self)
+        code = "inventory.requests.purchase"
+        self.assertNotIn(self.viewer.pk, get_approver_ids(self.company.pk, code))
+
+        access = models.UserCompanyAccess.objects.get(user=self.viewer)
+        access.access_level = self.approver_level
+        access.save()
+        self.assertIn(self.viewer.pk, get_approver_ids(self.company.pk, code))
+
+        self.via_group.groups.remove(self.group)
+        self.assertNotIn(self.via_group.pk, get_approver_ids(self.company.pk, code))
+
+        self.root.is_superuser = False
+        self.root.save()
+        self.assertNotIn(self.root.pk, get_approver_ids(self.company.pk, code))
@@ -3,8 +3,16 @@ URL configuration for shared module.
 """
 from django.urls import path
 from . import views
+from .views.attachments import (
+    AttachmentDownloadView,
+    UploadCompleteView,
+    UploadSessionView,
+    UploadStartView,
+)
 from .views.auth import mark_notification_read, mark_notification_unread
+from .views.instrumentation import InstrumentationReportView
 from .views.notifications import NotificationListView
+from .views.search import DocumentSearchView
 
 app_name = 'shared'
 
@@ -36,5 +44,20 @@ urlpatterns = [
     path('notifications/', NotificationListView.as_view(), name='notifications'),
     path('mark-notification-read/', mark_notification_read, name='mark_notification_read'),
     path('mark-notification-unread/', mark_notification_unread, name='mark_notification_unread'),
+    path('search/documents/', DocumentSearchView.as_view(), name='document_search'),
+    path('uploads/', UploadStartView.as_view(), name='upload_start'),
+    path('uploads/<uuid:upload_id>/', UploadSessionView.as_view(), name='upload_session'),
+    path('uploads/<uuid:upload_id>/complete/', UploadCompleteView.as_view(), name='upload_complete'),
+    path(
+        'attachments/<str:target>/<int:object_id>/<str:sha256>/',
+        AttachmentDownloadView.as_view(),
+        name='attachment_download',
+    ),
+    path(
+        'attachments/<str:target>/<int:object_id>/<str:sha256>/thumbnail/',
+        AttachmentDownloadView.as_view(thumbnail=True),
+        name='attachment_thumbnail',
+    ),
+    path('instrumentation/', InstrumentationReportView.as_view(), name='instrumentation_report'),
 ]
 
@@ -0,0 +1,156 @@
+"""
+Approver directory: who may approve each feature in a company.
+
+Approval forms (purchase/warehouse requests, stocktaking records, production
+orders, transfers, ...) list the users holding the ``approve`` permission of
+a feature. Instead of joining users → company access / groups → access levels
+→ permissions on every form, ``get_approver_directory`` resolves the whole
+company once with five small queries into a ``(feature_code → user IDs)``
+mapping and caches it. Lookups are then dictionary reads.
+
+The cache key embeds two versions: the feature-permission version (bumped
+when ``AccessLevelPermission`` rows change, see ``shared.utils.permissions``)
+and the approver version, bumped by ``shared.signals`` when company access,
+group membership, group access levels, access levels or superuser flags change.
+Directories are only cached when the default cache is shared by all workers
+(``shared.utils.cache.is_shared_cache``).
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from shared.models import AccessLevelPermission, GroupProfile, UserCompanyAccess
+from shared.utils.cache import is_shared_cache
+from shared.utils.permissions import get_feature_permission_version
+
+
+CACHE_PREFIX = "shared:approvers"
+_VERSION_KEY = f"{CACHE_PREFIX}:version"
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+@dataclass(frozen=True)
+class ApproverDirectory:
+    """Approver user IDs of one company, by feature code and by source."""
+
+    company_id: int
+    company_access: Dict[str, FrozenSet[int]] = field(default_factory=dict)
+    groups: Dict[str, FrozenSet[int]] = field(default_factory=dict)
+    superusers: FrozenSet[int] = _EMPTY
+
+    def approver_ids(
+        self,
+        feature_code: str,
+        include_groups: bool = True,
+        include_superusers: bool = True,
+    ) -> FrozenSet[int]:
+        ids = self.company_access.get(feature_code, _EMPTY)
+        if include_groups:
+            ids = ids | self.groups.get(feature_code, _EMPTY)
+        if include_superusers:
+            ids = ids | self.superusers
+        return ids
+
+
+def get_approver_version() -> int:
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, 1, None)
+        version = cache.get(_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_approvers(**kwargs) -> None:
+    """Make every cached approver directory stale (usable as a signal receiver)."""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 2, None)
+
+
+def _by_feature(pairs, features_by_level) -> Dict[str, FrozenSet[int]]:
+    users: Dict[str, set] = defaultdict(set)
+    for user_id, level_id in pairs:
+        for code in features_by_level.get(level_id, ()):
+            users[code].add(user_id)
+    return {code: frozenset(ids) for code, ids in users.items()}
+
+
+def build_approver_directory(company_id: int) -> ApproverDirectory:
+    """Resolve the approvers of every feature in a company (five small queries, no joins across users)."""
+    features_by_level: Dict[int, set] = defaultdict(set)
+    for level_id, code in AccessLevelPermission.objects.filter(can_approve=1).values_list(
+        "access_level_id", "resource_code",
+    ):
+        features_by_level[level_id].add(code)
+
+    company_pairs = UserCompanyAccess.objects.filter(
+        company_id=company_id, is_enabled=1, access_level_id__in=list(features_by_level),
+    ).values_list("user_id", "access_level_id")
+
+    levels_by_group: Dict[int, set] = defaultdict(set)
+    for group_id, level_id in GroupProfile.access_levels.through.objects.filter(
+        accesslevel_id__in=list(features_by_level),
+    ).values_list("groupprofile__group_id", "accesslevel_id"):
+        levels_by_group[group_id].add(level_id)
+    User = get_user_model()
+    group_pairs = [
+        (user_id, level_id)
+        for user_id, group_id in User.groups.through.objects.filter(
+            group_id__in=list(levels_by_group),
+        ).values_list("user_id", "group_id")
+        for level_id in levels_by_group[group_id]
+    ]
+
+    return ApproverDirectory(
+        company_id=company_id,
+        company_access=_by_feature(company_pairs, features_by_level),
+        groups=_by_feature(group_pairs, features_by_level),
+        superusers=frozenset(User.objects.filter(is_superuser=True).values_list("pk", flat=True)),
+    )
+
+
+def get_approver_directory(company_id: int) -> ApproverDirectory:
+    """Return the cached approver directory of a company, building it on a miss.
+
+    As with permission matrices, the directory is only cached on a cache shared
+    by all workers; a per-process cache would keep a removed approver on the
+    other workers for the whole TTL.
+    """
+    if not is_shared_cache():
+        return build_approver_directory(company_id)
+    key = f"{CACHE_PREFIX}:v{get_approver_version()}.{get_feature_permission_version()}:{company_id}"
+    directory = cache.get(key)
+    if directory is None:
+        directory = build_approver_directory(company_id)
+        cache.set(key, directory, getattr(settings, "APPROVER_DIRECTORY_TIMEOUT", 3600))
+    return directory
+
+
+def get_approver_ids(
+    company_id: Optional[int],
+    feature_code: str,
+    include_groups: bool = True,
+    include_superusers: bool = True,
+) -> FrozenSet[int]:
+    """IDs of users who may approve ``feature_code`` in the company."""
+    if not company_id:
+        return _EMPTY
+    return get_approver_directory(company_id).approver_ids(
+        feature_code, include_groups=include_groups, include_superusers=include_superusers,
+    )
+
+
+def get_approver_queryset(company_id: Optional[int], feature_code: str, **options):
+    """``User`` queryset of the approvers (a primary-key lookup, for choice fields)."""
+    User = get_user_model()
+    ids = get_approver_ids(company_id, feature_code, **options)
+    if not ids:
+        return User.objects.none()
+    return User.objects.filter(pk__in=sorted(ids))
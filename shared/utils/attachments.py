@@ -0,0 +1,461 @@
+"""
+Streaming, content-addressed attachment storage.
+
+Uploads arrive in chunks (``start_upload`` → ``append_chunk``… →
+``complete_upload``) and are streamed to disk, so a request never holds
+more than ``STREAM_BLOCK_SIZE`` bytes in memory; each chunk is appended to
+the upload's ``.part`` file under a row lock on its ``UploadSession``, and an
+interrupted upload resumes from ``UploadSession.received_size``. Completing
+an upload hashes the file (streamed) and either moves it to
+``blobs/<aa>/<bb>/<sha256>`` or, when that content is already stored, drops
+it and reuses the existing ``StoredFile`` – the same bytes attached to many
+tickets and inspections are kept once.
+
+Models that accept attachments register with ``register_attachment_target``;
+downloads go through ``attachment_response`` which streams the blob and
+honours single ``Range`` requests.
+"""
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.test.signals import setting_changed
+from django.utils.functional import LazyObject, empty
+from django.utils.http import content_disposition_header
+
+from shared.models import StoredFile, UploadSession
+
+
+STREAM_BLOCK_SIZE = 64 * 1024
+THUMBNAIL_SIZE = (256, 256)
+THUMBNAIL_MIME_TYPES = frozenset({"image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp"})
+# Types a browser may display from our origin; everything else (HTML, SVG, ...) is downloaded
+INLINE_MIME_TYPES = THUMBNAIL_MIME_TYPES | {"application/pdf"}
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class AttachmentError(Exception):
+    """Invalid upload request; ``status`` is the HTTP status to answer with."""
+
+    status = 400
+
+
+class UploadOffsetError(AttachmentError):
+    """Chunk offset does not match what the server has received."""
+
+    status = 409
+
+    def __init__(self, expected: int):
+        super().__init__(f"Expected offset {expected}")
+        self.expected = expected
+
+
+class AttachmentPermissionError(AttachmentError):
+    status = 403
+
+
+class _AttachmentStorage(LazyObject):
+    def _setup(self):
+        root = getattr(settings, "ATTACHMENT_STORAGE_ROOT", None) or os.path.join(settings.MEDIA_ROOT, "attachments")
+        self._wrapped = FileSystemStorage(location=root, base_url=None)
+
+
+attachment_storage = _AttachmentStorage()
+
+
+def _reset_storage(setting, **kwargs):
+    if setting in ("ATTACHMENT_STORAGE_ROOT", "MEDIA_ROOT"):
+        attachment_storage._wrapped = empty
+
+
+setting_changed.connect(_reset_storage)
+
+
+def _max_size() -> int:
+    return getattr(settings, "ATTACHMENT_MAX_SIZE", 1024 ** 3)
+
+
+def max_chunk_size() -> int:
+    return getattr(settings, "ATTACHMENT_CHUNK_SIZE", 8 * 1024 * 1024)
+
+
+def _part_path(session: UploadSession) -> str:
+    return attachment_storage.path(os.path.join("uploads", f"{session.pk}.part"))
+
+
+def _blob_name(digest: str) -> str:
+    return os.path.join("blobs", digest[:2], digest[2:4], digest)
+
+
+def _guess_mime(file_name: str) -> str:
+    # The client's Content-Type is never trusted; it is served back on download
+    return mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+
+# --------------------------------------------------------------------- upload
+
+def start_upload(user, company_id, file_name: str, total_size: int) -> UploadSession:
+    """Open a resumable upload and create its empty ``.part`` file."""
+    file_name = os.path.basename(file_name or "").strip()
+    if not file_name:
+        raise AttachmentError("file_name is required")
+    if total_size < 0 or total_size > _max_size():
+        raise AttachmentError(f"size must be between 0 and {_max_size()} bytes")
+    session = UploadSession.objects.create(
+        company_id=company_id,
+        user=user,
+        file_name=file_name[:255],
+        mime_type=_guess_mime(file_name)[:100],
+        total_size=total_size,
+    )
+    path = _part_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    return session
+
+
+def append_chunk(session: UploadSession, offset: int, stream, length: int) -> int:
+    """
+    Append ``length`` bytes read from ``stream`` at ``offset``; return the new offset.
+
+    ``offset`` must equal the bytes already received, which makes retries of
+    a lost chunk safe and lets a client resume after ``get``-ing the session.
+    The chunk is first read into its own temp file, so a slow client never
+    holds the session lock; it is copied into the ``.part`` file while the
+    session row is locked, so two concurrent retries of the same chunk cannot
+    interleave their writes.
+    """
+    _check_chunk(session, offset, length)
+    chunk_path = f"{_part_path(session)}.{uuid.uuid4().hex}"
+    written = 0
+    try:
+        with open(chunk_path, "wb") as handle:
+            while written < length:
+                block = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                handle.write(block)
+                written += len(block)
+
+        with transaction.atomic():
+            locked = UploadSession.objects.select_for_update().get(pk=session.pk)
+            _check_chunk(locked, offset, length)
+            new_offset = offset + written
+            with open(_part_path(session), "r+b") as handle, open(chunk_path, "rb") as chunk:
+                handle.seek(offset)
+                for block in iter(lambda: chunk.read(STREAM_BLOCK_SIZE), b""):
+                    handle.write(block)
+                handle.truncate(new_offset)
+            locked.received_size = new_offset
+            locked.save(update_fields=["received_size", "updated_at"])
+    finally:
+        try:
+            os.remove(chunk_path)
+        except FileNotFoundError:
+            pass
+    session.received_size = new_offset
+    return new_offset
+
+
+def _check_chunk(session: UploadSession, offset: int, length: int) -> None:
+    if session.status != "uploading":
+        raise AttachmentError("Upload is not in progress")
+    if offset != session.received_size:
+        raise UploadOffsetError(session.received_size)
+    if length <= 0 or length > max_chunk_size():
+        raise AttachmentError(f"Chunk length must be between 1 and {max_chunk_size()} bytes")
+    if offset + length > session.total_size:
+        raise AttachmentError("Chunk exceeds the declared size")
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _store_blob(path: str, digest: str, size: int, mime_type: str) -> Tuple[StoredFile, bool]:
+    """Move a finished temp file into place, or drop it when the content exists."""
+    existing = StoredFile.objects.filter(sha256=digest).first()
+    if existing is not None:
+        os.remove(path)
+        return existing, False
+
+    name = _blob_name(digest)
+    target = attachment_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(path, target)
+    status = "pending" if mime_type in THUMBNAIL_MIME_TYPES else "skipped"
+    try:
+        with transaction.atomic():
+            return StoredFile.objects.create(
+                sha256=digest, size=size, mime_type=mime_type, storage_name=name, thumbnail_status=status,
+            ), True
+    except IntegrityError:
+        # A concurrent upload of the same content won; both wrote identical bytes
+        return StoredFile.objects.get(sha256=digest), False
+
+
+def complete_upload(session: UploadSession) -> Tuple[StoredFile, bool]:
+    """Finish an upload; returns ``(stored_file, created)`` (``created`` is False when deduplicated)."""
+    with transaction.atomic():
+        # A concurrent complete waits here and then sees the finished session
+        locked = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if locked.status == "complete" and locked.stored_file_id:
+            stored, created = locked.stored_file, False
+        else:
+            if locked.status != "uploading":
+                raise AttachmentError("Upload is not in progress")
+            if locked.received_size != locked.total_size:
+                raise UploadOffsetError(locked.received_size)
+
+            path = _part_path(locked)
+            stored, created = _store_blob(path, _hash_file(path), locked.total_size, locked.mime_type)
+            locked.status = "complete"
+            locked.stored_file = stored
+            locked.save(update_fields=["status", "stored_file", "updated_at"])
+    session.status, session.stored_file = locked.status, stored
+    return stored, created
+
+
+def store_file(fileobj, file_name: str) -> Tuple[StoredFile, bool]:
+    """Store an uploaded/opened file in one go (streamed and hashed block by block)."""
+    mime_type = _guess_mime(file_name)
+    temp_dir = attachment_storage.path("uploads")
+    os.makedirs(temp_dir, exist_ok=True)
+    path = os.path.join(temp_dir, f"direct-{uuid.uuid4()}.part")
+    digest = hashlib.sha256()
+    size = 0
+    blocks = fileobj.chunks(STREAM_BLOCK_SIZE) if hasattr(fileobj, "chunks") else iter(
+        lambda: fileobj.read(STREAM_BLOCK_SIZE), b"",
+    )
+    with open(path, "wb") as handle:
+        for block in blocks:
+            digest.update(block)
+            handle.write(block)
+            size += len(block)
+    return _store_blob(path, digest.hexdigest(), size, mime_type)
+
+
+def abort_upload(session: UploadSession) -> None:
+    """Abort an unfinished upload and delete its ``.part`` file."""
+    if session.status != "uploading":
+        return
+    session.status = "aborted"
+    session.save(update_fields=["status", "updated_at"])
+    try:
+        os.remove(_part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def purge_stale_uploads(max_age: Optional[timedelta] = None) -> int:
+    """Delete unfinished uploads untouched for ``max_age`` (``ATTACHMENT_UPLOAD_TTL_HOURS``, default 24)."""
+    max_age = max_age or timedelta(hours=getattr(settings, "ATTACHMENT_UPLOAD_TTL_HOURS", 24))
+    stale = list(UploadSession.objects.filter(status="uploading", updated_at__lt=timezone.now() - max_age))
+    for session in stale:
+        try:
+            os.remove(_part_path(session))
+        except FileNotFoundError:
+            pass
+    UploadSession.objects.filter(pk__in=[session.pk for session in stale]).update(status="aborted")
+    return len(stale)
+
+
+# ------------------------------------------------------------------- download
+
+def _iter_range(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = handle.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Return ``(start, end)`` (inclusive) of a single ``bytes=`` range, ``None`` if absent/unsupported."""
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def attachment_response(request, stored: StoredFile, file_name: str, as_attachment: bool = True):
+    """
+    Stream a stored file; answers ``Range: bytes=a-b`` with 206 Partial Content.
+
+    Only ``INLINE_MIME_TYPES`` are ever served inline, and every response is
+    sandboxed, so uploaded HTML/SVG cannot run script on our origin.
+    """
+    path = attachment_storage.path(stored.storage_name)
+    if stored.mime_type not in INLINE_MIME_TYPES:
+        as_attachment = True
+    byte_range = _parse_range(request.headers.get("Range", ""), stored.size)
+    if byte_range is None:
+        response = FileResponse(
+            open(path, "rb"), as_attachment=as_attachment, filename=file_name, content_type=stored.mime_type or None,
+        )
+        response.block_size = STREAM_BLOCK_SIZE
+    else:
+        start, end = byte_range
+        if start > end or start >= stored.size:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stored.size}"
+            return response
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_range(path, start, length), status=206, content_type=stored.mime_type or "application/octet-stream",
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{stored.size}"
+        response["Content-Disposition"] = content_disposition_header(as_attachment, file_name)
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = f'"{stored.sha256}"'
+    response["Content-Security-Policy"] = "sandbox"
+    response["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+# ----------------------------------------------------------------- thumbnails
+
+def _render_thumbnail(image_module, stored: StoredFile) -> str:
+    """Write the PNG thumbnail of ``stored`` and return its storage name."""
+    name = os.path.join("thumbnails", stored.sha256[:2], f"{stored.sha256}.png")
+    target = attachment_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp = f"{target}.{uuid.uuid4().hex}.tmp"
+    try:
+        with image_module.open(attachment_storage.path(stored.storage_name)) as image:
+            image.draft("RGB", THUMBNAIL_SIZE)
+            image.thumbnail(THUMBNAIL_SIZE)
+            image.save(temp, "PNG")
+        # Workers racing on the same blob write identical bytes; the rename is atomic
+        os.replace(temp, target)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+    return name
+
+
+def generate_thumbnails(limit: int = 100) -> Dict[str, int]:
+    """
+    Render thumbnails for pending image blobs (requires Pillow).
+
+    Rendering runs outside any transaction and each result is written with
+    its own ``UPDATE`` of a still-pending row, so no row lock is held while
+    images are decoded and one bad file (corrupt, decompression bomb) is
+    marked ``failed`` without affecting the others. Pillow decodes JPEGs in
+    draft mode so large images are not fully loaded.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return {"ready": 0, "failed": 0, "unavailable": 1}
+
+    counts = {"ready": 0, "failed": 0}
+    pending = list(
+        StoredFile.objects.filter(thumbnail_status="pending")
+        .order_by("created_at")
+        .only("pk", "sha256", "storage_name")[:limit]
+    )
+    for stored in pending:
+        try:
+            values = {"thumbnail_status": "ready", "thumbnail_name": _render_thumbnail(Image, stored)}
+        except Exception:
+            # Any decoder error, including Image.DecompressionBombError, fails this file only
+            values = {"thumbnail_status": "failed"}
+        if StoredFile.objects.filter(pk=stored.pk, thumbnail_status="pending").update(**values):
+            counts[values["thumbnail_status"]] += 1
+    return counts
+
+
+# -------------------------------------------------------------------- targets
+
+@dataclass(frozen=True)
+class AttachmentTarget:
+    """
+    A model that accepts attachments.
+
+    ``attach(instance, stored, file_name, user)`` links a blob and returns a
+    JSON-able description; ``files(instance)`` returns the attachment
+    descriptions (each with ``sha256`` and ``file_name``) used to authorize
+    downloads; ``allowed(user, company_id, instance, action)`` decides
+    ``view`` (download) and ``attach``.
+    """
+
+    key: str
+    model: Any
+    attach: Callable[..., Dict[str, Any]]
+    files: Callable[[Any], List[Dict[str, Any]]]
+    allowed: Callable[..., bool]
+
+
+def feature_allowed(feature_code: str, attach_action: str = "edit_own") -> Callable[..., bool]:
+    """``allowed`` callable backed by feature permissions (``view`` / ``attach_action``)."""
+    from shared.utils.permissions import get_user_feature_permissions, has_feature_permission
+
+    def allowed(user, company_id, instance, action: str) -> bool:
+        permissions = get_user_feature_permissions(user, company_id)
+        return has_feature_permission(permissions, feature_code, "view" if action == "view" else attach_action)
+
+    return allowed
+
+
+_TARGETS: Dict[str, AttachmentTarget] = {}
+
+
+def register_attachment_target(model, key: str, **options) -> AttachmentTarget:
+    """Register ``model`` as an attachment target under ``key`` (idempotent)."""
+    if key not in _TARGETS:
+        _TARGETS[key] = AttachmentTarget(key=key, model=model, **options)
+    return _TARGETS[key]
+
+
+def get_attachment_target(key: str) -> Optional[AttachmentTarget]:
+    return _TARGETS.get(key)
+
+
+def find_attachment(target: AttachmentTarget, instance, sha256: str) -> Optional[Dict[str, Any]]:
+    """Return the attachment of ``instance`` with this content hash, if any."""
+    for entry in target.files(instance):
+        if entry.get("sha256") == sha256:
+            return entry
+    return None
+
+
+def describe(stored: StoredFile, file_name: str, **extra) -> Dict[str, Any]:
+    """JSON entry stored in ``attachments`` lists and returned by the API."""
+    return {
+        "stored_file_id": stored.pk,
+        "sha256": stored.sha256,
+        "file_name": file_name,
+        "size": stored.size,
+        "mime_type": stored.mime_type,
+        **extra,
+    }
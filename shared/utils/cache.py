@@ -0,0 +1,93 @@
+"""
+Helpers for company-scoped cached values.
+
+Every company has a cache *version*; keys built with ``company_cache_key``
+embed it, so bumping the version with ``invalidate_company_cache`` makes all
+cached values of that company stale at once without deleting keys one by one.
+"""
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+CACHE_PREFIX = 'company-cache'
+
+# Backends whose entries live inside one worker process; a version bump made
+# by one worker is invisible to the others.
+PROCESS_LOCAL_CACHE_BACKENDS = frozenset({
+    'django.core.cache.backends.locmem.LocMemCache',
+})
+
+
+def is_shared_cache(alias: str = 'default') -> bool:
+    """True when every worker process sees the same entries of cache ``alias``."""
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    return backend is not None and backend not in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+def _version_key(company_id) -> str:
+    return f'{CACHE_PREFIX}:{company_id}:version'
+
+
+def get_company_cache_version(company_id) -> int:
+    """Return current cache version of a company (created on first use)."""
+    key = _version_key(company_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def company_cache_key(namespace: str, company_id, *parts) -> str:
+    """Build a versioned cache key for ``namespace`` inside a company."""
+    version = get_company_cache_version(company_id)
+    suffix = ':'.join(str(part) for part in parts)
+    key = f'{CACHE_PREFIX}:{company_id}:v{version}:{namespace}'
+    return f'{key}:{suffix}' if suffix else key
+
+
+def invalidate_company_cache(company_id) -> None:
+    """Drop every cached value of a company by bumping its version."""
+    if not company_id:
+        return
+    key = _version_key(company_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def invalidate_company_cache_on_commit(company_id) -> None:
+    """Invalidate after the surrounding transaction commits (immediately outside one)."""
+    if company_id:
+        transaction.on_commit(lambda: invalidate_company_cache(company_id))
+
+
+def get_company_cached(
+    namespace: str,
+    company_id,
+    builder: Callable[[], Any],
+    *parts,
+    timeout: Optional[int] = None,
+) -> Any:
+    """
+    Return a cached value for the company, building it on a miss.
+
+    Args:
+        namespace: Logical name of the cached value (e.g. ``'dashboard-stats'``)
+        company_id: Active company ID
+        builder: Callable producing the value on cache miss
+        *parts: Extra key parts (user ID, filters, ...)
+        timeout: Seconds to keep the value (defaults to ``COMPANY_CACHE_TIMEOUT``)
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'COMPANY_CACHE_TIMEOUT', 60)
+    key = company_cache_key(namespace, company_id, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
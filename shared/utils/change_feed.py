@@ -0,0 +1,349 @@
+"""
+Incremental change feed (transactional outbox).
+
+Models register themselves with ``register_change_feed``; every save,
+delete and lock/unlock of a registered model writes a ``ChangeEvent`` row
+from the ``post_save``/``post_delete`` signal, i.e. in the same transaction
+as the change when the caller runs inside ``transaction.atomic``. Right
+after that transaction commits, the writer numbers the committed events with
+``assign_sequences``; readers only ``SELECT``. Consumers remember the last
+sequence they processed and ask for the events after it (``read_changes`` /
+``wait_for_changes``, the ``/api/v1/changes/`` endpoint and the
+``consume_changes`` command).
+
+Code that saves many rows wraps them in ``batch()``: events are collected
+and written with one ``bulk_create`` at the end of the block, so an import
+does not pay one extra ``INSERT`` per row. Rows written with
+``bulk_create`` bypass the signals and are recorded with ``record_many``.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+
+from shared.models import ChangeEvent
+
+
+ACTION_CREATE = 'create'
+ACTION_UPDATE = 'update'
+ACTION_DELETE = 'delete'
+ACTION_LOCK = 'lock'
+ACTION_UNLOCK = 'unlock'
+
+DEFAULT_READ_LIMIT = 500
+MAX_READ_LIMIT = 5000
+BATCH_SIZE = 1000
+# pg_advisory_xact_lock key serialising assign_sequences ("chfd")
+SEQUENCE_LOCK_KEY = 0x63686664
+
+DOCUMENT_PAYLOAD_FIELDS = ('document_code', 'document_date', 'is_locked', 'is_enabled')
+LINE_PAYLOAD_FIELDS = ('document_id', 'item_id', 'warehouse_id', 'unit', 'quantity')
+
+
+@dataclass(frozen=True)
+class ChangeFeedEntity:
+    """How one model is described in ``ChangeEvent`` rows."""
+
+    model: Any
+    entity_type: str
+    feature_code: str
+    payload_fields: Tuple[str, ...] = ()
+    lock_field: Optional[str] = None
+
+
+_REGISTRY: Dict[str, ChangeFeedEntity] = {}
+_REGISTRY_BY_MODEL: Dict[Any, ChangeFeedEntity] = {}
+_state = threading.local()
+_long_poll_lock = threading.Lock()
+_open_long_polls = 0
+
+
+def register_change_feed(
+    model,
+    entity_type: str,
+    *,
+    feature_code: str,
+    payload_fields: Sequence[str] = DOCUMENT_PAYLOAD_FIELDS,
+    lines: Optional[str] = None,
+    line_payload_fields: Sequence[str] = LINE_PAYLOAD_FIELDS,
+) -> ChangeFeedEntity:
+    """
+    Record changes of ``model`` as ``entity_type`` events and connect its signals.
+
+    ``lines`` names the reverse relation of the model's lines, which are then
+    registered as ``<entity_type>_line`` with the same ``feature_code``.
+    Registering the same type twice is a no-op.
+    """
+    if entity_type in _REGISTRY:
+        return _REGISTRY[entity_type]
+
+    field_names = {field.name for field in model._meta.concrete_fields}
+    spec = ChangeFeedEntity(
+        model=model,
+        entity_type=entity_type,
+        feature_code=feature_code,
+        payload_fields=tuple(payload_fields),
+        lock_field='is_locked' if 'is_locked' in field_names else None,
+    )
+    _REGISTRY[entity_type] = spec
+    _REGISTRY_BY_MODEL[model] = spec
+    post_save.connect(
+        _saved_handler,
+        sender=model,
+        dispatch_uid=f'change_feed_save_{entity_type}',
+    )
+    post_delete.connect(
+        _deleted_handler,
+        sender=model,
+        dispatch_uid=f'change_feed_delete_{entity_type}',
+    )
+    if lines:
+        register_change_feed(
+            model._meta.get_field(lines).related_model,
+            f'{entity_type}_line',
+            feature_code=feature_code,
+            payload_fields=line_payload_fields,
+        )
+    return spec
+
+
+def get_entity(entity_type: str) -> Optional[ChangeFeedEntity]:
+    return _REGISTRY.get(entity_type)
+
+
+def get_registered_entities() -> List[ChangeFeedEntity]:
+    return list(_REGISTRY.values())
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def build_event(instance, action: str, update_fields: Optional[Iterable[str]] = None) -> Optional[ChangeEvent]:
+    """Unsaved ``ChangeEvent`` for ``instance`` (``None`` when its model is not registered)."""
+    spec = _REGISTRY_BY_MODEL.get(type(instance))
+    if spec is None:
+        return None
+    payload = {
+        name: _jsonable(getattr(instance, name))
+        for name in spec.payload_fields
+        if hasattr(instance, name)
+    }
+    if update_fields:
+        payload['fields'] = sorted(update_fields)
+    return ChangeEvent(
+        company_id=getattr(instance, 'company_id', None),
+        entity_type=spec.entity_type,
+        entity_id=instance.pk,
+        action=action,
+        payload=payload,
+    )
+
+
+def record(instance, action: str, update_fields: Optional[Iterable[str]] = None) -> None:
+    """Write (or, inside ``batch()``, queue) the event of one change."""
+    event = build_event(instance, action, update_fields)
+    if event is None:
+        return
+    buffer = getattr(_state, 'buffer', None)
+    if buffer is not None:
+        buffer.append(event)
+    else:
+        event.save()
+        schedule_sequencing()
+
+
+def record_many(instances: Iterable, action: str) -> None:
+    """Events of rows written without signals (``bulk_create``), with one ``INSERT``."""
+    events = [event for event in (build_event(instance, action) for instance in instances) if event]
+    buffer = getattr(_state, 'buffer', None)
+    if buffer is not None:
+        buffer.extend(events)
+    elif events:
+        ChangeEvent.objects.bulk_create(events, batch_size=BATCH_SIZE)
+        schedule_sequencing()
+
+
+@contextmanager
+def batch():
+    """
+    Queue the events of the block and write them with one ``INSERT`` at its end.
+
+    The outermost block runs in ``transaction.atomic(savepoint=False)`` so the
+    events commit with the changes. A nested block only scopes its events:
+    if it raises, the events queued inside it are dropped, matching the
+    rollback of a ``transaction.atomic()`` block inside it.
+    """
+    buffer = getattr(_state, 'buffer', None)
+    if buffer is not None:
+        start = len(buffer)
+        try:
+            yield
+        except BaseException:
+            del buffer[start:]
+            raise
+        return
+
+    _state.buffer = []
+    try:
+        with transaction.atomic(savepoint=False):
+            yield
+            events, _state.buffer = _state.buffer, None
+            if events:
+                ChangeEvent.objects.bulk_create(events, batch_size=BATCH_SIZE)
+                schedule_sequencing()
+    finally:
+        _state.buffer = None
+
+
+def _saved_handler(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    action = ACTION_CREATE if created else ACTION_UPDATE
+    lock_field = _REGISTRY_BY_MODEL[sender].lock_field
+    if not created and lock_field and update_fields and lock_field in update_fields:
+        action = ACTION_LOCK if getattr(instance, lock_field) else ACTION_UNLOCK
+    record(instance, action, None if created else update_fields)
+
+
+def _deleted_handler(sender, instance, **kwargs):
+    record(instance, ACTION_DELETE)
+
+
+def assign_sequences() -> int:
+    """
+    Number the committed events that have no sequence yet, in ID order.
+
+    IDs are taken when a row is inserted, so a slow transaction can commit a
+    smaller ID after a reader has moved past it. Sequences are taken after
+    the commit instead: the numbering runs under a lock held until it
+    commits, so a reader that has seen sequence N never later finds a
+    committed event below N. Returns the number of events numbered.
+    """
+    table = connection.ops.quote_name(ChangeEvent._meta.db_table)
+    sequence = connection.ops.quote_name('sequence')
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [SEQUENCE_LOCK_KEY])
+        cursor.execute(
+            f"""
+            UPDATE {table} SET {sequence} = numbered.base + numbered.n
+            FROM (
+                SELECT id,
+                       ROW_NUMBER() OVER (ORDER BY id) AS n,
+                       (SELECT COALESCE(MAX({sequence}), 0) FROM {table}) AS base
+                FROM {table}
+                WHERE {sequence} IS NULL
+            ) AS numbered
+            WHERE {table}.id = numbered.id
+            """
+        )
+        return cursor.rowcount
+
+
+def schedule_sequencing() -> None:
+    """
+    Number the events just written once their transaction has committed.
+
+    One ``assign_sequences`` runs per transaction, however many events it
+    wrote; outside a transaction the events are already committed and are
+    numbered at once. The step forgets itself when it runs; Django replaces
+    its list of commit hooks after a rollback, so a step dropped with its
+    transaction is not mistaken for a pending one. If the process dies
+    between the commit and the step, the next writer's step numbers those
+    events too.
+    """
+    if not connection.in_atomic_block:
+        assign_sequences()
+        return
+    hooks = connection.run_on_commit
+    if getattr(_state, 'sequencing_hooks', None) is hooks:
+        return
+    _state.sequencing_hooks = hooks
+    transaction.on_commit(_sequence_committed_events, robust=True)
+
+
+def _sequence_committed_events() -> None:
+    _state.sequencing_hooks = None
+    assign_sequences()
+
+
+def read_changes(
+    company_id: int,
+    after: int = 0,
+    limit: int = DEFAULT_READ_LIMIT,
+    entity_types: Optional[Iterable[str]] = None,
+) -> List[ChangeEvent]:
+    """Events of a company with a sequence greater than ``after``, oldest first (read-only)."""
+    queryset = ChangeEvent.objects.filter(company_id=company_id, sequence__gt=after)
+    if entity_types is not None:
+        queryset = queryset.filter(entity_type__in=list(entity_types))
+    return list(queryset.order_by('sequence')[:max(1, min(limit, MAX_READ_LIMIT))])
+
+
+@contextmanager
+def long_poll_slot(wait: float):
+    """
+    Yield how long this request may wait: ``wait`` while fewer than
+    ``CHANGE_FEED_MAX_LONG_POLLS`` long-polls are open in this process, else 0.
+
+    A waiting request holds its worker thread, so the default of 0 turns long
+    polls into plain reads; a worker pool dedicated to the feed raises it.
+    """
+    global _open_long_polls
+    granted = False
+    if wait > 0:
+        with _long_poll_lock:
+            granted = _open_long_polls < getattr(settings, 'CHANGE_FEED_MAX_LONG_POLLS', 0)
+            if granted:
+                _open_long_polls += 1
+    try:
+        yield wait if granted else 0
+    finally:
+        if granted:
+            with _long_poll_lock:
+                _open_long_polls -= 1
+
+
+def wait_for_changes(
+    company_id: int,
+    after: int = 0,
+    limit: int = DEFAULT_READ_LIMIT,
+    entity_types: Optional[Iterable[str]] = None,
+    timeout: float = 0,
+    poll_interval: float = 1.0,
+) -> List[ChangeEvent]:
+    """``read_changes`` that polls for up to ``timeout`` seconds while nothing is available."""
+    if entity_types is not None:
+        entity_types = list(entity_types)
+    deadline = time.monotonic() + timeout
+    while True:
+        events = read_changes(company_id, after, limit, entity_types)
+        if events or time.monotonic() >= deadline:
+            return events
+        time.sleep(min(poll_interval, max(0.0, deadline - time.monotonic())))
+
+
+def serialize_event(event: ChangeEvent) -> Dict[str, Any]:
+    return {
+        'id': event.pk,
+        'sequence': event.sequence,
+        'entity_type': event.entity_type,
+        'entity_id': event.entity_id,
+        'action': event.action,
+        'payload': event.payload,
+        'created_at': event.created_at.isoformat(),
+    }
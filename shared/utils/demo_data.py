@@ -0,0 +1,717 @@
+"""
+Synthetic, referentially consistent data for benchmarks and load tests.
+
+``DemoDataGenerator`` creates one company with an item hierarchy, items,
+suppliers, warehouses, permanent receipts/issues with lines, stocktaking
+documents, serials, tickets and (when the production module is installed)
+BOMs, product orders and performance records. Rows are written with
+``bulk_create`` in batches and every code is pre-allocated, so ``save()``
+code generation, per-row lookups and signals are skipped; derived data such
+as the search index is not maintained for generated rows.
+
+``generate_companies`` creates several companies, one worker process per
+company where the database allows concurrent writers (not SQLite).
+"""
+from __future__ import annotations
+
+import multiprocessing
+import random
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from decimal import Decimal
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.utils import timezone
+
+from shared.utils.modules import is_production_installed
+
+
+@dataclass(frozen=True)
+class DemoScale:
+    """Row counts of one generated company."""
+
+    items: int = 200
+    suppliers: int = 20
+    warehouses: int = 5
+    categories: int = 5
+    subcategories_per_category: int = 4
+    receipts: int = 100
+    issues: int = 100
+    lines_per_document: int = 20
+    lot_tracked_ratio: float = 0.1
+    serials_per_lot_item: int = 5
+    stocktakings: int = 10
+    boms: int = 20
+    materials_per_bom: int = 5
+    orders: int = 20
+    performance_records: int = 20
+    ticket_templates: int = 5
+    tickets: int = 200
+    days: int = 365
+
+
+SCALES: Dict[str, DemoScale] = {
+    'tiny': DemoScale(items=20, suppliers=3, warehouses=2, categories=2, subcategories_per_category=2,
+                      receipts=5, issues=5, lines_per_document=5, serials_per_lot_item=2, stocktakings=2,
+                      boms=2, materials_per_bom=3, orders=2, performance_records=2, ticket_templates=2,
+                      tickets=10, days=30),
+    'small': DemoScale(),
+    'medium': DemoScale(items=5_000, suppliers=200, warehouses=20, categories=20, receipts=5_000,
+                        issues=5_000, lines_per_document=20, stocktakings=100, boms=500, orders=2_000,
+                        performance_records=2_000, ticket_templates=20, tickets=10_000),
+    'large': DemoScale(items=20_000, suppliers=1_000, warehouses=50, categories=40, receipts=25_000,
+                       issues=25_000, lines_per_document=20, stocktakings=500, boms=2_000, orders=10_000,
+                       performance_records=10_000, ticket_templates=50, tickets=50_000),
+}
+
+
+def get_scale(name: str, **overrides) -> DemoScale:
+    """Return a named scale with optional field overrides (``None`` values ignored)."""
+    scale = SCALES[name]
+    overrides = {key: value for key, value in overrides.items() if value is not None}
+    return replace(scale, **overrides) if overrides else scale
+
+
+@dataclass
+class DemoDataset:
+    """Primary keys of generated rows, for benchmarks and tests."""
+
+    company_id: int = 0
+    user_id: int = 0
+    warehouse_ids: List[int] = field(default_factory=list)
+    item_ids: List[int] = field(default_factory=list)
+    lot_item_ids: List[int] = field(default_factory=list)
+    receipt_ids: List[int] = field(default_factory=list)
+    issue_ids: List[int] = field(default_factory=list)
+    supplier_ids: List[int] = field(default_factory=list)
+    stocktaking_ids: List[int] = field(default_factory=list)
+    ticket_ids: List[int] = field(default_factory=list)
+    performance_ids: List[int] = field(default_factory=list)
+    bom_ids: List[int] = field(default_factory=list)
+    order_ids: List[int] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _free_codes(values: Iterable[str], width: int, count: int, start: int = 1) -> List[str]:
+    used = set(values)
+    codes = []
+    for number in range(start, 10 ** width):
+        code = str(number).zfill(width)
+        if code not in used:
+            codes.append(code)
+            if len(codes) == count:
+                return codes
+    raise ValueError(f'No free {width}-digit code left')
+
+
+def _free_code(values: Iterable[str], width: int, start: int = 1) -> str:
+    return _free_codes(values, width, 1, start)[0]
+
+
+def free_type_codes(count: int) -> List[str]:
+    """Item type codes not used by any existing item (one per generated company)."""
+    Item = apps.get_model('inventory.Item')
+    return _free_codes(Item.objects.values_list('type_code', flat=True).distinct(), 3, count, start=100)
+
+
+class DemoDataGenerator:
+    """
+    Generate one synthetic company at ``scale``.
+
+    Args:
+        scale: Row counts (see ``SCALES``)
+        batch_size: Rows per ``bulk_create`` call
+        seed: Random seed, so two runs produce the same shape of data
+    """
+
+    def __init__(self, scale: DemoScale, *, batch_size: int = 2000, seed: int = 0):
+        self.scale = scale
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.dataset = DemoDataset()
+        self.today = timezone.localdate()
+
+    # ------------------------------------------------------------------ helpers
+
+    def model(self, label: str):
+        return apps.get_model(label)
+
+    def bulk_create(self, model, rows: Iterable) -> list:
+        """Insert ``rows`` in batches and return the created objects (with PKs)."""
+        created = []
+        for batch in _chunks(rows, self.batch_size):
+            created.extend(model.objects.bulk_create(batch, batch_size=self.batch_size))
+        key = model._meta.label
+        self.dataset.counts[key] = self.dataset.counts.get(key, 0) + len(created)
+        return created
+
+    def insert(self, model, rows: Iterable) -> int:
+        """
+        Insert ``rows`` whose primary keys are not needed afterwards.
+
+        On PostgreSQL (psycopg 3) rows are streamed with ``COPY``, which avoids
+        building and parsing huge multi-row ``INSERT`` statements; elsewhere
+        this falls back to ``bulk_create``.
+        """
+        if connection.vendor != 'postgresql' or not is_psycopg3:
+            return len(self.bulk_create(model, rows))
+
+        opts = model._meta
+        conn = connections[model.objects.db]
+        fields = [f for f in opts.concrete_fields if not (f.primary_key and f.db_returning)]
+        getters = [self._copy_getter(f, conn, timezone.now()) for f in fields]
+        columns = ', '.join(conn.ops.quote_name(f.column) for f in fields)
+        sql = f'COPY {conn.ops.quote_name(opts.db_table)} ({columns}) FROM STDIN'
+        count = 0
+        with conn.cursor() as cursor, cursor.cursor.copy(sql) as copy:
+            for obj in rows:
+                copy.write_row([getter(obj) for getter in getters])
+                count += 1
+        key = opts.label
+        self.dataset.counts[key] = self.dataset.counts.get(key, 0) + count
+        return count
+
+    @staticmethod
+    def _copy_getter(field, conn, now):
+        """Value of ``field`` for COPY; psycopg adapts plain Python values itself."""
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            return lambda obj: now
+        if field.get_internal_type() == 'JSONField':
+            return lambda obj: field.get_db_prep_save(getattr(obj, field.attname), conn)
+        return attrgetter(field.attname)
+
+    def random_date(self) -> date:
+        return self.today - timedelta(days=self.random.randrange(max(self.scale.days, 1)))
+
+    def common(self) -> dict:
+        return {
+            'company_id': self.company.pk,
+            'company_code': self.company.public_code,
+            'created_by_id': self.user.pk,
+        }
+
+    # ----------------------------------------------------------------- entities
+
+    def generate(self, company=None, user=None, type_code: Optional[str] = None) -> DemoDataset:
+        """
+        Create every entity and return the ``DemoDataset``.
+
+        ``type_code`` is the item type code of the company; pass distinct
+        codes when several generators run concurrently (``full_item_code`` is
+        globally unique), otherwise a free code is picked.
+        """
+        self.company = company or self.create_company()
+        self.user = user or self.create_user()
+        self.tag = f'D{self.company.pk}'
+        self.dataset.company_id = self.company.pk
+        self.dataset.user_id = self.user.pk
+
+        self.create_item_hierarchy(type_code)
+        self.create_warehouses()
+        self.create_items()
+        self.create_suppliers()
+        self.create_receipts()
+        self.create_issues()
+        self.create_stocktaking()
+        self.create_serials()
+        if is_production_installed():
+            self.create_boms()
+            self.create_orders()
+            self.create_performance_records()
+        if apps.is_installed('ticketing'):
+            self.create_tickets()
+        return self.dataset
+
+    def create_company(self):
+        Company = self.model('shared.Company')
+        code = _free_code(Company.objects.values_list('public_code', flat=True), 3, start=100)
+        return Company.objects.create(
+            public_code=code,
+            legal_name=f'Demo Company {code}',
+            display_name=f'Demo Company {code}',
+            is_enabled=1,
+        )
+
+    def create_user(self):
+        User = get_user_model()
+        username = f'demo-{self.company.public_code}'
+        user, _ = User.objects.get_or_create(
+            username=username,
+            defaults={'email': f'{username}@example.com', 'is_staff': True, 'is_superuser': True},
+        )
+        return user
+
+    def create_item_hierarchy(self, type_code: Optional[str] = None):
+        ItemType = self.model('inventory.ItemType')
+        ItemCategory = self.model('inventory.ItemCategory')
+        ItemSubcategory = self.model('inventory.ItemSubcategory')
+        common = self.common()
+
+        # A type code never used by existing items keeps full_item_code globally unique
+        type_code = type_code or free_type_codes(1)[0]
+        self.item_type = ItemType.objects.create(
+            public_code=type_code, name=f'{self.tag} Type', name_en=f'{self.tag} Type', **common,
+        )
+        categories = self.bulk_create(ItemCategory, (
+            ItemCategory(public_code=str(i + 1).zfill(3), name=f'{self.tag} Category {i + 1}',
+                         name_en=f'{self.tag} Category {i + 1}', **common)
+            for i in range(self.scale.categories)
+        ))
+        self.subcategories = self.bulk_create(ItemSubcategory, (
+            ItemSubcategory(category_id=category.pk, public_code=str(j + 1).zfill(3),
+                            name=f'{self.tag} Sub {category.public_code}-{j + 1}',
+                            name_en=f'{self.tag} Sub {category.public_code}-{j + 1}', **common)
+            for category in categories
+            for j in range(self.scale.subcategories_per_category)
+        ))
+        self.categories = categories
+        self.category_codes = {category.pk: category.public_code for category in categories}
+
+    def create_warehouses(self):
+        Warehouse = self.model('inventory.Warehouse')
+        common = self.common()
+        self.warehouses = self.bulk_create(Warehouse, (
+            Warehouse(public_code=str(i + 1).zfill(5), name=f'{self.tag} Warehouse {i + 1}',
+                      name_en=f'{self.tag} Warehouse {i + 1}', **common)
+            for i in range(self.scale.warehouses)
+        ))
+        self.dataset.warehouse_ids = [warehouse.pk for warehouse in self.warehouses]
+
+    def create_items(self):
+        Item = self.model('inventory.Item')
+        ItemWarehouse = self.model('inventory.ItemWarehouse')
+        common = self.common()
+        batch_prefix = self.today.strftime('%m%y')
+        lot_every = int(1 / self.scale.lot_tracked_ratio) if self.scale.lot_tracked_ratio else 0
+
+        def rows():
+            for i in range(self.scale.items):
+                subcategory = self.subcategories[i % len(self.subcategories)]
+                user_segment = str((i // 99_999) % 100).zfill(2)
+                sequence = str(i % 99_999 + 1).zfill(5)
+                item_code = f'{user_segment}{sequence}'
+                category_code = self.category_codes[subcategory.category_id]
+                yield Item(
+                    type_id=self.item_type.pk,
+                    category_id=subcategory.category_id,
+                    subcategory_id=subcategory.pk,
+                    type_code=self.item_type.public_code,
+                    category_code=category_code,
+                    subcategory_code=subcategory.public_code,
+                    user_segment=user_segment,
+                    sequence_segment=sequence,
+                    item_code=item_code,
+                    full_item_code=f'{self.item_type.public_code}{category_code}{subcategory.public_code}{item_code}',
+                    batch_number=f'{batch_prefix}-{self.company.pk:03d}{i:07d}'[:20],
+                    name=f'{self.tag} Item {i + 1:07d}',
+                    name_en=f'{self.tag} Item {i + 1:07d}',
+                    default_unit='EA',
+                    primary_unit='EA',
+                    has_lot_tracking=1 if lot_every and i % lot_every == 0 else 0,
+                    min_stock=Decimal(self.random.randrange(0, 50)),
+                    **common,
+                )
+
+        self.items = self.bulk_create(Item, rows())
+        self.dataset.item_ids = [item.pk for item in self.items]
+        self.dataset.lot_item_ids = [item.pk for item in self.items if item.has_lot_tracking]
+        self.insert(ItemWarehouse, (
+            ItemWarehouse(item_id=item.pk, warehouse_id=self.warehouses[index % len(self.warehouses)].pk,
+                          is_primary=1, **common)
+            for index, item in enumerate(self.items)
+        ))
+
+    def create_suppliers(self):
+        Supplier = self.model('inventory.Supplier')
+        SupplierCategory = self.model('inventory.SupplierCategory')
+        common = self.common()
+        suppliers = self.bulk_create(Supplier, (
+            Supplier(public_code=str(i + 1).zfill(6), name=f'{self.tag} Supplier {i + 1}',
+                     name_en=f'{self.tag} Supplier {i + 1}', city='Tehran', country='IR', **common)
+            for i in range(self.scale.suppliers)
+        ))
+        self.dataset.supplier_ids = [supplier.pk for supplier in suppliers]
+        self.insert(SupplierCategory, (
+            SupplierCategory(supplier_id=supplier.pk, category_id=self.categories[i % len(self.categories)].pk,
+                             is_primary=1, **common)
+            for i, supplier in enumerate(suppliers)
+        ))
+
+    def _create_documents(self, header_label: str, line_label: str, count: int, code_prefix: str,
+                          quantity_range=(1, 100)) -> List[int]:
+        Header = self.model(header_label)
+        Line = self.model(line_label)
+        common = self.common()
+        headers = self.bulk_create(Header, (
+            Header(document_code=f'{code_prefix}{self.company.pk:04d}{i + 1:08d}',
+                   document_date=self.random_date(), is_locked=1, **common)
+            for i in range(count)
+        ))
+        low, high = quantity_range
+
+        def lines():
+            for header in headers:
+                for sort_order in range(self.scale.lines_per_document):
+                    item = self.items[self.random.randrange(len(self.items))]
+                    warehouse = self.warehouses[self.random.randrange(len(self.warehouses))]
+                    yield Line(
+                        document_id=header.pk,
+                        document_date=header.document_date,
+                        document_is_locked=header.is_locked,
+                        item_id=item.pk,
+                        item_code=item.item_code,
+                        warehouse_id=warehouse.pk,
+                        warehouse_code=warehouse.public_code,
+                        unit='EA',
+                        quantity=Decimal(self.random.randint(low, high)),
+                        sort_order=sort_order,
+                        **common,
+                    )
+
+        self.insert(Line, lines())
+        return [header.pk for header in headers]
+
+    def create_receipts(self):
+        self.dataset.receipt_ids = self._create_documents(
+            'inventory.ReceiptPermanent', 'inventory.ReceiptPermanentLine', self.scale.receipts, 'RP',
+            quantity_range=(50, 500),
+        )
+
+    def create_issues(self):
+        self.dataset.issue_ids = self._create_documents(
+            'inventory.IssuePermanent', 'inventory.IssuePermanentLine', self.scale.issues, 'IP',
+            quantity_range=(1, 20),
+        )
+
+    def create_stocktaking(self):
+        """Deficit and surplus documents per count, plus the confirming stocktaking record."""
+        if not self.scale.stocktakings:
+            return
+        StocktakingRecord = self.model('inventory.StocktakingRecord')
+        common = self.common()
+        deficits = self._create_stocktaking_documents(
+            'inventory.StocktakingDeficit', 'inventory.StocktakingDeficitLine', 'SD', -1,
+        )
+        surpluses = self._create_stocktaking_documents(
+            'inventory.StocktakingSurplus', 'inventory.StocktakingSurplusLine', 'SS', 1,
+        )
+        now = timezone.now()
+        records = self.bulk_create(StocktakingRecord, (
+            StocktakingRecord(
+                document_code=f'SR{self.company.pk:04d}{i + 1:08d}',
+                document_date=deficit.document_date,
+                stocktaking_session_id=i + 1,
+                inventory_snapshot_time=now,
+                confirmed_by_id=self.user.pk,
+                confirmed_by_code=self.user.username[:8],
+                variance_document_ids=[deficit.pk, surplus.pk],
+                variance_document_codes=[deficit.document_code, surplus.document_code],
+                approval_status='approved',
+                is_locked=1,
+                **common,
+            )
+            for i, (deficit, surplus) in enumerate(zip(deficits, surpluses))
+        ))
+        self.dataset.stocktaking_ids = [record.pk for record in records]
+
+    def _create_stocktaking_documents(self, header_label: str, line_label: str, code_prefix: str,
+                                      direction: int) -> list:
+        Header = self.model(header_label)
+        Line = self.model(line_label)
+        common = self.common()
+        headers = self.bulk_create(Header, (
+            Header(document_code=f'{code_prefix}{self.company.pk:04d}{i + 1:08d}',
+                   document_date=self.random_date(), stocktaking_session_id=i + 1, is_locked=1, **common)
+            for i in range(self.scale.stocktakings)
+        ))
+
+        def lines():
+            for header in headers:
+                for sort_order in range(self.scale.lines_per_document):
+                    item = self.items[self.random.randrange(len(self.items))]
+                    warehouse = self.warehouses[self.random.randrange(len(self.warehouses))]
+                    expected = Decimal(self.random.randint(10, 200))
+                    difference = Decimal(self.random.randint(1, 5))
+                    yield Line(
+                        document_id=header.pk,
+                        document_date=header.document_date,
+                        document_is_locked=header.is_locked,
+                        item_id=item.pk,
+                        item_code=item.item_code,
+                        warehouse_id=warehouse.pk,
+                        warehouse_code=warehouse.public_code,
+                        unit='EA',
+                        quantity_expected=expected,
+                        quantity_counted=expected + direction * difference,
+                        quantity_adjusted=difference,
+                        sort_order=sort_order,
+                        **common,
+                    )
+
+        self.insert(Line, lines())
+        return headers
+
+    def create_serials(self):
+        if not self.dataset.lot_item_ids or not self.dataset.receipt_ids:
+            return
+        ItemSerial = self.model('inventory.ItemSerial')
+        common = self.common()
+        receipt_codes = dict(
+            self.model('inventory.ReceiptPermanent').objects
+            .filter(pk__in=self.dataset.receipt_ids[:100])
+            .values_list('pk', 'document_code')
+        )
+        receipt_ids = list(receipt_codes)
+        items = {item.pk: item for item in self.items}
+
+        def rows():
+            for item_id in self.dataset.lot_item_ids:
+                item = items[item_id]
+                receipt_id = receipt_ids[item_id % len(receipt_ids)]
+                warehouse = self.warehouses[item_id % len(self.warehouses)]
+                for n in range(self.scale.serials_per_lot_item):
+                    yield ItemSerial(
+                        item_id=item_id,
+                        item_code=item.item_code,
+                        serial_code=f'{self.tag}-{item_id}-{n + 1:05d}',
+                        receipt_document_id=receipt_id,
+                        receipt_document_code=receipt_codes[receipt_id],
+                        current_warehouse_id=warehouse.pk,
+                        current_warehouse_code=warehouse.public_code,
+                        **common,
+                    )
+
+        self.insert(ItemSerial, rows())
+
+    def create_boms(self):
+        BOM = self.model('production.BOM')
+        BOMMaterial = self.model('production.BOMMaterial')
+        common = self.common()
+        count = min(self.scale.boms, len(self.items))
+        finished = self.items[:count]
+        self.boms = self.bulk_create(BOM, (
+            BOM(bom_code=f'{self.company.pk:04d}{i + 1:08d}', finished_item_id=item.pk,
+                finished_item_code=item.item_code, **common)
+            for i, item in enumerate(finished)
+        ))
+        self.dataset.bom_ids = [bom.pk for bom in self.boms]
+        materials = self.items[count:] or self.items
+
+        def rows():
+            per_bom = min(self.scale.materials_per_bom, len(materials))
+            for bom in self.boms:
+                # A material appears at most once per BOM
+                for line_number, material in enumerate(self.random.sample(materials, per_bom)):
+                    yield BOMMaterial(
+                        bom_id=bom.pk,
+                        material_item_id=material.pk,
+                        material_item_code=material.item_code,
+                        material_type_id=self.item_type.pk,
+                        quantity_per_unit=Decimal(self.random.randint(1, 10)),
+                        unit='EA',
+                        line_number=line_number + 1,
+                        **common,
+                    )
+
+        self.insert(BOMMaterial, rows())
+
+    def create_orders(self):
+        if not getattr(self, 'boms', None):
+            return
+        ProductOrder = self.model('production.ProductOrder')
+        common = self.common()
+        items = {item.pk: item for item in self.items}
+
+        def rows():
+            for i in range(self.scale.orders):
+                bom = self.boms[i % len(self.boms)]
+                yield ProductOrder(
+                    order_code=f'PO{self.company.pk:04d}{i + 1:08d}',
+                    order_date=self.random_date(),
+                    finished_item_id=bom.finished_item_id,
+                    finished_item_code=items[bom.finished_item_id].item_code,
+                    bom_id=bom.pk,
+                    bom_code=bom.bom_code,
+                    quantity_planned=Decimal(self.random.randint(10, 1000)),
+                    unit='EA',
+                    **common,
+                )
+
+        self.dataset.order_ids = [order.pk for order in self.bulk_create(ProductOrder, rows())]
+
+    def create_performance_records(self):
+        orders = self.model('production.ProductOrder').objects.filter(pk__in=self.dataset.order_ids)
+        orders = list(orders.values('pk', 'order_code', 'bom_id', 'finished_item_id', 'finished_item_code',
+                                    'quantity_planned'))
+        if not orders or not self.scale.performance_records:
+            return
+        PerformanceRecord = self.model('production.PerformanceRecord')
+        PerformanceRecordMaterial = self.model('production.PerformanceRecordMaterial')
+        common = self.common()
+
+        def rows():
+            for i in range(self.scale.performance_records):
+                order = orders[i % len(orders)]
+                planned = order['quantity_planned']
+                yield PerformanceRecord(
+                    performance_code=f'PR{self.company.pk:04d}{i + 1:08d}',
+                    order_id=order['pk'],
+                    order_code=order['order_code'],
+                    performance_date=self.random_date(),
+                    quantity_planned=planned,
+                    quantity_actual=planned - self.random.randint(0, int(planned) // 10),
+                    finished_item_id=order['finished_item_id'],
+                    finished_item_code=order['finished_item_code'],
+                    unit='EA',
+                    status='approved',
+                    is_locked=1,
+                    **common,
+                )
+
+        records = self.bulk_create(PerformanceRecord, rows())
+        self.dataset.performance_ids = [record.pk for record in records]
+
+        bom_materials: Dict[int, list] = {}
+        for material in self.model('production.BOMMaterial').objects.filter(bom_id__in=self.dataset.bom_ids).values(
+            'bom_id', 'material_item_id', 'material_item_code', 'quantity_per_unit',
+        ):
+            bom_materials.setdefault(material['bom_id'], []).append(material)
+        order_boms = {order['pk']: order['bom_id'] for order in orders}
+
+        def materials():
+            for record in records:
+                for material in bom_materials.get(order_boms[record.order_id], ()):
+                    yield PerformanceRecordMaterial(
+                        performance_id=record.pk,
+                        material_item_id=material['material_item_id'],
+                        material_item_code=material['material_item_code'],
+                        quantity_required=material['quantity_per_unit'] * record.quantity_actual,
+                        quantity_waste=Decimal(self.random.randint(0, 3)),
+                        unit='EA',
+                        **common,
+                    )
+
+        self.insert(PerformanceRecordMaterial, materials())
+
+    def create_tickets(self):
+        if not self.scale.tickets:
+            return
+        TicketCategory = self.model('ticketing.TicketCategory')
+        TicketPriority = self.model('ticketing.TicketPriority')
+        TicketTemplate = self.model('ticketing.TicketTemplate')
+        Ticket = self.model('ticketing.Ticket')
+        common = self.common()
+
+        category, = self.bulk_create(TicketCategory, [
+            TicketCategory(public_code='1'.zfill(10), name=f'{self.tag} Support', name_en=f'{self.tag} Support',
+                           **common),
+        ])
+        priorities = self.bulk_create(TicketPriority, (
+            TicketPriority(public_code=str(level).zfill(10), name=f'{self.tag} P{level}', name_en=f'P{level}',
+                           priority_level=level, sla_hours=level * 8, **common)
+            for level in range(1, 4)
+        ))
+        templates = self.bulk_create(TicketTemplate, (
+            TicketTemplate(template_code=f'TMP-{self.company.pk:04d}-{i + 1:06d}', name=f'{self.tag} Template {i + 1}',
+                           category_id=category.pk, category_code=category.public_code,
+                           default_priority_id=priorities[-1].pk, default_priority_code=priorities[-1].public_code,
+                           **common)
+            for i in range(max(self.scale.ticket_templates, 1))
+        ))
+        statuses = [code for code, _ in Ticket.STATUS_CHOICES]
+
+        def rows():
+            for i in range(self.scale.tickets):
+                template = templates[i % len(templates)]
+                priority = priorities[self.random.randrange(len(priorities))]
+                yield Ticket(
+                    ticket_code=f'TKT-{self.company.pk:04d}-{i + 1:08d}',
+                    template_id=template.pk,
+                    template_code=template.template_code,
+                    title=f'{self.tag} Ticket {i + 1}',
+                    category_id=category.pk,
+                    category_code=category.public_code,
+                    priority_id=priority.pk,
+                    priority_code=priority.public_code,
+                    status=statuses[self.random.randrange(len(statuses))],
+                    reported_by_id=self.user.pk,
+                    reported_by_username=self.user.username,
+                    **common,
+                )
+
+        self.insert(Ticket, rows())
+        self.dataset.ticket_ids = list(
+            Ticket.objects.filter(company_id=self.company.pk).order_by('pk').values_list('pk', flat=True)
+        )
+
+
+def _generate_company(task: tuple) -> DemoDataset:
+    """Generate one pre-created company in a single transaction."""
+    company_id, user_id, type_code, scale, batch_size, seed = task
+    company = apps.get_model('shared.Company').objects.get(pk=company_id)
+    user = get_user_model().objects.get(pk=user_id)
+    with transaction.atomic():
+        return DemoDataGenerator(scale, batch_size=batch_size, seed=seed).generate(company, user, type_code)
+
+
+def _generate_company_worker(task: tuple) -> DemoDataset:
+    """Pool worker: ``_generate_company`` on the process's own connection."""
+    import django
+
+    if not apps.ready:
+        django.setup()
+    try:
+        return _generate_company(task)
+    finally:
+        connections.close_all()
+
+
+def generate_companies(scale: DemoScale, companies: int = 1, *, processes: Optional[int] = None,
+                       batch_size: int = 2000, seed: int = 0) -> List[DemoDataset]:
+    """
+    Generate ``companies`` companies at ``scale``.
+
+    Companies, demo users and item type codes are allocated up front so the
+    per-company work is independent; with ``processes`` > 1 it is spread over
+    a process pool. SQLite allows a single writer, and workers cannot see rows
+    of an open transaction, so those cases run in-process.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if connection.vendor == 'sqlite' or connection.in_atomic_block:
+        processes = 1
+    processes = max(1, min(processes, companies))
+
+    type_codes = free_type_codes(companies)
+    tasks = []
+    for index in range(companies):
+        generator = DemoDataGenerator(scale, batch_size=batch_size, seed=seed + index)
+        generator.company = generator.create_company()
+        user = generator.create_user()
+        tasks.append((generator.company.pk, user.pk, type_codes[index], scale, batch_size, seed + index))
+
+    if processes == 1:
+        return [_generate_company(task) for task in tasks]
+
+    # Children must open their own connections
+    connections.close_all()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+    with context.Pool(processes) as pool:
+        return pool.map(_generate_company_worker, tasks)
@@ -0,0 +1,360 @@
+"""
+Global document search index.
+
+Document types register themselves with ``register_searchable_document``;
+saves and deletes of the header or its lines schedule a re-index of the
+header (once per transaction, after commit) into ``DocumentSearchIndex``.
+``search_documents`` then answers a global search with a single query over
+that table (full-text prefix match plus substring match on codes), instead
+of joining every header → lines → items table per document type.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q, TextField, Value
+from django.db.models.signals import post_delete, post_save
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from shared.models import DocumentSearchIndex
+
+
+SEARCH_CONFIG = 'simple'
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_state = threading.local()
+
+
+@dataclass(frozen=True)
+class SearchableDocument:
+    """Describes how one document model is flattened into the search index."""
+
+    model: Any
+    type_key: str
+    label: str
+    feature_code: str
+    url_name: str
+    code_field: str = 'document_code'
+    date_field: str = 'document_date'
+    lines: Optional[str] = 'lines'
+    item_field: str = 'item'
+    status_field: Optional[str] = None
+    header_item_field: Optional[str] = None
+    owner_field: str = 'created_by'
+
+    @property
+    def line_model(self):
+        if not self.lines:
+            return None
+        return self.model._meta.get_field(self.lines).related_model
+
+    @property
+    def line_fk(self) -> Optional[str]:
+        if not self.lines:
+            return None
+        return self.model._meta.get_field(self.lines).field.name
+
+
+_REGISTRY: Dict[str, SearchableDocument] = {}
+_REGISTRY_BY_MODEL: Dict[Any, SearchableDocument] = {}
+
+
+def register_searchable_document(model, type_key: str, **options) -> SearchableDocument:
+    """
+    Register ``model`` for global search and connect its index signals.
+
+    Options are ``SearchableDocument`` fields (``label``, ``feature_code``,
+    ``url_name``, ``code_field``, ``date_field``, ``lines``, ``item_field``,
+    ``status_field``, ``header_item_field``, ``owner_field``). ``owner_field``
+    must match the owner field the type's list view scopes ``view_own`` by.
+    Registering the same type twice is a no-op.
+    """
+    if type_key in _REGISTRY:
+        return _REGISTRY[type_key]
+
+    spec = SearchableDocument(model=model, type_key=type_key, **options)
+    _REGISTRY[type_key] = spec
+    _REGISTRY_BY_MODEL[model] = spec
+
+    uid = f'document-search:{type_key}'
+    post_save.connect(_header_saved, sender=model, dispatch_uid=f'{uid}:save', weak=False)
+    post_delete.connect(_header_deleted, sender=model, dispatch_uid=f'{uid}:delete', weak=False)
+    line_model = spec.line_model
+    if line_model is not None:
+        post_save.connect(_line_changed, sender=line_model, dispatch_uid=f'{uid}:line-save', weak=False)
+        post_delete.connect(_line_changed, sender=line_model, dispatch_uid=f'{uid}:line-delete', weak=False)
+    return spec
+
+
+def get_searchable_documents() -> List[SearchableDocument]:
+    """Return registered document types in registration order."""
+    return list(_REGISTRY.values())
+
+
+def _line_spec(line_model) -> List[SearchableDocument]:
+    return [spec for spec in _REGISTRY.values() if spec.line_model is line_model]
+
+
+def _header_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_reindex(sender, instance.pk)
+
+
+def _header_deleted(sender, instance, **kwargs):
+    spec = _REGISTRY_BY_MODEL.get(sender)
+    if spec is not None:
+        pk = instance.pk
+        transaction.on_commit(lambda: remove_document(spec.type_key, pk))
+
+
+def _line_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for spec in _line_spec(sender):
+        header_id = getattr(instance, f'{spec.line_fk}_id', None)
+        if header_id:
+            schedule_reindex(spec.model, header_id)
+
+
+class _PendingReindex:
+    """on_commit callable re-indexing every document scheduled in one transaction."""
+
+    def __init__(self, hooks):
+        self.hooks = hooks
+        self.search_keys: Dict[tuple, None] = {}
+
+    def __call__(self):
+        if getattr(_state, 'pending', None) is self:
+            _state.pending = None
+        for model, pk in self.search_keys:
+            reindex(model, pk)
+
+
+def schedule_reindex(model, pk) -> None:
+    """Re-index a document after commit; repeated calls in one transaction run once."""
+    if model not in _REGISTRY_BY_MODEL or not pk:
+        return
+    if not connection.in_atomic_block:
+        reindex(model, pk)
+        return
+    # Django replaces its list of commit hooks after a commit or rollback, so
+    # a pending set left behind by a rolled-back transaction is never reused
+    hooks = connection.run_on_commit
+    pending = getattr(_state, 'pending', None)
+    if pending is None or pending.hooks is not hooks:
+        pending = _state.pending = _PendingReindex(hooks)
+        transaction.on_commit(pending)
+    pending.search_keys[(model, pk)] = None
+
+
+def remove_document(type_key: str, pk) -> None:
+    """Delete a document's index entry."""
+    DocumentSearchIndex.objects.filter(document_type=type_key, document_id=pk).delete()
+
+
+def _collect_items(spec: SearchableDocument, instance) -> List[tuple]:
+    items: List[tuple] = []
+    if spec.header_item_field:
+        item = getattr(instance, spec.header_item_field, None)
+        if item is not None:
+            items.append((item.item_code, item.full_item_code, item.name))
+    line_model = spec.line_model
+    if line_model is not None:
+        items.extend(
+            line_model.objects.filter(**{spec.line_fk: instance.pk, 'is_enabled': 1})
+            .values_list(
+                f'{spec.item_field}__item_code',
+                f'{spec.item_field}__full_item_code',
+                f'{spec.item_field}__name',
+            )
+            .distinct()
+        )
+    return items
+
+
+def _unique_join(values: Iterable[Optional[str]]) -> str:
+    return ' '.join(dict.fromkeys(value for value in values if value))
+
+
+def _search_vector(code: str, item_codes: str, item_names: str):
+    def part(value, weight):
+        return SearchVector(Value(value, output_field=TextField()), weight=weight, config=SEARCH_CONFIG)
+
+    return part(code, 'A') + part(item_codes, 'B') + part(item_names, 'C')
+
+
+def index_document(instance) -> Optional[DocumentSearchIndex]:
+    """Write (or refresh) the index row of a registered document instance."""
+    spec = _REGISTRY_BY_MODEL.get(type(instance))
+    if spec is None:
+        return None
+
+    items = _collect_items(spec, instance)
+    code = getattr(instance, spec.code_field) or ''
+    item_codes = _unique_join(code_part for item in items for code_part in item[:2])
+    item_names = _unique_join(item[2] for item in items)
+    status = getattr(instance, spec.status_field) if spec.status_field else ''
+
+    values = {
+        'company_id': instance.company_id,
+        'document_code': code,
+        'document_date': getattr(instance, spec.date_field, None),
+        'status': '' if status is None else str(status),
+        'is_enabled': getattr(instance, 'is_enabled', 1),
+        'is_locked': getattr(instance, 'is_locked', 0) or 0,
+        'owner_id': getattr(instance, f'{spec.owner_field}_id', None),
+        'item_codes': item_codes,
+        'item_names': item_names,
+        'search_text': f'{code} {item_codes} {item_names}'.lower(),
+    }
+    if connection.vendor == 'postgresql':
+        values['search_vector'] = _search_vector(code, item_codes, item_names)
+
+    entries = DocumentSearchIndex.objects.filter(document_type=spec.type_key, document_id=instance.pk)
+    if entries.update(updated_at=timezone.now(), **values):
+        return entries.first()
+    try:
+        with transaction.atomic():
+            return DocumentSearchIndex.objects.create(
+                document_type=spec.type_key,
+                document_id=instance.pk,
+                **values,
+            )
+    except IntegrityError:
+        # Concurrent first index of the same document; the other writer won.
+        entries.update(updated_at=timezone.now(), **values)
+        return entries.first()
+
+
+def reindex(model, pk) -> None:
+    """Re-index one document by primary key (removes the entry if it is gone)."""
+    spec = _REGISTRY_BY_MODEL.get(model)
+    if spec is None:
+        return
+    queryset = model.objects.filter(pk=pk)
+    if spec.header_item_field:
+        queryset = queryset.select_related(spec.header_item_field)
+    instance = queryset.first()
+    if instance is None:
+        remove_document(spec.type_key, pk)
+    else:
+        index_document(instance)
+
+
+def rebuild_index(type_keys: Optional[Iterable[str]] = None, company_id=None, batch_size: int = 500) -> int:
+    """Re-index every registered document (optionally limited to types/company)."""
+    wanted = set(type_keys or ())
+    specs = [spec for key, spec in _REGISTRY.items() if not wanted or key in wanted]
+    total = 0
+    for spec in specs:
+        queryset = spec.model.objects.order_by('pk')
+        if company_id:
+            queryset = queryset.filter(company_id=company_id)
+        if spec.header_item_field:
+            queryset = queryset.select_related(spec.header_item_field)
+        for instance in queryset.iterator(chunk_size=batch_size):
+            index_document(instance)
+            total += 1
+    return total
+
+
+def _permission_filter(user, company_id) -> Optional[Q]:
+    """Limit results to types the user may view (documents they own only for view_own)."""
+    if user.is_superuser:
+        return Q(document_type__in=list(_REGISTRY))
+
+    from shared.utils.permissions import get_user_feature_permissions, has_feature_permission
+
+    permissions = get_user_feature_permissions(user, company_id)
+    view_all = []
+    view_own = []
+    for key, spec in _REGISTRY.items():
+        if has_feature_permission(permissions, spec.feature_code, 'view_all'):
+            view_all.append(key)
+        elif has_feature_permission(permissions, spec.feature_code, 'view_own'):
+            view_own.append(key)
+    if not view_all and not view_own:
+        return None
+    return Q(document_type__in=view_all) | Q(document_type__in=view_own, owner_id=user.pk)
+
+
+def _prefix_query(term: str) -> Optional[SearchQuery]:
+    tokens = _TOKEN_RE.findall(term)
+    if not tokens:
+        return None
+    raw = ' & '.join(f'{token}:*' for token in tokens)
+    return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_documents(
+    user,
+    company_id,
+    term: str,
+    *,
+    types: Optional[Iterable[str]] = None,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+) -> List[Dict[str, Any]]:
+    """
+    Search documents of a company by code, item code or item name.
+
+    Returns typed hits (``type``, ``label``, ``id``, ``code``, ``date``,
+    ``status``, ``is_locked``, ``url``, ``rank``) best match first. Runs one
+    query against ``DocumentSearchIndex`` (plus the permission lookup).
+    """
+    term = (term or '').strip()
+    if not term or not company_id:
+        return []
+    permission_q = _permission_filter(user, company_id)
+    if permission_q is None:
+        return []
+
+    queryset = DocumentSearchIndex.objects.filter(permission_q, company_id=company_id, is_enabled=1)
+    if types:
+        queryset = queryset.filter(document_type__in=list(types))
+
+    text_match = Q(search_text__contains=term.lower())
+    search_query = _prefix_query(term) if connection.vendor == 'postgresql' else None
+    if search_query is not None:
+        queryset = queryset.filter(Q(search_vector=search_query) | text_match).annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+        )
+        ordering = ('-rank', '-document_date', '-id')
+    else:
+        queryset = queryset.filter(text_match)
+        ordering = ('-document_date', '-id')
+
+    limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+    entries = queryset.order_by(*ordering).only(
+        'document_type', 'document_id', 'document_code', 'document_date', 'status', 'is_locked',
+    )[:limit]
+
+    hits = []
+    for entry in entries:
+        spec = _REGISTRY.get(entry.document_type)
+        if spec is None:
+            continue
+        try:
+            url = reverse(spec.url_name, args=[entry.document_id])
+        except NoReverseMatch:
+            url = ''
+        rank = getattr(entry, 'rank', None)
+        hits.append({
+            'type': spec.type_key,
+            'label': str(spec.label),
+            'id': entry.document_id,
+            'code': entry.document_code,
+            'date': entry.document_date.isoformat() if entry.document_date else None,
+            'status': entry.status,
+            'is_locked': bool(entry.is_locked),
+            'url': url,
+            'rank': round(float(rank), 4) if rank is not None else None,
+        })
+    return hits
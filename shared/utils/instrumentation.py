@@ -0,0 +1,209 @@
+"""
+Per-request query and latency instrumentation.
+
+``QueryRecorder`` is a database ``execute_wrapper`` that counts queries, sums
+SQL time and fingerprints statements so repeated queries (N+1 patterns) can
+be spotted. ``RequestMetrics`` keeps a rolling aggregate per view plus a ring
+buffer of the slowest recent requests; it lives in process memory, so each
+worker reports its own traffic.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from django.db import connections
+
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint_sql(sql: str) -> str:
+    """Normalise SQL so the same statement with other parameters compares equal."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` callable collecting query statistics."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint_sql(sql)] += 1
+
+    @property
+    def duplicates(self) -> Dict[str, int]:
+        """Fingerprints executed more than once, most repeated first."""
+        return {sql: count for sql, count in self.fingerprints.most_common() if count > 1}
+
+    @property
+    def duplicate_count(self) -> int:
+        """Number of queries that repeated an earlier fingerprint."""
+        return sum(count - 1 for count in self.fingerprints.values() if count > 1)
+
+
+@contextmanager
+def record_queries(using: Optional[List[str]] = None):
+    """Install a ``QueryRecorder`` on every (or the given) database connection."""
+    recorder = QueryRecorder()
+    aliases = using or list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+@dataclass
+class ViewStats:
+    """Rolling aggregate for one view (``METHOD view_name``)."""
+
+    key: str
+    requests: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    sql_ms: float = 0.0
+    queries: int = 0
+    max_queries: int = 0
+    duplicate_queries: int = 0
+    errors: int = 0
+    worst_duplicate: str = ''
+    worst_duplicate_count: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        requests = self.requests or 1
+        return {
+            'view': self.key,
+            'requests': self.requests,
+            'avg_ms': round(self.total_ms / requests, 2),
+            'max_ms': round(self.max_ms, 2),
+            'avg_sql_ms': round(self.sql_ms / requests, 2),
+            'avg_queries': round(self.queries / requests, 2),
+            'max_queries': self.max_queries,
+            'avg_duplicate_queries': round(self.duplicate_queries / requests, 2),
+            'errors': self.errors,
+            'worst_duplicate': self.worst_duplicate,
+            'worst_duplicate_count': self.worst_duplicate_count,
+        }
+
+
+@dataclass
+class RequestSample:
+    """One recorded request kept in the slow-request ring buffer."""
+
+    key: str
+    path: str
+    status: int
+    total_ms: float
+    sql_ms: float
+    queries: int
+    duplicate_queries: int
+    recorded_at: float = field(default_factory=time.time)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'view': self.key,
+            'path': self.path,
+            'status': self.status,
+            'total_ms': round(self.total_ms, 2),
+            'sql_ms': round(self.sql_ms, 2),
+            'queries': self.queries,
+            'duplicate_queries': self.duplicate_queries,
+            'recorded_at': self.recorded_at,
+        }
+
+
+REPORT_SORT_KEYS = ('avg_ms', 'max_ms', 'avg_queries', 'max_queries', 'avg_duplicate_queries', 'requests')
+
+
+class RequestMetrics:
+    """Thread-safe in-process store of per-view statistics."""
+
+    def __init__(self, recent_size: int = 200):
+        self._lock = threading.Lock()
+        self._views: Dict[str, ViewStats] = {}
+        self._recent: Deque[RequestSample] = deque(maxlen=recent_size)
+        self.started_at = time.time()
+
+    def record(self, key: str, path: str, status: int, total: float, recorder: QueryRecorder) -> None:
+        total_ms = total * 1000
+        sql_ms = recorder.duration * 1000
+        duplicates = recorder.duplicates
+        with self._lock:
+            stats = self._views.get(key)
+            if stats is None:
+                stats = self._views[key] = ViewStats(key=key)
+            stats.requests += 1
+            stats.total_ms += total_ms
+            stats.max_ms = max(stats.max_ms, total_ms)
+            stats.sql_ms += sql_ms
+            stats.queries += recorder.count
+            stats.max_queries = max(stats.max_queries, recorder.count)
+            stats.duplicate_queries += recorder.duplicate_count
+            if status >= 500:
+                stats.errors += 1
+            if duplicates:
+                sql, count = next(iter(duplicates.items()))
+                if count > stats.worst_duplicate_count:
+                    stats.worst_duplicate, stats.worst_duplicate_count = sql, count
+            self._recent.append(RequestSample(
+                key=key,
+                path=path,
+                status=status,
+                total_ms=total_ms,
+                sql_ms=sql_ms,
+                queries=recorder.count,
+                duplicate_queries=recorder.duplicate_count,
+            ))
+
+    def report(self, sort: str = 'avg_ms', limit: int = 25) -> Dict[str, Any]:
+        """Return the worst views by ``sort`` and the slowest recent requests."""
+        if sort not in REPORT_SORT_KEYS:
+            sort = 'avg_ms'
+        with self._lock:
+            views = [stats.as_dict() for stats in self._views.values()]
+            recent = [sample.as_dict() for sample in self._recent]
+        views.sort(key=lambda row: row[sort], reverse=True)
+        recent.sort(key=lambda row: row['total_ms'], reverse=True)
+        return {
+            'since': self.started_at,
+            'sort': sort,
+            'views': views[:limit],
+            'slowest_requests': recent[:limit],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._views.clear()
+            self._recent.clear()
+            self.started_at = time.time()
+
+
+metrics = RequestMetrics()
+
+
+def server_timing_header(total: float, recorder: QueryRecorder) -> str:
+    """Build a ``Server-Timing`` value with SQL and total durations (ms)."""
+    return (
+        f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+        f'app;dur={total * 1000:.1f}'
+    )
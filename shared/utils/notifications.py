@@ -149,3 +149,24 @@ def get_recent_notifications(user, company_id: Optional[int], limit: int = 10) -
     
     return notifications
 
+
+
+SENT_EMAIL_SESSION_KEY = 'sent_email_notifications'
+
+
+def get_sent_email_notifications(session) -> set:
+    """
+    Return notification keys that already triggered an email in this session.
+
+    Stored in the session (shared by every worker) as a list; reading it
+    does not mark the session modified.
+    """
+    return set(session.get(SENT_EMAIL_SESSION_KEY) or ())
+
+
+def mark_email_notification_sent(session, notification_key: str) -> None:
+    """Remember that an email was sent for ``notification_key`` (writes the session only then)."""
+    sent = get_sent_email_notifications(session)
+    if notification_key not in sent:
+        sent.add(notification_key)
+        session[SENT_EMAIL_SESSION_KEY] = sorted(sent)
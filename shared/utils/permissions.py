@@ -4,17 +4,35 @@ from __future__ import annotations
 
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, Iterable, Mapping, Optional, Set
+from typing import Any, Dict, Iterable, Mapping, Optional, Set
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Prefetch
+from django.utils import timezone
 
 from shared.models import AccessLevel, AccessLevelPermission, GroupProfile, UserCompanyAccess
 from shared.permissions import FEATURE_PERMISSION_MAP
+from shared.utils.cache import is_shared_cache
 
 
 User = get_user_model()
 
+CACHE_PREFIX = "shared:feature-permissions"
+_VERSION_KEY = f"{CACHE_PREFIX}:version"
+PERMISSION_VALUE_FIELDS = (
+    "module_code",
+    "resource_type",
+    "can_view",
+    "can_create",
+    "can_edit",
+    "can_delete",
+    "can_approve",
+    "metadata",
+)
+
 
 @dataclass(frozen=True)
 class FeaturePermissionState:
@@ -152,6 +170,50 @@ def _resolve_feature_permissions(access_level_ids: Iterable[int]) -> Dict[str, F
     return resolved
 
 
+def get_feature_permission_version() -> int:
+    """Return the current version of cached permission matrices (created on first use)."""
+
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, 1, None)
+        version = cache.get(_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_feature_permissions(**kwargs) -> None:
+    """Make every cached permission matrix stale (usable as a signal receiver)."""
+
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 2, None)
+
+
+def invalidate_feature_permissions_on_commit() -> None:
+    transaction.on_commit(invalidate_feature_permissions)
+
+
+def _cached_feature_permissions(access_level_ids: Set[int]) -> Dict[str, FeaturePermissionState]:
+    """Resolve (and cache) the merged matrix of a set of access levels.
+
+    Matrices are only cached on a cache shared by all workers: with a
+    per-process cache a revoked permission would stay granted on every other
+    worker until the TTL expires.
+    """
+
+    if not access_level_ids:
+        return {}
+    if not is_shared_cache():
+        return _resolve_feature_permissions(access_level_ids)
+    level_key = ",".join(str(pk) for pk in sorted(access_level_ids))
+    key = f"{CACHE_PREFIX}:v{get_feature_permission_version()}:{level_key}"
+    resolved = cache.get(key)
+    if resolved is None:
+        resolved = _resolve_feature_permissions(access_level_ids)
+        cache.set(key, resolved, getattr(settings, "FEATURE_PERMISSION_CACHE_TIMEOUT", 300))
+    return resolved
+
+
 def get_user_feature_permissions(user: User, company_id: Optional[int]) -> Dict[str, FeaturePermissionState]:
     """Public helper to resolve feature permissions for templates and views."""
 
@@ -169,7 +231,7 @@ def get_user_feature_permissions(user: User, company_id: Optional[int]) -> Dict[
         }
 
     level_ids = _collect_access_level_ids_for_user(user, company_id)
-    return _resolve_feature_permissions(level_ids)
+    return _cached_feature_permissions(level_ids)
 
 
 def has_feature_permission(
@@ -208,3 +270,110 @@ def has_feature_permission(
         return state.view_scope in {"own", "all"}
 
     return False
+
+
+def permission_rows_from_post(data: Mapping[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Translate the access-level editor matrix into ``AccessLevelPermission`` values.
+
+    ``data`` holds ``perm-<feature>-view`` (``none``/``own``/``all``) and one
+    ``perm-<feature>-<action>`` checkbox per action. Returns field values keyed
+    by feature code; features with no view scope and no action are omitted.
+    """
+
+    from shared.permissions import PermissionAction
+
+    view_actions = {PermissionAction.VIEW_OWN, PermissionAction.VIEW_ALL}
+    rows: Dict[str, Dict[str, Any]] = {}
+    for feature in FEATURE_PERMISSION_MAP.values():
+        html_key = _feature_key(feature.code)
+        view_scope = data.get(f"perm-{html_key}-view", "none")
+        selected = {
+            action
+            for action in feature.actions
+            if action not in view_actions and data.get(f"perm-{html_key}-{action.value}") == "on"
+        }
+        if view_scope == "none" and not selected:
+            continue
+
+        metadata_actions: Dict[str, Any] = {
+            "view_scope": view_scope,
+            PermissionAction.VIEW_OWN.value: view_scope in {"own", "all"},
+            PermissionAction.VIEW_ALL.value: view_scope == "all",
+        }
+        for action in feature.actions:
+            if action not in view_actions:
+                metadata_actions[action.value] = action in selected
+        rows[feature.code] = {
+            "module_code": feature.code.split(".")[0],
+            "resource_type": "menu",
+            "can_view": 1 if view_scope != "none" else 0,
+            "can_create": 1 if PermissionAction.CREATE in selected else 0,
+            "can_edit": 1 if PermissionAction.EDIT_OWN in selected else 0,
+            "can_delete": 1 if PermissionAction.DELETE_OWN in selected else 0,
+            "can_approve": 1 if PermissionAction.APPROVE in selected else 0,
+            "metadata": {"actions": metadata_actions},
+        }
+    return rows
+
+
+def sync_access_level_permissions(
+    access_level_ids: Iterable[int],
+    rows: Mapping[str, Mapping[str, Any]],
+    user: Optional[User] = None,
+) -> Dict[str, int]:
+    """
+    Make the permissions of every given access level equal ``rows``.
+
+    Existing rows of all levels are read with one query and diffed in memory;
+    changes are written with at most one ``bulk_create``, one ``bulk_update``
+    and one ``DELETE``, and cached permission matrices are invalidated once
+    after commit. Returns ``created`` / ``updated`` / ``deleted`` counts.
+    """
+
+    level_ids = sorted({int(pk) for pk in access_level_ids})
+    existing: Dict[tuple, AccessLevelPermission] = {}
+    stale: list = []
+    for perm in AccessLevelPermission.objects.filter(access_level_id__in=level_ids).order_by("pk"):
+        key = (perm.access_level_id, perm.resource_code)
+        if perm.resource_code not in rows or key in existing:
+            stale.append(perm.pk)
+        else:
+            existing[key] = perm
+
+    now = timezone.now()
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    to_create: list = []
+    to_update: list = []
+    for level_id in level_ids:
+        for code, values in rows.items():
+            perm = existing.get((level_id, code))
+            if perm is None:
+                to_create.append(
+                    AccessLevelPermission(
+                        access_level_id=level_id,
+                        resource_code=code,
+                        created_by_id=user_id,
+                        edited_by_id=user_id,
+                        **values,
+                    )
+                )
+            elif any(getattr(perm, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(perm, name, value)
+                perm.edited_at = now
+                perm.edited_by_id = user_id
+                to_update.append(perm)
+
+    if stale or to_create or to_update:
+        with transaction.atomic():
+            if stale:
+                AccessLevelPermission.objects.filter(pk__in=stale).delete()
+            if to_create:
+                AccessLevelPermission.objects.bulk_create(to_create)
+            if to_update:
+                AccessLevelPermission.objects.bulk_update(
+                    to_update, [*PERMISSION_VALUE_FIELDS, "edited_at", "edited_by"],
+                )
+            invalidate_feature_permissions_on_commit()
+    return {"created": len(to_create), "updated": len(to_update), "deleted": len(stale)}
@@ -57,9 +57,31 @@ class AccessLevelCreateView(FeaturePermissionRequiredMixin, AccessLevelPermissio
         context['active_module'] = 'shared'
         context['page_title'] = _('Create Access Level')
         context['is_create'] = True
-        context['feature_permissions'] = self._prepare_feature_context()
+        context['copy_from'] = self.get_copy_source()
+        context['feature_permissions'] = self._prepare_feature_context(context['copy_from'])
+        context['other_access_levels'] = self._other_access_levels()
         return context
 
+    def get_copy_source(self) -> Optional[AccessLevel]:
+        """Access level to clone (``?copy_from=<pk>``): its permissions pre-fill the matrix."""
+        copy_from = self.request.GET.get('copy_from', '')
+        if not copy_from.isdigit():
+            return None
+        return AccessLevel.objects.prefetch_related('permissions').filter(pk=int(copy_from)).first()
+
+    def get_initial(self) -> Dict[str, Any]:
+        """Pre-fill name/description/flags when cloning."""
+        initial = super().get_initial()
+        source = self.get_copy_source()
+        if source is not None:
+            initial.update({
+                'name': _('%(name)s (copy)') % {'name': source.name},
+                'description': source.description,
+                'is_enabled': source.is_enabled,
+                'is_global': source.is_global,
+            })
+        return initial
+
     def form_valid(self, form: AccessLevelForm) -> Any:
         """Save access level and permissions."""
         response = super().form_valid(form)
@@ -86,6 +108,7 @@ class AccessLevelUpdateView(EditLockProtectedMixin, FeaturePermissionRequiredMix
         context['page_title'] = _('Edit Access Level')
         context['is_create'] = False
         context['feature_permissions'] = self._prepare_feature_context(self.object)
+        context['other_access_levels'] = self._other_access_levels()
         return context
 
     def form_valid(self, form: AccessLevelForm) -> Any:
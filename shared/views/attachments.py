@@ -0,0 +1,166 @@
+"""
+Chunked attachment upload and streaming download endpoints.
+
+Protocol (all JSON):
+
+1. ``POST uploads/`` with ``file_name`` and ``size`` (the MIME type is taken
+   from the file name) → ``{"upload_id", "offset": 0, "chunk_size"}``
+2. ``PATCH uploads/<id>/`` with the raw chunk as body and ``Upload-Offset``
+   header → ``{"offset"}``; ``GET uploads/<id>/`` returns the current offset
+   to resume after a failure, ``DELETE`` aborts
+3. ``POST uploads/<id>/complete/`` with ``target`` and ``object_id``
+   → ``{"deduplicated", "attachment"}``
+
+Downloads: ``GET attachments/<target>/<object_id>/<sha256>/`` (``?inline=1``
+to display images and PDFs, ``Range`` supported) and ``.../thumbnail/``.
+"""
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views import View
+
+from shared.models import StoredFile, UploadSession
+from shared.utils.attachments import (
+    AttachmentError,
+    AttachmentPermissionError,
+    UploadOffsetError,
+    abort_upload,
+    append_chunk,
+    attachment_response,
+    attachment_storage,
+    complete_upload,
+    find_attachment,
+    get_attachment_target,
+    max_chunk_size,
+    start_upload,
+)
+
+
+def _error(exc: AttachmentError) -> JsonResponse:
+    payload = {'error': str(exc)}
+    if isinstance(exc, UploadOffsetError):
+        payload['offset'] = exc.expected
+    return JsonResponse(payload, status=exc.status)
+
+
+def _session_payload(session: UploadSession) -> dict:
+    return {
+        'upload_id': str(session.pk),
+        'file_name': session.file_name,
+        'size': session.total_size,
+        'offset': session.received_size,
+        'status': session.status,
+        'chunk_size': max_chunk_size(),
+    }
+
+
+def _resolve_target(request, target_key, object_id, action):
+    """Return ``(target, instance)`` of the active company, or raise 404/permission error."""
+    target = get_attachment_target(target_key or '')
+    company_id = request.session.get('active_company_id')
+    if target is None or not company_id:
+        raise Http404
+    instance = target.model.objects.filter(pk=object_id, company_id=company_id).first()
+    if instance is None:
+        raise Http404
+    if not target.allowed(request.user, company_id, instance, action):
+        raise AttachmentPermissionError('You do not have permission for this attachment')
+    return target, instance
+
+
+class UploadStartView(LoginRequiredMixin, View):
+    """Open a resumable upload."""
+
+    def post(self, request, *args, **kwargs):
+        try:
+            size = int(request.POST.get('size', ''))
+        except ValueError:
+            return JsonResponse({'error': 'size is required'}, status=400)
+        try:
+            session = start_upload(
+                request.user,
+                request.session.get('active_company_id'),
+                request.POST.get('file_name', ''),
+                size,
+            )
+        except AttachmentError as exc:
+            return _error(exc)
+        return JsonResponse(_session_payload(session), status=201)
+
+
+class UploadSessionView(LoginRequiredMixin, View):
+    """Status (GET), chunk append (PATCH) and abort (DELETE) of one upload."""
+
+    def get_session(self):
+        return get_object_or_404(UploadSession, pk=self.kwargs['upload_id'], user=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(_session_payload(self.get_session()))
+
+    def patch(self, request, *args, **kwargs):
+        session = self.get_session()
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return JsonResponse({'error': 'Upload-Offset header is required'}, status=400)
+        try:
+            # The body is read from the request stream block by block
+            new_offset = append_chunk(session, offset, request, length)
+        except AttachmentError as exc:
+            return _error(exc)
+        return JsonResponse({'upload_id': str(session.pk), 'offset': new_offset})
+
+    put = patch
+
+    def delete(self, request, *args, **kwargs):
+        session = self.get_session()
+        abort_upload(session)
+        return JsonResponse(_session_payload(session))
+
+
+class UploadCompleteView(LoginRequiredMixin, View):
+    """Finish an upload (hash + dedup) and attach it to a registered target object."""
+
+    def post(self, request, *args, **kwargs):
+        session = get_object_or_404(UploadSession, pk=kwargs['upload_id'], user=request.user)
+        try:
+            target, instance = _resolve_target(
+                request, request.POST.get('target'), request.POST.get('object_id'), 'attach',
+            )
+            stored, created = complete_upload(session)
+        except AttachmentError as exc:
+            return _error(exc)
+        except (ValueError, TypeError):
+            raise Http404
+        entry = target.attach(instance, stored, session.file_name, request.user)
+        return JsonResponse({'deduplicated': not created, 'attachment': entry}, status=201)
+
+
+class AttachmentDownloadView(LoginRequiredMixin, View):
+    """Stream an attachment (or its thumbnail) of an object the user may view."""
+
+    thumbnail = False
+
+    def get(self, request, *args, **kwargs):
+        try:
+            target, instance = _resolve_target(request, kwargs['target'], kwargs['object_id'], 'view')
+        except AttachmentError as exc:
+            return _error(exc)
+        entry = find_attachment(target, instance, kwargs['sha256'])
+        if entry is None:
+            raise Http404
+        stored = get_object_or_404(StoredFile, sha256=kwargs['sha256'])
+        if self.thumbnail:
+            if stored.thumbnail_status != 'ready':
+                raise Http404
+            thumbnail = StoredFile(
+                sha256=f'{stored.sha256}-thumb',
+                size=attachment_storage.size(stored.thumbnail_name),
+                mime_type='image/png',
+                storage_name=stored.thumbnail_name,
+            )
+            return attachment_response(request, thumbnail, f'{entry["file_name"]}.png', as_attachment=False)
+        return attachment_response(
+            request, stored, entry['file_name'], as_attachment=request.GET.get('inline') != '1',
+        )
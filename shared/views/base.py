@@ -169,57 +169,30 @@ class AccessLevelPermissionMixin:
         
         return module_list
 
-    def _save_permissions(self, form: Any) -> None:
-        """Save permissions from form POST data."""
-        from shared.permissions import FEATURE_PERMISSION_MAP, PermissionAction
-        
-        active_codes: Set[str] = set()
-        for feature in FEATURE_PERMISSION_MAP.values():
-            code: str = feature.code
-            html_key: str = self._feature_key(code)
-            view_scope: str = self.request.POST.get(f'perm-{html_key}-view', 'none')
-            selected_actions: list = []
-            for action in feature.actions:
-                if action in {PermissionAction.VIEW_OWN, PermissionAction.VIEW_ALL}:
-                    continue
-                if self.request.POST.get(f'perm-{html_key}-{action.value}') == 'on':
-                    selected_actions.append(action)
+    def _other_access_levels(self) -> list:
+        """Access levels offered as extra targets of the same permission matrix."""
+        from shared.models import AccessLevel
 
-            if view_scope == 'none' and not selected_actions:
-                # Remove existing permission if it exists
-                self.object.permissions.filter(resource_code=code).delete()
-                continue
+        queryset = AccessLevel.objects.order_by('code').only('pk', 'code', 'name')
+        if getattr(self, 'object', None) is not None and self.object.pk:
+            queryset = queryset.exclude(pk=self.object.pk)
+        return list(queryset)
 
-            perm, _created = self.object.permissions.get_or_create(
-                resource_code=code,
-                defaults={
-                    'module_code': code.split('.')[0],
-                    'resource_type': 'menu',
-                },
-            )
-            perm.module_code = code.split('.')[0]
-            perm.resource_type = 'menu'
-            perm.can_view = 1 if view_scope != 'none' else 0
-            perm.can_create = 1 if PermissionAction.CREATE in selected_actions else 0
-            perm.can_edit = 1 if PermissionAction.EDIT_OWN in selected_actions else 0
-            perm.can_delete = 1 if PermissionAction.DELETE_OWN in selected_actions else 0
-            perm.can_approve = 1 if PermissionAction.APPROVE in selected_actions else 0
+    def _save_permissions(self, form: Any) -> None:
+        """
+        Save permissions from form POST data.
 
-            metadata_actions: Dict[str, Any] = {
-                'view_scope': view_scope,
-                PermissionAction.VIEW_OWN.value: view_scope in {'own', 'all'},
-                PermissionAction.VIEW_ALL.value: view_scope == 'all',
-            }
-            for action in feature.actions:
-                if action in {PermissionAction.VIEW_OWN, PermissionAction.VIEW_ALL}:
-                    continue
-                metadata_actions[action.value] = action in selected_actions
-            perm.metadata = {'actions': metadata_actions}
-            perm.save()
-            active_codes.add(code)
+        The same matrix is also applied to the access levels selected in
+        ``apply_to`` (batch editing); all levels are synced together.
+        """
+        from shared.utils.permissions import permission_rows_from_post, sync_access_level_permissions
 
-        # Remove stale permissions not present anymore
-        self.object.permissions.exclude(resource_code__in=active_codes).delete()
+        level_ids = {self.object.pk}
+        for value in self.request.POST.getlist('apply_to'):
+            if value.isdigit():
+                level_ids.add(int(value))
+        rows = permission_rows_from_post(self.request.POST)
+        sync_access_level_permissions(level_ids, rows, self.request.user)
 
 
 class EditLockProtectedMixin:
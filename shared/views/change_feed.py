@@ -0,0 +1,68 @@
+"""
+Long-poll endpoint of the change feed (``/api/v1/changes/``).
+
+See ``shared.utils.change_feed`` for how events are recorded.
+"""
+from __future__ import annotations
+
+from django.conf import settings
+from rest_framework import exceptions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from shared.api import FeaturePermission, get_api_company_id
+from shared.utils import change_feed
+from shared.utils.permissions import get_user_feature_permissions, has_feature_permission
+
+
+def _int_param(request, name: str, default: int) -> int:
+    raw = request.query_params.get(name)
+    if raw in (None, ''):
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise exceptions.ValidationError({name: 'Expected an integer.'})
+
+
+class ChangeFeedView(APIView):
+    """
+    Events of the request's company after ``?after=<sequence>``, oldest first.
+
+    ``?wait=<seconds>`` holds the request open (up to ``CHANGE_FEED_MAX_WAIT``)
+    until an event is available, when a long-poll slot is free (see
+    ``change_feed.long_poll_slot``); ``?entity_type=a,b`` narrows the types.
+    Only entity types whose feature the user can view in full (``view_all``)
+    are returned: events carry no owner, so a ``view_own`` scope cannot be
+    applied to them. The response's ``last_sequence`` is the ``after`` of the
+    next call.
+    """
+
+    permission_classes = [FeaturePermission]
+
+    def get(self, request):
+        company_id = get_api_company_id(request)
+        after = _int_param(request, 'after', 0)
+        limit = _int_param(request, 'limit', change_feed.DEFAULT_READ_LIMIT)
+        wait = max(0, min(_int_param(request, 'wait', 0), getattr(settings, 'CHANGE_FEED_MAX_WAIT', 25)))
+
+        entities = change_feed.get_registered_entities()
+        if not request.user.is_superuser:
+            permissions = get_user_feature_permissions(request.user, company_id)
+            entities = [
+                entity for entity in entities
+                if has_feature_permission(permissions, entity.feature_code, 'view_all')
+            ]
+        entity_types = {entity.entity_type for entity in entities}
+        requested = request.query_params.get('entity_type')
+        if requested:
+            entity_types &= {value.strip() for value in requested.split(',')}
+
+        events = []
+        if entity_types:
+            with change_feed.long_poll_slot(wait) as wait:
+                events = change_feed.wait_for_changes(company_id, after, limit, entity_types, timeout=wait)
+        return Response({
+            'events': [change_feed.serialize_event(event) for event in events],
+            'last_sequence': events[-1].sequence if events else after,
+        })
@@ -0,0 +1,47 @@
+"""
+Staff-only report of request instrumentation (worst endpoints).
+"""
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.utils.translation import gettext_lazy as _
+from django.views.generic import TemplateView
+
+from shared.utils.instrumentation import REPORT_SORT_KEYS, metrics
+
+
+class InstrumentationReportView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """
+    Worst views by latency / query count recorded by ``QueryInstrumentationMiddleware``.
+
+    ``?format=json`` returns the raw report; ``?sort=`` picks the ranking
+    column and ``?limit=`` the number of rows. POST resets the statistics.
+    """
+
+    template_name = 'shared/instrumentation_report.html'
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get_report(self):
+        try:
+            limit = max(1, min(int(self.request.GET.get('limit', 25)), 200))
+        except ValueError:
+            limit = 25
+        return metrics.report(sort=self.request.GET.get('sort', 'avg_ms'), limit=limit)
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('format') == 'json':
+            return JsonResponse(self.get_report())
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        metrics.reset()
+        return redirect('shared:instrumentation_report')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = _('Request Instrumentation')
+        context['report'] = self.get_report()
+        context['sort_keys'] = REPORT_SORT_KEYS
+        return context
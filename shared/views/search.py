@@ -0,0 +1,35 @@
+"""
+Global document search endpoint.
+"""
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.views import View
+
+from shared.utils.document_search import DEFAULT_SEARCH_LIMIT, search_documents
+
+
+class DocumentSearchView(LoginRequiredMixin, View):
+    """
+    JSON search over every registered document type of the active company.
+
+    Query parameters: ``q`` (document code, item code or item name),
+    optional repeated ``type`` to restrict document types and ``limit``.
+    """
+
+    def get(self, request, *args, **kwargs):
+        term = request.GET.get('q', '').strip()
+        company_id = request.session.get('active_company_id')
+        if not company_id:
+            return JsonResponse({'error': 'No active company'}, status=400)
+        try:
+            limit = int(request.GET.get('limit', DEFAULT_SEARCH_LIMIT))
+        except ValueError:
+            limit = DEFAULT_SEARCH_LIMIT
+        results = search_documents(
+            request.user,
+            company_id,
+            term,
+            types=request.GET.getlist('type') or None,
+            limit=limit,
+        )
+        return JsonResponse({'query': term, 'results': results})
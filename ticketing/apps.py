@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TicketingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ticketing'
+
+    def ready(self):
+        from . import attachments, signals
+
+        signals.connect_signals()
+        attachments.register_targets()
@@ -0,0 +1,39 @@
+"""
+Attachment target registration for tickets.
+
+See ``shared.utils.attachments`` for upload, deduplication and download.
+"""
+from shared.utils.attachments import describe, register_attachment_target
+
+from . import models
+from .utils.permissions import get_ticket_template_access
+
+
+def _attach(ticket, stored, file_name, user):
+    attachment = models.TicketAttachment.objects.create(
+        company_id=ticket.company_id,
+        company_code=ticket.company_code,
+        ticket=ticket,
+        file_name=file_name,
+        file_path=stored.storage_name,
+        file_size=stored.size,
+        mime_type=stored.mime_type,
+        stored_file=stored,
+        uploaded_by=user,
+    )
+    return describe(stored, file_name, attachment_id=attachment.pk)
+
+
+def _files(ticket):
+    attachments = ticket.file_attachments.filter(stored_file__isnull=False).select_related("stored_file")
+    return [describe(item.stored_file, item.file_name, attachment_id=item.pk) for item in attachments]
+
+
+def _allowed(user, company_id, ticket, action):
+    if user.is_superuser or user.pk in (ticket.reported_by_id, ticket.assigned_to_id):
+        return True
+    return get_ticket_template_access(user, company_id).can("respond", ticket.template_id)
+
+
+def register_targets():
+    register_attachment_target(models.Ticket, "ticketing.ticket", attach=_attach, files=_files, allowed=_allowed)
@@ -0,0 +1,35 @@
+"""
+Management command to flag ticket SLA breaches.
+"""
+from django.core.management.base import BaseCommand
+
+from ticketing.utils.sla import recompute_open_tickets, sweep_sla_breaches
+
+
+class Command(BaseCommand):
+    help = 'Flag tickets whose response/resolution SLA deadline has passed and notify assignees'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Tickets locked and updated per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--recompute',
+            action='store_true',
+            help='Recompute deadlines of all open tickets first (after changing priority SLA hours)',
+        )
+        parser.add_argument('--company', type=int, help='Limit --recompute to this company ID')
+
+    def handle(self, *args, **options):
+        if options['recompute']:
+            updated = recompute_open_tickets(options['company'])
+            self.stdout.write(f'Recomputed SLA deadlines of {updated} open tickets.')
+
+        flagged = sweep_sla_breaches(batch_size=options['batch_size'])
+        if flagged:
+            self.stdout.write(self.style.WARNING(f'Flagged {flagged} SLA breaches.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No new SLA breaches.'))
@@ -0,0 +1,125 @@
+# Generated by Django 4.2 on 2026-10-18 23:10
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Frozen copy of ticketing.utils.sla as of this migration; later changes to
+# the SLA engine must not change what this backfill computes.
+OPEN_STATUSES = ('open', 'in_progress', 'assigned', 'pending')
+SLA_FIELDS = (
+    'response_due_at',
+    'resolution_due_at',
+    'response_breached_at',
+    'resolution_breached_at',
+    'sla_due_at',
+    'sla_check_at',
+)
+STATUS_FIELDS = ('assigned_at', 'resolved_at', 'closed_at')
+
+
+def _due(start, hours):
+    return start + timedelta(hours=hours) if start and hours else None
+
+
+def _apply_open_ticket_sla(ticket, now):
+    # Only open tickets are backfilled, so the resolved/closed branches drop out
+    if ticket.assigned_to_id and ticket.assigned_at is None:
+        ticket.assigned_at = now
+    ticket.resolved_at = None
+    ticket.closed_at = None
+
+    priority = ticket.priority
+    ticket.response_due_at = _due(ticket.opened_at, priority.sla_hours)
+    ticket.resolution_due_at = _due(ticket.opened_at, priority.resolution_sla_hours)
+    if (
+        ticket.response_due_at and ticket.first_response_at
+        and ticket.first_response_at > ticket.response_due_at and ticket.response_breached_at is None
+    ):
+        ticket.response_breached_at = ticket.first_response_at
+
+    if ticket.first_response_at is None and ticket.response_due_at:
+        ticket.sla_due_at = ticket.response_due_at
+    else:
+        ticket.sla_due_at = ticket.resolution_due_at
+    pending = []
+    if ticket.response_due_at and ticket.first_response_at is None and ticket.response_breached_at is None:
+        pending.append(ticket.response_due_at)
+    if ticket.resolution_due_at and ticket.resolution_breached_at is None:
+        pending.append(ticket.resolution_due_at)
+    ticket.sla_check_at = min(pending) if pending else None
+
+
+def backfill_sla(apps, schema_editor):
+    Ticket = apps.get_model('ticketing', 'Ticket')
+    now = timezone.now()
+    batch = []
+    tickets = Ticket.objects.filter(status__in=OPEN_STATUSES, priority__isnull=False).select_related('priority')
+    for ticket in tickets.iterator(chunk_size=2000):
+        _apply_open_ticket_sla(ticket, now)
+        batch.append(ticket)
+        if len(batch) >= 2000:
+            Ticket.objects.bulk_update(batch, SLA_FIELDS + STATUS_FIELDS)
+            batch = []
+    if batch:
+        Ticket.objects.bulk_update(batch, SLA_FIELDS + STATUS_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0004_ticketattachment_editing_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='resolution_breached_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Resolution Breached At'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='resolution_due_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='opened_at + priority resolution SLA', null=True, verbose_name='Resolution Due At'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='response_breached_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Response Breached At'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='response_due_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='opened_at + priority response SLA', null=True, verbose_name='Response Due At'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='sla_check_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Earliest deadline not yet met or flagged; scanned by the SLA sweeper', null=True, verbose_name='SLA Check At'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='sla_due_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Current deadline (response until first response, then resolution); queue urgency', null=True, verbose_name='SLA Due At'),
+        ),
+        migrations.AddField(
+            model_name='ticketpriority',
+            name='resolution_sla_hours',
+            field=models.IntegerField(blank=True, help_text='Service Level Agreement hours for resolution time', null=True, verbose_name='Resolution SLA Hours'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ('open', 'in_progress', 'assigned', 'pending'))), fields=['company', 'assigned_to', 'sla_due_at', 'id'], name='tkt_queue_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ('open', 'in_progress', 'assigned', 'pending'))), fields=['company', 'sla_due_at', 'id'], name='tkt_queue_company_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('sla_check_at__isnull', False)), fields=['sla_check_at'], name='tkt_sla_check_idx'),
+        ),
+        migrations.RunPython(backfill_sla, migrations.RunPython.noop),
+    ]
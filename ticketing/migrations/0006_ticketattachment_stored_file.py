@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-18 23:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shared', '0016_attachment_storage'),
+        ('ticketing', '0005_ticket_sla'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketattachment',
+            name='stored_file',
+            field=models.ForeignKey(blank=True, help_text='Content-addressed blob (deduplicated by SHA-256)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ticket_attachments', to='shared.storedfile', verbose_name='Stored File'),
+        ),
+    ]
@@ -27,6 +27,7 @@ from shared.models import (
 )
 
 from .utils.codes import generate_sequential_code, generate_template_code, generate_ticket_code
+from .utils.sla import OPEN_STATUSES, apply_ticket_sla
 
 
 # Base model for ticketing
@@ -155,6 +156,12 @@ class TicketPriority(TicketingSortableModel):
         verbose_name=_("SLA Hours"),
         help_text=_("Service Level Agreement hours for response time"),
     )
+    resolution_sla_hours = models.IntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("Resolution SLA Hours"),
+        help_text=_("Service Level Agreement hours for resolution time"),
+    )
 
     class Meta:
         verbose_name = _("Ticket Priority")
@@ -998,6 +1005,46 @@ class Ticket(TicketingBaseModel, LockableModel):
         related_name="closed_tickets",
         verbose_name=_("Closed By"),
     )
+    response_due_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("Response Due At"),
+        help_text=_("opened_at + priority response SLA"),
+    )
+    resolution_due_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("Resolution Due At"),
+        help_text=_("opened_at + priority resolution SLA"),
+    )
+    response_breached_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("Response Breached At"),
+    )
+    resolution_breached_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("Resolution Breached At"),
+    )
+    sla_due_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("SLA Due At"),
+        help_text=_("Current deadline (response until first response, then resolution); queue urgency"),
+    )
+    sla_check_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("SLA Check At"),
+        help_text=_("Earliest deadline not yet met or flagged; scanned by the SLA sweeper"),
+    )
     resolution_notes = models.TextField(
         blank=True,
         verbose_name=_("Resolution Notes"),
@@ -1059,6 +1106,23 @@ class Ticket(TicketingBaseModel, LockableModel):
                 fields=["related_entity_type", "related_entity_id"],
                 name="tkt_related_entity_idx",
             ),
+            # Agent queues: open tickets by urgency, keyset-paginated
+            models.Index(
+                fields=["company", "assigned_to", "sla_due_at", "id"],
+                name="tkt_queue_assignee_idx",
+                condition=models.Q(status__in=OPEN_STATUSES),
+            ),
+            models.Index(
+                fields=["company", "sla_due_at", "id"],
+                name="tkt_queue_company_idx",
+                condition=models.Q(status__in=OPEN_STATUSES),
+            ),
+            # SLA sweeper range scan (sla_check_at <= now)
+            models.Index(
+                fields=["sla_check_at"],
+                name="tkt_sla_check_idx",
+                condition=models.Q(sla_check_at__isnull=False),
+            ),
         ]
         ordering = ("-created_at",)
 
@@ -1079,6 +1143,9 @@ class Ticket(TicketingBaseModel, LockableModel):
             self.reported_by_username = self.reported_by.username
         if self.assigned_to and not self.assigned_to_username:
             self.assigned_to_username = self.assigned_to.username
+        changed = apply_ticket_sla(self)
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | changed
         super().save(*args, **kwargs)
 
 
@@ -1266,6 +1333,15 @@ class TicketAttachment(TicketingBaseModel):
         blank=True,
         verbose_name=_("MIME Type"),
     )
+    stored_file = models.ForeignKey(
+        "shared.StoredFile",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="ticket_attachments",
+        verbose_name=_("Stored File"),
+        help_text=_("Content-addressed blob (deduplicated by SHA-256)"),
+    )
     uploaded_by = models.ForeignKey(
         User,
         on_delete=models.PROTECT,
@@ -0,0 +1,89 @@
+"""
+Signal handlers for the ticketing module.
+
+Changes to template/category permissions, templates, categories or a user's
+group membership make the cached ticket template permissions stale once the
+transaction commits; changes to a template's fields, options or events make
+its compiled schema stale. The first public comment by someone other than
+the reporter records the ticket's first response for the SLA engine.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .utils.permissions import invalidate_ticket_permissions
+from .utils.schema import invalidate_template_schema_on_commit
+from .utils.sla import record_first_response
+from . import models
+
+
+PERMISSION_CACHE_MODELS = (
+    models.TicketTemplatePermission,
+    models.TicketCategoryPermission,
+    models.TicketTemplate,
+    models.TicketCategory,
+)
+
+SCHEMA_CACHE_MODELS = (
+    models.TicketTemplateField,
+    models.TicketTemplateFieldOption,
+    models.TicketTemplateEvent,
+    models.TicketTemplateFieldEvent,
+)
+
+
+def invalidate_ticket_permissions_handler(sender, **kwargs):
+    transaction.on_commit(invalidate_ticket_permissions)
+
+
+def invalidate_on_group_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(invalidate_ticket_permissions)
+
+
+def invalidate_template_schema_handler(sender, instance, **kwargs):
+    template_id = instance.pk if sender is models.TicketTemplate else instance.template_id
+    invalidate_template_schema_on_commit(template_id)
+
+
+def record_first_response_handler(sender, instance, created, **kwargs):
+    if not created or instance.is_internal == 1 or instance.comment_type != 'comment':
+        return
+    if instance.author_id == instance.ticket.reported_by_id:
+        return
+    record_first_response(instance.ticket_id, instance.created_at)
+
+
+def connect_signals():
+    for model in PERMISSION_CACHE_MODELS:
+        post_save.connect(
+            invalidate_ticket_permissions_handler,
+            sender=model,
+            dispatch_uid=f'ticketing_permission_cache_save_{model._meta.model_name}',
+        )
+        post_delete.connect(
+            invalidate_ticket_permissions_handler,
+            sender=model,
+            dispatch_uid=f'ticketing_permission_cache_delete_{model._meta.model_name}',
+        )
+    for model in (models.TicketTemplate,) + SCHEMA_CACHE_MODELS:
+        post_save.connect(
+            invalidate_template_schema_handler,
+            sender=model,
+            dispatch_uid=f'ticketing_schema_cache_save_{model._meta.model_name}',
+        )
+        post_delete.connect(
+            invalidate_template_schema_handler,
+            sender=model,
+            dispatch_uid=f'ticketing_schema_cache_delete_{model._meta.model_name}',
+        )
+    post_save.connect(
+        record_first_response_handler,
+        sender=models.TicketComment,
+        dispatch_uid='ticketing_sla_first_response',
+    )
+    m2m_changed.connect(
+        invalidate_on_group_change,
+        sender=get_user_model().groups.through,
+        dispatch_uid='ticketing_permission_cache_user_groups',
+    )
@@ -1,3 +1,302 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from shared.models import Company, Notification
+from ticketing import models
+from ticketing.utils.permissions import get_available_templates, get_ticket_template_access
+from ticketing.utils.schema import get_template_schema
+from ticketing.utils.sla import get_ticket_queue, sweep_sla_breaches
+
+
+class TicketTemplatePermissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(public_code="001", legal_name="Co", display_name="Co")
+        self.user = get_user_model().objects.create_user(username="agent", password="x")
+        self.group = Group.objects.create(name="support")
+        self.category = models.TicketCategory.objects.create(company=self.company, name="IT", name_en="IT")
+        self.other_category = models.TicketCategory.objects.create(company=self.company, name="HR", name_en="HR")
+        self.by_user = self._template("By user", self.category)
+        self.by_group = self._template("By group", self.other_category)
+        self.by_category = self._template("By category", self.category)
+        self.hidden = self._template("Hidden", self.other_category)
+
+        models.TicketTemplatePermission.objects.create(
+            company=self.company, template=self.by_user, user=self.user, can_create=1, can_close=1,
+        )
+        models.TicketTemplatePermission.objects.create(
+            company=self.company, template=self.by_group, group=self.group, can_create=1,
+        )
+        models.TicketCategoryPermission.objects.create(
+            company=self.company, category=self.category, user=self.user, can_respond=1,
+        )
+
+    def _template(self, name, category):
+        return models.TicketTemplate.objects.create(company=self.company, name=name, category=category)
+
+    def test_resolves_template_category_and_group_grants_in_one_query(self):
+        self.user.groups.add(self.group)
+        with CaptureQueriesContext(connection) as queries:
+            access = get_ticket_template_access(self.user, self.company.pk)
+        self.assertEqual(len([q for q in queries if "ticketing_tickettemplate" in q["sql"]]), 1)
+        self.assertEqual(access.template_ids("create"), {self.by_user.pk, self.by_group.pk})
+        self.assertEqual(access.template_ids("respond"), {self.by_user.pk, self.by_category.pk})
+        self.assertEqual(access.template_ids("close"), {self.by_user.pk})
+        self.assertFalse(access.can("create", self.hidden.pk))
+
+    def test_cached_result_is_invalidated_by_permission_and_group_changes(self):
+        self.assertEqual(set(get_available_templates(self.user, self.company.pk)), {self.by_user})
+        with self.assertNumQueries(0):
+            get_ticket_template_access(self.user, self.company.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.group)
+        self.assertIn(self.by_group.pk, get_ticket_template_access(self.user, self.company.pk).template_ids("create"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            models.TicketCategoryPermission.objects.filter(category=self.category).update(can_create=1)
+            models.TicketCategoryPermission.objects.get(category=self.category).save()
+        self.assertTrue(get_ticket_template_access(self.user, self.company.pk).can("create", self.by_category.pk))
+
+    def test_superuser_can_use_every_template(self):
+        admin = get_user_model().objects.create_superuser(username="root", password="x", email="root@example.com")
+        self.assertEqual(get_available_templates(admin, self.company.pk).count(), 4)
+
+
+class TicketTemplateSchemaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(public_code="001", legal_name="Co", display_name="Co")
+        self.template = models.TicketTemplate.objects.create(company=self.company, name="Request")
+        self.priority = self._field("priority", "dropdown", is_required=1)
+        for order, value in enumerate(("low", "high")):
+            models.TicketTemplateFieldOption.objects.create(
+                company=self.company, template=self.template, template_field=self.priority,
+                option_value=value, option_label=value.title(), option_order=order,
+            )
+        self.hours = self._field("hours", "number", validation_rules={"min_value": 1, "max_value": 8})
+        self.email = self._field("email", "email")
+        models.TicketTemplateEvent.objects.create(
+            company=self.company, template=self.template, event_type="on_open", action_reference="notify",
+        )
+        models.TicketTemplateFieldEvent.objects.create(
+            company=self.company, template=self.template, template_field=self.priority, event_type="on_set",
+            event_order=1, action_reference="escalate",
+            condition_rules={"field_key": "priority", "operator": "equals", "value": "high"},
+        )
+
+    def _field(self, key, field_type, **extra):
+        return models.TicketTemplateField.objects.create(
+            company=self.company, template=self.template, field_key=key, field_name=key.title(),
+            field_type=field_type, field_order=models.TicketTemplateField.objects.count(), **extra,
+        )
+
+    def test_compiles_fields_options_and_events_and_caches_them(self):
+        with self.assertNumQueries(3):
+            schema = get_template_schema(self.template.pk)
+        self.assertEqual([field.field_key for field in schema.fields], ["priority", "hours", "email"])
+        self.assertEqual([option.value for option in schema.fields[0].options], ["low", "high"])
+        self.assertEqual([event.action_reference for event in schema.events_for("on_open", {})], ["notify"])
+        self.assertEqual([event.action_reference for event in schema.events_for("on_set", {"priority": "high"})],
+                         ["escalate"])
+        self.assertEqual(schema.events_for("on_set", {"priority": "low"}), [])
+        with self.assertNumQueries(0):
+            get_template_schema(self.template.pk)
+
+    def test_field_change_invalidates_schema(self):
+        get_template_schema(self.template.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.email.is_enabled = 0
+            self.email.save()
+        self.assertEqual([field.field_key for field in get_template_schema(self.template.pk).fields],
+                         ["priority", "hours"])
+
+    def test_validates_submitted_values(self):
+        schema = get_template_schema(self.template.pk)
+        cleaned, errors = schema.validate({
+            f"field_{self.priority.pk}": "urgent",
+            f"field_{self.hours.pk}": "12",
+            f"field_{self.email.pk}": "not-an-email",
+        })
+        self.assertEqual(set(errors), {self.priority.pk, self.hours.pk, self.email.pk})
+        self.assertEqual(cleaned, {})
+
+        cleaned, errors = schema.validate({f"field_{self.priority.pk}": "high", f"field_{self.hours.pk}": "4"})
+        self.assertEqual(errors, {})
+        self.assertEqual(cleaned, {self.priority.pk: "high", self.hours.pk: "4"})
+        self.assertIn(self.priority.pk, schema.validate({})[1])
+
+    def test_validates_values_as_the_create_form_sends_them(self):
+        from django.http import QueryDict
+
+        channels = self._field("channels", "checkbox", field_config={"options": [
+            {"value": "mail", "label": "Mail"}, {"value": "phone", "label": "Phone"},
+        ]})
+        tags = self._field("tags", "tags")
+        due = self._field("due", "date")
+        starts = self._field("starts", "datetime")
+        at = self._field("at", "time")
+        schema = get_template_schema(self.template.pk)
+
+        data = QueryDict(mutable=True)
+        data.update({f"field_{self.priority.pk}": "low", f"field_{tags.pk}": "printer, urgent,",
+                     f"field_{due.pk}": "1403/09/15", f"field_{starts.pk}": "1403/09/15 14:30",
+                     f"field_{at.pk}": "08:15"})
+        data.setlist(f"field_{channels.pk}", ["mail", "phone"])
+        cleaned, errors = schema.validate(data)
+        self.assertEqual(errors, {})
+        self.assertEqual(cleaned[channels.pk], ["mail", "phone"])
+        self.assertEqual(cleaned[tags.pk], ["printer", "urgent"])
+        self.assertEqual(cleaned[due.pk], "2024-12-05")
+        self.assertEqual(cleaned[starts.pk], "2024-12-05T14:30:00")
+        self.assertEqual(cleaned[at.pk], "08:15:00")
+
+        self.assertEqual(schema.validate({f"field_{due.pk}": "2024-12-05"})[0][due.pk], "2024-12-05")
+        _cleaned, errors = schema.validate({f"field_{self.priority.pk}": "low", f"field_{due.pk}": "1403/13/01"})
+        self.assertEqual(set(errors), {due.pk})
+
+        admin = get_user_model().objects.create_superuser(username="root", password="x", email="root@example.com")
+        self.client.force_login(admin)
+        session = self.client.session
+        session["active_company_id"] = self.company.pk
+        session.save()
+        page = self.client.get(reverse("ticketing:ticket_create") + f"?template_id={self.template.pk}")
+        self.assertContains(page, f'type="checkbox" name="field_{channels.pk}" value="phone"')
+        self.assertContains(page, f'type="time" name="field_{at.pk}"')
+
+    def test_create_view_rejects_invalid_values_and_stores_valid_ones(self):
+        admin = get_user_model().objects.create_superuser(username="root", password="x", email="root@example.com")
+        self.client.force_login(admin)
+        session = self.client.session
+        session["active_company_id"] = self.company.pk
+        session.save()
+        url = reverse("ticketing:ticket_create") + f"?template_id={self.template.pk}"
+        data = {"template": self.template.pk, "title": "Printer", "description": "Broken"}
+
+        response = self.client.post(url, {**data, f"field_{self.priority.pk}": "urgent"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(models.Ticket.objects.exists())
+
+        response = self.client.post(url, {**data, f"field_{self.priority.pk}": "high", f"field_{self.hours.pk}": "2"})
+        self.assertEqual(response.status_code, 302)
+        ticket = models.Ticket.objects.get()
+        self.assertEqual(
+            dict(ticket.field_values.values_list("template_field_key", "field_value")),
+            {"priority": "high", "hours": "2"},
+        )
+
+
+class TicketSlaTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(public_code="001", legal_name="Co", display_name="Co")
+        self.reporter = get_user_model().objects.create_user(username="reporter", password="x", email="r@example.com")
+        self.agent = get_user_model().objects.create_user(username="agent", password="x", email="a@example.com")
+        self.template = models.TicketTemplate.objects.create(company=self.company, name="Request")
+        self.urgent = models.TicketPriority.objects.create(
+            company=self.company, name="Urgent", priority_level=1, sla_hours=2, resolution_sla_hours=8,
+        )
+        self.normal = models.TicketPriority.objects.create(
+            company=self.company, name="Normal", priority_level=3, sla_hours=24, resolution_sla_hours=72,
+        )
+        self.now = timezone.now()
+
+    def _ticket(self, priority=None, hours_ago=0, **extra):
+        return models.Ticket.objects.create(
+            company=self.company, template=self.template, title="Ticket", reported_by=self.reporter,
+            priority=priority, opened_at=self.now - timedelta(hours=hours_ago), **extra,
+        )
+
+    def test_deadlines_follow_priority_first_response_and_status(self):
+        ticket = self._ticket(self.urgent, assigned_to=self.agent)
+        self.assertEqual(ticket.response_due_at, ticket.opened_at + timedelta(hours=2))
+        self.assertEqual(ticket.resolution_due_at, ticket.opened_at + timedelta(hours=8))
+        self.assertEqual(ticket.sla_due_at, ticket.response_due_at)
+        self.assertEqual(ticket.sla_check_at, ticket.response_due_at)
+        self.assertIsNotNone(ticket.assigned_at)
+
+        models.TicketComment.objects.create(
+            company=self.company, ticket=ticket, comment_text="On it", author=self.agent,
+        )
+        ticket.refresh_from_db()
+        self.assertIsNotNone(ticket.first_response_at)
+        self.assertEqual(ticket.sla_due_at, ticket.resolution_due_at)
+
+        ticket.status = "resolved"
+        ticket.save(update_fields=["status"])
+        ticket.refresh_from_db()
+        self.assertIsNotNone(ticket.resolved_at)
+        self.assertIsNone(ticket.sla_due_at)
+        self.assertIsNone(ticket.sla_check_at)
+
+    def test_migration_backfill_matches_the_sla_engine(self):
+        import importlib
+
+        from django.apps import apps
+
+        backfill = importlib.import_module("ticketing.migrations.0005_ticket_sla")
+        tickets = [
+            self._ticket(self.urgent, hours_ago=3, assigned_to=self.agent),
+            self._ticket(self.normal, hours_ago=30, first_response_at=self.now - timedelta(hours=1)),
+            self._ticket(self.urgent, status="resolved"),
+        ]
+        expected = list(models.Ticket.objects.order_by("pk").values(*backfill.SLA_FIELDS, *backfill.STATUS_FIELDS))
+        models.Ticket.objects.filter(status__in=backfill.OPEN_STATUSES).update(
+            **{name: None for name in backfill.SLA_FIELDS},
+        )
+        backfill.backfill_sla(apps, None)
+        self.assertEqual(
+            list(models.Ticket.objects.order_by("pk").values(*backfill.SLA_FIELDS, *backfill.STATUS_FIELDS)),
+            expected,
+        )
+        self.assertEqual(len(expected), len(tickets))
+
+    def test_sweeper_flags_breaches_once_and_notifies_assignee(self):
+        late = self._ticket(self.urgent, hours_ago=3, assigned_to=self.agent)
+        self._ticket(self.normal, hours_ago=3)
+
+        self.assertEqual(sweep_sla_breaches(), 1)
+        late.refresh_from_db()
+        self.assertIsNotNone(late.response_breached_at)
+        self.assertIsNone(late.resolution_breached_at)
+        self.assertEqual(late.sla_check_at, late.resolution_due_at)
+        self.assertTrue(Notification.objects.filter(user=self.agent, notification_type="ticket_sla_breach").exists())
+
+        self.assertEqual(sweep_sla_breaches(), 0)
+        self.assertEqual(sweep_sla_breaches(now=self.now + timedelta(hours=6)), 1)
+
+    def test_queue_orders_by_urgency_with_keyset_pages(self):
+        expected = [
+            self._ticket(self.urgent, hours_ago=1),
+            self._ticket(self.urgent),
+            self._ticket(self.normal, hours_ago=5),
+            self._ticket(),
+            self._ticket(),
+        ]
+        self._ticket(self.urgent, status="closed")
+
+        seen, cursor = [], None
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                rows, cursor = get_ticket_queue(self.company.pk, after=cursor, limit=2)
+            self.assertLessEqual(len(queries), 2)
+            seen.extend(row["id"] for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [ticket.pk for ticket in expected])
 
-# Create your tests here.
+        self.client.force_login(self.agent)
+        session = self.client.session
+        session["active_company_id"] = self.company.pk
+        session.save()
+        expected[0].assigned_to = self.agent
+        expected[0].save()
+        response = self.client.get(reverse("ticketing:ticket_queue"), {"scope": "mine"})
+        self.assertEqual([row["id"] for row in response.json()["results"]], [expected[0].pk])
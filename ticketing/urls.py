@@ -12,6 +12,7 @@ urlpatterns = [
     # Tickets
     path('tickets/create/', views.TicketCreateView.as_view(), name='ticket_create'),
     path('tickets/respond/', views.TicketRespondView.as_view(), name='ticket_respond'),
+    path('tickets/queue/', views.TicketQueueView.as_view(), name='ticket_queue'),
     
     # Management - Categories
     path('management/categories/', views.TicketCategoryListView.as_view(), name='categories'),
@@ -0,0 +1,117 @@
+"""
+Ticket template permission resolution.
+
+A user may create/respond/close tickets of a template when an enabled
+``TicketTemplatePermission`` of that template, or an enabled
+``TicketCategoryPermission`` of the template's category, grants the action to
+the user directly or to one of the user's groups. All templates of a company
+are resolved with one query and the result is cached per user; any change to
+permissions, templates, categories or group membership invalidates it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from shared.utils.cache import get_company_cached
+
+from .. import models
+
+
+TICKET_ACTIONS = ("create", "respond", "close")
+CACHE_NAMESPACE = "ticket-template-access"
+_VERSION_KEY = "ticketing:permissions:version"
+
+
+@dataclass(frozen=True)
+class TicketTemplateAccess:
+    """Template IDs per action a user may perform (``all_templates`` for superusers)."""
+
+    templates: Dict[str, FrozenSet[int]] = field(default_factory=dict)
+    all_templates: bool = False
+
+    def can(self, action: str, template_id: Optional[int]) -> bool:
+        if self.all_templates:
+            return True
+        return template_id in self.templates.get(action, frozenset())
+
+    def template_ids(self, action: str) -> FrozenSet[int]:
+        return self.templates.get(action, frozenset())
+
+
+def _permission_version() -> int:
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, 1, None)
+        version = cache.get(_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_ticket_permissions(**kwargs) -> None:
+    """Make every cached ``TicketTemplateAccess`` stale (usable as a signal receiver)."""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 2, None)
+
+
+def _grant(permission_model, link: str, outer: str, action: str, user_id: int, group_ids):
+    return Exists(
+        permission_model.objects.filter(
+            Q(user_id=user_id) | Q(group_id__in=group_ids),
+            **{link: OuterRef(outer), "is_enabled": 1, f"can_{action}": 1},
+        )
+    )
+
+
+def _resolve(user_id: int, company_id) -> TicketTemplateAccess:
+    group_ids = get_user_model().groups.through.objects.filter(user_id=user_id).values("group_id")
+    annotations = {}
+    granted = Q()
+    for action in TICKET_ACTIONS:
+        annotations[f"allow_{action}"] = (
+            _grant(models.TicketTemplatePermission, "template_id", "pk", action, user_id, group_ids)
+            | _grant(models.TicketCategoryPermission, "category_id", "category_id", action, user_id, group_ids)
+        )
+        granted |= Q(**{f"allow_{action}": True})
+
+    rows = (
+        models.TicketTemplate.objects.filter(company_id=company_id, is_enabled=1)
+        .annotate(**annotations)
+        .filter(granted)
+        .values_list("pk", *annotations)
+    )
+    templates = {action: set() for action in TICKET_ACTIONS}
+    for pk, *flags in rows:
+        for action, allowed in zip(TICKET_ACTIONS, flags):
+            if allowed:
+                templates[action].add(pk)
+    return TicketTemplateAccess(templates={action: frozenset(ids) for action, ids in templates.items()})
+
+
+def get_ticket_template_access(user, company_id) -> TicketTemplateAccess:
+    """Return (cached) template permissions of ``user`` in ``company_id``."""
+    if not user.is_authenticated or not company_id:
+        return TicketTemplateAccess()
+    if user.is_superuser:
+        return TicketTemplateAccess(all_templates=True)
+    return get_company_cached(
+        CACHE_NAMESPACE,
+        company_id,
+        lambda: _resolve(user.pk, company_id),
+        user.pk,
+        _permission_version(),
+    )
+
+
+def get_available_templates(user, company_id, action: str = "create"):
+    """Enabled templates of the company the user may use for ``action``."""
+    queryset = models.TicketTemplate.objects.filter(company_id=company_id, is_enabled=1)
+    access = get_ticket_template_access(user, company_id)
+    if not access.all_templates:
+        queryset = queryset.filter(pk__in=access.template_ids(action))
+    return queryset.order_by("sort_order", "name")
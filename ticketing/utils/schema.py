@@ -0,0 +1,372 @@
+"""
+Compiled ticket template schema.
+
+``get_template_schema`` turns a ``TicketTemplate`` and its fields, options
+and events into an immutable ``TemplateSchema`` built with three queries
+(fields, options, events) and cached until the template or one of its
+children changes. The same schema renders the create form and validates
+submitted field values.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import EmailValidator, URLValidator
+from django.db import transaction
+from django.db.models import BigIntegerField, F, Value
+from django.utils.translation import gettext as _
+
+from inventory.utils.jalali import jalali_to_gregorian
+
+from .. import models
+
+
+CACHE_PREFIX = "ticketing:template-schema"
+CHOICE_TYPES = frozenset({"dropdown", "radio"})
+MULTI_CHOICE_TYPES = frozenset({"checkbox", "multi_select", "tags"})
+TEMPORAL_TYPES = frozenset({"date", "time", "datetime"})
+# Jalali years are below this, Gregorian ISO input (API clients) above it
+_GREGORIAN_YEAR_FLOOR = 1700
+NUMERIC_TYPES = frozenset({"number", "currency", "rating", "slider"})
+NO_INPUT_TYPES = frozenset({"section", "calculation", "file_upload", "signature"})
+_EMPTY_CONFIG: Dict[str, Any] = {}
+
+
+@dataclass(frozen=True)
+class OptionSchema:
+    value: str
+    label: str
+    is_default: bool = False
+
+
+@dataclass(frozen=True)
+class EventSchema:
+    event_type: str
+    event_order: int
+    action_reference: str
+    condition_rules: Dict[str, Any] = field(default_factory=dict)
+
+    def matches(self, values: Mapping[str, Any]) -> bool:
+        """Evaluate ``condition_rules`` (``field_key``/``operator``/``value``) against values by field key."""
+        rules = self.condition_rules or {}
+        key = rules.get("field_key")
+        if not key:
+            return True
+        actual = values.get(key)
+        expected = rules.get("value")
+        operator = rules.get("operator", "equals")
+        if operator == "equals":
+            return _as_text(actual) == _as_text(expected)
+        if operator == "not_equals":
+            return _as_text(actual) != _as_text(expected)
+        if operator == "contains":
+            if isinstance(actual, (list, tuple)):
+                return _as_text(expected) in [_as_text(item) for item in actual]
+            return _as_text(expected) in _as_text(actual)
+        if operator == "in":
+            return _as_text(actual) in [_as_text(item) for item in (expected or [])]
+        if operator == "is_empty":
+            return actual in (None, "", [])
+        if operator == "is_not_empty":
+            return actual not in (None, "", [])
+        return False
+
+
+@dataclass(frozen=True)
+class FieldSchema:
+    """One template field; attribute names follow ``TicketTemplateField`` so templates can use either."""
+
+    pk: int
+    field_key: str
+    field_name: str
+    field_type: str
+    is_required: int
+    default_value: str
+    help_text: str
+    field_order: int
+    options: Tuple[OptionSchema, ...] = ()
+    validation_rules: Dict[str, Any] = field(default_factory=dict)
+    field_config: Dict[str, Any] = field(default_factory=dict)
+    events: Tuple[EventSchema, ...] = ()
+
+    @property
+    def input_name(self) -> str:
+        return f"field_{self.pk}"
+
+    @property
+    def default(self):
+        defaults = [option.value for option in self.options if option.is_default]
+        if self.field_type in MULTI_CHOICE_TYPES:
+            return defaults
+        return defaults[0] if defaults else self.default_value
+
+    @property
+    def option_values(self) -> frozenset:
+        return frozenset(option.value for option in self.options)
+
+
+@dataclass(frozen=True)
+class TemplateSchema:
+    template_id: int
+    version: int
+    fields: Tuple[FieldSchema, ...]
+    events: Tuple[EventSchema, ...] = ()
+
+    def get_field(self, pk: int) -> Optional[FieldSchema]:
+        for item in self.fields:
+            if item.pk == pk:
+                return item
+        return None
+
+    def events_for(self, event_type: str, values: Mapping[str, Any]) -> List[EventSchema]:
+        """Template and field events of ``event_type`` whose conditions match ``values`` (by field key)."""
+        events = list(self.events)
+        for item in self.fields:
+            events.extend(item.events)
+        return sorted(
+            (event for event in events if event.event_type == event_type and event.matches(values)),
+            key=lambda event: event.event_order,
+        )
+
+    def validate(self, data) -> Tuple[Dict[int, Any], Dict[int, List[str]]]:
+        """
+        Validate submitted values (``field_<pk>`` keys of a QueryDict or dict).
+
+        Returns ``(cleaned, errors)`` keyed by field ID; multi-value fields are
+        cleaned to lists, everything else to strings. Dates are accepted in
+        Jalali (as the create form's date picker sends them) or Gregorian ISO
+        form and cleaned to Gregorian ISO strings.
+        """
+        cleaned: Dict[int, Any] = {}
+        errors: Dict[int, List[str]] = {}
+        for item in self.fields:
+            if item.field_type in NO_INPUT_TYPES:
+                continue
+            value = _read(data, item)
+            problems = _validate_field(item, value)
+            if problems:
+                errors[item.pk] = problems
+            elif value not in ("", []):
+                cleaned[item.pk] = _parse_temporal(item.field_type, value) if item.field_type in TEMPORAL_TYPES else value
+        return cleaned, errors
+
+
+def _as_text(value) -> str:
+    return "" if value is None else str(value)
+
+
+def _read(data, item: FieldSchema):
+    if item.field_type in MULTI_CHOICE_TYPES:
+        getlist = getattr(data, "getlist", None)
+        raw = getlist(item.input_name) if getlist else data.get(item.input_name, [])
+        if isinstance(raw, str):
+            raw = [raw]
+        if item.field_type == "tags" and not item.options:
+            # Free tags are typed into one comma-separated text input
+            raw = [part for value in raw for part in str(value).split(",")]
+        return [str(value).strip() for value in raw if str(value).strip()]
+    return str(data.get(item.input_name, "") or "").strip()
+
+
+def _validate_field(item: FieldSchema, value) -> List[str]:
+    if value in ("", []):
+        return [_("This field is required.")] if item.is_required == 1 else []
+
+    rules = item.validation_rules or {}
+    problems: List[str] = []
+    if item.field_type in CHOICE_TYPES and item.options and value not in item.option_values:
+        problems.append(_("Select a valid choice."))
+    elif item.field_type in MULTI_CHOICE_TYPES and item.options and not set(value) <= item.option_values:
+        problems.append(_("Select a valid choice."))
+    elif item.field_type in NUMERIC_TYPES:
+        problems.extend(_validate_number(value, rules))
+    elif item.field_type == "email":
+        problems.extend(_run_validator(EmailValidator(), value))
+    elif item.field_type == "url":
+        problems.extend(_run_validator(URLValidator(), value))
+    elif item.field_type in TEMPORAL_TYPES and _parse_temporal(item.field_type, value) is None:
+        problems.append(_("Enter a valid value."))
+
+    if isinstance(value, str):
+        if rules.get("min_length") and len(value) < int(rules["min_length"]):
+            problems.append(_("Ensure this value has at least %(count)s characters.") % {"count": rules["min_length"]})
+        if rules.get("max_length") and len(value) > int(rules["max_length"]):
+            problems.append(_("Ensure this value has at most %(count)s characters.") % {"count": rules["max_length"]})
+        if rules.get("pattern") and not re.fullmatch(rules["pattern"], value):
+            problems.append(rules.get("pattern_message") or _("Enter a valid value."))
+    return problems
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        parsed = date.fromisoformat(value)
+    except ValueError:
+        parsed = None
+    if parsed is not None and parsed.year >= _GREGORIAN_YEAR_FLOOR:
+        return parsed
+    return jalali_to_gregorian(value)
+
+
+def _parse_temporal(field_type: str, value: str) -> Optional[str]:
+    """ISO string of a submitted date/time/datetime value, or ``None`` when it is invalid."""
+    try:
+        if field_type == "time":
+            return time.fromisoformat(value).isoformat()
+        if field_type == "date":
+            parsed = _parse_date(value)
+            return parsed.isoformat() if parsed else None
+        date_part, _sep, time_part = value.replace("T", " ").partition(" ")
+        parsed = _parse_date(date_part)
+        if parsed is None:
+            return None
+        return datetime.combine(parsed, time.fromisoformat(time_part.strip() or "00:00")).isoformat()
+    except ValueError:
+        return None
+
+
+def _validate_number(value: str, rules: Mapping[str, Any]) -> List[str]:
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        return [_("Enter a number.")]
+    problems = []
+    if rules.get("min_value") is not None and number < Decimal(str(rules["min_value"])):
+        problems.append(_("Ensure this value is greater than or equal to %(limit)s.") % {"limit": rules["min_value"]})
+    if rules.get("max_value") is not None and number > Decimal(str(rules["max_value"])):
+        problems.append(_("Ensure this value is less than or equal to %(limit)s.") % {"limit": rules["max_value"]})
+    return problems
+
+
+def _run_validator(validator, value: str) -> List[str]:
+    try:
+        validator(value)
+    except ValidationError as exc:
+        return list(exc.messages)
+    return []
+
+
+# --------------------------------------------------------------------- compile
+
+def _config_options(config: Mapping[str, Any]) -> Tuple[OptionSchema, ...]:
+    return tuple(
+        OptionSchema(value=str(option["value"]), label=str(option["label"]), is_default=bool(option.get("is_default")))
+        for option in config.get("options") or ()
+        if isinstance(option, dict) and "value" in option and "label" in option
+    )
+
+
+def compile_template_schema(template_id: int, version: int = 0) -> TemplateSchema:
+    """Build the schema of a template with three queries (fields, options, events)."""
+    fields = list(
+        models.TicketTemplateField.objects.filter(template_id=template_id, is_enabled=1)
+        .order_by("field_order", "id")
+        .values(
+            "pk", "field_key", "field_name", "field_type", "is_required", "default_value", "help_text",
+            "field_order", "validation_rules", "field_config",
+        )
+    )
+
+    option_rows: Dict[int, List[OptionSchema]] = {}
+    for field_id, value, label, is_default in (
+        models.TicketTemplateFieldOption.objects.filter(template_id=template_id, is_enabled=1)
+        .order_by("option_order", "id")
+        .values_list("template_field_id", "option_value", "option_label", "is_default")
+    ):
+        option_rows.setdefault(field_id, []).append(OptionSchema(value, label, is_default == 1))
+
+    columns = ("event_type", "event_order", "action_reference", "condition_rules", "field_id")
+    # Parts of a UNION may not carry Meta.ordering (SQLite rejects it); events are sorted below
+    template_events = (
+        models.TicketTemplateEvent.objects.filter(template_id=template_id, is_enabled=1)
+        .annotate(field_id=Value(None, output_field=BigIntegerField()))
+        .order_by()
+        .values_list(*columns)
+    )
+    field_events = (
+        models.TicketTemplateFieldEvent.objects.filter(template_id=template_id, is_enabled=1)
+        .annotate(field_id=F("template_field_id"))
+        .order_by()
+        .values_list(*columns)
+    )
+    events_by_field: Dict[Optional[int], List[EventSchema]] = {}
+    for event_type, event_order, action_reference, condition_rules, field_id in template_events.union(
+        field_events, all=True,
+    ):
+        events_by_field.setdefault(field_id, []).append(
+            EventSchema(event_type, event_order, action_reference, condition_rules or {})
+        )
+
+    compiled = []
+    for row in fields:
+        config = row["field_config"] or _EMPTY_CONFIG
+        # Options in field_config win over option rows, as in the template editor
+        options = _config_options(config) or tuple(option_rows.get(row["pk"], ()))
+        compiled.append(FieldSchema(
+            pk=row["pk"],
+            field_key=row["field_key"],
+            field_name=row["field_name"],
+            field_type=row["field_type"],
+            is_required=row["is_required"],
+            default_value=row["default_value"] or "",
+            help_text=row["help_text"] or "",
+            field_order=row["field_order"],
+            options=options,
+            validation_rules=row["validation_rules"] or {},
+            field_config=config,
+            events=tuple(sorted(events_by_field.get(row["pk"], ()), key=lambda event: event.event_order)),
+        ))
+    return TemplateSchema(
+        template_id=template_id,
+        version=version,
+        fields=tuple(compiled),
+        events=tuple(sorted(events_by_field.get(None, ()), key=lambda event: event.event_order)),
+    )
+
+
+# ----------------------------------------------------------------------- cache
+
+def _version_key(template_id) -> str:
+    return f"{CACHE_PREFIX}:{template_id}:version"
+
+
+def get_template_schema_version(template_id) -> int:
+    key = _version_key(template_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def get_template_schema(template_id: int) -> TemplateSchema:
+    """Return the cached schema of a template, compiling it on a miss."""
+    version = get_template_schema_version(template_id)
+    key = f"{CACHE_PREFIX}:{template_id}:v{version}"
+    schema = cache.get(key)
+    if schema is None:
+        schema = compile_template_schema(template_id, version)
+        cache.set(key, schema, getattr(settings, "TICKET_TEMPLATE_SCHEMA_TIMEOUT", 86400))
+    return schema
+
+
+def invalidate_template_schema(template_id) -> None:
+    """Make the cached schema of a template stale."""
+    if not template_id:
+        return
+    key = _version_key(template_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def invalidate_template_schema_on_commit(template_id) -> None:
+    if template_id:
+        transaction.on_commit(lambda: invalidate_template_schema(template_id))
@@ -0,0 +1,299 @@
+"""
+Ticket SLA engine and agent queues.
+
+Each ``TicketPriority`` carries a response target (``sla_hours``) and a
+resolution target (``resolution_sla_hours``). ``apply_ticket_sla`` runs on
+every ``Ticket.save()`` and keeps the denormalized deadline columns in step
+with priority, status and first response:
+
+- ``response_due_at`` / ``resolution_due_at``: ``opened_at`` + target
+- ``sla_due_at``: the deadline that currently matters (response until the
+  first response, then resolution); ``NULL`` once the ticket is no longer
+  open. Agent queues are ordered by it.
+- ``sla_check_at``: the earliest deadline neither met nor flagged yet. The
+  sweeper only reads ``sla_check_at <= now`` through a partial index, so it
+  never scans tickets that cannot breach.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+OPEN_STATUSES = ("open", "in_progress", "assigned", "pending")
+RESOLVED_STATUSES = ("resolved", "closed")
+SLA_FIELDS = (
+    "response_due_at",
+    "resolution_due_at",
+    "response_breached_at",
+    "resolution_breached_at",
+    "sla_due_at",
+    "sla_check_at",
+)
+STATUS_FIELDS = ("assigned_at", "resolved_at", "closed_at")
+QUEUE_FIELDS = (
+    "id",
+    "ticket_code",
+    "title",
+    "status",
+    "priority_code",
+    "assigned_to_id",
+    "assigned_to_username",
+    "opened_at",
+    "first_response_at",
+    "response_due_at",
+    "resolution_due_at",
+    "response_breached_at",
+    "resolution_breached_at",
+    "sla_due_at",
+)
+
+
+def _due(start: datetime, hours: Optional[int]) -> Optional[datetime]:
+    return start + timedelta(hours=hours) if start and hours else None
+
+
+def _next_check(ticket) -> Optional[datetime]:
+    if ticket.status not in OPEN_STATUSES:
+        return None
+    pending = []
+    if ticket.response_due_at and ticket.first_response_at is None and ticket.response_breached_at is None:
+        pending.append(ticket.response_due_at)
+    if ticket.resolution_due_at and ticket.resolution_breached_at is None:
+        pending.append(ticket.resolution_due_at)
+    return min(pending) if pending else None
+
+
+def apply_ticket_sla(ticket, now: Optional[datetime] = None) -> Set[str]:
+    """
+    Update status timestamps and SLA columns of ``ticket`` in place.
+
+    Returns the names of the fields that changed so callers saving with
+    ``update_fields`` persist them too.
+    """
+    now = now or timezone.now()
+    before = {name: getattr(ticket, name) for name in SLA_FIELDS + STATUS_FIELDS}
+
+    if ticket.assigned_to_id and ticket.assigned_at is None:
+        ticket.assigned_at = now
+    if ticket.status in RESOLVED_STATUSES and ticket.resolved_at is None:
+        ticket.resolved_at = now
+    if ticket.status == "closed" and ticket.closed_at is None:
+        ticket.closed_at = now
+    if ticket.status in OPEN_STATUSES:
+        # Reopened tickets run against the resolution target again
+        ticket.resolved_at = None
+        ticket.closed_at = None
+
+    priority = ticket.priority if ticket.priority_id else None
+    ticket.response_due_at = _due(ticket.opened_at, priority and priority.sla_hours)
+    ticket.resolution_due_at = _due(ticket.opened_at, priority and priority.resolution_sla_hours)
+
+    # Targets met late (before the sweeper noticed) are still breaches
+    if (
+        ticket.response_due_at and ticket.first_response_at
+        and ticket.first_response_at > ticket.response_due_at and ticket.response_breached_at is None
+    ):
+        ticket.response_breached_at = ticket.first_response_at
+    if (
+        ticket.resolution_due_at and ticket.resolved_at
+        and ticket.resolved_at > ticket.resolution_due_at and ticket.resolution_breached_at is None
+    ):
+        ticket.resolution_breached_at = ticket.resolved_at
+
+    if ticket.status not in OPEN_STATUSES:
+        ticket.sla_due_at = None
+    elif ticket.first_response_at is None and ticket.response_due_at:
+        ticket.sla_due_at = ticket.response_due_at
+    else:
+        ticket.sla_due_at = ticket.resolution_due_at
+    ticket.sla_check_at = _next_check(ticket)
+
+    return {name for name, value in before.items() if getattr(ticket, name) != value}
+
+
+def record_first_response(ticket_id: int, responded_at: Optional[datetime] = None) -> bool:
+    """Set ``first_response_at`` (once) and recompute the ticket's SLA columns."""
+    from ..models import Ticket
+
+    ticket = (
+        Ticket.objects.select_related("priority")
+        .filter(pk=ticket_id, first_response_at__isnull=True)
+        .first()
+    )
+    if ticket is None:
+        return False
+    ticket.first_response_at = responded_at or timezone.now()
+    ticket.save(update_fields=["first_response_at"])
+    return True
+
+
+def recompute_open_tickets(company_id: Optional[int] = None, batch_size: int = 2000) -> int:
+    """Recompute SLA columns of open tickets (e.g. after priority targets changed)."""
+    from ..models import Ticket
+
+    tickets = Ticket.objects.filter(status__in=OPEN_STATUSES).select_related("priority").order_by("pk")
+    if company_id:
+        tickets = tickets.filter(company_id=company_id)
+    count = 0
+    batch = []
+    for ticket in tickets.iterator(chunk_size=batch_size):
+        if apply_ticket_sla(ticket):
+            batch.append(ticket)
+        if len(batch) >= batch_size:
+            Ticket.objects.bulk_update(batch, SLA_FIELDS + STATUS_FIELDS)
+            count += len(batch)
+            batch = []
+    if batch:
+        Ticket.objects.bulk_update(batch, SLA_FIELDS + STATUS_FIELDS)
+        count += len(batch)
+    return count
+
+
+# --------------------------------------------------------------------- sweeper
+
+def _breach_notifications(ticket, stages: Iterable[str]) -> List[Any]:
+    from shared.models import Notification
+
+    if not ticket.assigned_to_id:
+        return []
+    return [
+        Notification(
+            user_id=ticket.assigned_to_id,
+            company_id=ticket.company_id,
+            notification_type="ticket_sla_breach",
+            notification_key=f"ticket_sla_{stage}_{ticket.pk}",
+            message=f"{ticket.ticket_code}: {stage} SLA breached",
+            url_name="ticketing:ticket_respond",
+        )
+        for stage in stages
+    ]
+
+
+def sweep_sla_breaches(now: Optional[datetime] = None, batch_size: int = 500) -> int:
+    """
+    Flag tickets whose response or resolution deadline has passed.
+
+    Reads ``sla_check_at <= now`` in batches (partial index range scan, rows
+    locked with ``SKIP LOCKED`` so concurrent sweepers do not collide), sets
+    ``*_breached_at``, advances ``sla_check_at`` to the next pending deadline
+    and queues one ``Notification`` per breach for the assignee. Returns the
+    number of breaches flagged.
+    """
+    from shared.models import Notification
+
+    from ..models import Ticket
+
+    now = now or timezone.now()
+    flagged = 0
+    while True:
+        with transaction.atomic():
+            tickets = list(
+                Ticket.objects.filter(sla_check_at__lte=now)
+                .order_by("sla_check_at")
+                .select_for_update(skip_locked=True)
+                .only(
+                    "id", "company_id", "ticket_code", "status", "assigned_to_id", "first_response_at",
+                    *SLA_FIELDS,
+                )[:batch_size]
+            )
+            if not tickets:
+                break
+            notifications = []
+            for ticket in tickets:
+                stages = []
+                if (
+                    ticket.first_response_at is None and ticket.response_breached_at is None
+                    and ticket.response_due_at and ticket.response_due_at <= now
+                ):
+                    ticket.response_breached_at = now
+                    stages.append("response")
+                if (
+                    ticket.resolution_breached_at is None
+                    and ticket.resolution_due_at and ticket.resolution_due_at <= now
+                ):
+                    ticket.resolution_breached_at = now
+                    stages.append("resolution")
+                ticket.sla_check_at = _next_check(ticket)
+                flagged += len(stages)
+                notifications.extend(_breach_notifications(ticket, stages))
+            Ticket.objects.bulk_update(
+                tickets, ["response_breached_at", "resolution_breached_at", "sla_check_at"],
+            )
+            Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+        if len(tickets) < batch_size:
+            break
+    return flagged
+
+
+# ----------------------------------------------------------------------- queue
+
+def _encode_cursor(due: Optional[datetime], pk: int) -> str:
+    raw = json.dumps([due.isoformat() if due else None, pk], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[Optional[datetime], int]]:
+    if not cursor:
+        return None
+    try:
+        due, pk = json.loads(base64.urlsafe_b64decode((cursor + "=" * (-len(cursor) % 4)).encode()))
+        return (parse_datetime(due) if due else None), int(pk)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+def get_ticket_queue(
+    company_id: int,
+    *,
+    assigned_to_id: Optional[int] = None,
+    unassigned: bool = False,
+    template_ids: Optional[Iterable[int]] = None,
+    after: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Open tickets ordered by urgency (``sla_due_at`` ascending, tickets
+    without a deadline last, then ``id``), one keyset page at a time.
+
+    Returns ``(rows, next_cursor)``; pass ``next_cursor`` back as ``after``.
+    Tickets with a deadline and those without are read as two index range
+    scans so late pages cost the same as the first one.
+    """
+    from ..models import Ticket
+
+    queryset = Ticket.objects.filter(company_id=company_id, status__in=OPEN_STATUSES)
+    if unassigned:
+        queryset = queryset.filter(assigned_to__isnull=True)
+    elif assigned_to_id is not None:
+        queryset = queryset.filter(assigned_to_id=assigned_to_id)
+    if template_ids is not None:
+        queryset = queryset.filter(template_id__in=list(template_ids))
+    queryset = queryset.values(*QUEUE_FIELDS)
+
+    position = _decode_cursor(after)
+    rows: List[Dict[str, Any]] = []
+    if position is None or position[0] is not None:
+        timed = queryset.filter(sla_due_at__isnull=False)
+        if position is not None:
+            due, pk = position
+            timed = timed.filter(Q(sla_due_at__gte=due), Q(sla_due_at__gt=due) | Q(id__gt=pk))
+        rows = list(timed.order_by("sla_due_at", "id")[: limit + 1])
+    if len(rows) <= limit:
+        untimed = queryset.filter(sla_due_at__isnull=True)
+        if position is not None and position[0] is None:
+            untimed = untimed.filter(id__gt=position[1])
+        rows.extend(untimed.order_by("id")[: limit + 1 - len(rows)])
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_cursor(rows[-1]["sla_due_at"], rows[-1]["id"]) if has_next else None
+    return rows, next_cursor
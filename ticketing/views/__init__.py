@@ -18,6 +18,7 @@ from .tickets import (
     TicketListView,
     TicketCreateView,
     TicketEditView,
+    TicketQueueView,
 )
 
 # Import placeholder views
@@ -69,6 +70,7 @@ __all__ = [
     "TicketListView",
     "TicketCreateView",
     "TicketEditView",
+    "TicketQueueView",
     "TicketRespondView",
     "TicketTemplateListView",
     "TicketTemplateCreateView",
@@ -13,7 +13,7 @@ logger = logging.getLogger('ticketing.debug')
 @csrf_exempt
 @require_http_methods(["POST"])
 def debug_log_view(request):
-    """Receive debug logs from browser and print them to server console."""
+    """Receive debug logs from browser and write them to the ``ticketing.debug`` logger."""
     try:
         data = json.loads(request.body)
         level = data.get('level', 'LOG')
@@ -27,11 +27,7 @@ def debug_log_view(request):
             log_message += f" | URL: {url}"
         if log_data:
             log_message += f" | Data: {json.dumps(log_data, indent=2)}"
-        
-        # Print to console (terminal)
-        print(log_message)
-        
-        # Also log to Django logger
+
         if level == 'ERROR':
             logger.error(log_message)
         else:
@@ -39,6 +35,6 @@ def debug_log_view(request):
         
         return JsonResponse({'status': 'ok'})
     except Exception as e:
-        print(f"[ERROR] Failed to process debug log: {e}")
+        logger.warning("Failed to process debug log: %s", e)
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
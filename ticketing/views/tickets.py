@@ -6,13 +6,20 @@ This module contains views for creating, editing, listing, and managing tickets.
 from typing import Dict, Any
 
 from django.contrib import messages
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from django.views import View
 from django.views.generic import ListView, CreateView, UpdateView
 
 from .. import models
 from .base import TicketingBaseView
+from ..utils.permissions import get_available_templates, get_ticket_template_access
+from ..utils.schema import get_template_schema
+from ..utils.sla import get_ticket_queue
 from shared.views.base import EditLockProtectedMixin
 
 
@@ -25,9 +32,14 @@ class TicketListView(TicketingBaseView, ListView):
     paginate_by = 50
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
-        """Add context data."""
+        """Add context data with per-ticket respond/close permissions."""
         context = super().get_context_data(**kwargs)
         context["page_title"] = _("Tickets")
+        access = get_ticket_template_access(self.request.user, self.request.session.get("active_company_id"))
+        for ticket in context["tickets"]:
+            ticket.can_respond = access.can("respond", ticket.template_id)
+            ticket.can_close = access.can("close", ticket.template_id)
+        context["template_access"] = access
         return context
 
 
@@ -56,86 +68,16 @@ class TicketCreateView(TicketingBaseView, CreateView):
                     is_enabled=1
                 )
                 
-                # Check permissions
-                user = self.request.user
-                has_permission = False
-                
-                if user.is_superuser:
-                    has_permission = True
-                else:
-                    permissions = selected_template.permissions.filter(
-                        is_enabled=1,
-                        can_create=1
-                    )
-                    for perm in permissions:
-                        if perm.user_id == user.id:
-                            has_permission = True
-                            break
-                        if perm.group_id and user.groups.filter(id=perm.group_id).exists():
-                            has_permission = True
-                            break
-                
-                if has_permission:
+                access = get_ticket_template_access(
+                    self.request.user, self.request.session.get("active_company_id")
+                )
+                if access.can("create", selected_template.pk):
                     context["selected_template"] = selected_template
-                    fields = selected_template.fields.filter(is_enabled=1).prefetch_related('options').order_by("field_order")
-                    
-                    # Process fields to extract options for dropdown/radio fields
-                    fields_with_options = []
-                    for field in fields:
-                        field_data = {
-                            'field': field,
-                            'options': []
-                        }
-                        
-                        # Extract options from field_config
-                        if field.field_type in ['dropdown', 'radio', 'checkbox', 'multi_select']:
-                            field_config = field.field_config or {}
-                            
-                            print(f"🔵 [TICKET_CREATE] Field: {field.field_name} ({field.field_type})")
-                            print(f"🔵 [TICKET_CREATE] Field config: {field_config}")
-                            print(f"🔵 [TICKET_CREATE] Options source: {field_config.get('options_source')}")
-                            print(f"🔵 [TICKET_CREATE] Has options: {bool(field_config.get('options'))}")
-                            
-                            # Check if manual options exist
-                            if field_config.get('options_source') == 'manual' and field_config.get('options'):
-                                print(f"🔵 [TICKET_CREATE] Loading manual options, count: {len(field_config['options'])}")
-                                # Options from field_config
-                                for opt in field_config['options']:
-                                    if isinstance(opt, dict) and 'value' in opt and 'label' in opt:
-                                        field_data['options'].append({
-                                            'value': opt['value'],
-                                            'label': opt['label'],
-                                            'is_default': opt.get('is_default', False)
-                                        })
-                                        print(f"🔵 [TICKET_CREATE]   Added option: {opt.get('value')} = {opt.get('label')}")
-                            elif field_config.get('options'):
-                                print(f"🔵 [TICKET_CREATE] Loading options without options_source, count: {len(field_config['options'])}")
-                                # Fallback: options without options_source
-                                for opt in field_config['options']:
-                                    if isinstance(opt, dict) and 'value' in opt and 'label' in opt:
-                                        field_data['options'].append({
-                                            'value': opt['value'],
-                                            'label': opt['label'],
-                                            'is_default': opt.get('is_default', False)
-                                        })
-                                        print(f"🔵 [TICKET_CREATE]   Added option: {opt.get('value')} = {opt.get('label')}")
-                            else:
-                                print(f"🔵 [TICKET_CREATE] No options in field_config, checking TicketTemplateFieldOption model")
-                                # Fallback: use TicketTemplateFieldOption model
-                                for opt in field.options.all():
-                                    if opt.is_enabled == 1:
-                                        field_data['options'].append({
-                                            'value': opt.option_value,
-                                            'label': opt.option_label,
-                                            'is_default': opt.is_default == 1
-                                        })
-                                        print(f"🔵 [TICKET_CREATE]   Added option from model: {opt.option_value} = {opt.option_label}")
-                            
-                            print(f"🔵 [TICKET_CREATE] Final options count for {field.field_name}: {len(field_data['options'])}")
-                        
-                        fields_with_options.append(field_data)
-                    
-                    context["template_fields"] = fields_with_options
+                    schema = get_template_schema(selected_template.pk)
+                    context["template_schema"] = schema
+                    context["template_fields"] = [
+                        {'field': field, 'options': field.options} for field in schema.fields
+                    ]
                 else:
                     messages.error(self.request, _("You don't have permission to create tickets with this template."))
                     context["selected_template"] = None
@@ -146,46 +88,12 @@ class TicketCreateView(TicketingBaseView, CreateView):
             # Show template selection list
             context["selected_template"] = None
             
-            # Get available templates for the user
+            # Templates the user may create tickets with (template or category permission)
             company_id = self.request.session.get("active_company_id")
             if company_id:
-                # Get all enabled templates for this company
-                all_templates = models.TicketTemplate.objects.filter(
-                    company_id=company_id,
-                    is_enabled=1
-                ).order_by("sort_order", "name")
-                
-                # Filter templates by user permissions
-                user = self.request.user
-                available_templates = []
-                
-                for template in all_templates:
-                    # Check if user has permission to create tickets with this template
-                    has_permission = False
-                    
-                    # Check superuser
-                    if user.is_superuser:
-                        has_permission = True
-                    else:
-                        # Check template permissions
-                        permissions = template.permissions.filter(
-                            is_enabled=1,
-                            can_create=1
-                        )
-                        
-                        # Check if user or user's groups have permission
-                        for perm in permissions:
-                            if perm.user_id == user.id:
-                                has_permission = True
-                                break
-                            if perm.group_id and user.groups.filter(id=perm.group_id).exists():
-                                has_permission = True
-                                break
-                    
-                    if has_permission:
-                        available_templates.append(template)
-                
-                context["available_templates"] = available_templates
+                context["available_templates"] = list(
+                    get_available_templates(self.request.user, company_id, "create")
+                )
         
         return context
 
@@ -200,15 +108,51 @@ class TicketCreateView(TicketingBaseView, CreateView):
     def form_valid(self, form):
         """Set reported_by to current user."""
         company_id = self.request.session.get("active_company_id")
+        template = form.cleaned_data.get("template")
+        access = get_ticket_template_access(self.request.user, company_id)
+        if template is None or not access.can("create", template.pk):
+            form.add_error("template", _("You don't have permission to create tickets with this template."))
+            return self.form_invalid(form)
+        schema = get_template_schema(template.pk)
+        values, errors = schema.validate(self.request.POST)
+        if errors:
+            for field_id, problems in errors.items():
+                label = schema.get_field(field_id).field_name
+                for problem in problems:
+                    form.add_error(None, f"{label}: {problem}")
+            return self.form_invalid(form)
         if company_id:
             form.instance.company_id = company_id
         form.instance.reported_by = self.request.user
+        with transaction.atomic():
+            response = super().form_valid(form)
+            self._save_field_values(schema, values)
         messages.success(self.request, _("Ticket created successfully."))
-        return super().form_valid(form)
+        return response
+
+    def _save_field_values(self, schema, values):
+        """Store validated template field values of the new ticket in one insert."""
+        ticket = self.object
+        rows = []
+        for field_id, value in values.items():
+            field = schema.get_field(field_id)
+            is_list = isinstance(value, list)
+            rows.append(models.TicketFieldValue(
+                company_id=ticket.company_id,
+                company_code=ticket.company_code,
+                ticket=ticket,
+                ticket_code=ticket.ticket_code,
+                template_field_id=field_id,
+                template_field_key=field.field_key,
+                field_value=", ".join(value) if is_list else value,
+                field_value_json=value if is_list else None,
+                created_by=self.request.user,
+            ))
+        models.TicketFieldValue.objects.bulk_create(rows)
 
     def get_success_url(self):
-        """Redirect to ticket list."""
-        return reverse_lazy("ticketing:ticket_list")
+        """Redirect to the tickets page (the list view has no route yet)."""
+        return reverse_lazy("ticketing:ticket_respond")
 
 
 class TicketEditView(EditLockProtectedMixin, TicketingBaseView, UpdateView):
@@ -222,6 +166,9 @@ class TicketEditView(EditLockProtectedMixin, TicketingBaseView, UpdateView):
         """Add context data."""
         context = super().get_context_data(**kwargs)
         context["page_title"] = _("Edit Ticket")
+        access = get_ticket_template_access(self.request.user, self.request.session.get("active_company_id"))
+        context["can_respond"] = access.can("respond", self.object.template_id)
+        context["can_close"] = access.can("close", self.object.template_id)
         return context
 
     def form_valid(self, form):
@@ -233,3 +180,40 @@ class TicketEditView(EditLockProtectedMixin, TicketingBaseView, UpdateView):
         """Redirect to ticket detail."""
         return reverse_lazy("ticketing:ticket_list")
 
+
+class TicketQueueView(TicketingBaseView, View):
+    """Agent queue (JSON): open tickets by SLA urgency with keyset pagination."""
+
+    page_size = 50
+    max_page_size = 200
+
+    def get(self, request, *args, **kwargs):
+        """Return ``{"results": [...], "next": cursor}`` for ``scope`` mine/unassigned/all."""
+        company_id = request.session.get("active_company_id")
+        if not company_id:
+            return JsonResponse({"results": [], "next": None})
+
+        scope = request.GET.get("scope", "mine")
+        try:
+            limit = max(1, min(int(request.GET.get("limit", self.page_size)), self.max_page_size))
+        except ValueError:
+            limit = self.page_size
+
+        template_ids = None
+        if scope != "mine":
+            access = get_ticket_template_access(request.user, company_id)
+            if not access.all_templates:
+                template_ids = access.template_ids("respond")
+
+        rows, next_cursor = get_ticket_queue(
+            company_id,
+            assigned_to_id=request.user.pk if scope == "mine" else None,
+            unassigned=scope == "unassigned",
+            template_ids=template_ids,
+            after=request.GET.get("after"),
+            limit=limit,
+        )
+        now = timezone.now()
+        for row in rows:
+            row["is_overdue"] = bool(row["sla_due_at"] and row["sla_due_at"] <= now)
+        return JsonResponse({"results": rows, "next": next_cursor})
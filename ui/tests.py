@@ -1,3 +1,46 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from inventory import models as inventory_models
+from shared import models as shared_models
+from shared.utils.cache import get_company_cached
+from ui.views import DashboardView
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = shared_models.User.objects.create_user(username="dash", password="secure-pass")
+        self.company = shared_models.Company.objects.create(
+            public_code="001",
+            legal_name="Dashboard Co.",
+            display_name="Dashboard",
+            is_enabled=1,
+        )
+        inventory_models.Warehouse.objects.create(
+            company=self.company, public_code="00001", name="Main", name_en="Main",
+        )
+        inventory_models.IssuePermanent.objects.create(company=self.company, document_code="ISP-1")
+
+    def test_stats_use_few_queries(self):
+        with self.assertNumQueries(7):
+            stats = DashboardView()._calculate_stats(self.company.id)['stats']
+        self.assertEqual(stats['total_warehouses'], 1)
+        self.assertEqual(stats['permanent_issues_today'], 1)
+        self.assertEqual(stats['total_permanent_issues'], 1)
+        self.assertEqual(stats['total_items'], 0)
+
+    def test_cached_stats_invalidated_by_document_save(self):
+        def build():
+            return DashboardView()._calculate_stats(self.company.id)
+
+        first = get_company_cached('dashboard-stats', self.company.id, build)
+        with self.assertNumQueries(0):
+            get_company_cached('dashboard-stats', self.company.id, build)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory_models.IssuePermanent.objects.create(company=self.company, document_code="ISP-2")
+
+        second = get_company_cached('dashboard-stats', self.company.id, build)
+        self.assertEqual(first['stats']['total_permanent_issues'], 1)
+        self.assertEqual(second['stats']['total_permanent_issues'], 2)
@@ -1,10 +1,52 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, Q
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.views.generic import TemplateView
 
 from inventory import models as inventory_models
+from shared import models as shared_models
+from shared.utils.cache import get_company_cached
+
+
+DASHBOARD_STAT_KEYS = (
+    'total_items',
+    'total_warehouses',
+    'total_suppliers',
+    'temp_receipts_pending',
+    'temp_receipts_qc_pending',
+    'permanent_receipts_today',
+    'total_permanent_receipts',
+    'permanent_issues_today',
+    'consumption_issues_today',
+    'total_permanent_issues',
+    'pending_purchase_requests',
+    'pending_warehouse_requests',
+    'total_pending_requests',
+    'deficit_records',
+    'surplus_records',
+    'total_stocktaking_records',
+    'low_stock_items',
+    'pending_purchase_approvals',
+    'pending_warehouse_approvals',
+    'pending_stocktaking_approvals',
+    'total_pending_approvals',
+    'recent_receipts',
+    'recent_issues',
+)
+
+
+def _count_subquery(queryset):
+    """Scalar subquery counting ``queryset`` rows of the outer company."""
+    counted = (
+        queryset.filter(company_id=OuterRef('pk'))
+        .order_by()
+        .values('company_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -60,195 +102,111 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         
         if not company_id:
             # No company available, return empty stats
-            context['stats'] = {
-                'total_items': 0,
-                'total_warehouses': 0,
-                'total_suppliers': 0,
-                'temp_receipts_pending': 0,
-                'temp_receipts_qc_pending': 0,
-                'permanent_receipts_today': 0,
-                'total_permanent_receipts': 0,
-                'permanent_issues_today': 0,
-                'consumption_issues_today': 0,
-                'total_permanent_issues': 0,
-                'pending_purchase_requests': 0,
-                'pending_warehouse_requests': 0,
-                'total_pending_requests': 0,
-                'deficit_records': 0,
-                'surplus_records': 0,
-                'total_stocktaking_records': 0,
-                'pending_purchase_approvals': 0,
-                'pending_warehouse_approvals': 0,
-                'pending_stocktaking_approvals': 0,
-                'total_pending_approvals': 0,
-                'recent_receipts': 0,
-                'recent_issues': 0,
-            }
+            context['stats'] = dict.fromkeys(DASHBOARD_STAT_KEYS, 0)
             return context
         
-        # Calculate statistics
-        stats = self._calculate_stats(company_id)
+        # Calculate statistics (cached briefly per company, invalidated on document saves)
+        stats = get_company_cached(
+            'dashboard-stats',
+            company_id,
+            lambda: self._calculate_stats(company_id),
+            timezone.now().date().isoformat(),
+        )
         context.update(stats)
         
         return context
     
     def _calculate_stats(self, company_id):
-        """Calculate dashboard statistics for the active company."""
+        """
+        Calculate dashboard statistics for the active company.
+
+        Uses one conditional-aggregation query per document table and one
+        query with scalar subqueries for the plain counters.
+        """
         today = timezone.now().date()
-        
-        # Inventory Master Data
-        total_items = inventory_models.Item.objects.filter(
-            company_id=company_id,
-            is_enabled=1
-        ).count()
-        
-        total_warehouses = inventory_models.Warehouse.objects.filter(
-            company_id=company_id,
-            is_enabled=1
-        ).count()
-        
-        total_suppliers = inventory_models.Supplier.objects.filter(
-            company_id=company_id,
-            is_enabled=1
-        ).count()
-        
-        # Receipts
-        temp_receipts_pending = inventory_models.ReceiptTemporary.objects.filter(
-            company_id=company_id,
-            status=inventory_models.ReceiptTemporary.Status.DRAFT,
-            is_enabled=1
-        ).count()
-        
-        temp_receipts_qc_pending = inventory_models.ReceiptTemporary.objects.filter(
-            company_id=company_id,
-            status=inventory_models.ReceiptTemporary.Status.AWAITING_INSPECTION,
-            is_enabled=1
-        ).count()
-        
-        permanent_receipts_today = inventory_models.ReceiptPermanent.objects.filter(
-            company_id=company_id,
-            document_date=today,
-            is_enabled=1
-        ).count()
-        
-        total_permanent_receipts = inventory_models.ReceiptPermanent.objects.filter(
-            company_id=company_id,
-            is_enabled=1
-        ).count()
-        
-        # Issues
-        permanent_issues_today = inventory_models.IssuePermanent.objects.filter(
-            company_id=company_id,
-            document_date=today,
-            is_enabled=1
-        ).count()
-        
-        consumption_issues_today = inventory_models.IssueConsumption.objects.filter(
-            company_id=company_id,
-            document_date=today,
-            is_enabled=1
-        ).count()
-        
-        total_permanent_issues = inventory_models.IssuePermanent.objects.filter(
-            company_id=company_id,
-            is_enabled=1
-        ).count()
-        
-        # Requests
-        pending_purchase_requests = inventory_models.PurchaseRequest.objects.filter(
-            company_id=company_id,
-            status=inventory_models.PurchaseRequest.Status.DRAFT,
-            is_enabled=1
-        ).count()
-        
-        pending_warehouse_requests = inventory_models.WarehouseRequest.objects.filter(
-            company_id=company_id,
-            request_status='draft',
-            is_enabled=1
-        ).count()
-        
-        # Stocktaking
-        deficit_records = inventory_models.StocktakingDeficit.objects.filter(
-            company_id=company_id,
-            is_locked=0,
-            is_enabled=1
-        ).count()
-        
-        surplus_records = inventory_models.StocktakingSurplus.objects.filter(
-            company_id=company_id,
-            is_locked=0,
-            is_enabled=1
-        ).count()
-        
-        # Pending Approvals
-        # Purchase requests awaiting approval (draft with approver assigned)
-        pending_purchase_approvals = inventory_models.PurchaseRequest.objects.filter(
-            company_id=company_id,
-            status=inventory_models.PurchaseRequest.Status.DRAFT,
-            approver__isnull=False,
-            is_enabled=1
-        ).count()
-        
-        # Warehouse requests awaiting approval (draft with approver assigned)
-        pending_warehouse_approvals = inventory_models.WarehouseRequest.objects.filter(
-            company_id=company_id,
-            request_status='draft',
-            approver__isnull=False,
-            is_enabled=1
-        ).count()
-        
-        # Stocktaking records awaiting approval (records module)
-        pending_stocktaking_approvals = inventory_models.StocktakingRecord.objects.filter(
-            company_id=company_id,
-            approval_status='pending',
-            approver__isnull=False,
-            is_locked=0,
-            is_enabled=1
-        ).count()
-        
-        total_pending_approvals = (
-            pending_purchase_approvals +
-            pending_warehouse_approvals +
-            pending_stocktaking_approvals
-        )
-        
-        # Recent activity (last 7 days)
         week_ago = today - timezone.timedelta(days=7)
-        recent_receipts = inventory_models.ReceiptPermanent.objects.filter(
-            company_id=company_id,
-            document_date__gte=week_ago,
-            is_enabled=1
-        ).count()
-        
-        recent_issues = inventory_models.IssuePermanent.objects.filter(
-            company_id=company_id,
-            document_date__gte=week_ago,
-            is_enabled=1
-        ).count()
-        
-        return {
-            'stats': {
-                'total_items': total_items,
-                'total_warehouses': total_warehouses,
-                'total_suppliers': total_suppliers,
-                'temp_receipts_pending': temp_receipts_pending,
-                'temp_receipts_qc_pending': temp_receipts_qc_pending,
-                'permanent_receipts_today': permanent_receipts_today,
-                'total_permanent_receipts': total_permanent_receipts,
-                'permanent_issues_today': permanent_issues_today,
-                'consumption_issues_today': consumption_issues_today,
-                'total_permanent_issues': total_permanent_issues,
-                'pending_purchase_requests': pending_purchase_requests,
-                'pending_warehouse_requests': pending_warehouse_requests,
-                'total_pending_requests': pending_purchase_requests + pending_warehouse_requests,
-                'deficit_records': deficit_records,
-                'surplus_records': surplus_records,
-                'total_stocktaking_records': deficit_records + surplus_records,
-                'pending_purchase_approvals': pending_purchase_approvals,
-                'pending_warehouse_approvals': pending_warehouse_approvals,
-                'pending_stocktaking_approvals': pending_stocktaking_approvals,
-                'total_pending_approvals': total_pending_approvals,
-                'recent_receipts': recent_receipts,
-                'recent_issues': recent_issues,
-            }
-        }
+        enabled = Q(is_enabled=1)
+
+        counters = shared_models.Company.objects.filter(pk=company_id).annotate(
+            total_items=_count_subquery(inventory_models.Item.objects.filter(is_enabled=1)),
+            total_warehouses=_count_subquery(inventory_models.Warehouse.objects.filter(is_enabled=1)),
+            total_suppliers=_count_subquery(inventory_models.Supplier.objects.filter(is_enabled=1)),
+            deficit_records=_count_subquery(
+                inventory_models.StocktakingDeficit.objects.filter(is_locked=0, is_enabled=1)
+            ),
+            surplus_records=_count_subquery(
+                inventory_models.StocktakingSurplus.objects.filter(is_locked=0, is_enabled=1)
+            ),
+            pending_stocktaking_approvals=_count_subquery(
+                inventory_models.StocktakingRecord.objects.filter(
+                    approval_status='pending',
+                    approver__isnull=False,
+                    is_locked=0,
+                    is_enabled=1,
+                )
+            ),
+            low_stock_items=_count_subquery(
+                inventory_models.LowStockAlert.objects.filter(status=inventory_models.LowStockAlert.STATUS_OPEN)
+            ),
+        ).values(
+            'total_items',
+            'total_warehouses',
+            'total_suppliers',
+            'deficit_records',
+            'surplus_records',
+            'pending_stocktaking_approvals',
+            'low_stock_items',
+        ).first() or {}
+
+        temp_receipts = inventory_models.ReceiptTemporary.objects.filter(company_id=company_id).aggregate(
+            temp_receipts_pending=Count(
+                'pk', filter=enabled & Q(status=inventory_models.ReceiptTemporary.Status.DRAFT)
+            ),
+            temp_receipts_qc_pending=Count(
+                'pk', filter=enabled & Q(status=inventory_models.ReceiptTemporary.Status.AWAITING_INSPECTION)
+            ),
+        )
+        permanent_receipts = inventory_models.ReceiptPermanent.objects.filter(company_id=company_id).aggregate(
+            permanent_receipts_today=Count('pk', filter=enabled & Q(document_date=today)),
+            total_permanent_receipts=Count('pk', filter=enabled),
+            recent_receipts=Count('pk', filter=enabled & Q(document_date__gte=week_ago)),
+        )
+        permanent_issues = inventory_models.IssuePermanent.objects.filter(company_id=company_id).aggregate(
+            permanent_issues_today=Count('pk', filter=enabled & Q(document_date=today)),
+            total_permanent_issues=Count('pk', filter=enabled),
+            recent_issues=Count('pk', filter=enabled & Q(document_date__gte=week_ago)),
+        )
+        consumption_issues = inventory_models.IssueConsumption.objects.filter(company_id=company_id).aggregate(
+            consumption_issues_today=Count('pk', filter=enabled & Q(document_date=today)),
+        )
+        purchase_draft = enabled & Q(status=inventory_models.PurchaseRequest.Status.DRAFT)
+        purchase_requests = inventory_models.PurchaseRequest.objects.filter(company_id=company_id).aggregate(
+            pending_purchase_requests=Count('pk', filter=purchase_draft),
+            pending_purchase_approvals=Count('pk', filter=purchase_draft & Q(approver__isnull=False)),
+        )
+        warehouse_draft = enabled & Q(request_status='draft')
+        warehouse_requests = inventory_models.WarehouseRequest.objects.filter(company_id=company_id).aggregate(
+            pending_warehouse_requests=Count('pk', filter=warehouse_draft),
+            pending_warehouse_approvals=Count('pk', filter=warehouse_draft & Q(approver__isnull=False)),
+        )
+
+        stats = dict.fromkeys(DASHBOARD_STAT_KEYS, 0)
+        for values in (
+            counters,
+            temp_receipts,
+            permanent_receipts,
+            permanent_issues,
+            consumption_issues,
+            purchase_requests,
+            warehouse_requests,
+        ):
+            stats.update({key: value or 0 for key, value in values.items()})
+
+        stats['total_pending_requests'] = stats['pending_purchase_requests'] + stats['pending_warehouse_requests']
+        stats['total_stocktaking_records'] = stats['deficit_records'] + stats['surplus_records']
+        stats['total_pending_approvals'] = (
+            stats['pending_purchase_approvals'] +
+            stats['pending_warehouse_approvals'] +
+            stats['pending_stocktaking_approvals']
+        )
+        return {'stats': stats}